@@ -0,0 +1,281 @@
+// afl_mutator.cpp
+// AFL++ custom mutator for FormatFuzzer
+//
+// Built into the format-specific shared library (say, 'gif.so'), this lets
+// AFL++ use FormatFuzzer's smart mutations through its custom mutator API:
+//
+//   AFL_CUSTOM_MUTATOR_LIBRARY=./gif.so afl-fuzz ...
+//
+// Queue entries are only parsed when they are first mutated, or a few at a
+// time between batches, so that large queues do not delay the fuzzer.
+// Inputs that are not queue entries are parsed into a single temporary
+// slot that is reused.  Mutants are produced in batches of FF_BATCH_SIZE
+// (default 16) per queue entry, into buffers that are reused across calls.
+// Decision files of parsed entries go to FF_MUTATOR_DIR (default: a
+// temporary directory); set FF_CHUNK_INDEX to also keep the parsed entries
+// across runs.
+
+#include <unordered_map>
+#include <stdlib.h>
+#include <cstdio>
+#include <cstring>
+#include <stdint.h>
+#include <unistd.h>
+#include <fcntl.h>
+#include <dirent.h>
+#include <sys/stat.h>
+#include <string>
+#include <string_view>
+#include <deque>
+#include <vector>
+#include <algorithm>
+
+#include "formatfuzzer.h"
+
+extern "C" int process_file(const char *file_name, const char *rand_name);
+extern "C" int process_temp_file(const char *file_name, const char *rand_name);
+extern "C" void forget_last_file();
+extern "C" int one_smart_mutation(int target_file_index, unsigned char** file, unsigned* file_size);
+extern "C" void generate_random_file(unsigned char** file, unsigned* file_size);
+
+#define DEFAULT_BATCH_SIZE 16
+// Queue entries parsed ahead of their first mutation per batch
+#define PENDING_PER_BATCH 1
+// Mutations tried per mutant before giving up on the queue entry
+#define MUTATION_ATTEMPTS 8
+
+struct ff_mutator {
+	unsigned batch_size;
+	std::string work_dir;
+	bool remove_work_dir;
+	// Queue entries that have not been parsed yet, and their paths by the
+	// hash of their contents
+	std::deque<std::string> pending;
+	std::unordered_map<size_t, std::string> queued;
+	// The queue entry AFL++ is fuzzing, see afl_custom_queue_get()
+	std::string current;
+	// File indices of parsed queue entries by the hash of their contents.
+	// Entries are told apart by hash only: a collision would at worst
+	// mutate another entry.
+	std::unordered_map<size_t, int> files;
+	// The file index and hash of the last input that was not a queue
+	// entry, or -1.  It is always the last file index.
+	int temp_index;
+	size_t temp_hash;
+	// The current batch of mutants and the contents it was made from
+	std::vector<std::vector<unsigned char>> batch;
+	unsigned batch_count;
+	unsigned batch_pos;
+	std::string batch_source;
+	std::string buffer;
+};
+
+static size_t content_hash(const void* buf, size_t size) {
+	return std::hash<std::string_view>()(std::string_view((const char*) buf, size));
+}
+
+static bool read_contents(const char* file_name, std::string& contents) {
+	int fd = open(file_name, O_RDONLY);
+	if (fd == -1)
+		return false;
+	struct stat st;
+	bool success = fstat(fd, &st) == 0;
+	if (success) {
+		contents.resize(st.st_size);
+		success = read(fd, &contents[0], st.st_size) == st.st_size;
+	}
+	close(fd);
+	return success;
+}
+
+static void forget_temp_file(ff_mutator* m) {
+	if (m->temp_index != -1)
+		forget_last_file();
+	m->temp_index = -1;
+}
+
+// Parse the queue entry file_name with the given contents; returns its
+// file index
+static int add_file(ff_mutator* m, const char* file_name, const std::string& contents) {
+	size_t hash = content_hash(contents.data(), contents.size());
+	auto it = m->files.find(hash);
+	if (it != m->files.end())
+		return it->second;
+	// Keep the temporary file last
+	forget_temp_file(m);
+	int index = rand_names.size();
+	std::string rand_name = m->work_dir + "/" + std::to_string(index) + "-decisions";
+	process_file(file_name, rand_name.c_str());
+	m->files[hash] = index;
+	m->queued.erase(hash);
+	return index;
+}
+
+static void add_pending(ff_mutator* m, unsigned count) {
+	while (count-- && !m->pending.empty()) {
+		if (read_contents(m->pending.front().c_str(), m->buffer))
+			add_file(m, m->pending.front().c_str(), m->buffer);
+		m->pending.pop_front();
+	}
+}
+
+// Parse buf into the temporary file index
+static int add_temp_file(ff_mutator* m, const unsigned char* buf, size_t buf_size, size_t hash) {
+	forget_temp_file(m);
+	std::string file_name = m->work_dir + "/input";
+	int fd = open(file_name.c_str(), O_CREAT | O_WRONLY | O_TRUNC, S_IRUSR | S_IWUSR);
+	if (fd == -1) {
+		perror(file_name.c_str());
+		return -1;
+	}
+	bool written = write(fd, buf, buf_size) == (ssize_t) buf_size;
+	close(fd);
+	if (!written)
+		return -1;
+	m->temp_index = rand_names.size();
+	process_temp_file(file_name.c_str(), (file_name + "-decisions").c_str());
+	m->temp_hash = hash;
+	return m->temp_index;
+}
+
+// Return the file index of contents, parsing them if needed
+static int find_file(ff_mutator* m, const unsigned char* buf, size_t buf_size) {
+	size_t hash = content_hash(buf, buf_size);
+	auto it = m->files.find(hash);
+	if (it != m->files.end())
+		return it->second;
+	if (m->temp_index != -1 && m->temp_hash == hash)
+		return m->temp_index;
+	// Most likely a queue entry that has not been parsed yet
+	auto queued = m->queued.find(hash);
+	if (queued != m->queued.end()) {
+		std::string file_name = queued->second;
+		if (read_contents(file_name.c_str(), m->buffer) && content_hash(m->buffer.data(), m->buffer.size()) == hash)
+			return add_file(m, file_name.c_str(), m->buffer);
+	}
+	if (!m->current.empty() && read_contents(m->current.c_str(), m->buffer)
+		&& m->buffer == std::string_view((const char*) buf, buf_size))
+		return add_file(m, m->current.c_str(), m->buffer);
+	return add_temp_file(m, buf, buf_size, hash);
+}
+
+static void store_mutant(ff_mutator* m, const unsigned char* file, size_t size) {
+	if (m->batch.size() <= m->batch_count)
+		m->batch.resize(m->batch_count + 1);
+	m->batch[m->batch_count++].assign(file, file + size);
+}
+
+// Fill the batch of m with up to count mutants of buf
+static void fill_batch(ff_mutator* m, const unsigned char* buf, size_t buf_size, unsigned count) {
+	m->batch_count = 0;
+	m->batch_pos = 0;
+	m->batch_source.assign((const char*) buf, buf_size);
+	add_pending(m, PENDING_PER_BATCH);
+	int index = find_file(m, buf, buf_size);
+	unsigned failures = 0;
+	while (index != -1 && m->batch_count < count && failures < MUTATION_ATTEMPTS) {
+		unsigned char* file = NULL;
+		unsigned size = 0;
+		if (one_smart_mutation(index, &file, &size) == -2 || !file || !size) {
+			++failures;
+			continue;
+		}
+		store_mutant(m, file, size);
+	}
+	// Without any chunks to mutate, fall back to generating a new file
+	if (m->batch_count == 0) {
+		unsigned char* file = NULL;
+		unsigned size = 0;
+		generate_random_file(&file, &size);
+		if (file && size)
+			store_mutant(m, file, size);
+	}
+}
+
+// Produce up to count mutants of buf.  They stay valid until the next call
+// with the same mutator; returns the number of mutants.
+extern "C" unsigned ff_mutate_batch(void* data, const unsigned char* buf, size_t buf_size, unsigned count, unsigned char** mutants, size_t* sizes) {
+	ff_mutator* m = (ff_mutator*) data;
+	fill_batch(m, buf, buf_size, count);
+	for (unsigned i = 0; i < m->batch_count; ++i) {
+		mutants[i] = m->batch[i].data();
+		sizes[i] = m->batch[i].size();
+	}
+	m->batch_pos = m->batch_count;
+	return m->batch_count;
+}
+
+extern "C" void* afl_custom_init(void* afl, unsigned int seed) {
+	ff_mutator* m = new ff_mutator();
+	srand(seed);
+	const char* batch_size = getenv("FF_BATCH_SIZE");
+	m->batch_size = batch_size ? atoi(batch_size) : DEFAULT_BATCH_SIZE;
+	if (m->batch_size == 0)
+		m->batch_size = 1;
+	m->temp_index = -1;
+	const char* work_dir = getenv("FF_MUTATOR_DIR");
+	if (work_dir) {
+		m->work_dir = work_dir;
+		mkdir(work_dir, S_IRWXU);
+	} else {
+		char dir_template[] = "/tmp/ff-mutator-XXXXXX";
+		if (!mkdtemp(dir_template)) {
+			perror("Failed to create mutator directory");
+			delete m;
+			return NULL;
+		}
+		m->work_dir = dir_template;
+		m->remove_work_dir = true;
+	}
+	return m;
+}
+
+// AFL++ calls afl_custom_fuzz() this many times for each queue entry
+extern "C" unsigned int afl_custom_fuzz_count(void* data, const unsigned char* buf, size_t buf_size) {
+	return ((ff_mutator*) data)->batch_size;
+}
+
+extern "C" size_t afl_custom_fuzz(void* data, unsigned char* buf, size_t buf_size, unsigned char** out_buf, unsigned char* add_buf, size_t add_buf_size, size_t max_size) {
+	ff_mutator* m = (ff_mutator*) data;
+	if (m->batch_pos == m->batch_count || m->batch_source != std::string_view((const char*) buf, buf_size)) {
+		fill_batch(m, buf, buf_size, m->batch_size);
+		if (m->batch_count == 0) {
+			*out_buf = buf;
+			return buf_size;
+		}
+	}
+	std::vector<unsigned char>& mutant = m->batch[m->batch_pos++];
+	*out_buf = mutant.data();
+	return std::min(mutant.size(), max_size);
+}
+
+extern "C" unsigned char afl_custom_queue_new_entry(void* data, const unsigned char* filename_new_queue, const unsigned char* filename_orig_queue) {
+	ff_mutator* m = (ff_mutator*) data;
+	const char* file_name = (const char*) filename_new_queue;
+	m->pending.push_back(file_name);
+	if (read_contents(file_name, m->buffer))
+		m->queued[content_hash(m->buffer.data(), m->buffer.size())] = file_name;
+	return 0;
+}
+
+// AFL++ calls this before fuzzing the queue entry filename
+extern "C" unsigned char afl_custom_queue_get(void* data, const unsigned char* filename) {
+	((ff_mutator*) data)->current = (const char*) filename;
+	return 1;
+}
+
+extern "C" void afl_custom_deinit(void* data) {
+	ff_mutator* m = (ff_mutator*) data;
+	if (m->remove_work_dir) {
+		DIR* dir = opendir(m->work_dir.c_str());
+		if (dir) {
+			while (struct dirent* entry = readdir(dir)) {
+				if (strcmp(entry->d_name, ".") && strcmp(entry->d_name, ".."))
+					unlink((m->work_dir + "/" + entry->d_name).c_str());
+			}
+			closedir(dir);
+		}
+		rmdir(m->work_dir.c_str());
+	}
+	delete m;
+}
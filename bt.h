@@ -7,10 +7,9 @@
 #include <cstring>
 #include <vector>
 #include <unordered_set>
+#include <chrono>
 #include <stdarg.h>
 
-#include <boost/crc.hpp>
-
 #include <unistd.h>
 #include <sys/types.h>
 #include <sys/stat.h>
@@ -131,22 +130,35 @@ const int TRUE = 1;
 const int False = 0;
 const int FALSE = 0;
 
-#define GENERATE_VAR(name, value) do { \
-	start_generation(#name);       \
+#define GENERATE_VAR(name, site, value) do { \
+	start_generation(#name, site); \
 	name ## _var = (value);        \
 	name ## _exists = true;        \
 	end_generation();              \
 	} while (0)
 
-#define GENERATE(name, value) do {     \
-	start_generation(#name);       \
+#define GENERATE(name, site, value) do { \
+	start_generation(#name, site); \
 	(value);                       \
 	end_generation();              \
 	} while (0)
 
-#define GENERATE_EXISTS(name, value)   \
+#define GENERATE_EXISTS(name, site, value) \
 	name ## _exists = true
 
+// A constant list of known values, built and indexed once per call site
+#define KNOWN_VALUES(type, ...)                                          \
+	([]() -> const value_set<type>& {                                  \
+		static const value_set<type> values(__VA_ARGS__, true);    \
+		return values;                                             \
+	}())
+
+#define KNOWN_VALUES_MAP(type, ...)                                      \
+	([]() -> const known_values_map<type>& {                           \
+		static const known_values_map<type> values(__VA_ARGS__);   \
+		return values;                                             \
+	}())
+
 
 unsigned long long STR2INT(std::string s) {
 	assert(s.size() <= 8);
@@ -169,21 +181,104 @@ constexpr unsigned long long STR2INT(const char * s) {
 	return result;
 }
 
-extern unsigned char *rand_buffer;
-file_accessor file_acc;
+extern thread_local unsigned char *rand_buffer;
+thread_local file_accessor file_acc;
 
-extern bool is_big_endian;
-extern bool is_padded_bitfield;
+extern thread_local bool is_big_endian;
+extern thread_local bool is_padded_bitfield;
 void generate_file();
 
-bool aflsmart_output = false;
+thread_local bool aflsmart_output = false;
 
 double get_validity() {
 	return (double)file_acc.parsed_file_size / (double)file_acc.final_file_size;
 }
 
 
-void start_generation(const char* name) {
+// Profiling (see ff_profile_write())
+thread_local bool profiling = false;
+
+struct profile_entry {
+	unsigned long long calls = 0;
+	unsigned long long decision_bytes = 0;
+	unsigned long long file_bytes = 0;
+	unsigned long long total_ns = 0;
+	unsigned long long self_ns = 0;
+	// Number of active invocations, so that recursion is counted once
+	unsigned depth = 0;
+};
+
+struct profile_frame {
+	int site;
+	unsigned rand_start;
+	unsigned file_start;
+	unsigned long long start_ns;
+	unsigned long long children_ns;
+	size_t path_size;
+};
+
+// Entries per declaration site (see variable_sites)
+thread_local std::vector<profile_entry> profile_entries;
+// Self time per collapsed stack of site ids "outer;...;inner"
+thread_local std::unordered_map<std::string, unsigned long long> profile_stacks;
+thread_local std::vector<profile_frame> profile_stack;
+thread_local std::string profile_path;
+thread_local unsigned long long profile_last_ns;
+
+static unsigned long long profile_now() {
+	profile_last_ns = std::chrono::duration_cast<std::chrono::nanoseconds>(
+		std::chrono::steady_clock::now().time_since_epoch()).count();
+	return profile_last_ns;
+}
+
+void profile_start(int site) {
+	if (profile_entries.empty())
+		profile_entries.resize(variable_sites.size());
+	++profile_entries[site].depth;
+	size_t path_size = profile_path.size();
+	if (path_size)
+		profile_path += ';';
+	profile_path += std::to_string(site);
+	profile_stack.push_back({site, file_acc.rand_pos, file_acc.file_pos, profile_now(), 0, path_size});
+}
+
+void profile_end(unsigned long long now) {
+	profile_frame& frame = profile_stack.back();
+	profile_entry& entry = profile_entries[frame.site];
+	unsigned long long elapsed = now - frame.start_ns;
+	++entry.calls;
+	entry.self_ns += elapsed - frame.children_ns;
+	if (--entry.depth == 0) {
+		entry.total_ns += elapsed;
+		if (file_acc.rand_pos > frame.rand_start)
+			entry.decision_bytes += file_acc.rand_pos - frame.rand_start;
+		if (file_acc.file_pos > frame.file_start)
+			entry.file_bytes += file_acc.file_pos - frame.file_start;
+	}
+	profile_stacks[profile_path] += elapsed - frame.children_ns;
+	profile_path.resize(frame.path_size);
+	profile_stack.pop_back();
+	if (!profile_stack.empty())
+		profile_stack.back().children_ns += elapsed;
+}
+
+// Close the frames left open by a generation that was aborted, as of the
+// last profiling event
+void profile_unwind() {
+	while (!profile_stack.empty())
+		profile_end(profile_last_ns);
+}
+
+// Decision position from which on start_generation() takes checkpoints of
+// the generator (see take_checkpoint() in fuzzer.cpp)
+thread_local unsigned checkpoint_pos = UINT_MAX;
+void take_checkpoint();
+
+void start_generation(const char* name, int site) {
+	if (file_acc.rand_pos >= checkpoint_pos)
+		take_checkpoint();
+	if (profiling)
+		profile_start(site);
 	if (!get_parse_tree)
 		return;
 	generator_stack.emplace_back(name, file_acc.rand_prev, file_acc.rand_pos);
@@ -192,6 +287,8 @@ void start_generation(const char* name) {
 }
 
 void end_generation() {
+	if (profiling)
+		profile_end(profile_now());
 	if (!get_parse_tree)
 		return;
 	stack_cell& back = generator_stack.back();
@@ -317,7 +414,9 @@ void end_generation() {
 
 	file_acc.rand_last = UINT_MAX;
 
-	++prev.counts[back.name];
+	// counts only number repeated chunks in the debug output
+	if (debug_print)
+		++prev.counts[back.name];
 	generator_stack.pop_back();
 }
 
@@ -342,6 +441,7 @@ void set_generator() {
 bool setup_input(const char* filename) {
 	bool success = true;
 	debug_print = true;
+	profile_unwind();
 	int file_fd;
 	if (strcmp(filename, "-") == 0)
 		file_fd = STDIN_FILENO;
@@ -353,6 +453,8 @@ bool setup_input(const char* filename) {
 		exit(1);
 	}
     
+	file_acc.commit_buffers();
+	commit_buffer(rand_buffer, MAX_RAND_SIZE);
     if (file_fd == STDIN_FILENO) {
         // Read from stdin, up to MAX_RAND_SIZE
         unsigned char *p = rand_buffer;
@@ -389,14 +491,19 @@ bool setup_input(const char* filename) {
 		}
 		ssize_t file_size = st.st_size;
 		if (file_size > MAX_FILE_SIZE) {
-			fprintf(stderr, "File size exceeds MAX_FILE_SIZE\n");
+			fprintf(stderr, "File size exceeds maximum size %u (see --max-size)\n", MAX_FILE_SIZE);
 			file_size = MAX_FILE_SIZE;
 			success = false;
 		}
-		ssize_t size = read(file_fd, file_acc.file_buffer, file_size);
-		if (size != file_size) {
-			perror("Failed to read input file");
-			exit(1);
+		// Regular files are mapped rather than copied into the file buffer
+		if (!S_ISREG(st.st_mode) || !file_acc.map_file(file_fd, file_size)) {
+			file_acc.unmap_file();
+			ssize_t size = read(file_fd, file_acc.file_buffer, file_size);
+			if (size != file_size) {
+				perror("Failed to read input file");
+				exit(1);
+			}
+			file_acc.load_file(file_acc.file_buffer, file_size);
 		}
 		file_acc.seed(rand_buffer, MAX_RAND_SIZE, file_size);
 	}
@@ -439,6 +546,7 @@ unsigned copy_rand(unsigned char *dest) {
 void delete_globals();
 
 extern "C" size_t ff_generate(unsigned char* data, size_t size, unsigned char** new_data) {
+	profile_unwind();
 	file_acc.seed(data, size, 0);
 	try {
 		generate_file();
@@ -461,13 +569,13 @@ extern "C" int ff_parse(unsigned char* data, size_t size, unsigned char** new_da
 	file_acc.generate = false;
 
 	if (size > MAX_FILE_SIZE) {
-		fprintf(stderr, "File size larger than MAX_FILE_SIZE\n");
+		fprintf(stderr, "File size larger than maximum size %u (see ff_set_max_size())\n", MAX_FILE_SIZE);
 		size = MAX_FILE_SIZE;
 	}
-	if (data != file_acc.file_buffer) {
-		memcpy(file_acc.file_buffer, data, size);
-	}
-	memset(file_acc.file_buffer + size, 0, MAX_FILE_SIZE - size);
+	file_acc.commit_buffers();
+	commit_buffer(rand_buffer, MAX_RAND_SIZE);
+	file_acc.load_file(data, size);
+	profile_unwind();
 	file_acc.seed(rand_buffer, MAX_RAND_SIZE, size);
 	bool success = true;
 	try {
@@ -486,6 +594,254 @@ extern "C" int ff_parse(unsigned char* data, size_t size, unsigned char** new_da
 	return success;
 }
 
+// Set the maximum size of generated and parsed files to file_size bytes,
+// allowing twice as many decision bytes.  Buffers grow when they are next
+// used; buffers that callers allocated themselves must be large enough.
+extern "C" int ff_set_max_size(size_t file_size) {
+	if (file_size == 0 || file_size > FILE_RESERVE_SIZE || 2 * file_size > RAND_RESERVE_SIZE)
+		return 0;
+	ff_max_file_size = file_size;
+	ff_max_rand_size = 2 * file_size;
+	return 1;
+}
+
+// Report the number of struct copies and bytes allocated by this thread's
+// last generation or parsing run
+extern "C" void ff_arena_stats(size_t* bytes, size_t* instances) {
+	*bytes = struct_arena.bytes;
+	*instances = struct_arena.instances;
+}
+
+static std::string profile_label(int site) {
+	return std::string(variable_sites[site].first) + " (" + variable_sites[site].second + ")";
+}
+
+// Write the profile of this thread's generation and parsing runs since
+// profiling was turned on: the calls, decision bytes, file bytes and time
+// per generated variable to prefix.flat, and the time per stack of
+// variables in microseconds to prefix.collapsed, for flamegraph tools.
+// Returns whether both files were written.
+extern "C" int ff_profile_write(const char* prefix) {
+	profile_unwind();
+	std::vector<std::pair<std::string, const profile_entry*>> entries;
+	for (size_t site = 0; site < profile_entries.size(); ++site) {
+		if (profile_entries[site].calls)
+			entries.emplace_back(profile_label(site), &profile_entries[site]);
+	}
+	std::sort(entries.begin(), entries.end(), [](const auto& a, const auto& b) {
+		if (a.second->self_ns != b.second->self_ns)
+			return a.second->self_ns > b.second->self_ns;
+		return a.first < b.first;
+	});
+
+	std::string flat_name = std::string(prefix) + ".flat";
+	FILE* flat = fopen(flat_name.c_str(), "w");
+	if (!flat) {
+		perror(flat_name.c_str());
+		return false;
+	}
+	fprintf(flat, "%10s %12s %12s %12s %12s  %s\n", "calls", "decisions", "file bytes", "total (s)", "self (s)", "variable");
+	for (auto& e : entries) {
+		const profile_entry& entry = *e.second;
+		fprintf(flat, "%10llu %12llu %12llu %12.6f %12.6f  %s\n", entry.calls, entry.decision_bytes, entry.file_bytes, entry.total_ns / 1e9, entry.self_ns / 1e9, e.first.c_str());
+	}
+	fclose(flat);
+
+	std::vector<std::pair<std::string, unsigned long long>> stacks;
+	for (auto& e : profile_stacks) {
+		std::string path;
+		size_t start = 0;
+		while (start <= e.first.size()) {
+			size_t end = e.first.find(';', start);
+			if (end == std::string::npos)
+				end = e.first.size();
+			if (start)
+				path += ';';
+			path += profile_label(std::stoi(e.first.substr(start, end - start)));
+			start = end + 1;
+		}
+		stacks.emplace_back(path, e.second);
+	}
+	std::sort(stacks.begin(), stacks.end());
+
+	std::string collapsed_name = std::string(prefix) + ".collapsed";
+	FILE* collapsed = fopen(collapsed_name.c_str(), "w");
+	if (!collapsed) {
+		perror(collapsed_name.c_str());
+		return false;
+	}
+	for (auto& e : stacks) {
+		unsigned long long micros = (e.second + 500) / 1000;
+		if (micros)
+			fprintf(collapsed, "%s %llu\n", e.first.c_str(), micros);
+	}
+	fclose(collapsed);
+	return true;
+}
+
+static bool write_all(int fd, const void* data, size_t size) {
+	while (size) {
+		ssize_t r = write(fd, data, size);
+		if (r <= 0)
+			return false;
+		data = (const char*) data + r;
+		size -= r;
+	}
+	return true;
+}
+
+static bool read_all(int fd, void* data, size_t size) {
+	while (size) {
+		ssize_t r = read(fd, data, size);
+		if (r <= 0)
+			return false;
+		data = (char*) data + r;
+		size -= r;
+	}
+	return true;
+}
+
+// Send the profile of this thread to fd, so that the process that forked
+// this one can add it to its own with ff_profile_receive().  Returns
+// whether the profile was sent.
+extern "C" int ff_profile_send(int fd) {
+	profile_unwind();
+	std::string data;
+	uint64_t count = profile_entries.size();
+	data.append((const char*) &count, sizeof(count));
+	for (const profile_entry& entry : profile_entries) {
+		uint64_t values[] = { entry.calls, entry.decision_bytes, entry.file_bytes, entry.total_ns, entry.self_ns };
+		data.append((const char*) values, sizeof(values));
+	}
+	count = profile_stacks.size();
+	data.append((const char*) &count, sizeof(count));
+	for (auto& e : profile_stacks) {
+		uint64_t values[] = { e.first.size(), e.second };
+		data.append((const char*) values, sizeof(values));
+		data.append(e.first);
+	}
+	return write_all(fd, data.data(), data.size());
+}
+
+// Add a profile sent by ff_profile_send() from fd to the profile of this
+// thread.  Returns whether a complete profile was received.
+extern "C" int ff_profile_receive(int fd) {
+	uint64_t count;
+	if (!read_all(fd, &count, sizeof(count)))
+		return false;
+	if (count && profile_entries.empty())
+		profile_entries.resize(variable_sites.size());
+	if (count && count != profile_entries.size())
+		return false;
+	for (profile_entry& entry : profile_entries) {
+		if (!count)
+			break;
+		uint64_t values[5];
+		if (!read_all(fd, values, sizeof(values)))
+			return false;
+		entry.calls += values[0];
+		entry.decision_bytes += values[1];
+		entry.file_bytes += values[2];
+		entry.total_ns += values[3];
+		entry.self_ns += values[4];
+	}
+	if (!read_all(fd, &count, sizeof(count)))
+		return false;
+	for (uint64_t i = 0; i < count; ++i) {
+		uint64_t values[2];
+		if (!read_all(fd, values, sizeof(values)))
+			return false;
+		std::string path(values[0], '\0');
+		if (!read_all(fd, &path[0], path.size()))
+			return false;
+		profile_stacks[path] += values[1];
+	}
+	return true;
+}
+
+// A generation context owns the buffers that ff_generate_ctx() and
+// ff_parse_ctx() return their results in.  The remaining generator state
+// is thread-local, so each context must only be used by one thread at a
+// time, but separate contexts can be driven concurrently from different
+// threads of the same process.
+struct ff_context {
+	unsigned char* file_buffer;
+	unsigned char* rand_buffer;
+};
+
+class context_binding {
+	unsigned char* file_buffer;
+	unsigned char* rand_buffer;
+public:
+	// The last run wrote to the buffer being swapped out
+	context_binding(ff_context* ctx) : file_buffer(file_acc.file_buffer), rand_buffer(::rand_buffer) {
+		use_buffer(file_acc.file_buffer, file_acc.file_size);
+		++file_acc.buffer_generation;
+		file_acc.file_buffer = ctx->file_buffer;
+		::rand_buffer = ctx->rand_buffer;
+	}
+	~context_binding() {
+		use_buffer(file_acc.file_buffer, file_acc.file_size);
+		++file_acc.buffer_generation;
+		file_acc.file_buffer = file_buffer;
+		::rand_buffer = rand_buffer;
+	}
+};
+
+extern "C" ff_context* ff_context_new() {
+	ff_context* ctx = new ff_context;
+	ctx->file_buffer = new_buffer(FILE_RESERVE_SIZE, MAX_FILE_SIZE);
+	ctx->rand_buffer = new_buffer(RAND_RESERVE_SIZE, MAX_RAND_SIZE);
+	return ctx;
+}
+
+extern "C" void ff_context_free(ff_context* ctx) {
+	if (!ctx)
+		return;
+	delete_buffer(ctx->file_buffer);
+	delete_buffer(ctx->rand_buffer);
+	delete ctx;
+}
+
+extern "C" size_t ff_generate_ctx(ff_context* ctx, unsigned char* data, size_t size, unsigned char** new_data) {
+	context_binding binding(ctx);
+	return ff_generate(data, size, new_data);
+}
+
+extern "C" int ff_parse_ctx(ff_context* ctx, unsigned char* data, size_t size, unsigned char** new_data, size_t* new_size) {
+	context_binding binding(ctx);
+	return ff_parse(data, size, new_data, new_size);
+}
+
+// Generate up to count files from the size decision bytes in data, each
+// file using the decisions that the previous one left over.  The files are
+// stored one after the other in out, and their sizes in sizes (0 for a
+// failed attempt).  Stops early when out is full or the remaining decisions
+// run out; *used is set to the number of decision bytes consumed.  Returns
+// the number of attempts made.
+extern "C" size_t ff_generate_batch(ff_context* ctx, unsigned char* data, size_t size, size_t* used, size_t count, unsigned char* out, size_t out_size, size_t* sizes) {
+	size_t pos = 0;
+	size_t out_pos = 0;
+	size_t n = 0;
+	for (; n < count; ++n) {
+		size_t available = std::min(size - pos, (size_t) MAX_RAND_SIZE);
+		unsigned char* file = NULL;
+		size_t file_size = ctx ? ff_generate_ctx(ctx, data + pos, available, &file) : ff_generate(data + pos, available, &file);
+		// Without a full set of decisions, a failure may just mean that
+		// they ran out
+		if (!file && available < MAX_RAND_SIZE)
+			break;
+		if (file_size > out_size - out_pos)
+			break;
+		memcpy(out + out_pos, file, file_size);
+		out_pos += file_size;
+		sizes[n] = file ? file_size : 0;
+		pos += file_acc.rand_pos;
+	}
+	*used = pos;
+	return n;
+}
+
 void exit_template(int status) {
 	if (debug_print || print_errors)
 		fprintf(stderr, "Template exited with code %d\n", status);
@@ -500,9 +856,9 @@ void exit_template(std::string message) {
 
 #ifdef USE_OPENSSL
 
-RSA *rsa = NULL;
-EC_KEY *eckey = NULL;
-RSA *ca_rsa = NULL;
+thread_local RSA *rsa = NULL;
+thread_local EC_KEY *eckey = NULL;
+thread_local RSA *ca_rsa = NULL;
 
 bool RSA_key_generate(std::string& modulus, std::string& public_exponent) {
 	int ret = 0, req = 0;
@@ -700,7 +1056,7 @@ int Abs(int value) {
 	return abs(value);
 }
 
-bool change_array_length = false;
+thread_local bool change_array_length = false;
 
 void check_array_length(unsigned& size) {
 	if (change_array_length && size > MAX_FILE_SIZE/16 && file_acc.generate) {
@@ -720,7 +1076,7 @@ void EndChangeArrayLength() {
 	change_array_length = false;
 }
 
-bool global_indexing_of_arrays = false;
+thread_local bool global_indexing_of_arrays = false;
 
 void GlobalIndexingOfArrays() {
 	global_indexing_of_arrays = true;
@@ -763,29 +1119,139 @@ int SetEvilBit(int allow) {
 	return file_acc.set_evil_bit(allow);
 }
 
-uint32 Checksum(int checksum_type, int64 start, int64 size) {
-	assert_cond(start >= 0 && size >= 0 && start + size <= file_acc.file_size, "checksum range invalid");
+// Table-driven CRC of up to 32 bits
+class crc_table {
+	unsigned table[256];
+	unsigned width;
+	bool reflected;
+public:
+	crc_table(unsigned width, unsigned poly, bool reflected) : width(width), reflected(reflected) {
+		for (unsigned i = 0; i < 256; ++i) {
+			unsigned c;
+			if (reflected) {
+				unsigned rpoly = 0;
+				for (unsigned bit = 0; bit < width; ++bit)
+					if (poly & (1u << bit))
+						rpoly |= 1u << (width - 1 - bit);
+				c = i;
+				for (int k = 0; k < 8; ++k)
+					c = (c & 1) ? (c >> 1) ^ rpoly : c >> 1;
+			} else {
+				unsigned top = 1u << (width - 1);
+				c = i << (width - 8);
+				for (int k = 0; k < 8; ++k)
+					c = (c & top) ? (c << 1) ^ poly : c << 1;
+				c &= width == 32 ? ~0u : (1u << width) - 1;
+			}
+			table[i] = c;
+		}
+	}
+
+	unsigned process(unsigned crc, const unsigned char* p, size_t size) const {
+		if (reflected) {
+			for (size_t i = 0; i < size; ++i)
+				crc = table[(crc ^ p[i]) & 0xFF] ^ (crc >> 8);
+		} else {
+			unsigned mask = width == 32 ? ~0u : (1u << width) - 1;
+			for (size_t i = 0; i < size; ++i)
+				crc = ((crc << 8) ^ table[((crc >> (width - 8)) ^ p[i]) & 0xFF]) & mask;
+		}
+		return crc;
+	}
+};
+
+// Sum of the width-byte values in [p, p+size); a partial value at the
+// end is padded with zeros
+uint64 checksum_sum(const unsigned char* p, size_t size, unsigned width, bool big_endian) {
+	uint64 sum = 0;
+	if (width == 1) {
+		for (size_t i = 0; i < size; ++i)
+			sum += p[i];
+		return sum;
+	}
+	for (size_t i = 0; i < size; i += width) {
+		uint64 value = 0;
+		for (unsigned j = 0; j < width; ++j) {
+			uint64 b = i + j < size ? p[i + j] : 0;
+			value |= b << 8 * (big_endian ? width - 1 - j : j);
+		}
+		sum += value;
+	}
+	return sum;
+}
+
+int64 compute_checksum(int checksum_type, const unsigned char* p, size_t size) {
 	switch(checksum_type) {
+	case CHECKSUM_BYTE:
+	case CHECKSUM_SUM64:
+		return checksum_sum(p, size, 1, false);
+	case CHECKSUM_SHORT_LE:
+		return checksum_sum(p, size, 2, false);
+	case CHECKSUM_SHORT_BE:
+		return checksum_sum(p, size, 2, true);
+	case CHECKSUM_INT_LE:
+		return checksum_sum(p, size, 4, false);
+	case CHECKSUM_INT_BE:
+		return checksum_sum(p, size, 4, true);
+	case CHECKSUM_INT64_LE:
+		return checksum_sum(p, size, 8, false);
+	case CHECKSUM_INT64_BE:
+		return checksum_sum(p, size, 8, true);
+	case CHECKSUM_SUM8:
+		return (uchar) checksum_sum(p, size, 1, false);
+	case CHECKSUM_SUM16:
+		return (uint16) checksum_sum(p, size, 1, false);
+	case CHECKSUM_SUM32:
+		return (uint32) checksum_sum(p, size, 1, false);
 	case CHECKSUM_CRC8: {
-		boost::crc_optimal<8, 0x07, 0x00, 0, false, false> res;
-		res.process_bytes(file_acc.file_buffer + start, size);
-		return res.checksum();
+		static const crc_table crc8(8, 0x07, false);
+		return crc8.process(0, p, size);
 	}
 	case CHECKSUM_CRC16: {
-		boost::crc_16_type res;
-		res.process_bytes(file_acc.file_buffer + start, size);
-		return res.checksum();
+		static const crc_table crc16(16, 0x8005, true);
+		return crc16.process(0, p, size);
 	}
-	case CHECKSUM_CRC32: {
-		boost::crc_32_type res;
-		res.process_bytes(file_acc.file_buffer + start, size);
-		return res.checksum();
+	case CHECKSUM_CRCCCITT: {
+		static const crc_table crcccitt(16, 0x1021, false);
+		return crcccitt.process(0xFFFF, p, size);
 	}
+	case CHECKSUM_CRC32:
+		return crc32(0, p, size);
+	case CHECKSUM_ADLER32:
+		return adler32(1, p, size);
 	default:
 		abort();
 	}
 }
 
+// Recent checksums, valid as long as the file buffer has not changed below
+// the end of their range.  Templates often check the same range twice,
+// e.g. in the local and the central headers of ZIP files.
+struct checksum_cache_entry {
+	int checksum_type = -1;
+	int64 start = 0;
+	int64 size = 0;
+	unsigned generation = 0;
+	int64 value = 0;
+};
+
+thread_local checksum_cache_entry checksum_cache[64];
+
+int64 Checksum(int checksum_type, int64 start = 0, int64 size = 0) {
+	if (start == 0 && size == 0)
+		size = file_acc.file_size;
+	assert_cond(start >= 0 && size >= 0 && start + size <= file_acc.file_size, "checksum range invalid");
+	checksum_cache_entry& entry = checksum_cache[(checksum_type * 31 + start * 7 + size) & 63];
+	if (entry.checksum_type == checksum_type && entry.start == start && entry.size == size && entry.generation == file_acc.buffer_generation)
+		return entry.value;
+	entry.value = compute_checksum(checksum_type, file_acc.file_buffer + start, size);
+	entry.checksum_type = checksum_type;
+	entry.start = start;
+	entry.size = size;
+	entry.generation = file_acc.buffer_generation;
+	return entry.value;
+}
+
 #ifdef USE_OPENSSL
 int ChecksumAlgStr(int algorithm, std::string& result, int64 start = 0, int64 size = 0, std::string ignore = "", int64 crcPolynomial = -1, int64 crcInitValue = -1) {
 	// Other configurations not yet handled
@@ -937,9 +1403,7 @@ int Random( int maximum ) {
 int64 FileSize() {
 	if (!file_acc.has_size) {
 		file_acc.lookahead = true;
-		if (!file_acc.generate)
-			file_acc.parse = [](unsigned char* file_buf) -> long long { return file_acc.final_file_size - file_acc.file_size; };
-		unsigned new_file_size = file_acc.file_size + file_acc.rand_int(MAX_FILE_SIZE + 1 - file_acc.file_size, file_acc.parse);
+		unsigned new_file_size = file_acc.file_size + file_acc.rand_int(MAX_FILE_SIZE + 1 - file_acc.file_size, [](unsigned char* file_buf) -> long long { return file_acc.final_file_size - file_acc.file_size; });
 		file_acc.lookahead = false;
 		if (debug_print)
 			fprintf(stderr, "FileSize %u\n", new_file_size);
@@ -955,6 +1419,10 @@ unsigned get_file_size() {
 	return file_acc.file_size;
 }
 
+unsigned get_rand_pos() {
+	return file_acc.rand_pos;
+}
+
 
 class TFindResults {
 public:
@@ -1006,24 +1474,18 @@ int64 FindFirst(T data, int matchcase=true, int wholeword=false, int method=0, d
 	swap_bytes(&newdata, sizeof(T));
 
 	file_acc.lookahead = true;
-	if (!file_acc.generate)
-		file_acc.evil_parse = [&start, &newdata](unsigned char* file_buf) -> bool {
+	if (file_acc.evil([&start, &newdata](unsigned char* file_buf) -> bool {
 			return memmem(file_acc.file_buffer + start, file_acc.final_file_size - start, &newdata, sizeof(T)) == NULL;
-		};
-	if (file_acc.evil(file_acc.evil_parse)) {
+		})) {
 		file_acc.lookahead = false;
 		return -1;
 	}
-	if (!file_acc.generate)
-		file_acc.evil_parse = [&start, &newdata](unsigned char* file_buf) -> bool {
+	unsigned long long max = file_acc.evil([&start, &newdata](unsigned char* file_buf) -> bool {
 			return (unsigned char *)memmem(file_acc.file_buffer + start, file_acc.final_file_size - start, &newdata, sizeof(T)) - (file_acc.file_buffer + start) >= 16;
-		};
-	unsigned long long max = file_acc.evil(file_acc.evil_parse) ? MAX_FILE_SIZE + 1 - sizeof(T) - start : 16;
-	if (!file_acc.generate)
-		file_acc.parse = [&start, &newdata](unsigned char* file_buf) -> long long {
+		}) ? MAX_FILE_SIZE + 1 - sizeof(T) - start : 16;
+	int64 pos = start + file_acc.rand_int(max, [&start, &newdata](unsigned char* file_buf) -> long long {
 			return (unsigned char *)memmem(file_acc.file_buffer + start, file_acc.final_file_size - start, &newdata, sizeof(T)) - (file_acc.file_buffer + start);
-		};
-	int64 pos = start + file_acc.rand_int(max, file_acc.parse);
+		});
 	int64 original_pos = FTell();
 	FSeek(pos);
 	std::vector<T> values = { data };
@@ -1043,24 +1505,18 @@ int64 FindFirst(std::string data, int matchcase, int wholeword, int method, doub
 	assert(matchcase == true && wholeword == false && method == 0 && tolerance == 0.0 && dir == 1 && size == 0 && wildcardMatchLength == 24);
 
 	file_acc.lookahead = true;
-	if (!file_acc.generate)
-		file_acc.evil_parse = [&start, &data](unsigned char* file_buf) -> bool {
+	if (file_acc.evil([&start, &data](unsigned char* file_buf) -> bool {
 			return memmem(file_acc.file_buffer + start, file_acc.final_file_size - start, data.c_str(), data.size()) == NULL;
-		};
-	if (file_acc.evil(file_acc.evil_parse)) {
+		})) {
 		file_acc.lookahead = false;
 		return -1;
 	}
-	if (!file_acc.generate)
-		file_acc.evil_parse = [&start, &data](unsigned char* file_buf) -> bool {
+	unsigned long long max = file_acc.evil([&start, &data](unsigned char* file_buf) -> bool {
 			return (unsigned char *)memmem(file_acc.file_buffer + start, file_acc.final_file_size - start, data.c_str(), data.size()) - (file_acc.file_buffer + start) >= 16;
-		};
-	unsigned long long max = file_acc.evil(file_acc.evil_parse) ? MAX_FILE_SIZE + 1 - data.size() - start : 16;
-	if (!file_acc.generate)
-		file_acc.parse = [&start, &data](unsigned char* file_buf) -> long long {
+		}) ? MAX_FILE_SIZE + 1 - data.size() - start : 16;
+	int64 pos = start + file_acc.rand_int(max, [&start, &data](unsigned char* file_buf) -> long long {
 			return (unsigned char *)memmem(file_acc.file_buffer + start, file_acc.final_file_size - start, data.c_str(), data.size()) - (file_acc.file_buffer + start);
-		};
-	int64 pos = start + file_acc.rand_int(max, file_acc.parse);
+		});
 	int64 original_pos = FTell();
 	FSeek(pos);
 	std::vector<std::string> values = { data };
@@ -1080,24 +1536,18 @@ int64 FindFirst(const char* data, int matchcase, int wholeword, int method, doub
 	assert(matchcase == true && wholeword == false && method == 0 && tolerance == 0.0 && dir == 1 && size == 0 && wildcardMatchLength == 24);
 
 	file_acc.lookahead = true;
-	if (!file_acc.generate)
-		file_acc.evil_parse = [&start, &data](unsigned char* file_buf) -> bool {
+	if (file_acc.evil([&start, &data](unsigned char* file_buf) -> bool {
 			return memmem(file_acc.file_buffer + start, file_acc.final_file_size - start, data, strlen(data)) == NULL;
-		};
-	if (file_acc.evil(file_acc.evil_parse)) {
+		})) {
 		file_acc.lookahead = false;
 		return -1;
 	}
-	if (!file_acc.generate)
-		file_acc.evil_parse = [&start, &data](unsigned char* file_buf) -> bool {
+	unsigned long long max = file_acc.evil([&start, &data](unsigned char* file_buf) -> bool {
 			return (unsigned char *)memmem(file_acc.file_buffer + start, file_acc.final_file_size - start, data, strlen(data)) - (file_acc.file_buffer + start) >= 16;
-		};
-	unsigned long long max = file_acc.evil(file_acc.evil_parse) ? MAX_FILE_SIZE + 1 - strlen(data) - start : 16;
-	if (!file_acc.generate)
-		file_acc.parse = [&start, &data](unsigned char* file_buf) -> long long {
+		}) ? MAX_FILE_SIZE + 1 - strlen(data) - start : 16;
+	int64 pos = start + file_acc.rand_int(max, [&start, &data](unsigned char* file_buf) -> long long {
 			return (unsigned char *)memmem(file_acc.file_buffer + start, file_acc.final_file_size - start, data, strlen(data)) - (file_acc.file_buffer + start);
-		};
-	int64 pos = start + file_acc.rand_int(max, file_acc.parse);
+		});
 	int64 original_pos = FTell();
 	FSeek(pos);
 	std::vector<std::string> values = { data };
@@ -1137,7 +1587,7 @@ std::string ReadLine(int64 pos, int maxLen = -1, int includeLinefeeds = true) {
 }
 
 
-extern std::vector<std::string> ReadBytesInitValues;
+extern value_set<std::string> ReadBytesInitValues;
 
 bool ReadBytes(std::string& s, int64 pos, int n) {
 	assert_cond(n > 0, "ReadBytes: invalid number of bytes");
@@ -1155,7 +1605,7 @@ bool ReadBytes(std::string& s, int64 pos, int n) {
 	return true;
 }
 
-bool ReadBytes(std::string& s, int64 pos, int n, std::vector<std::string> preferred_values, std::vector<std::string> possible_values = {}, double p = 0.25) {
+bool ReadBytes(std::string& s, int64 pos, int n, const std::vector<std::string>& preferred_values, const std::vector<std::string>& possible_values = {}, double p = 0.25) {
 	assert_cond(n > 0, "ReadBytes: invalid number of bytes");
 	int64 original_pos = FTell();
 	file_acc.file_pos = pos;
@@ -1163,28 +1613,23 @@ bool ReadBytes(std::string& s, int64 pos, int n, std::vector<std::string> prefer
 
 	int evil = SetEvilBit(false);
 	if (possible_values.size() && ReadBytesInitValues.size()) {
-		if (!file_acc.generate && preferred_values.size()) {
-			file_acc.parse = [&preferred_values, &possible_values, &n](unsigned char* file_buf) -> long long {
-					if (file_acc.file_pos + n > file_acc.final_file_size)
-						return 0;
-			        	if (std::find(preferred_values.begin(), preferred_values.end(), std::string((char*)file_buf, n)) != preferred_values.end())
-			        		return 0;
-			        	if (std::find(possible_values.begin(), possible_values.end(), std::string((char*)file_buf, n)) != possible_values.end())
-			        		return 253;
-			        	return 255;
-			        };
-		} else if (!file_acc.generate) {
-			file_acc.parse = [&possible_values, &n](unsigned char* file_buf) -> long long {
-					if (file_acc.file_pos + n > file_acc.final_file_size)
+		int choice = file_acc.rand_int(256, [&preferred_values, &possible_values, &n](unsigned char* file_buf) -> long long {
+				if (file_acc.file_pos + n > file_acc.final_file_size)
+					return 0;
+				std::string_view value((char*)file_buf, n);
+				if (preferred_values.size()) {
+					if (find_value(preferred_values, value) != preferred_values.size())
 						return 0;
-			        	if (std::find(possible_values.begin(), possible_values.end(), std::string((char*)file_buf, n)) != possible_values.end())
-			        		return 253;
-			        	if (std::find(ReadBytesInitValues.begin(), ReadBytesInitValues.end(), std::string((char*)file_buf, n)) != ReadBytesInitValues.end())
-			        		return 255;
-			        	return 0;
-			        };
-		}
-		int choice = file_acc.rand_int(256, file_acc.parse);
+					if (find_value(possible_values, value) != possible_values.size())
+						return 253;
+					return 255;
+				}
+				if (find_value(possible_values, value) != possible_values.size())
+					return 253;
+				if (find_value(ReadBytesInitValues, value) != ReadBytesInitValues.size())
+					return 255;
+				return 0;
+			});
 		if (choice < 255 * p) {
 			if (preferred_values.size())
 				s = file_acc.file_string(preferred_values);
@@ -1208,34 +1653,33 @@ bool ReadBytes(std::string& s, int64 pos, int n, std::vector<std::string> prefer
 			s = "";
 		}
 	} else {
-		std::vector<std::string>& known_values = possible_values.size() ? possible_values : ReadBytesInitValues;
 		if (!possible_values.size())
 			p = 0.995;
-		if (!file_acc.generate && preferred_values.size()) {
-			file_acc.parse = [&preferred_values, &n](unsigned char* file_buf) -> long long {
+		auto read_known = [&](const auto& known_values) {
+			int choice = file_acc.rand_int(256, [&preferred_values, &known_values, &n](unsigned char* file_buf) -> long long {
 					if (file_acc.file_pos + n > file_acc.final_file_size)
 						return 0;
-			        	return 255 * (std::find(preferred_values.begin(), preferred_values.end(), std::string((char*)file_buf, n)) == preferred_values.end());
-			        };
-		} else if (!file_acc.generate) {
-			file_acc.parse = [&known_values, &n](unsigned char* file_buf) -> long long {
-					if (file_acc.file_pos + n > file_acc.final_file_size)
-						return 0;
-			        	return 255 * (std::find(known_values.begin(), known_values.end(), std::string((char*)file_buf, n)) != known_values.end());
-			        };
-		}
-		int choice = file_acc.rand_int(256, file_acc.parse);
-		if (choice < 255 * p) {
-			if (preferred_values.size())
-				s = file_acc.file_string(preferred_values);
-			else {
-				s = "";
+					std::string_view value((char*)file_buf, n);
+					if (preferred_values.size())
+						return 255 * (find_value(preferred_values, value) == preferred_values.size());
+					return 255 * (find_value(known_values, value) != known_values.size());
+				});
+			if (choice < 255 * p) {
+				if (preferred_values.size())
+					s = file_acc.file_string(preferred_values);
+				else {
+					s = "";
+				}
+			} else {
+				if (preferred_values.size())
+					SetEvilBit(evil);
+				s = file_acc.file_string(known_values);
 			}
-		} else {
-			if (preferred_values.size())
-				SetEvilBit(evil);
-			s = file_acc.file_string(known_values);
-		}
+		};
+		if (possible_values.size())
+			read_known(possible_values);
+		else
+			read_known(ReadBytesInitValues);
 	}
 	SetEvilBit(evil);
 
@@ -1244,9 +1688,9 @@ bool ReadBytes(std::string& s, int64 pos, int n, std::vector<std::string> prefer
 	return s.length() != 0;
 }
 
-extern std::vector<byte> ReadByteInitValues;
+extern value_set<byte> ReadByteInitValues;
 
-byte ReadByte(int64 pos = FTell(), std::vector<byte> possible_values = {}) {
+byte ReadByte(int64 pos = FTell(), const std::vector<byte>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1262,9 +1706,9 @@ byte ReadByte(int64 pos = FTell(), std::vector<byte> possible_values = {}) {
 	return value;
 }
 
-extern std::vector<ubyte> ReadUByteInitValues;
+extern value_set<ubyte> ReadUByteInitValues;
 
-ubyte ReadUByte(int64 pos = FTell(), std::vector<ubyte> possible_values = {}) {
+ubyte ReadUByte(int64 pos = FTell(), const std::vector<ubyte>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1280,9 +1724,9 @@ ubyte ReadUByte(int64 pos = FTell(), std::vector<ubyte> possible_values = {}) {
 	return value;
 }
 
-extern std::vector<short> ReadShortInitValues;
+extern value_set<short> ReadShortInitValues;
 
-short ReadShort(int64 pos = FTell(), std::vector<short> possible_values = {}) {
+short ReadShort(int64 pos = FTell(), const std::vector<short>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1298,9 +1742,9 @@ short ReadShort(int64 pos = FTell(), std::vector<short> possible_values = {}) {
 	return value;
 }
 
-extern std::vector<ushort> ReadUShortInitValues;
+extern value_set<ushort> ReadUShortInitValues;
 
-ushort ReadUShort(int64 pos = FTell(), std::vector<ushort> possible_values = {}) {
+ushort ReadUShort(int64 pos = FTell(), const std::vector<ushort>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1316,9 +1760,9 @@ ushort ReadUShort(int64 pos = FTell(), std::vector<ushort> possible_values = {})
 	return value;
 }
 
-extern std::vector<int> ReadIntInitValues;
+extern value_set<int> ReadIntInitValues;
 
-int ReadInt(int64 pos = FTell(), std::vector<int> possible_values = {}) {
+int ReadInt(int64 pos = FTell(), const std::vector<int>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1334,9 +1778,9 @@ int ReadInt(int64 pos = FTell(), std::vector<int> possible_values = {}) {
 	return value;
 }
 
-extern std::vector<uint> ReadUIntInitValues;
+extern value_set<uint> ReadUIntInitValues;
 
-uint ReadUInt(int64 pos = FTell(), std::vector<uint> possible_values = {}) {
+uint ReadUInt(int64 pos = FTell(), const std::vector<uint>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1352,9 +1796,9 @@ uint ReadUInt(int64 pos = FTell(), std::vector<uint> possible_values = {}) {
 	return value;
 }
 
-extern std::vector<int64> ReadQuadInitValues;
+extern value_set<int64> ReadQuadInitValues;
 
-int64 ReadQuad(int64 pos = FTell(), std::vector<int64> possible_values = {}) {
+int64 ReadQuad(int64 pos = FTell(), const std::vector<int64>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1370,9 +1814,9 @@ int64 ReadQuad(int64 pos = FTell(), std::vector<int64> possible_values = {}) {
 	return value;
 }
 
-extern std::vector<uint64> ReadUQuadInitValues;
+extern value_set<uint64> ReadUQuadInitValues;
 
-uint64 ReadUQuad(int64 pos = FTell(), std::vector<uint64> possible_values = {}) {
+uint64 ReadUQuad(int64 pos = FTell(), const std::vector<uint64>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1388,9 +1832,9 @@ uint64 ReadUQuad(int64 pos = FTell(), std::vector<uint64> possible_values = {})
 	return value;
 }
 
-extern std::vector<int64> ReadInt64InitValues;
+extern value_set<int64> ReadInt64InitValues;
 
-int64 ReadInt64(int64 pos = FTell(), std::vector<int64> possible_values = {}) {
+int64 ReadInt64(int64 pos = FTell(), const std::vector<int64>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1406,9 +1850,9 @@ int64 ReadInt64(int64 pos = FTell(), std::vector<int64> possible_values = {}) {
 	return value;
 }
 
-extern std::vector<uint64> ReadUInt64InitValues;
+extern value_set<uint64> ReadUInt64InitValues;
 
-uint64 ReadUInt64(int64 pos = FTell(), std::vector<uint64> possible_values = {}) {
+uint64 ReadUInt64(int64 pos = FTell(), const std::vector<uint64>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1424,9 +1868,9 @@ uint64 ReadUInt64(int64 pos = FTell(), std::vector<uint64> possible_values = {})
 	return value;
 }
 
-extern std::vector<hfloat> ReadHFloatInitValues;
+extern value_set<hfloat> ReadHFloatInitValues;
 
-hfloat ReadHFloat(int64 pos = FTell(), std::vector<hfloat> possible_values = {}) {
+hfloat ReadHFloat(int64 pos = FTell(), const std::vector<hfloat>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1442,9 +1886,9 @@ hfloat ReadHFloat(int64 pos = FTell(), std::vector<hfloat> possible_values = {})
 	return value;
 }
 
-extern std::vector<float> ReadFloatInitValues;
+extern value_set<float> ReadFloatInitValues;
 
-float ReadFloat(int64 pos = FTell(), std::vector<float> possible_values = {}) {
+float ReadFloat(int64 pos = FTell(), const std::vector<float>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
@@ -1460,9 +1904,9 @@ float ReadFloat(int64 pos = FTell(), std::vector<float> possible_values = {}) {
 	return value;
 }
 
-extern std::vector<double> ReadDoubleInitValues;
+extern value_set<double> ReadDoubleInitValues;
 
-double ReadDouble(int64 pos = FTell(), std::vector<double> possible_values = {}) {
+double ReadDouble(int64 pos = FTell(), const std::vector<double>& possible_values = {}) {
 	int64 original_pos = FTell();
 	FSeek(pos);
 	file_acc.lookahead = true;
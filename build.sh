@@ -10,4 +10,4 @@ g++ -c -I . -std=c++17 -g -O3 -Wall $1.cpp
 g++ -O3 $1.o fuzzer.o -o $1-fuzzer -lz
 
 # Build format-specific shared library
-g++ -I . -std=c++17 -g -O3 -Wall -shared -fPIC $1.cpp fuzzer.cpp -o $1.so -lz
+g++ -I . -std=c++17 -g -O3 -Wall -shared -fPIC $1.cpp fuzzer.cpp afl_mutator.cpp -o $1.so -lz
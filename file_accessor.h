@@ -1,52 +1,59 @@
 #include <iostream>
 #include <string>
+#include <string_view>
 #include <vector>
 #include <unordered_map>
 #include <random>
 #include <cassert>
 #include <algorithm>
 #include <functional>
+#include <type_traits>
+#include <cstddef>
 #include <zlib.h>
+#include <sys/mman.h>
+#include <unistd.h>
 #include "formatfuzzer.h"
 
 extern std::vector<std::vector<int>> integer_ranges;
 
-bool is_big_endian = false;
-bool is_bitfield_left_to_right[2] = {false, true};
-bool is_padded_bitfield = true;
-
-bool is_following = false;
-bool following_is_optional = false;
-
-const char* chunk_name;
-const char* chunk_name2;
-int file_index = 0;
-
-bool get_chunk = false;
-bool get_all_chunks = false;
-bool smart_mutation = false;
-bool smart_abstraction = false;
-bool smart_swapping = false;
-unsigned chunk_start;
-unsigned chunk_end;
-unsigned rand_start;
-unsigned rand_end;
-unsigned rand_start2;
-unsigned rand_end2;
-unsigned delete_start;
-unsigned delete_end;
-bool is_optional = false;
-bool is_delete = false;
-
-
-std::vector<std::vector<InsertionPoint>> insertion_points;
-std::vector<std::vector<Chunk>> deletable_chunks;
-std::vector<Chunk> optional_chunks;
-std::vector<int> optional_index = { 0 };
-std::unordered_map<std::string, std::vector<Chunk>> non_optional_chunks;
-std::vector<std::vector<NonOptional>> non_optional_index;
-std::vector<std::string> rand_names;
-std::vector<std::string> file_names;
+// Generator state is kept per thread, so that independent generations can
+// run concurrently in one process (see ff_context in bt.h).
+thread_local bool is_big_endian = false;
+thread_local bool is_bitfield_left_to_right[2] = {false, true};
+thread_local bool is_padded_bitfield = true;
+
+thread_local bool is_following = false;
+thread_local bool following_is_optional = false;
+
+thread_local const char* chunk_name;
+thread_local const char* chunk_name2;
+thread_local int file_index = 0;
+
+thread_local bool get_chunk = false;
+thread_local bool get_all_chunks = false;
+thread_local bool smart_mutation = false;
+thread_local bool smart_abstraction = false;
+thread_local bool smart_swapping = false;
+thread_local unsigned chunk_start;
+thread_local unsigned chunk_end;
+thread_local unsigned rand_start;
+thread_local unsigned rand_end;
+thread_local unsigned rand_start2;
+thread_local unsigned rand_end2;
+thread_local unsigned delete_start;
+thread_local unsigned delete_end;
+thread_local bool is_optional = false;
+thread_local bool is_delete = false;
+
+
+thread_local std::vector<std::vector<InsertionPoint>> insertion_points;
+thread_local std::vector<std::vector<Chunk>> deletable_chunks;
+thread_local std::vector<Chunk> optional_chunks;
+thread_local std::vector<int> optional_index = { 0 };
+thread_local std::unordered_map<std::string, std::vector<Chunk>> non_optional_chunks;
+thread_local std::vector<std::vector<NonOptional>> non_optional_index;
+thread_local std::vector<std::string> rand_names;
+thread_local std::vector<std::string> file_names;
 
 void swap_bytes(void* b, unsigned size) {
 	if (is_big_endian) {
@@ -57,9 +64,9 @@ void swap_bytes(void* b, unsigned size) {
 }
 
 
-bool debug_print = false;
-bool print_errors = false;
-bool get_parse_tree = false;
+thread_local bool debug_print = false;
+thread_local bool print_errors = false;
+thread_local bool get_parse_tree = false;
 struct stack_cell {
 	const char* name;
 	std::unordered_map<std::string, int> counts;
@@ -75,7 +82,7 @@ struct stack_cell {
 	}
 };
 stack_cell root_cell("file", 0, 0);
-std::vector<stack_cell> generator_stack = {root_cell};
+thread_local std::vector<stack_cell> generator_stack = {root_cell};
 
 
 void assert_cond(bool cond, const char* error_msg) {
@@ -86,17 +93,302 @@ void assert_cond(bool cond, const char* error_msg) {
 	}
 }
 
-unsigned char *rand_buffer;
+// Size limits for files and decisions, shared by all threads.  They can be
+// raised at run time with ff_set_max_size(), up to the sizes reserved below.
+unsigned ff_max_file_size = 65536;
+unsigned ff_max_rand_size = 131072;
+
+// File and decision buffers reserve address space for the largest allowed
+// size, but only commit memory up to the current limit.  Committed pages are
+// backed lazily by the kernel, so small files only pay for the pages they
+// touch, and a buffer never moves when the limit is raised.  The first page
+// of each mapping holds its bookkeeping.
+struct buffer_header {
+	size_t reserved;
+	size_t committed;
+	size_t used; // all bytes past this offset are zero
+	size_t mapped; // bytes at the start that map an input file read-only
+};
+
+size_t page_size() {
+	static size_t size = sysconf(_SC_PAGESIZE);
+	return size;
+}
+
+buffer_header* get_buffer_header(unsigned char* buf) {
+	return (buffer_header*) (buf - page_size());
+}
+
+// Make the first size bytes of buf accessible
+void commit_buffer(unsigned char* buf, size_t size) {
+	buffer_header* header = get_buffer_header(buf);
+	if (size <= header->committed)
+		return;
+	size = (size + page_size() - 1) & ~(page_size() - 1);
+	if (size > header->reserved || mprotect(buf + header->committed, size - header->committed, PROT_READ | PROT_WRITE)) {
+		perror("Failed to commit buffer memory");
+		abort();
+	}
+	header->committed = size;
+}
+
+unsigned char* new_buffer(size_t reserve, size_t size) {
+	void* p = mmap(NULL, page_size() + reserve, PROT_NONE, MAP_PRIVATE | MAP_ANONYMOUS | MAP_NORESERVE, -1, 0);
+	if (p == MAP_FAILED || mprotect(p, page_size(), PROT_READ | PROT_WRITE)) {
+		perror("Failed to reserve buffer memory");
+		abort();
+	}
+	buffer_header* header = (buffer_header*) p;
+	header->reserved = reserve;
+	header->committed = 0;
+	header->used = 0;
+	header->mapped = 0;
+	unsigned char* buf = (unsigned char*) p + page_size();
+	commit_buffer(buf, size);
+	return buf;
+}
+
+void delete_buffer(unsigned char* buf) {
+	if (buf)
+		munmap(buf - page_size(), page_size() + get_buffer_header(buf)->reserved);
+}
+
+// Record that the first size bytes of buf may have been written
+void use_buffer(unsigned char* buf, size_t size) {
+	buffer_header* header = get_buffer_header(buf);
+	if (size > header->used)
+		header->used = size;
+}
+
+// Zero everything in buf from offset size on, touching only the bytes that
+// may have been written before
+void clear_buffer(unsigned char* buf, size_t size) {
+	buffer_header* header = get_buffer_header(buf);
+	if (header->used > size)
+		memset(buf + size, 0, header->used - size);
+	header->used = size;
+}
+
+// Map the first size bytes of the file fd read-only to the start of buf,
+// followed by zeros.  Returns false if the file cannot be mapped.
+bool map_buffer(unsigned char* buf, int fd, size_t size) {
+	buffer_header* header = get_buffer_header(buf);
+	size_t pages = (size + page_size() - 1) & ~(page_size() - 1);
+	if (size == 0 || pages > header->committed)
+		return false;
+	size_t zero = std::max(pages, header->mapped);
+	// Pages of a previous, larger input cannot be written to; replace them
+	if (header->mapped > pages && mmap(buf + pages, header->mapped - pages, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS | MAP_FIXED, -1, 0) == MAP_FAILED)
+		return false;
+	header->mapped = std::min(header->mapped, pages);
+	if (header->used > zero)
+		memset(buf + zero, 0, header->used - zero);
+	header->used = header->mapped;
+	// The kernel fills the last page past the end of the file with zeros
+	if (mmap(buf, pages, PROT_READ, MAP_PRIVATE | MAP_FIXED, fd, 0) == MAP_FAILED)
+		return false;
+	header->mapped = pages;
+	header->used = size;
+	return true;
+}
+
+// Turn a mapped input in buf back into zeroed, writable memory
+void unmap_buffer(unsigned char* buf) {
+	buffer_header* header = get_buffer_header(buf);
+	if (!header->mapped)
+		return;
+	if (mmap(buf, header->mapped, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS | MAP_FIXED, -1, 0) == MAP_FAILED) {
+		perror("Failed to unmap input file");
+		abort();
+	}
+	if (header->used <= header->mapped)
+		header->used = 0;
+	header->mapped = 0;
+}
+
+thread_local unsigned char *rand_buffer = new_buffer(RAND_RESERVE_SIZE, MAX_RAND_SIZE);
+
+// Allocator for the copies of generated structs.  All of them are destroyed
+// together with the globals at the end of a run, so they are carved out of
+// large blocks that reset() reclaims at once.  Copies freed earlier are kept
+// on per-size free lists.
+class instance_arena {
+	static const size_t BLOCK_SIZE = 64 << 10;
+	static const size_t ALIGN = alignof(std::max_align_t);
+
+	struct free_node {
+		free_node* next;
+	};
+
+	std::vector<char*> blocks;
+	std::vector<free_node*> free_lists;
+	size_t block = 0;
+	size_t block_pos = 0;
+
+public:
+	// Allocations since the start of the current run
+	size_t bytes = 0;
+	size_t instances = 0;
+
+	~instance_arena() {
+		for (char* b : blocks)
+			::operator delete(b);
+	}
+
+	void* allocate(size_t size) {
+		size = (size + ALIGN - 1) & ~(ALIGN - 1);
+		bytes += size;
+		++instances;
+		if (size > BLOCK_SIZE)
+			return ::operator new(size);
+		size_t slot = size / ALIGN;
+		if (slot < free_lists.size() && free_lists[slot]) {
+			free_node* node = free_lists[slot];
+			free_lists[slot] = node->next;
+			return node;
+		}
+		if (block < blocks.size() && block_pos + size > BLOCK_SIZE) {
+			++block;
+			block_pos = 0;
+		}
+		if (block == blocks.size())
+			blocks.push_back((char*) ::operator new(BLOCK_SIZE));
+		void* p = blocks[block] + block_pos;
+		block_pos += size;
+		return p;
+	}
+
+	void free(void* p, size_t size) {
+		size = (size + ALIGN - 1) & ~(ALIGN - 1);
+		if (size > BLOCK_SIZE) {
+			::operator delete(p);
+			return;
+		}
+		size_t slot = size / ALIGN;
+		if (slot >= free_lists.size())
+			free_lists.resize(slot + 1);
+		free_node* node = (free_node*) p;
+		node->next = free_lists[slot];
+		free_lists[slot] = node;
+	}
+
+	// Reclaim all memory; no instance may be alive any more
+	void reset() {
+		block = 0;
+		block_pos = 0;
+		free_lists.clear();
+	}
+
+	void start_run() {
+		reset();
+		bytes = 0;
+		instances = 0;
+	}
+};
+
+thread_local instance_arena struct_arena;
+
+thread_local unsigned char *following_rand_buffer = NULL;
+thread_local unsigned following_rand_size = 0;
 
-unsigned char *following_rand_buffer = NULL;
-unsigned following_rand_size = 0;
+// A list of known values.  Sets that are searched often can carry a hash
+// index from each value to its first position in the list.
+template<typename T>
+class value_set {
+	// Strings are looked up directly in the file buffer
+	typedef typename std::conditional<std::is_same<T, std::string>::value, std::string_view, T>::type key_type;
+
+	std::vector<T> values;
+	std::unordered_map<key_type, unsigned> index;
+
+	void build_index() {
+		index.clear();
+		for (unsigned i = 0; i < values.size(); ++i)
+			index.emplace(key_type(values[i]), i);
+	}
+
+public:
+	typedef T value_type;
+
+	value_set() {}
+	// Short lists are faster to search linearly than through an index
+	value_set(std::initializer_list<T> values, bool indexed = false) : values(values) {
+		if (indexed && values.size() > 8)
+			build_index();
+	}
+	value_set(const std::vector<T>& values) : values(values) {}
+	// The index refers to our own values, so it is never copied
+	value_set(const value_set& other) : values(other.values) {
+		if (!other.index.empty())
+			build_index();
+	}
+	value_set& operator = (const value_set& other) {
+		values = other.values;
+		index.clear();
+		if (!other.index.empty())
+			build_index();
+		return *this;
+	}
+
+	size_t size() const { return values.size(); }
+	bool empty() const { return values.empty(); }
+	const T& operator [] (size_t i) const { return values[i]; }
+	typename std::vector<T>::const_iterator begin() const { return values.begin(); }
+	typename std::vector<T>::const_iterator end() const { return values.end(); }
+
+	// Position of the first value equal to v, or size() if there is none
+	size_t find(const key_type& v) const {
+		if (!index.empty()) {
+			auto it = index.find(v);
+			return it == index.end() ? values.size() : it->second;
+		}
+		for (size_t i = 0; i < values.size(); ++i)
+			if (key_type(values[i]) == v)
+				return i;
+		return values.size();
+	}
+};
+
+template<typename T>
+size_t find_value(const value_set<T>& values, const T& v) {
+	return values.find(v);
+}
+
+inline size_t find_value(const value_set<std::string>& values, std::string_view v) {
+	return values.find(v);
+}
+
+template<typename T>
+size_t find_value(const std::vector<T>& values, const T& v) {
+	return std::find(values.begin(), values.end(), v) - values.begin();
+}
+
+inline size_t find_value(const std::vector<std::string>& values, std::string_view v) {
+	for (size_t i = 0; i < values.size(); ++i)
+		if (values[i] == v)
+			return i;
+	return values.size();
+}
+
+// Known values of individual array elements, by index
+template<typename T>
+using known_values_map = std::unordered_map<int, value_set<T>>;
+
+template<typename T>
+const value_set<T>* find_known_values(const known_values_map<T>* known, int index) {
+	if (!known)
+		return NULL;
+	auto it = known->find(index);
+	return it == known->end() ? NULL : &it->second;
+}
 
 class file_accessor {
 	bool allow_evil_values = true;
 	bool dont_be_evil = false;
 	unsigned bitfield_size = 0;
 	bool has_bitmap = false;
-	std::vector<bool> bitmap;
+	unsigned char* bitmap;
+	unsigned bitmap_end = 0;
 	std::string string_buf;
 
 	unsigned long long parse_integer(unsigned char* file_buf, unsigned size, unsigned bits = 0) {
@@ -190,10 +482,13 @@ class file_accessor {
 			if (!generate)
 				assert_cond(index < final_file_size, "reading past the end of file");
 			unsigned char old = file_buffer[index];
-			file_buffer[index] &= ~mask;
-			file_buffer[index] |= c;
-			if (!generate)
-				assert_cond(file_buffer[index] == old, "parsed wrong file contents");
+			unsigned char byte = (old & ~mask) | c;
+			if (generate) {
+				if (index < file_size)
+					++buffer_generation;
+				file_buffer[index] = byte;
+			} else
+				assert_cond(byte == old, "parsed wrong file contents");
 			new_bits -= write_bits;
 			bitfield_bits += write_bits;
 		}
@@ -229,6 +524,8 @@ class file_accessor {
 		assert_cond(file_pos <= MAX_FILE_SIZE, "file size exceeded MAX_FILE_SIZE");
 		assert_cond(!has_size || file_pos <= file_size, "file size exceeded known size");
 		if (generate) {
+			if (start_pos < file_size)
+				++buffer_generation;
 			memcpy(file_buffer + start_pos, buf, size);
 		} else {
 			assert_cond(file_pos <= final_file_size, "reading past the end of file");
@@ -241,8 +538,9 @@ class file_accessor {
 		if (lookahead && !is_padding) {
 			has_bitmap = true;
 			unsigned original_pos = file_pos - size;
-			for (unsigned i = 0; i < size; ++i)
-				bitmap[original_pos + i] = true;
+			memset(bitmap + original_pos, 1, size);
+			if (bitmap_end < file_pos)
+				bitmap_end = file_pos;
 		}
 
 		if (is_padding || lookahead)
@@ -268,22 +566,43 @@ public:
 	unsigned parsed_file_size = 0;
 	unsigned rand_prev = 0;
 	unsigned rand_last = UINT_MAX;
+	// Changes whenever bytes below file_size may have changed, so that
+	// results computed from them can be cached
+	unsigned buffer_generation = 0;
 	bool has_size = false;
 	bool generate = true;
 	bool lookahead = false;
 	bool is_padding = false;
 	unsigned bitfield_bits = 0;
 
-	file_accessor() : bitmap(MAX_FILE_SIZE) {
-		file_buffer = new unsigned char[MAX_FILE_SIZE];
-		::rand_buffer = new unsigned char[MAX_RAND_SIZE];
+	file_accessor() {
+		file_buffer = new_buffer(FILE_RESERVE_SIZE, MAX_FILE_SIZE);
+		bitmap = new_buffer(FILE_RESERVE_SIZE, MAX_FILE_SIZE);
 		if (getenv("DONT_BE_EVIL"))
 			dont_be_evil = true;
 	}
 	
 	~file_accessor() {
-		delete[] file_buffer;
-		delete[] ::rand_buffer;
+		delete_buffer(file_buffer);
+		delete_buffer(bitmap);
+		delete_buffer(::rand_buffer);
+	}
+
+	// Make the buffers follow the current MAX_FILE_SIZE
+	void commit_buffers() {
+		commit_buffer(file_buffer, MAX_FILE_SIZE);
+		commit_buffer(bitmap, MAX_FILE_SIZE);
+	}
+
+	// Place size bytes of input at the start of the file buffer, followed
+	// by zeros (data may already be the file buffer itself)
+	void load_file(const unsigned char* data, unsigned size) {
+		++buffer_generation;
+		unmap_buffer(file_buffer);
+		use_buffer(file_buffer, file_size);
+		if (data != file_buffer)
+			memcpy(file_buffer, data, size);
+		clear_buffer(file_buffer, size);
 	}
 
 	bool set_evil_bit(bool allow) {
@@ -294,17 +613,20 @@ public:
 
 	std::function<bool (unsigned char*)> evil_parse;
 
-	bool evil(std::function<bool (unsigned char*)>& evil_parse) {
-		if (!generate)
-			parse = [&evil_parse](unsigned char* file_buf) -> long long { return evil_parse(file_buf) ? 127 : 0; };
-		bool is_evil = rand_int(127 + allow_evil_values, parse) == 127;
+	// evil_parse (and parse below) may be any callable; passing the
+	// decoder as a template argument lets it be inlined, and it is only
+	// ever called when parsing.
+	template<typename F>
+	bool evil(F&& evil_parse) {
+		bool is_evil = rand_int(127 + allow_evil_values, [&evil_parse](unsigned char* file_buf) -> long long { return evil_parse(file_buf) ? 127 : 0; }) == 127;
 		assert_cond(!(!generate && !allow_evil_values && rand_buffer[rand_pos-1] == 127), "Evil bit is disabled, but an evil decision is required to parse this file");
 		return is_evil;
 	}
 
 	std::function<long long (unsigned char*)> parse;
 
-	long long rand_int(unsigned long long x, std::function<long long (unsigned char*)>& parse) {
+	template<typename F>
+	long long rand_int(unsigned long long x, F&& parse) {
 		unsigned long long max = x-1;
 		if (!max)
 			return 0;
@@ -407,7 +729,26 @@ public:
 		return result;
 	}
 
+	// Parse size bytes of the file fd without copying them
+	bool map_file(int fd, unsigned size) {
+		++buffer_generation;
+		use_buffer(file_buffer, file_size);
+		return map_buffer(file_buffer, fd, size);
+	}
+
+	// Make the file buffer writable again after map_file()
+	void unmap_file() {
+		++buffer_generation;
+		unmap_buffer(file_buffer);
+	}
+
 	void seed(unsigned char* b, unsigned rsize, unsigned fsize) {
+		commit_buffers();
+		struct_arena.start_run();
+		++buffer_generation;
+		if (generate)
+			unmap_buffer(file_buffer);
+		use_buffer(file_buffer, file_size);
 		rand_buffer = b;
 		rand_size = rsize;
 		rand_pos = 0;
@@ -427,8 +768,9 @@ public:
 		lookahead = false;
 		is_padding = false;
 		if (has_bitmap)
-			std::fill(bitmap.begin(), bitmap.end(), false);
+			memset(bitmap, 0, bitmap_end);
 		has_bitmap = false;
+		bitmap_end = 0;
 		is_big_endian = false;
 		is_bitfield_left_to_right[0] = false;
 		is_bitfield_left_to_right[1] = true;
@@ -445,9 +787,7 @@ public:
 		if (has_size)
 			return 1;
 		lookahead = true;
-		if (!generate)
-			parse = [this](unsigned char* file_buf) -> long long { return file_pos == final_file_size ? 255 : 0; };
-		int is_feof = (rand_int(256, parse) >= 255 * (1.0 - p));
+		int is_feof = (rand_int(256, [this](unsigned char* file_buf) -> long long { return file_pos == final_file_size ? 255 : 0; }) >= 255 * (1.0 - p));
 		lookahead = false;
 		if (is_feof)
 			has_size = true;
@@ -455,8 +795,8 @@ public:
 	}
 
 	template<typename T>
-	bool is_compatible_integer(unsigned size, T& v) {
-		unsigned char* p = (unsigned char*) &v;
+	bool is_compatible_integer(unsigned size, const T& v) {
+		const unsigned char* p = (const unsigned char*) &v;
 		for (unsigned i = 0; i < size; ++i) {
 			if (bitmap[file_pos + i]) {
 				unsigned index = is_big_endian ? size - 1 - i : i;
@@ -467,15 +807,16 @@ public:
 		return true;
 	}
 
-	template<typename T>
-	long long file_integer(unsigned size, unsigned bits, std::vector<T>& known) {
+	// known is a value_set or a std::vector of integers
+	template<typename V, typename = typename V::value_type>
+	long long file_integer(unsigned size, unsigned bits, const V& known) {
+		typedef typename V::value_type T;
 		if(!known.size())
 			return file_integer(size, bits);
 		assert_cond(0 < size && size <= 8, "sizeof integer invalid");
 		assert_cond(file_pos + size <= MAX_FILE_SIZE, "file size exceeded MAX_FILE_SIZE");
-		std::vector<T> compatible;
-		bool match = false;
 		if (has_bitmap) {
+			bool match = false;
 			for (unsigned i = 0; i < size; ++i) {
 				if (bitmap[file_pos + i]) {
 					match = true;
@@ -484,31 +825,33 @@ public:
 			}
 			if (match) {
 				assert_cond(bits == 0, "bitfield lookahead not implemented");
-				for (T& v : known) {
+				std::vector<T> compatible;
+				for (const T& v : known) {
 					if (is_compatible_integer(size, v))
 						compatible.push_back(v);
 				}
+				if (compatible.empty())
+					return file_integer(size, bits);
+				return file_known_integer(size, bits, compatible);
 			}
 		}
-		std::vector<T>& good = match ? compatible : known;
+		return file_known_integer(size, bits, known);
+	}
 
-		if (!generate)
-			evil_parse = [&size, &bits, &good, this](unsigned char* file_buf) -> bool {
+	template<typename V>
+	long long file_known_integer(unsigned size, unsigned bits, const V& good) {
+		typedef typename V::value_type T;
+		if (evil([&size, &bits, &good, this](unsigned char* file_buf) -> bool {
 				T value = (T)parse_integer(file_buf, size, bits);
-				return std::find(good.begin(), good.end(), value) == good.end();
-			};
-
-		if ((match && compatible.empty()) || evil(evil_parse)) {
+				return find_value(good, value) == good.size();
+			})) {
 			return file_integer(size, bits);
 		}
 
-		if (!generate)
-			parse = [&size, &bits, &good, this](unsigned char* file_buf) -> long long {
+		T value = good[rand_int(good.size(), [&size, &bits, &good, this](unsigned char* file_buf) -> long long {
 				T value = (T)parse_integer(file_buf, size, bits);
-				return std::find(good.begin(), good.end(), value) - good.begin();
-			};
-
-		T value = good[rand_int(good.size(), parse)];
+				return find_value(good, value);
+			})];
 		T newvalue = value;
 		if (bits) {
 			value = (T)((unsigned long long)value & ((1LLU << bits) - 1LLU));
@@ -529,76 +872,60 @@ public:
 		range = range == 64 ? 0 : 1LLU << range;
 		long long value;
 
+		auto parse_value = [&size, &bits, this](unsigned char* file_buf) -> long long {
+			return parse_integer(file_buf, size, bits);
+		};
 		if (small == 0) {
-			if (!generate)
-				parse = [&size, &bits, this](unsigned char* file_buf) -> long long {
-					return parse_integer(file_buf, size, bits);
-				};
-			value = rand_int(range, parse);
+			value = rand_int(range, parse_value);
 		} else if (small == 1 || (small >= 2 && integer_ranges[small-2][1] == INT_MAX)) {
 			int min = 0;
 			if (small >= 2)
 				min = integer_ranges[small-2][0];
-			std::function<long long (unsigned char*)> choice_parse;
-			if (!generate) {
-				choice_parse = [&size, &bits, &min, this](unsigned char* file_buf) -> long long {
-					unsigned long long value = parse_integer(file_buf, size, bits) - min;
-					if (value > 0 && value <= 1<<4)
-						return 0;
-					if (value < 1<<8)
-						return 256 - 32;
-					if (value < 1<<16)
-						return 256 - 8;
-					return 256 - 2;
-				};
-				parse = [&size, &bits, &min, this](unsigned char* file_buf) -> long long {
-					long long value = parse_integer(file_buf, size, bits);
-					value -= min;
-					return value;
-				};
-			}
-			int s = rand_int(256, choice_parse);
+			int s = rand_int(256, [&size, &bits, &min, this](unsigned char* file_buf) -> long long {
+				unsigned long long value = parse_integer(file_buf, size, bits) - min;
+				if (value > 0 && value <= 1<<4)
+					return 0;
+				if (value < 1<<8)
+					return 256 - 32;
+				if (value < 1<<16)
+					return 256 - 8;
+				return 256 - 2;
+			});
+			auto parse_offset = [&size, &bits, &min, this](unsigned char* file_buf) -> long long {
+				long long value = parse_integer(file_buf, size, bits);
+				value -= min;
+				return value;
+			};
 			if (s >= 256 - 2)
-				value = rand_int(range, parse);
+				value = rand_int(range, parse_offset);
 			else if (s >= 256 - 8)
-				value = rand_int(1<<16, parse);
+				value = rand_int(1<<16, parse_offset);
 			else if (s >= 256 - 32)
-				value = rand_int(1<<8, parse);
+				value = rand_int(1<<8, parse_offset);
 			else {
-				if (!generate)
-					parse = [&size, &bits, &min, this](unsigned char* file_buf) -> long long {
-						long long value = parse_integer(file_buf, size, bits);
-						value -= min + 1;
-						return value;
-					};
-				value = 1+rand_int(1<<4, parse);
+				value = 1+rand_int(1<<4, [&size, &bits, &min, this](unsigned char* file_buf) -> long long {
+					long long value = parse_integer(file_buf, size, bits);
+					value -= min + 1;
+					return value;
+				});
 			}
 			value += min;
 		} else {
 			int min = integer_ranges[small-2][0];
 			int max = integer_ranges[small-2][1];
-			if (!generate)
-				evil_parse = [&size, &bits, &min, &max, this](unsigned char* file_buf) -> bool {
+			if (evil([&size, &bits, &min, &max, this](unsigned char* file_buf) -> bool {
 					long long value = parse_integer(file_buf, size, bits);
 					if (value >= min && value <= max)
 						return false;
 					return true;
-				};
-
-			if (evil(evil_parse)) {
-				if (!generate)
-					parse = [&size, &bits, this](unsigned char* file_buf) -> long long {
-						return parse_integer(file_buf, size, bits);
-					};
-				value = rand_int(range, parse);
+				})) {
+				value = rand_int(range, parse_value);
 			} else {
-				if (!generate)
-					parse = [&size, &bits, &min, this](unsigned char* file_buf) -> long long {
-						long long value = parse_integer(file_buf, size, bits);
-						value -= min;
-						return value;
-					};
-				value = min + rand_int(max + 1 - min, parse);
+				value = min + rand_int(max + 1 - min, [&size, &bits, &min, this](unsigned char* file_buf) -> long long {
+					long long value = parse_integer(file_buf, size, bits);
+					value -= min;
+					return value;
+				});
 			}
 		}
 		if (has_bitmap) {
@@ -623,8 +950,58 @@ public:
 		return value;
 	}
 
-	bool is_compatible_string(std::string& v) {
-		unsigned char* p = (unsigned char*) v.c_str();
+	// Append count integers to values, each taking one full-range decision
+	// like file_integer(sizeof(T), 0, 0), but copying all of them between
+	// the decisions and the file at once.  Returns false without consuming
+	// anything if the values need to be handled one at a time (lookahead,
+	// parse trees, open bitfields or running out of input).
+	template<typename T>
+	bool file_integers(std::vector<T>& values, unsigned count) {
+		// file_integer() converts its result, which only copies the bits
+		// of integers
+		if (!std::is_integral<T>::value || std::is_same<T, bool>::value)
+			return false;
+		if (get_parse_tree || lookahead || is_padding || bitfield_bits)
+			return false;
+		size_t size = (size_t) count * sizeof(T);
+		size_t end = file_pos + size;
+		if (rand_pos + size > rand_size || end > MAX_FILE_SIZE || (has_size && end > file_size))
+			return false;
+		if (!generate && end > final_file_size)
+			return false;
+		if (has_bitmap && bitmap_end > file_pos && memchr(bitmap + file_pos, 1, std::min(end, (size_t) bitmap_end) - file_pos))
+			return false;
+
+		unsigned char* decisions = rand_buffer + rand_pos;
+		unsigned char* data = file_buffer + file_pos;
+		if (generate) {
+			if (file_pos < file_size)
+				++buffer_generation;
+			memcpy(data, decisions, size);
+		} else {
+			// Decisions are the parsed values themselves
+			memcpy(decisions, data, size);
+		}
+		if (is_big_endian && sizeof(T) > 1) {
+			unsigned char* p = generate ? data : decisions;
+			for (size_t i = 0; i < size; i += sizeof(T))
+				std::reverse(p + i, p + i + sizeof(T));
+		}
+		size_t old_size = values.size();
+		values.resize(old_size + count);
+		memcpy(values.data() + old_size, decisions, size);
+
+		rand_pos += size;
+		file_pos = end;
+		if (file_size < file_pos)
+			file_size = file_pos;
+		if (!generate && parsed_file_size < file_pos)
+			parsed_file_size = file_pos;
+		return true;
+	}
+
+	bool is_compatible_string(const std::string& v) {
+		const unsigned char* p = (const unsigned char*) v.c_str();
 		for (unsigned i = 0; i < v.length(); ++i) {
 			if (bitmap[file_pos + i] && p[i] != file_buffer[file_pos + i])
 				return false;
@@ -632,13 +1009,14 @@ public:
 		return true;
 	}
 	
-	std::string file_string(std::vector<std::string>& known) {
+	// known is a value_set or a std::vector of strings of equal length
+	template<typename V, typename = typename V::value_type>
+	std::string file_string(const V& known) {
 		assert(known.size());
 		int size = known[0].length();
 		assert_cond(file_pos + size <= MAX_FILE_SIZE, "file size exceeded MAX_FILE_SIZE");
-		std::vector<std::string> compatible;
-		bool match = false;
 		if (has_bitmap) {
+			bool match = false;
 			for (int i = 0; i < size; ++i) {
 				if (bitmap[file_pos + i]) {
 					match = true;
@@ -646,69 +1024,64 @@ public:
 				}
 			}
 			if (match) {
-				for (std::string& v : known) {
+				std::vector<std::string> compatible;
+				for (const std::string& v : known) {
 					if (is_compatible_string(v))
 						compatible.push_back(v);
 				}
+				if (compatible.empty()) {
+					assert_cond(size, "empty known string");
+					return file_string(size);
+				}
+				return file_known_string(compatible);
 			}
 		}
-		std::vector<std::string>& good = match ? compatible : known;
+		return file_known_string(known);
+	}
 
-		if (!generate)
-			evil_parse = [&good](unsigned char* file_buf) -> bool {
-				std::string value((char*) file_buf, good[0].length());
-				return std::find(good.begin(), good.end(), value) == good.end();
-			};
-		if ((match && compatible.empty()) || evil(evil_parse)) {
+	template<typename V>
+	std::string file_known_string(const V& good) {
+		if (evil([&good](unsigned char* file_buf) -> bool {
+				std::string_view value((char*) file_buf, good[0].length());
+				return find_value(good, value) == good.size();
+			})) {
+			int size = good[0].length();
 			assert_cond(size, "empty known string");
 			return file_string(size);
 		}
-		if (!generate)
-			parse = [&good](unsigned char* file_buf) -> long long {
-				std::string value((char*) file_buf, good[0].length());
-				return std::find(good.begin(), good.end(), value) - good.begin();
-			};
-		std::string value = good[rand_int(good.size(), parse)];
-		ssize_t len = value.length();
-		write_file(value.c_str(), len);
+		const std::string& value = good[rand_int(good.size(), [&good](unsigned char* file_buf) -> long long {
+				std::string_view value((char*) file_buf, good[0].length());
+				return find_value(good, value);
+			})];
+		write_file(value.c_str(), value.length());
 		return value;
 	}
 	
 	std::string file_string(int size = 0) {
 		assert_cond(size >= 0, "negative string length");
 		assert_cond(file_pos + size <= MAX_FILE_SIZE, "file size exceeded MAX_FILE_SIZE");
-		if (!generate)
-			parse = [&size](unsigned char* file_buf) -> long long {
+		int choice = rand_int(16, [&size](unsigned char* file_buf) -> long long {
 				int len = size ? size : INT_MAX;
 				for (int i = 0; i < len && (size || file_buf[i]); ++i)
 					if (file_buf[i] < 32 || file_buf[i] >= 127)
 						return 15;
 				return 0;
-			};
-		int choice = rand_int(16, parse);
+			});
 		if (choice < 14) {
 			return file_ascii_string(size);
 		} else if (choice == 14) {
 			return file_latin1_string(size);
 		}
 		ssize_t len = size;
-		if (!len) {
-			if (!generate)
-				parse = [](unsigned char* file_buf) -> long long { return strlen((char*)file_buf); };
-			len = rand_int(80, parse);
-		}
+		if (!len)
+			len = rand_int(80, [](unsigned char* file_buf) -> long long { return strlen((char*)file_buf); });
 
 		string_buf.resize(len + 1);
 		for (int i = 0; i < len; ++i) {
-			if (size == 0) {
-				if (!generate)
-					parse = [&i](unsigned char* file_buf) -> long long { return file_buf[i] - 1; };
-				string_buf[i] = rand_int(255, parse) + 1;
-			} else {
-				if (!generate)
-					parse = [&i](unsigned char* file_buf) -> long long { return file_buf[i]; };
-				string_buf[i] = rand_int(256, parse);
-			}
+			if (size == 0)
+				string_buf[i] = rand_int(255, [&i](unsigned char* file_buf) -> long long { return file_buf[i] - 1; }) + 1;
+			else
+				string_buf[i] = rand_int(256, [&i](unsigned char* file_buf) -> long long { return file_buf[i]; });
 		}
 		string_buf[len] = '\0';
 		if (has_bitmap) {
@@ -729,17 +1102,12 @@ public:
 		assert_cond(size >= 0, "negative string length");
 		assert_cond(file_pos + size <= MAX_FILE_SIZE, "file size exceeded MAX_FILE_SIZE");
 		ssize_t len = size;
-		if (!len) {
-			if (!generate)
-				parse = [](unsigned char* file_buf) -> long long { return strlen((char*)file_buf); };
-			len = rand_int(80, parse);
-		}
+		if (!len)
+			len = rand_int(80, [](unsigned char* file_buf) -> long long { return strlen((char*)file_buf); });
 
 		string_buf.resize(len + 1);
 		for (int i = 0; i < len; ++i) {
-			if (!generate)
-				parse = [&i](unsigned char* file_buf) -> long long { return file_buf[i] - 32; };
-			string_buf[i] = rand_int(95, parse) + 32;
+			string_buf[i] = rand_int(95, [&i](unsigned char* file_buf) -> long long { return file_buf[i] - 32; }) + 32;
 		}
 		string_buf[len] = '\0';
 		if (has_bitmap) {
@@ -760,17 +1128,12 @@ public:
 		assert_cond(size >= 0, "negative string length");
 		assert_cond(file_pos + size <= MAX_FILE_SIZE, "file size exceeded MAX_FILE_SIZE");
 		ssize_t len = size;
-		if (!len) {
-			if (!generate)
-				parse = [](unsigned char* file_buf) -> long long { return strlen((char*)file_buf); };
-			len = rand_int(80, parse);
-		}
+		if (!len)
+			len = rand_int(80, [](unsigned char* file_buf) -> long long { return strlen((char*)file_buf); });
 
 		string_buf.resize(len + 1);
 		for (int i = 0; i < len; ++i) {
-			if (!generate)
-				parse = [&i](unsigned char* file_buf) -> long long { return file_buf[i] >= 161 ? file_buf[i] - 66 : file_buf[i] - 32; };
-			string_buf[i] = rand_int(190, parse) + 32;
+			string_buf[i] = rand_int(190, [&i](unsigned char* file_buf) -> long long { return file_buf[i] >= 161 ? file_buf[i] - 66 : file_buf[i] - 32; }) + 32;
 			if (string_buf[i] >= 127)
 				string_buf[i] += 34;
 		}
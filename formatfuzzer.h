@@ -1,5 +1,13 @@
-#define MAX_RAND_SIZE 131072
-#define MAX_FILE_SIZE 65536
+// Maximum sizes of decision and generated files.  These are variables set
+// at run time (see ff_set_max_size()); the defaults are 131072 and 65536.
+#define MAX_RAND_SIZE ff_max_rand_size
+#define MAX_FILE_SIZE ff_max_file_size
+extern unsigned ff_max_rand_size;
+extern unsigned ff_max_file_size;
+// Address space reserved for file and decision buffers, the upper bounds of
+// the limits above.
+#define FILE_RESERVE_SIZE (1UL << 30)
+#define RAND_RESERVE_SIZE (1UL << 31)
 //#define SIMPLE_MUTATIONS 1
 
 #include <vector>
@@ -44,14 +52,17 @@ struct NonOptional {
 };
 
 extern std::unordered_map<std::string, std::string> variable_types;
-extern std::vector<std::vector<InsertionPoint>> insertion_points;
-extern std::vector<std::vector<Chunk>> deletable_chunks;
-extern std::vector<Chunk> optional_chunks;
-extern std::vector<int> optional_index;
-extern std::unordered_map<std::string, std::vector<Chunk>> non_optional_chunks;
-extern std::vector<std::vector<NonOptional>> non_optional_index;
-extern std::vector<std::string> rand_names;
-extern std::vector<std::string> file_names;
+// GENERATE name and template location of each declaration site
+extern std::vector<std::pair<const char*, const char*>> variable_sites;
+extern const char* template_hash;
+extern thread_local std::vector<std::vector<InsertionPoint>> insertion_points;
+extern thread_local std::vector<std::vector<Chunk>> deletable_chunks;
+extern thread_local std::vector<Chunk> optional_chunks;
+extern thread_local std::vector<int> optional_index;
+extern thread_local std::unordered_map<std::string, std::vector<Chunk>> non_optional_chunks;
+extern thread_local std::vector<std::vector<NonOptional>> non_optional_index;
+extern thread_local std::vector<std::string> rand_names;
+extern thread_local std::vector<std::string> file_names;
 
 void set_parser();
 
@@ -63,6 +74,8 @@ void generate_file();
 
 unsigned get_file_size();
 
+unsigned get_rand_pos();
+
 double get_validity();
 
 void delete_globals();
@@ -71,3 +84,30 @@ char* get_bin_name(char* arg);
 
 void save_output(const char* filename);
 
+unsigned char* new_buffer(size_t reserve, size_t size);
+
+void commit_buffer(unsigned char* buf, size_t size);
+
+struct ff_context;
+
+extern "C" ff_context* ff_context_new();
+
+extern "C" void ff_context_free(ff_context* ctx);
+
+extern "C" size_t ff_generate_ctx(ff_context* ctx, unsigned char* data, size_t size, unsigned char** new_data);
+
+extern "C" int ff_parse_ctx(ff_context* ctx, unsigned char* data, size_t size, unsigned char** new_data, size_t* new_size);
+
+extern "C" size_t ff_generate_batch(ff_context* ctx, unsigned char* data, size_t size, size_t* used, size_t count, unsigned char* out, size_t out_size, size_t* sizes);
+
+extern "C" int ff_set_max_size(size_t file_size);
+
+extern "C" void ff_arena_stats(size_t* bytes, size_t* instances);
+
+extern "C" int ff_profile_write(const char* prefix);
+
+extern "C" int ff_profile_send(int fd);
+
+extern "C" int ff_profile_receive(int fd);
+
+extern "C" int ff_open_chunk_index(const char* path);
@@ -17,15 +17,340 @@
 #include <string>
 #include <stdarg.h>
 #include <ctime>
+#include <cerrno>
+#include <sys/wait.h>
+#include <dirent.h>
+#include <sys/mman.h>
+#include <sys/file.h>
+#include <sys/socket.h>
+#include <unordered_set>
+#include <list>
+#include <vector>
+#include <algorithm>
 
 #include "formatfuzzer.h"
 
 static const char *bin_name = "formatfuzzer";
 
-extern bool get_parse_tree;
-extern bool debug_print;
+extern thread_local bool get_parse_tree;
+extern thread_local bool debug_print;
+extern thread_local bool profiling;
 
-extern bool aflsmart_output;
+extern thread_local bool aflsmart_output;
+
+extern "C" size_t ff_generate(unsigned char* data, size_t size, unsigned char** new_data);
+extern "C" int ff_parse(unsigned char* data, size_t size, unsigned char** new_data, size_t* new_size);
+
+/* Get unix time in microseconds */
+
+static uint64_t get_cur_time_us(void) {
+
+  struct timeval  tv;
+  struct timezone tz;
+
+  gettimeofday(&tv, &tz);
+
+  return (tv.tv_sec * 1000000ULL) + tv.tv_usec;
+
+}
+
+// Extension of the files produced by this fuzzer ("png" for png-fuzzer)
+static std::string get_format_name() {
+	const char *dash = strchr(bin_name, '-');
+	if (!dash)
+		return bin_name;
+	return std::string(bin_name, dash - bin_name);
+}
+
+// Decision bytes are read from the source in blocks of this size
+#define DECISION_BLOCK_SIZE (16 * MAX_RAND_SIZE)
+
+// Reads generation decisions from a source in large blocks.  Each generated
+// file consumes only the decision bytes it actually used, so consecutive files
+// get fresh bytes without one read() per file.  Streams such as /dev/urandom
+// never run out; a regular file is split into contiguous shards, one per
+// worker, and each shard is consumed as a stream of decision sequences.
+class decision_reader {
+	int fd = -1;
+	bool is_stream = true;
+	off_t offset = 0;
+	off_t shard_end = 0;
+	unsigned char *block = NULL;
+	size_t start = 0;
+	size_t filled = 0;
+
+	void refill() {
+		memmove(block, block + start, filled - start);
+		filled -= start;
+		start = 0;
+		while (filled < DECISION_BLOCK_SIZE) {
+			size_t wanted = DECISION_BLOCK_SIZE - filled;
+			if (!is_stream && (off_t) wanted > shard_end - offset)
+				wanted = shard_end - offset;
+			if (!wanted)
+				break;
+			ssize_t r = is_stream ? read(fd, block + filled, wanted) : pread(fd, block + filled, wanted, offset);
+			if (r < 0 && errno == EINTR)
+				continue;
+			if (r <= 0)
+				break;
+			filled += r;
+			offset += r;
+		}
+	}
+
+public:
+	bool open(const char *source, int shard, int shards) {
+		fd = ::open(source, O_RDONLY);
+		if (fd == -1) {
+			perror(source);
+			return false;
+		}
+		struct stat st;
+		if (fstat(fd, &st) == 0 && S_ISREG(st.st_mode)) {
+			is_stream = false;
+			offset = st.st_size * shard / shards;
+			shard_end = st.st_size * (shard + 1) / shards;
+		}
+		block = new unsigned char[DECISION_BLOCK_SIZE];
+		return true;
+	}
+
+	~decision_reader() {
+		if (fd != -1)
+			close(fd);
+		delete[] block;
+	}
+
+	// Return the next decisions and store how many bytes are available
+	unsigned char *next(size_t *size) {
+		if (filled - start < MAX_RAND_SIZE)
+			refill();
+		*size = filled - start;
+		if (*size > MAX_RAND_SIZE)
+			*size = MAX_RAND_SIZE;
+		return block + start;
+	}
+
+	void consume(size_t size) {
+		start += size;
+	}
+};
+
+// Collects generated files in memory and writes them out in batches,
+// relative to an open output directory.
+class batch_writer {
+	int dir_fd = -1;
+	std::string buffer;
+	std::vector<std::pair<std::string, size_t>> files;
+
+public:
+	size_t max_batch = 4 << 20;
+
+	bool open(const char *dir) {
+		if (mkdir(dir, 0777) && errno != EEXIST) {
+			perror(dir);
+			return false;
+		}
+		dir_fd = ::open(dir, O_RDONLY | O_DIRECTORY);
+		if (dir_fd == -1) {
+			perror(dir);
+			return false;
+		}
+		return true;
+	}
+
+	~batch_writer() {
+		flush();
+		if (dir_fd != -1)
+			close(dir_fd);
+	}
+
+	// Add a file; returns the number of files that could not be written
+	// if this filled the batch and flushed it
+	int add(const std::string& name, const unsigned char *data, size_t size) {
+		buffer.append((const char *) data, size);
+		files.emplace_back(name, size);
+		if (buffer.size() >= max_batch)
+			return flush();
+		return 0;
+	}
+
+	// Write out the batch; returns the number of files that could not be written
+	int flush() {
+		int errors = 0;
+		const char *p = buffer.data();
+		for (auto& f : files) {
+			int fd = openat(dir_fd, f.first.c_str(), O_CREAT | O_WRONLY | O_TRUNC, S_IRUSR | S_IWUSR | S_IRGRP | S_IWGRP | S_IROTH);
+			if (fd == -1 || write(fd, p, f.second) != (ssize_t) f.second) {
+				perror(f.first.c_str());
+				++errors;
+			}
+			if (fd != -1)
+				close(fd);
+			p += f.second;
+		}
+		buffer.clear();
+		files.clear();
+		return errors;
+	}
+};
+
+unsigned copy_rand(unsigned char *dest);
+
+// Collects the decisions of parsed inputs and writes them to their sink in
+// large batches; the decisions of several inputs are concatenated
+class decision_writer {
+	int fd = -1;
+	std::string buffer;
+
+public:
+	size_t max_batch = 4 << 20;
+
+	bool open(const char *sink) {
+		if (strcmp(sink, "-") == 0)
+			fd = STDOUT_FILENO;
+		else
+			fd = ::open(sink, O_CREAT | O_WRONLY | O_TRUNC, S_IRUSR | S_IWUSR | S_IRGRP | S_IWGRP | S_IROTH);
+		if (fd == -1) {
+			perror(sink);
+			return false;
+		}
+		return true;
+	}
+
+	~decision_writer() {
+		flush();
+		if (fd != -1 && fd != STDOUT_FILENO)
+			close(fd);
+	}
+
+	// Add the decisions of the last parse
+	void add() {
+		size_t size = buffer.size();
+		buffer.resize(size + get_rand_pos());
+		copy_rand((unsigned char *) &buffer[size]);
+		if (buffer.size() >= max_batch)
+			flush();
+	}
+
+	int flush() {
+		const char *p = buffer.data();
+		size_t left = buffer.size();
+		while (left) {
+			ssize_t res = write(fd, p, left);
+			if (res <= 0) {
+				perror("Failed to write decisions");
+				buffer.clear();
+				return 1;
+			}
+			p += res;
+			left -= res;
+		}
+		buffer.clear();
+		return 0;
+	}
+};
+
+struct fuzz_stats {
+	int created = 0;
+	int failed = 0;
+	unsigned long long bytes = 0;
+};
+
+// Generate the files numbered shard, shard + shards, ... below count into dir
+static fuzz_stats fuzz_worker(const char *decision_source, const char *dir, int count, int shard, int shards) {
+	fuzz_stats stats;
+	decision_reader decisions;
+	batch_writer writer;
+	if (!decisions.open(decision_source, shard, shards) || !writer.open(dir)) {
+		stats.failed = count;
+		return stats;
+	}
+	std::string extension = "." + get_format_name();
+	char name[32];
+	set_generator();
+	for (int i = shard; i < count; i += shards) {
+		size_t size;
+		unsigned char *data = decisions.next(&size);
+		if (size == 0) {
+			fprintf(stderr, "%s: %s exhausted after %d files\n", bin_name, decision_source, stats.created + stats.failed);
+			// the remaining files of this shard could not be attempted
+			stats.failed += (count - i + shards - 1) / shards;
+			break;
+		}
+		unsigned char *file = NULL;
+		size_t file_size = ff_generate(data, size, &file);
+		decisions.consume(get_rand_pos());
+		if (!file) {
+			++stats.failed;
+			continue;
+		}
+		snprintf(name, sizeof(name), "%06d", i);
+		++stats.created;
+		stats.bytes += file_size;
+		int errors = writer.add(name + extension, file, file_size);
+		stats.created -= errors;
+		stats.failed += errors;
+	}
+	int errors = writer.flush();
+	stats.created -= errors;
+	stats.failed += errors;
+	return stats;
+}
+
+// Run fuzz_worker() on jobs forked processes and add up their results
+static int fuzz_batch(const char *decision_source, const char *dir, int count, int jobs) {
+	fuzz_stats total;
+	uint64_t start = get_cur_time_us();
+	if (jobs <= 1) {
+		total = fuzz_worker(decision_source, dir, count, 0, 1);
+	} else {
+		std::vector<std::pair<pid_t, int>> workers;
+		for (int shard = 0; shard < jobs; ++shard) {
+			int fds[2];
+			if (pipe(fds)) {
+				perror("pipe");
+				break;
+			}
+			pid_t pid = fork();
+			if (pid == -1) {
+				perror("fork");
+				close(fds[0]);
+				close(fds[1]);
+				break;
+			}
+			if (pid == 0) {
+				close(fds[0]);
+				fuzz_stats stats = fuzz_worker(decision_source, dir, count, shard, jobs);
+				ssize_t r = write(fds[1], &stats, sizeof(stats));
+				if (profiling && !ff_profile_send(fds[1]))
+					r = -1;
+				_exit(r == sizeof(stats) ? 0 : 1);
+			}
+			close(fds[1]);
+			workers.emplace_back(pid, fds[0]);
+		}
+		for (auto& w : workers) {
+			fuzz_stats stats;
+			if (read(w.second, &stats, sizeof(stats)) == sizeof(stats)) {
+				total.created += stats.created;
+				total.failed += stats.failed;
+				total.bytes += stats.bytes;
+				if (profiling && !ff_profile_receive(w.second))
+					fprintf(stderr, "%s: no profile from worker %d\n", bin_name, (int) w.first);
+			} else {
+				fprintf(stderr, "%s: worker %d failed\n", bin_name, (int) w.first);
+				++total.failed;
+			}
+			close(w.second);
+			waitpid(w.first, NULL, 0);
+		}
+	}
+	double time = (get_cur_time_us() - start) / 1.0e6;
+	fprintf(stderr, "%s: created %d files in %s (%d failed) in %f s (%f / s, %llu bytes).\n", bin_name, total.created, dir, total.failed, time, total.created / time, total.bytes);
+	return total.failed;
+}
 
 // Each command comes as if it were invoked from the command line
 
@@ -33,6 +358,9 @@ extern bool aflsmart_output;
 int fuzz(int argc, char **argv)
 {
 	const char *decision_source = "/dev/urandom";
+	const char *outdir = NULL;
+	int count = -1;
+	int jobs = 1;
 
 	// Process options
 	while (1)
@@ -41,9 +369,12 @@ int fuzz(int argc, char **argv)
 			{
 				{"help", no_argument, 0, 'h'},
 				{"decisions", required_argument, 0, 'd'},
+				{"jobs", required_argument, 0, 'j'},
+				{"count", required_argument, 0, 'n'},
+				{"outdir", required_argument, 0, 'o'},
 				{0, 0, 0, 0}};
 		int option_index = 0;
-		int c = getopt_long(argc, argv, "d:p",
+		int c = getopt_long(argc, argv, "d:pj:n:o:",
 							long_options, &option_index);
 
 		// Detect the end of the options.
@@ -55,9 +386,15 @@ int fuzz(int argc, char **argv)
 		case 'h':
 		case '?':
 			fprintf(stderr, "fuzz: usage: fuzz [--decisions SOURCE] [FILES...|-]\n");
+			fprintf(stderr, "       fuzz [--decisions SOURCE] [--jobs N] --count M --outdir DIR\n");
 			fprintf(stderr, "Outputs random data to given FILES (or `-' for standard output).\n");
 			fprintf(stderr, "Options:\n");
 			fprintf(stderr, "--decisions SOURCE: Use SOURCE for generation decisions (default %s)\n", decision_source);
+			fprintf(stderr, "--count M: Make M generation attempts, saving files 000000.%s, ... in DIR\n", get_format_name().c_str());
+			fprintf(stderr, "--outdir DIR: Output directory for --count (created if needed)\n");
+			fprintf(stderr, "--jobs N: Split --count among N worker processes (default 1)\n");
+			fprintf(stderr, "With --count, SOURCE is read as a stream of consecutive decision sequences;\n");
+			fprintf(stderr, "a regular file is split into one contiguous shard per worker.\n");
 			fprintf(stderr, "-p: print parse tree\n");
 			return 0;
 
@@ -67,8 +404,29 @@ int fuzz(int argc, char **argv)
 		case 'p':
 			get_parse_tree = true;
 			break;
+		case 'j':
+			jobs = strtol(optarg, NULL, 0);
+			break;
+		case 'n':
+			count = strtol(optarg, NULL, 0);
+			break;
+		case 'o':
+			outdir = optarg;
+			break;
 		}
 	}
+
+	if (count >= 0 || outdir) {
+		if (count < 0 || !outdir) {
+			fprintf(stderr, "%s: --count and --outdir must be given together.\n", bin_name);
+			return 1;
+		}
+		if (jobs < 1) {
+			fprintf(stderr, "%s: invalid number of jobs.\n", bin_name);
+			return 1;
+		}
+		return fuzz_batch(decision_source, outdir, count, jobs) != 0;
+	}
     
     if (optind >= argc) {
 		fprintf(stderr, "%s: missing output files. (Use '-' for standard output)\n", bin_name);
@@ -139,6 +497,7 @@ int parse(int argc, char **argv)
 			fprintf(stderr, "Parses given FILES (or `-' for standard input).\n");
 			fprintf(stderr, "Options:\n");
 			fprintf(stderr, "--decisions SINK: Save parsing decisions in SINK (default: none)\n");
+			fprintf(stderr, "With several FILES, their decisions are concatenated in SINK.\n");
 			return 0;
 
 		case 'd':
@@ -155,6 +514,10 @@ int parse(int argc, char **argv)
         return 1;
     }
 
+	decision_writer decisions;
+	if (decision_sink && !decisions.open(decision_sink))
+		return 1;
+
 	int errors = 0;
 	for (int arg = optind; arg < argc; arg++)
 	{
@@ -189,55 +552,38 @@ int parse(int argc, char **argv)
 		}
 
 		if (decision_sink)
-			save_output(decision_sink);
+			decisions.add();
 	}
 
-	return errors;
+	return errors + decisions.flush();
 }
 
-extern "C" size_t ff_generate(unsigned char* data, size_t size, unsigned char** new_data);
-extern "C" int ff_parse(unsigned char* data, size_t size, unsigned char** new_data, size_t* new_size);
-extern bool print_errors;
+extern thread_local bool print_errors;
 extern std::unordered_map<std::string, std::string> variable_types;
 
-unsigned copy_rand(unsigned char *dest);
-
-extern const char* chunk_name;
-extern const char* chunk_name2;
-extern int file_index;
-
-extern bool get_chunk;
-extern bool get_all_chunks;
-extern bool smart_mutation;
-extern bool smart_abstraction;
-extern bool smart_swapping;
-extern unsigned chunk_start;
-extern unsigned chunk_end;
-extern unsigned rand_start;
-extern unsigned rand_end;
-extern unsigned rand_start2;
-extern unsigned rand_end2;
-extern bool is_optional;
-extern bool is_delete;
-extern bool following_is_optional;
-
-extern unsigned char *following_rand_buffer;
-extern unsigned following_rand_size;
-
-extern unsigned char *rand_buffer;
-
-/* Get unix time in microseconds */
-
-static uint64_t get_cur_time_us(void) {
-
-  struct timeval  tv;
-  struct timezone tz;
-
-  gettimeofday(&tv, &tz);
-
-  return (tv.tv_sec * 1000000ULL) + tv.tv_usec;
-
-}
+extern thread_local const char* chunk_name;
+extern thread_local const char* chunk_name2;
+extern thread_local int file_index;
+
+extern thread_local bool get_chunk;
+extern thread_local bool get_all_chunks;
+extern thread_local bool smart_mutation;
+extern thread_local bool smart_abstraction;
+extern thread_local bool smart_swapping;
+extern thread_local unsigned chunk_start;
+extern thread_local unsigned chunk_end;
+extern thread_local unsigned rand_start;
+extern thread_local unsigned rand_end;
+extern thread_local unsigned rand_start2;
+extern thread_local unsigned rand_end2;
+extern thread_local bool is_optional;
+extern thread_local bool is_delete;
+extern thread_local bool following_is_optional;
+
+extern thread_local unsigned char *following_rand_buffer;
+extern thread_local unsigned following_rand_size;
+
+extern thread_local unsigned char *rand_buffer;
 
 void write_file(const char* filename, unsigned char* data, size_t size) {
 	printf("Saving file %s\n", filename);
@@ -1223,12 +1569,454 @@ smaller number of decision bytes.
 }
 
 
-extern "C" int process_file(const char *file_name, const char *rand_name) {
+unsigned read_file(const char* file_name, unsigned char* file_buffer);
+
+// Decision store
+//
+// Smart mutations combine the decisions of two processed files.  Rather
+// than reading them from the decision files for every mutation, the
+// decisions of all processed files are kept in memory: those of indexed
+// files point into the mapped chunk index, the others are copied when the
+// file is processed.  Copies are bounded to FF_DECISION_STORE_SIZE bytes
+// (default 256 MB) by dropping the least recently used ones, which are
+// read again from their decision files when needed.
+
+#define DEFAULT_DECISION_STORE_SIZE (256UL << 20)
+
+struct stored_decisions {
+	const unsigned char* data = NULL;
+	unsigned size = 0;
+	// Empty if data points into the chunk index
+	std::vector<unsigned char> copy;
+	// Whether the copy may be dropped, and its position in decision_lru
+	bool evictable = false;
+	std::list<int>::iterator lru;
+};
+
+static thread_local std::vector<stored_decisions> decision_store;
+// Indices of stored copies, most recently used first
+static thread_local std::list<int> decision_lru;
+static thread_local size_t decision_store_size = 0;
+static thread_local size_t decision_store_limit = 0;
+
+static void drop_decisions(int index) {
+	stored_decisions& d = decision_store[index];
+	if (d.evictable) {
+		decision_store_size -= d.copy.size();
+		decision_lru.erase(d.lru);
+		d.evictable = false;
+	}
+	std::vector<unsigned char>().swap(d.copy);
+	d.data = NULL;
+	d.size = 0;
+}
+
+// Store the decisions of processed file index; a mapped store refers to
+// data instead of copying it
+static void store_decisions(int index, const unsigned char* data, unsigned size, bool mapped) {
+	if (!decision_store_limit) {
+		const char* limit = getenv("FF_DECISION_STORE_SIZE");
+		decision_store_limit = limit ? strtoul(limit, NULL, 0) : DEFAULT_DECISION_STORE_SIZE;
+		if (!decision_store_limit)
+			decision_store_limit = 1;
+	}
+	if ((size_t) index >= decision_store.size())
+		decision_store.resize(index + 1);
+	drop_decisions(index);
+	stored_decisions& d = decision_store[index];
+	d.size = size;
+	if (mapped || !size) {
+		d.data = data;
+		return;
+	}
+	while (!decision_lru.empty() && decision_store_size + size > decision_store_limit)
+		drop_decisions(decision_lru.back());
+	d.copy.assign(data, data + size);
+	d.data = d.copy.data();
+	decision_store_size += size;
+	decision_lru.push_front(index);
+	d.lru = decision_lru.begin();
+	d.evictable = true;
+}
+
+// Return the decisions of processed file index and their size
+static const unsigned char* get_decisions(int index, unsigned* size) {
+	if ((size_t) index < decision_store.size() && decision_store[index].data) {
+		stored_decisions& d = decision_store[index];
+		if (d.evictable && d.lru != decision_lru.begin())
+			decision_lru.splice(decision_lru.begin(), decision_lru, d.lru);
+		*size = d.size;
+		return d.data;
+	}
+	static thread_local unsigned char* buffer = NULL;
+	if (!buffer)
+		buffer = new_buffer(RAND_RESERVE_SIZE, MAX_RAND_SIZE);
+	// ff_set_max_size() may have raised the limit since the last call
+	commit_buffer(buffer, MAX_RAND_SIZE);
+	*size = read_file(rand_names[index].c_str(), buffer);
+	store_decisions(index, buffer, *size, false);
+	return decision_store[index].data;
+}
+
+// Copy the decisions of indexed files before unmapping the index.  These
+// copies are never dropped, as indexed files have no decision files.
+static void copy_mapped_decisions() {
+	for (stored_decisions& d : decision_store) {
+		if (d.data && d.copy.empty() && d.size) {
+			d.copy.assign(d.data, d.data + d.size);
+			d.data = d.copy.data();
+		}
+	}
+}
+
+
+// Chunk index
+//
+// Parsing every seed to find its chunks can make mutator startup take
+// minutes for large corpora.  A chunk index file keeps the chunk tables and
+// decisions of each parsed seed, keyed by the seed's path, size and
+// modification time, so that process_file() only parses new or changed
+// seeds.  New records are appended to the file; an index built for another
+// template (or index version) is discarded and rebuilt.
+
+#define CHUNK_INDEX_MAGIC "FFCHUNKS"
+#define CHUNK_INDEX_VERSION 1
+
+struct chunk_index_header {
+	char magic[8];
+	uint32_t version;
+	uint32_t simple_mutations;
+	char template_hash[64];
+};
+
+// Each record is followed by the seed path, its decisions and its chunk
+// tables, and padded to a multiple of 8 bytes
+struct chunk_index_record {
+	uint32_t size;
+	uint32_t path_size;
+	uint64_t file_size;
+	int64_t mtime;
+	double validity;
+	uint32_t rand_size;
+	uint32_t insertion_points;
+	uint32_t deletable_chunks;
+	uint32_t optional_chunks;
+	uint32_t non_optional_types;
+	uint32_t padding;
+};
+
+static thread_local int chunk_index_fd = -1;
+static thread_local bool chunk_index_checked = false;
+static thread_local unsigned char* chunk_index_map = NULL;
+static thread_local size_t chunk_index_map_size = 0;
+static thread_local std::unordered_map<std::string, const chunk_index_record*> chunk_index_records;
+// Chunk types and names of indexed files
+static thread_local std::unordered_set<std::string> chunk_index_strings;
+
+static void fill_index_header(chunk_index_header& header) {
+	memset(&header, 0, sizeof(header));
+	memcpy(header.magic, CHUNK_INDEX_MAGIC, sizeof(header.magic));
+	header.version = CHUNK_INDEX_VERSION;
+#ifdef SIMPLE_MUTATIONS
+	header.simple_mutations = 1;
+#endif
+	memcpy(header.template_hash, template_hash, std::min(strlen(template_hash), sizeof(header.template_hash)));
+}
+
+static void close_chunk_index() {
+	copy_mapped_decisions();
+	if (chunk_index_map)
+		munmap(chunk_index_map, chunk_index_map_size);
+	if (chunk_index_fd != -1)
+		close(chunk_index_fd);
+	chunk_index_fd = -1;
+	chunk_index_map = NULL;
+	chunk_index_map_size = 0;
+	chunk_index_records.clear();
+}
+
+static bool valid_index_record(const chunk_index_record* record);
+
+// Use the chunk index in path for the following calls of process_file(),
+// creating it if needed.  Returns 0 on success.  Several processes can share
+// an index: the file is locked while it is checked and while records are
+// appended.
+extern "C" int ff_open_chunk_index(const char* path) {
+	close_chunk_index();
+	chunk_index_checked = true;
+	int fd = open(path, O_RDWR | O_CREAT | O_APPEND, S_IRUSR | S_IWUSR | S_IRGRP | S_IWGRP | S_IROTH);
+	if (fd == -1) {
+		perror(path);
+		return -1;
+	}
+	struct stat st;
+	if (flock(fd, LOCK_EX) == -1 || fstat(fd, &st) == -1) {
+		perror(path);
+		close(fd);
+		return -1;
+	}
+	chunk_index_header header;
+	fill_index_header(header);
+	size_t size = st.st_size;
+	size_t valid_size = 0;
+	if (size >= sizeof(header)) {
+		void* map = mmap(NULL, size, PROT_READ, MAP_SHARED, fd, 0);
+		if (map != MAP_FAILED) {
+			chunk_index_map = (unsigned char*) map;
+			chunk_index_map_size = size;
+		}
+	}
+	if (chunk_index_map && memcmp(chunk_index_map, &header, sizeof(header)) == 0) {
+		valid_size = sizeof(header);
+		while (valid_size + sizeof(chunk_index_record) <= size) {
+			const chunk_index_record* record = (const chunk_index_record*) (chunk_index_map + valid_size);
+			if (record->size < sizeof(chunk_index_record) || record->size % 8 || record->size > size - valid_size
+				|| !valid_index_record(record))
+				break;
+			std::string file_name((const char*) (record + 1), record->path_size);
+			chunk_index_records[file_name] = record;
+			valid_size += record->size;
+		}
+	}
+	if (valid_size == 0 && size > 0) {
+		// Made by a different template: other processes may still have
+		// the old index mapped, so replace the file instead of truncating it
+		close_chunk_index();
+		std::string new_path = std::string(path) + ".new-" + std::to_string(getpid());
+		int new_fd = open(new_path.c_str(), O_RDWR | O_CREAT | O_TRUNC | O_APPEND, S_IRUSR | S_IWUSR | S_IRGRP | S_IWGRP | S_IROTH);
+		if (new_fd == -1 || write(new_fd, &header, sizeof(header)) != sizeof(header)
+			|| rename(new_path.c_str(), path) == -1) {
+			perror(path);
+			if (new_fd != -1) {
+				close(new_fd);
+				unlink(new_path.c_str());
+			}
+			close(fd);
+			return -1;
+		}
+		close(fd);
+		chunk_index_fd = new_fd;
+		return 0;
+	}
+	if (valid_size == 0) {
+		if (write(fd, &header, sizeof(header)) != sizeof(header)) {
+			perror(path);
+			close(fd);
+			return -1;
+		}
+	} else if (valid_size != size) {
+		// Drop an incomplete or damaged last record.  Writers hold the
+		// lock, so this is never a record that is still being appended.
+		if (ftruncate(fd, valid_size) == -1)
+			perror(path);
+	}
+	flock(fd, LOCK_UN);
+	chunk_index_fd = fd;
+	return 0;
+}
+
+static void put_u32(std::string& out, uint32_t value) {
+	out.append((const char*) &value, sizeof(value));
+}
+
+static void put_str(std::string& out, const char* s) {
+	uint32_t size = strlen(s);
+	put_u32(out, size);
+	out.append(s, size);
+}
+
+static uint32_t get_u32(const unsigned char*& p) {
+	uint32_t value;
+	memcpy(&value, p, sizeof(value));
+	p += sizeof(value);
+	return value;
+}
+
+static const char* get_str(const unsigned char*& p) {
+	uint32_t size = get_u32(p);
+	const char* s = chunk_index_strings.emplace((const char*) p, size).first->c_str();
+	p += size;
+	return s;
+}
+
+static void write_index_chunk(std::string& out, const Chunk& c) {
+	put_u32(out, c.start);
+	put_u32(out, c.end);
+#ifdef SIMPLE_MUTATIONS
+	put_u32(out, c.start_file);
+	put_u32(out, c.end_file);
+#else
+	put_u32(out, 0);
+	put_u32(out, 0);
+#endif
+	put_str(out, c.type);
+	put_str(out, c.name);
+}
+
+static Chunk read_index_chunk(const unsigned char*& p) {
+	unsigned start = get_u32(p);
+	unsigned end = get_u32(p);
+	unsigned start_file = get_u32(p);
+	unsigned end_file = get_u32(p);
+	const char* type = get_str(p);
+	const char* name = get_str(p);
+	return Chunk(file_index, start, end, type, name, start_file, end_file);
+}
+
+// Append the chunk tables and decisions of the file just processed
+static void add_index_record(const char* file_name, const struct stat& st, double validity, unsigned rand_size) {
+	std::string data;
+	data.append(file_name);
+	data.append((const char*) rand_buffer, rand_size);
+	for (const InsertionPoint& ip : insertion_points[file_index]) {
+		put_u32(data, ip.pos);
+#ifdef SIMPLE_MUTATIONS
+		put_u32(data, ip.pos_file);
+#else
+		put_u32(data, 0);
+#endif
+		put_str(data, ip.type);
+		put_str(data, ip.name);
+	}
+	for (const Chunk& c : deletable_chunks[file_index])
+		write_index_chunk(data, c);
+	for (unsigned i = optional_index.back(); i < optional_chunks.size(); ++i)
+		write_index_chunk(data, optional_chunks[i]);
+	for (const NonOptional& no : non_optional_index[file_index]) {
+		put_str(data, no.type);
+		put_u32(data, no.size);
+		std::vector<Chunk>& chunks = non_optional_chunks[no.type];
+		for (int i = no.start; i < no.start + no.size; ++i)
+			write_index_chunk(data, chunks[i]);
+	}
+
+	chunk_index_record record;
+	memset(&record, 0, sizeof(record));
+	record.path_size = strlen(file_name);
+	record.file_size = st.st_size;
+	record.mtime = st.st_mtim.tv_sec * 1000000000LL + st.st_mtim.tv_nsec;
+	record.validity = validity;
+	record.rand_size = rand_size;
+	record.insertion_points = insertion_points[file_index].size();
+	record.deletable_chunks = deletable_chunks[file_index].size();
+	record.optional_chunks = optional_chunks.size() - optional_index.back();
+	record.non_optional_types = non_optional_index[file_index].size();
+	data.resize((data.size() + 7) & ~7);
+	record.size = sizeof(record) + data.size();
+	data.insert(0, (const char*) &record, sizeof(record));
+	// Concurrent writers must not interleave records, and readers must not
+	// see (and drop) a partly written one
+	flock(chunk_index_fd, LOCK_EX);
+	if (write(chunk_index_fd, data.data(), data.size()) != (ssize_t) data.size())
+		perror("Failed to write chunk index");
+	flock(chunk_index_fd, LOCK_UN);
+}
+
+// Bounds-checked reading, to validate records
+static bool skip_bytes(const unsigned char*& p, const unsigned char* end, size_t size) {
+	if ((size_t) (end - p) < size)
+		return false;
+	p += size;
+	return true;
+}
+
+static bool check_u32(const unsigned char*& p, const unsigned char* end, uint32_t& value) {
+	if ((size_t) (end - p) < sizeof(value))
+		return false;
+	value = get_u32(p);
+	return true;
+}
+
+static bool skip_str(const unsigned char*& p, const unsigned char* end) {
+	uint32_t size;
+	return check_u32(p, end, size) && skip_bytes(p, end, size);
+}
+
+static bool skip_index_chunks(const unsigned char*& p, const unsigned char* end, uint32_t count) {
+	for (uint32_t i = 0; i < count; ++i) {
+		if (!skip_bytes(p, end, 4 * sizeof(uint32_t)) || !skip_str(p, end) || !skip_str(p, end))
+			return false;
+	}
+	return true;
+}
+
+// Check that all lengths and counts of record stay within its size, so that
+// load_index_record() does not read past it
+static bool valid_index_record(const chunk_index_record* record) {
+	const unsigned char* p = (const unsigned char*) (record + 1);
+	const unsigned char* end = (const unsigned char*) record + record->size;
+	if (!skip_bytes(p, end, record->path_size) || !skip_bytes(p, end, record->rand_size))
+		return false;
+	for (uint32_t i = 0; i < record->insertion_points; ++i) {
+		if (!skip_bytes(p, end, 2 * sizeof(uint32_t)) || !skip_str(p, end) || !skip_str(p, end))
+			return false;
+	}
+	if (!skip_index_chunks(p, end, record->deletable_chunks) || !skip_index_chunks(p, end, record->optional_chunks))
+		return false;
+	for (uint32_t i = 0; i < record->non_optional_types; ++i) {
+		uint32_t size;
+		if (!skip_str(p, end) || !check_u32(p, end, size) || !skip_index_chunks(p, end, size))
+			return false;
+	}
+	return true;
+}
+
+// Add the chunk tables of an indexed file as if it had been parsed
+static double load_index_record(const chunk_index_record* record) {
+	const unsigned char* p = (const unsigned char*) (record + 1) + record->path_size;
+	store_decisions(file_index, p, record->rand_size, true);
+	p += record->rand_size;
+	for (unsigned i = 0; i < record->insertion_points; ++i) {
+		unsigned pos = get_u32(p);
+		unsigned pos_file = get_u32(p);
+		const char* type = get_str(p);
+		const char* name = get_str(p);
+		insertion_points[file_index].emplace_back(pos, type, name, pos_file);
+	}
+	for (unsigned i = 0; i < record->deletable_chunks; ++i)
+		deletable_chunks[file_index].push_back(read_index_chunk(p));
+	for (unsigned i = 0; i < record->optional_chunks; ++i)
+		optional_chunks.push_back(read_index_chunk(p));
+	for (unsigned i = 0; i < record->non_optional_types; ++i) {
+		const char* type = get_str(p);
+		unsigned size = get_u32(p);
+		std::vector<Chunk>& chunks = non_optional_chunks[type];
+		non_optional_index[file_index].emplace_back(type, chunks.size(), size);
+		for (unsigned j = 0; j < size; ++j)
+			chunks.push_back(read_index_chunk(p));
+	}
+	return record->validity;
+}
+
+static int process_file(const char *file_name, const char *rand_name, bool use_index) {
 	rand_names.push_back(rand_name);
 	file_names.push_back(file_name);
 	insertion_points.push_back({});
 	deletable_chunks.push_back({});
 	non_optional_index.push_back({});
+
+	if (!chunk_index_checked) {
+		const char* index_name = getenv("FF_CHUNK_INDEX");
+		if (index_name)
+			ff_open_chunk_index(index_name);
+		chunk_index_checked = true;
+	}
+	struct stat st;
+	bool indexed = use_index && chunk_index_fd != -1 && stat(file_name, &st) == 0;
+	if (indexed) {
+		auto it = chunk_index_records.find(file_name);
+		// Decisions larger than the current limit would not fit the
+		// mutation buffers, so such files are parsed again
+		if (it != chunk_index_records.end() && it->second->file_size == (uint64_t) st.st_size
+			&& it->second->rand_size <= MAX_RAND_SIZE
+			&& it->second->mtime == st.st_mtim.tv_sec * 1000000000LL + st.st_mtim.tv_nsec) {
+			double validity = load_index_record(it->second);
+			++file_index;
+			optional_index.push_back(optional_chunks.size());
+			return 100.0 * validity;
+		}
+	}
+
 	bool success = false;
 
 	get_all_chunks = true;
@@ -1252,6 +2040,9 @@ extern "C" int process_file(const char *file_name, const char *rand_name) {
 	}
 	get_all_chunks = false;
 	save_output(rand_name);
+	store_decisions(file_index, rand_buffer, get_rand_pos(), false);
+	if (indexed)
+		add_index_record(file_name, st, get_validity(), get_rand_pos());
 	++file_index;
 	optional_index.push_back(optional_chunks.size());
 	if (!success && debug_print)
@@ -1262,6 +2053,41 @@ extern "C" int process_file(const char *file_name, const char *rand_name) {
 
 }
 
+extern "C" int process_file(const char *file_name, const char *rand_name) {
+	return process_file(file_name, rand_name, true);
+}
+
+// Like process_file(), but never keeps file_name in the chunk index, for
+// temporary files that are forgotten again with forget_last_file()
+extern "C" int process_temp_file(const char *file_name, const char *rand_name) {
+	return process_file(file_name, rand_name, false);
+}
+
+static void drop_checkpoints(int index);
+
+// Remove the chunks and decisions of the last processed file, so that its
+// file index is used by the next one
+extern "C" void forget_last_file() {
+	if (file_index == 0)
+		return;
+	--file_index;
+	drop_checkpoints(file_index);
+	// The chunks of the last file are at the end of all tables
+	for (const NonOptional& no : non_optional_index[file_index]) {
+		std::vector<Chunk>& chunks = non_optional_chunks[no.type];
+		chunks.erase(chunks.begin() + no.start, chunks.end());
+	}
+	optional_index.pop_back();
+	optional_chunks.erase(optional_chunks.begin() + optional_index.back(), optional_chunks.end());
+	non_optional_index.pop_back();
+	insertion_points.pop_back();
+	deletable_chunks.pop_back();
+	rand_names.pop_back();
+	file_names.pop_back();
+	if ((size_t) file_index < decision_store.size())
+		drop_decisions(file_index);
+}
+
 unsigned read_file(const char* file_name, unsigned char* file_buffer) {
 	int file_fd = open(file_name, O_RDONLY);
 	if (file_fd == -1) {
@@ -1277,9 +2103,424 @@ unsigned read_file(const char* file_name, unsigned char* file_buffer) {
 	return size;
 }
 
-char mutation_info[1024];
-char* print_pos = mutation_info;
-size_t buf_size = 1024;
+// Checkpoints for smart mutations
+//
+// A smart mutation only changes the decisions of its target file from the
+// mutated chunk on, but generating the mutant starts again at the first
+// decision.  Most of the state of the generator is in the locals of the
+// nested generate() calls, so checkpoints of it are taken with fork(),
+// which keeps the native stack along with everything else.
+//
+// For a target file with enough decisions, a forked builder generates the
+// original decisions once.  Every checkpoint_spacing decision bytes, at the
+// start of the next variable, start_generation() calls take_checkpoint(),
+// which forks a server that stays at this point while the builder goes on.
+// To generate a mutant, the server of the last checkpoint before the
+// mutated decisions forks again, and its child resumes the generation with
+// the mutated decisions and passes the file back through shared memory.
+// The generator never reads decisions before its position again, so the
+// mutant is the same as that of a complete generation.  Servers exit when
+// their socket is closed.
+//
+// Resuming costs two forks and the exit of the resumed generator, which
+// takes longer than generating the decisions of small files.  The builder
+// therefore records how long it took to reach each checkpoint, and a
+// checkpoint is only used if this is more than the measured overhead of
+// resuming.
+//
+// Checkpoints are off unless FF_CHECKPOINTS or ff_set_checkpoints() asks
+// for them: the servers are copies of the host process, and fork() is only
+// safe in hosts with a single thread, so they are never taken while other
+// threads run.  The builder closes the descriptors of the host (e.g. the
+// pipes of the AFL++ fork server) other than stdio, so the servers do not
+// keep them open.
+
+#define MAX_CHECKPOINTS 64
+// Target files that have checkpoints at the same time
+#define CHECKPOINT_FILES 8
+// Minimum number of decision bytes between checkpoints; generating fewer
+// takes less time than a fork
+#define CHECKPOINT_SPACING 16384
+
+// Shared by the fuzzer, the builder, the servers and the resumed generators,
+// followed by the decisions, the following decisions of smart abstractions
+// and the generated file
+struct checkpoint_shared {
+	// Positions of the checkpoints taken by the builder
+	unsigned count;
+	unsigned pos[MAX_CHECKPOINTS];
+	// Microseconds the builder took to generate the decisions before them
+	uint64_t elapsed[MAX_CHECKPOINTS];
+	// The mutation to generate; rand_end and smart_abstraction are updated
+	// by the generator
+	bool smart_mutation;
+	bool smart_abstraction;
+	bool get_parse_tree;
+	bool is_optional;
+	unsigned rand_start;
+	unsigned rand_end;
+	unsigned following_rand_size;
+	char chunk_name[256];
+	// Set by the resumed generator when it has generated the file
+	bool done;
+	unsigned file_size;
+	uint64_t generation_time;
+};
+
+struct checkpoint_chain {
+	int file_index;
+	unsigned long long last_use;
+	std::vector<unsigned> pos;
+	std::vector<uint64_t> elapsed;
+	// Socket to the server of each checkpoint
+	std::vector<int> fds;
+};
+
+static thread_local int checkpoints = -1;
+static thread_local std::vector<checkpoint_chain> checkpoint_chains;
+static thread_local unsigned long long checkpoint_uses = 0;
+static thread_local int checkpoint_last_target = -1;
+static thread_local checkpoint_shared* checkpoint_mem = NULL;
+static thread_local size_t checkpoint_mem_size = 0;
+static thread_local unsigned checkpoint_rand_size = 0;
+// Average microseconds a mutant generated from a checkpoint takes longer
+// than its generation
+static thread_local uint64_t checkpoint_overhead = 0;
+static thread_local bool checkpoint_measured = false;
+// In the builder and the resumed generators: the start of the generation,
+// not counting the time spent in fork()
+static thread_local uint64_t checkpoint_start;
+// In the builder: the spacing and the sockets of the servers to fork
+static thread_local unsigned checkpoint_spacing;
+static thread_local std::vector<int> checkpoint_fds;
+// In a resumed generator
+static thread_local bool checkpoint_resumed = false;
+
+extern thread_local unsigned checkpoint_pos;
+
+static unsigned char* checkpoint_decisions() {
+	return (unsigned char*) checkpoint_mem + 4096;
+}
+
+static unsigned char* checkpoint_following() {
+	return checkpoint_decisions() + checkpoint_rand_size;
+}
+
+static unsigned char* checkpoint_file() {
+	return checkpoint_following() + checkpoint_rand_size;
+}
+
+static void drop_checkpoint_chain(size_t i) {
+	for (int fd : checkpoint_chains[i].fds)
+		close(fd);
+	checkpoint_chains.erase(checkpoint_chains.begin() + i);
+}
+
+// Drop the checkpoints of processed file index, or of all files if index
+// is -1
+static void drop_checkpoints(int index) {
+	for (size_t i = checkpoint_chains.size(); i-- > 0; ) {
+		if (index == -1 || checkpoint_chains[i].file_index == index)
+			drop_checkpoint_chain(i);
+	}
+}
+
+// Map the shared memory for the current maximum sizes
+static bool map_checkpoint_memory() {
+	if (checkpoint_mem && checkpoint_rand_size == MAX_RAND_SIZE)
+		return true;
+	drop_checkpoints(-1);
+	if (checkpoint_mem)
+		munmap(checkpoint_mem, checkpoint_mem_size);
+	checkpoint_rand_size = MAX_RAND_SIZE;
+	checkpoint_mem_size = 4096 + 2 * (size_t) MAX_RAND_SIZE + MAX_FILE_SIZE;
+	void* mem = mmap(NULL, checkpoint_mem_size, PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS | MAP_NORESERVE, -1, 0);
+	if (mem == MAP_FAILED) {
+		checkpoint_mem = NULL;
+		return false;
+	}
+	checkpoint_mem = (checkpoint_shared*) mem;
+	return true;
+}
+
+// Called by start_generation() in the builder once it has generated
+// checkpoint_pos decision bytes
+void take_checkpoint() {
+	checkpoint_shared* shared = checkpoint_mem;
+	unsigned k = shared->count;
+	int fd = checkpoint_fds[k];
+	uint64_t now = get_cur_time_us();
+	pid_t pid = fork();
+	if (pid == -1) {
+		checkpoint_pos = UINT_MAX;
+		return;
+	}
+	if (pid) {
+		close(fd);
+		shared->pos[k] = get_rand_pos();
+		shared->elapsed[k] = now - checkpoint_start;
+		checkpoint_start += get_cur_time_us() - now;
+		shared->count = k + 1;
+		checkpoint_pos = k + 1 < checkpoint_fds.size() ? get_rand_pos() + checkpoint_spacing : UINT_MAX;
+		return;
+	}
+
+	// The server
+	for (size_t i = k + 1; i < checkpoint_fds.size(); ++i)
+		close(checkpoint_fds[i]);
+	checkpoint_pos = UINT_MAX;
+	char c;
+	while (read(fd, &c, 1) == 1) {
+		shared->done = false;
+		pid = fork();
+		if (pid == 0) {
+			close(fd);
+			smart_mutation = shared->smart_mutation;
+			smart_abstraction = shared->smart_abstraction;
+			get_parse_tree = shared->get_parse_tree;
+			is_optional = shared->is_optional;
+			rand_start = shared->rand_start;
+			rand_end = shared->rand_end;
+			chunk_name = shared->chunk_name;
+			following_rand_buffer = checkpoint_following();
+			following_rand_size = shared->following_rand_size;
+			checkpoint_resumed = true;
+			checkpoint_start = get_cur_time_us();
+			// Resume the generation
+			return;
+		}
+		int status;
+		// 1: generated, 0: generation failed, -1: no generator
+		char result = -1;
+		if (pid != -1 && waitpid(pid, &status, 0) == pid)
+			result = WIFEXITED(status) && WEXITSTATUS(status) == 0 && shared->done;
+		if (write(fd, &result, 1) != 1)
+			break;
+	}
+	_exit(0);
+}
+
+// Whether this process has no other threads, which could hold locks that
+// forked processes never get back
+static bool single_threaded() {
+	FILE* f = fopen("/proc/self/status", "r");
+	if (!f)
+		return false;
+	char line[256];
+	int threads = 0;
+	while (fgets(line, sizeof(line), f)) {
+		if (sscanf(line, "Threads: %d", &threads) == 1)
+			break;
+	}
+	fclose(f);
+	return threads == 1;
+}
+
+// Close all descriptors other than stdio and those in keep
+static void close_host_fds(const std::vector<int>& keep) {
+	std::vector<int> fds;
+	DIR* dir = opendir("/proc/self/fd");
+	if (dir) {
+		while (struct dirent* entry = readdir(dir)) {
+			if (entry->d_name[0] != '.')
+				fds.push_back(atoi(entry->d_name));
+		}
+		closedir(dir);
+	} else {
+		for (int fd = 3; fd < 65536; ++fd)
+			fds.push_back(fd);
+	}
+	for (int fd : fds) {
+		if (fd > 2 && std::find(keep.begin(), keep.end(), fd) == keep.end())
+			close(fd);
+	}
+}
+
+// Take the checkpoints of processed file index.  Returns false if they
+// cannot be taken.
+static bool build_checkpoints(int index, checkpoint_chain& chain) {
+	if (!single_threaded())
+		return false;
+	unsigned len;
+	const unsigned char* decisions = get_decisions(index, &len);
+	unsigned spacing = std::max(len / checkpoints, (unsigned) CHECKPOINT_SPACING);
+	if (len < 2 * spacing || !map_checkpoint_memory())
+		return false;
+	memcpy(checkpoint_decisions(), decisions, len);
+	checkpoint_mem->count = 0;
+
+	unsigned count = std::min(len / spacing, (unsigned) checkpoints);
+	std::vector<int> fds, server_fds;
+	for (unsigned i = 0; i < count; ++i) {
+		int sv[2];
+		if (socketpair(AF_UNIX, SOCK_STREAM, 0, sv) == -1)
+			break;
+		fds.push_back(sv[0]);
+		server_fds.push_back(sv[1]);
+	}
+	fflush(NULL);
+	pid_t pid = server_fds.empty() ? -1 : fork();
+	if (pid == 0) {
+		// The builder
+		close_host_fds(server_fds);
+		checkpoint_fds = server_fds;
+		checkpoint_spacing = spacing;
+		checkpoint_pos = spacing;
+		smart_mutation = false;
+		smart_abstraction = false;
+		get_parse_tree = true;
+		debug_print = false;
+		set_generator();
+		checkpoint_start = get_cur_time_us();
+		unsigned char* file = NULL;
+		size_t file_size = ff_generate(checkpoint_decisions(), MAX_RAND_SIZE, &file);
+		if (checkpoint_resumed) {
+			// A mutant generated from a checkpoint
+			checkpoint_shared* shared = checkpoint_mem;
+			shared->generation_time = get_cur_time_us() - checkpoint_start;
+			shared->file_size = file ? file_size : 0;
+			if (shared->file_size)
+				memcpy(checkpoint_file(), file, file_size);
+			shared->rand_end = rand_end;
+			shared->smart_abstraction = smart_abstraction;
+			shared->done = true;
+			fflush(NULL);
+		}
+		_exit(0);
+	}
+	for (int fd : server_fds)
+		close(fd);
+	if (pid == -1) {
+		for (int fd : fds)
+			close(fd);
+		return false;
+	}
+	int status;
+	waitpid(pid, &status, 0);
+	count = checkpoint_mem->count;
+	for (size_t i = count; i < fds.size(); ++i)
+		close(fds[i]);
+	fds.resize(count);
+	chain.file_index = index;
+	chain.pos.assign(checkpoint_mem->pos, checkpoint_mem->pos + count);
+	chain.elapsed.assign(checkpoint_mem->elapsed, checkpoint_mem->elapsed + count);
+	chain.fds = fds;
+	return true;
+}
+
+// Return the checkpoints of processed file index, or NULL if the mutants
+// of index are generated completely
+static checkpoint_chain* get_checkpoints(int index) {
+	if (checkpoints == -1) {
+		const char* count = getenv("FF_CHECKPOINTS");
+		checkpoints = count ? std::max(0, std::min(atoi(count), MAX_CHECKPOINTS)) : 0;
+	}
+	// Profiles need the whole generation in this process
+	if (checkpoints <= 0 || profiling)
+		return NULL;
+	if (!map_checkpoint_memory())
+		return NULL;
+	for (checkpoint_chain& chain : checkpoint_chains) {
+		if (chain.file_index == index) {
+			chain.last_use = ++checkpoint_uses;
+			return &chain;
+		}
+	}
+	if (checkpoint_chains.size() >= CHECKPOINT_FILES) {
+		// Only replace the checkpoints of other files for a file that is
+		// mutated repeatedly, rather than for every mutation when cycling
+		// through more files
+		if (index != checkpoint_last_target)
+			return NULL;
+		size_t lru = 0;
+		for (size_t i = 1; i < checkpoint_chains.size(); ++i) {
+			if (checkpoint_chains[i].last_use < checkpoint_chains[lru].last_use)
+				lru = i;
+		}
+		drop_checkpoint_chain(lru);
+	}
+	checkpoint_chain chain;
+	if (!build_checkpoints(index, chain)) {
+		// Remember files without checkpoints, too
+		chain.file_index = index;
+		chain.pos.clear();
+		chain.elapsed.clear();
+		chain.fds.clear();
+	}
+	chain.last_use = ++checkpoint_uses;
+	checkpoint_chains.push_back(chain);
+	return &checkpoint_chains.back();
+}
+
+// Set the number of checkpoints taken of each target file, overriding
+// FF_CHECKPOINTS; 0 generates all mutants completely
+extern "C" void ff_set_checkpoints(int count) {
+	checkpoints = std::max(0, std::min(count, MAX_CHECKPOINTS));
+	drop_checkpoints(-1);
+}
+
+// Generate a mutant of processed file index from the decisions in rand_t,
+// which are those of the file before position first_changed.  The mutation
+// is described by the globals set for ff_generate().
+static size_t generate_mutant(int index, unsigned char* rand_t, unsigned first_changed, unsigned char** file) {
+	checkpoint_chain* chain = get_checkpoints(index);
+	checkpoint_last_target = index;
+	int k = -1;
+	// Deletions leave chunk_name unset
+	const char* name = chunk_name ? chunk_name : "";
+	if (chain && strlen(name) < sizeof(checkpoint_mem->chunk_name)) {
+		while (k + 1 < (int) chain->pos.size() && chain->pos[k + 1] < first_changed)
+			++k;
+		// Skipping the decisions before the checkpoint has to make up
+		// for resuming
+		if (k != -1 && chain->elapsed[k] <= checkpoint_overhead)
+			k = -1;
+	}
+	if (k == -1)
+		return ff_generate(rand_t, MAX_RAND_SIZE, file);
+
+	checkpoint_shared* shared = checkpoint_mem;
+	unsigned pos = chain->pos[k];
+	memcpy(checkpoint_decisions() + pos, rand_t + pos, MAX_RAND_SIZE - pos);
+	shared->smart_mutation = smart_mutation;
+	shared->smart_abstraction = smart_abstraction;
+	shared->get_parse_tree = get_parse_tree;
+	shared->is_optional = is_optional;
+	shared->rand_start = rand_start;
+	shared->rand_end = rand_end;
+	strcpy(shared->chunk_name, name);
+	shared->following_rand_size = 0;
+	if (smart_abstraction) {
+		shared->following_rand_size = following_rand_size;
+		memcpy(checkpoint_following(), following_rand_buffer, following_rand_size);
+	}
+	uint64_t start = get_cur_time_us();
+	char result;
+	if (send(chain->fds[k], "m", 1, MSG_NOSIGNAL) != 1 || read(chain->fds[k], &result, 1) != 1 || result == -1) {
+		// The server is gone
+		drop_checkpoints(index);
+		return ff_generate(rand_t, MAX_RAND_SIZE, file);
+	}
+	if (result) {
+		uint64_t time = get_cur_time_us() - start;
+		uint64_t overhead = time > shared->generation_time ? time - shared->generation_time : 0;
+		checkpoint_overhead = checkpoint_measured ? (7 * checkpoint_overhead + overhead) / 8 : overhead;
+		checkpoint_measured = true;
+	}
+	rand_end = shared->rand_end;
+	smart_abstraction = shared->smart_abstraction;
+	if (!result || !shared->file_size) {
+		*file = NULL;
+		return 0;
+	}
+	*file = checkpoint_file();
+	return shared->file_size;
+}
+
+
+thread_local char mutation_info[1024];
+thread_local char* print_pos = mutation_info;
+thread_local size_t buf_size = 1024;
 
 void reset_info() {
 	print_pos = mutation_info;
@@ -1326,29 +2567,32 @@ enum SMART_MUTATION {
 };
 
 int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned* file_size, SMART_MUTATION mut = SMART_MUTATION_RANDOM, unsigned char** file_simple = NULL, unsigned* file_size_simple = NULL) {
-	static unsigned char *original_rand_t = NULL;
-	static unsigned char *rand_t = NULL;
-	static unsigned char *rand_s = NULL;
+	static thread_local unsigned char *rand_t = NULL;
+	static thread_local unsigned char *rand_s = NULL;
+	// Random bytes in rand_t so far
+	static thread_local unsigned rand_t_size = 0;
 	if (!rand_t) {
-		original_rand_t = new unsigned char[MAX_RAND_SIZE];
-		rand_t = new unsigned char[MAX_RAND_SIZE];
-		rand_s = new unsigned char[MAX_RAND_SIZE];
+		rand_t = new_buffer(RAND_RESERVE_SIZE, MAX_RAND_SIZE);
+		rand_s = new_buffer(RAND_RESERVE_SIZE, MAX_RAND_SIZE);
+	}
+	if (rand_t_size < MAX_RAND_SIZE) {
+		// First call, or ff_set_max_size() raised the limit
+		commit_buffer(rand_t, MAX_RAND_SIZE);
+		commit_buffer(rand_s, MAX_RAND_SIZE);
 		int rand_fd = open("/dev/urandom", O_RDONLY);
-		ssize_t r = read(rand_fd, rand_t, MAX_RAND_SIZE);
-		if (r != MAX_RAND_SIZE)
+		ssize_t r = read(rand_fd, rand_t + rand_t_size, MAX_RAND_SIZE - rand_t_size);
+		if (r != (ssize_t) (MAX_RAND_SIZE - rand_t_size))
 			printf("Read only %ld bytes from /dev/urandom\n", r);
 		close(rand_fd);
+		rand_t_size = MAX_RAND_SIZE;
 	}
 	if (file_simple && file_size_simple) {
 		*file_simple = NULL;
 		*file_size_simple = 0;
 	}
-	static int previous_file_index = -1;
-	static unsigned len_t = 0;
-	if (target_file_index != previous_file_index) {
-		len_t = read_file(rand_names[target_file_index].c_str(), original_rand_t);
-		previous_file_index = target_file_index;
-	}
+	// Only valid until the next call of get_decisions()
+	unsigned len_t;
+	const unsigned char *original_rand_t = get_decisions(target_file_index, &len_t);
 
 	if (mut == SMART_MUTATION_RANDOM) {
 		switch (rand() % (deletable_chunks[target_file_index].size() ? 10 : 9)) {
@@ -1399,7 +2643,8 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 		log_info("Replacing: source non-optional chunk from file %d position %u %u %s %s\ninto target file %d non-optional chunk position %u %u %s %s\n", s.file_index, s.start, s.end, s.type, s.name, t.file_index, t.start, t.end, t.type, t.name);
 #endif
 		memcpy(rand_t, original_rand_t, len_t);
-		read_file(rand_names[s.file_index].c_str(), rand_s);
+		unsigned len_s;
+		const unsigned char *decisions_s = get_decisions(s.file_index, &len_s);
 
 		unsigned rand_size = len_t + (s.end - s.start) - (t.end - t.start);
 		if (rand_size > MAX_RAND_SIZE) {
@@ -1410,7 +2655,7 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 			return -2;
 		}
 		memmove(rand_t + t.start + s.end + 1 - s.start, rand_t + t.end + 1, len_t - (t.end + 1));
-		memcpy(rand_t + t.start, rand_s + s.start, s.end + 1 - s.start);
+		memcpy(rand_t + t.start, decisions_s + s.start, s.end + 1 - s.start);
 
 		smart_mutation = true;
 		get_parse_tree = true;
@@ -1422,7 +2667,7 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 
 		*file = NULL;
 		debug_print = false;
-		*file_size = ff_generate(rand_t, MAX_RAND_SIZE, file);
+		*file_size = generate_mutant(target_file_index, rand_t, t.start, file);
 		smart_mutation = false;
 		get_parse_tree = false;
 		debug_print = old_debug_print;
@@ -1468,7 +2713,8 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 		log_info("Replacing: source optional chunk from file %d position %u %u %s %s\ninto target file %d optional chunk position %u %u %s %s\n", s.file_index, s.start, s.end, s.type, s.name, t.file_index, t.start, t.end, t.type, t.name);
 #endif
 		memcpy(rand_t, original_rand_t, len_t);
-		read_file(rand_names[s.file_index].c_str(), rand_s);
+		unsigned len_s;
+		const unsigned char *decisions_s = get_decisions(s.file_index, &len_s);
 
 		unsigned rand_size = len_t + (s.end - s.start) - (t.end - t.start);
 		if (rand_size > MAX_RAND_SIZE) {
@@ -1479,7 +2725,7 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 			return -2;
 		}
 		memmove(rand_t + t.start + s.end + 1 - s.start, rand_t + t.end + 1, len_t - (t.end + 1));
-		memcpy(rand_t + t.start, rand_s + s.start, s.end + 1 - s.start);
+		memcpy(rand_t + t.start, decisions_s + s.start, s.end + 1 - s.start);
 
 		smart_mutation = true;
 		get_parse_tree = true;
@@ -1491,7 +2737,7 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 
 		*file = NULL;
 		debug_print = false;
-		*file_size = ff_generate(rand_t, MAX_RAND_SIZE, file);
+		*file_size = generate_mutant(target_file_index, rand_t, t.start, file);
 		smart_mutation = false;
 		get_parse_tree = false;
 		debug_print = old_debug_print;
@@ -1535,7 +2781,8 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 		log_info("Inserting: source chunk from file %d position %u %u %s %s\ninto target file %d position %u %s %s\n", s.file_index, s.start, s.end, s.type, s.name, target_file_index, ip.pos, ip.type, ip.name);
 #endif
 		memcpy(rand_t, original_rand_t, len_t);
-		read_file(rand_names[s.file_index].c_str(), rand_s);
+		unsigned len_s;
+		const unsigned char *decisions_s = get_decisions(s.file_index, &len_s);
 
 		unsigned rand_size = len_t + (s.end + 1 - s.start);
 		if (rand_size > MAX_RAND_SIZE) {
@@ -1546,7 +2793,7 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 			return -2;
 		}
 		memmove(rand_t + ip.pos + s.end + 1 - s.start, rand_t + ip.pos, len_t - ip.pos);
-		memcpy(rand_t + ip.pos, rand_s + s.start, s.end + 1 - s.start);
+		memcpy(rand_t + ip.pos, decisions_s + s.start, s.end + 1 - s.start);
 
 		smart_mutation = true;
 		get_parse_tree = true;
@@ -1558,7 +2805,7 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 
 		*file = NULL;
 		debug_print = false;
-		*file_size = ff_generate(rand_t, MAX_RAND_SIZE, file);
+		*file_size = generate_mutant(target_file_index, rand_t, ip.pos, file);
 		smart_mutation = false;
 		get_parse_tree = false;
 		debug_print = old_debug_print;
@@ -1635,7 +2882,7 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 
 		*file = NULL;
 		debug_print = false;
-		*file_size = ff_generate(rand_t, MAX_RAND_SIZE, file);
+		*file_size = generate_mutant(target_file_index, rand_t, start_t, file);
 		get_parse_tree = false;
 		debug_print = old_debug_print;
 		if (!(*file) || !(*file_size)) {
@@ -1675,7 +2922,7 @@ int do_one_smart_mutation(int target_file_index, unsigned char** file, unsigned*
 
 		*file = NULL;
 		debug_print = false;
-		*file_size = ff_generate(rand_t, MAX_RAND_SIZE, file);
+		*file_size = generate_mutant(target_file_index, rand_t, t.start, file);
 		debug_print = old_debug_print;
 		if (!(*file) || !(*file_size)) {
 			log_info("Failed to generate mutated file!\n");
@@ -1714,11 +2961,54 @@ extern "C" int one_smart_mutation(int target_file_index, unsigned char** file, u
 	return do_one_smart_mutation(target_file_index, file, file_size);
 }
 
+// Like one_smart_mutation(), with the kind of mutation (a SMART_MUTATION)
+extern "C" int one_smart_mutation_of_kind(int target_file_index, int kind, unsigned char** file, unsigned* file_size) {
+	if (kind < SMART_MUTATION_RANDOM || kind > SMART_ABSTRACT) {
+		*file = NULL;
+		*file_size = 0;
+		return -2;
+	}
+	return do_one_smart_mutation(target_file_index, file, file_size, (SMART_MUTATION) kind);
+}
+
 
 int mutations(int argc, char **argv)
 {
+	// Process options
+	while (1)
+	{
+		static struct option long_options[] =
+			{
+				{"help", no_argument, 0, 'h'},
+				{"index", required_argument, 0, 'x'},
+				{0, 0, 0, 0}};
+		int option_index = 0;
+		int c = getopt_long(argc, argv, "",
+							long_options, &option_index);
+
+		// Detect the end of the options.
+		if (c == -1)
+			break;
+
+		switch (c)
+		{
+		case 'h':
+		case '?':
+			fprintf(stderr, "mutations: usage: mutations [--index FILE] FILES...\n");
+			fprintf(stderr, "Parse FILES and apply random smart mutations to them.\n");
+			fprintf(stderr, "Options:\n");
+			fprintf(stderr, "--index FILE: Keep the chunks of parsed FILES in this chunk index, and only parse files not in it\n");
+			return 0;
+
+		case 'x':
+			if (ff_open_chunk_index(optarg) != 0)
+				return 1;
+			break;
+		}
+	}
+
 	srand(time(NULL));
-	for (int i = 1; i < argc; ++i) {
+	for (int i = optind; i < argc; ++i) {
 		char *file_name = argv[i];
 		std::string rand_name = std::string(file_name) + "-decisions";
 		process_file(file_name, rand_name.c_str());
@@ -1806,60 +3096,367 @@ int test(int argc, char *argv[])
 	return 0;
 }
 
-int benchmark(int argc, char *argv[])
+// Measure how fast the given FILES are parsed, repeating each one ITERATIONS times.
+static int benchmark_parse(char **files, int nfiles, int iterations)
 {
+	std::vector<std::vector<unsigned char>> inputs;
+	for (int i = 0; i < nfiles; ++i) {
+		int fd = open(files[i], O_RDONLY);
+		struct stat st;
+		if (fd == -1 || fstat(fd, &st) == -1) {
+			perror(files[i]);
+			return 1;
+		}
+		std::vector<unsigned char> contents(st.st_size);
+		if (read(fd, contents.data(), st.st_size) != st.st_size) {
+			perror(files[i]);
+			return 1;
+		}
+		close(fd);
+		inputs.push_back(std::move(contents));
+	}
+
+	unsigned char* rand = NULL;
+	size_t rand_size = 0;
+	int parsed = 0;
+	int failed = 0;
+	unsigned long long total_bytes = 0;
+	unsigned long long total_decisions = 0;
+	uint64_t start = get_cur_time_us();
+	for (int i = 0; i < iterations; ++i) {
+		for (auto& input : inputs) {
+			if (ff_parse(input.data(), input.size(), &rand, &rand_size)) {
+				parsed += 1;
+				total_bytes += input.size();
+				total_decisions += rand_size;
+			} else {
+				failed += 1;
+			}
+		}
+	}
+	uint64_t end = get_cur_time_us();
+	double time = (end - start) / 1.0e6;
+	printf("Parsed %d files (%d failed) in %f s.\n", parsed, failed, time);
+	printf("Average file size %llu bytes, %llu decision bytes.\n",
+		parsed ? total_bytes / parsed : 0, parsed ? total_decisions / parsed : 0);
+	printf("Parsing speed %f / s (%f MB / s).\n", parsed / time, total_bytes / time / 1.0e6);
+	return failed != 0;
+}
+
+struct benchmark_stats {
+	int attempts = 0;
+	int generated = 0;
+	int valid = 0;
+	int signaled = 0;
+	int parsed = 0;
+	int roundtrip = 0;
+	unsigned long long bytes = 0;
+	unsigned long long decision_bytes = 0;
+	uint64_t generate_us = 0;
+	uint64_t parse_us = 0;
+	int status[256] = {};
+};
+
+// Remove dir and the files the checker left in it
+static void remove_dir(const char *dir) {
+	DIR *d = opendir(dir);
+	if (d) {
+		struct dirent *entry;
+		while ((entry = readdir(d)) != NULL) {
+			if (strcmp(entry->d_name, ".") && strcmp(entry->d_name, ".."))
+				unlinkat(dirfd(d), entry->d_name, 0);
+		}
+		closedir(d);
+	}
+	rmdir(dir);
+}
+
+// Run checker on the file out.<fmt> in dir and return its wait status
+static int run_checker(const char *checker, const char *dir) {
+	pid_t pid = fork();
+	if (pid == -1) {
+		perror("fork");
+		return -1;
+	}
+	if (pid == 0) {
+		if (chdir(dir) == 0)
+			execl("/bin/sh", "sh", checker, (char *) NULL);
+		_exit(127);
+	}
+	int result;
+	while (waitpid(pid, &result, 0) == -1) {
+		if (errno != EINTR)
+			return -1;
+	}
+	return result;
+}
+
+// Generate iterations files from random decisions, checking each one in dir.
+// With roundtrip, also parse each file and check that its decisions
+// re-generate the same file.
+static benchmark_stats benchmark_worker(int iterations, const char *checker, const char *dir, bool roundtrip) {
+	benchmark_stats stats;
 	int rand_fd = open("/dev/urandom", O_RDONLY);
 	unsigned char *data =  new unsigned char[MAX_RAND_SIZE];
 	ssize_t r = read(rand_fd, data, MAX_RAND_SIZE);
 	if (r != MAX_RAND_SIZE)
 		printf("Read only %ld bytes from /dev/urandom\n", r);
 	unsigned char* new_data = NULL;
-	int generated = 0;
-	int valid = 0;
-	unsigned long long total_bytes = 0;
-	int i;
-	int iterations = 10000;
-	std::unordered_map<int,int> status;
-	std::string fmt = std::string(bin_name, strchr(bin_name, '-') - bin_name);
-	std::string output = "out." + fmt;
-	std::string checker = "checkers/" + fmt + ".sh";
-	uint64_t start = get_cur_time_us();
-	for (i = 0; i < iterations; ++i)
+	unsigned char *contents = roundtrip ? new unsigned char[MAX_FILE_SIZE] : NULL;
+	std::string output = std::string(dir) + "/out." + get_format_name();
+	for (stats.attempts = 0; stats.attempts < iterations; ++stats.attempts)
 	{
 		ssize_t r = read(rand_fd, data, 4096);
 		assert(r == 4096);
+		uint64_t before = get_cur_time_us();
 		size_t new_size = ff_generate(data, MAX_RAND_SIZE, &new_data);
+		stats.generate_us += get_cur_time_us() - before;
 		if (new_size && new_data) {
-			generated += 1;
-			total_bytes += new_size;
-			if (argc > 1) {
+			stats.generated += 1;
+			stats.bytes += new_size;
+			if (checker) {
 				save_output(output.c_str());
-				int result = system(checker.c_str());
-				if (WIFEXITED(result)) {
-					++status[WEXITSTATUS(result)];
+				int result = run_checker(checker, dir);
+				if (result != -1 && WIFEXITED(result)) {
+					++stats.status[WEXITSTATUS(result)];
 				}
-				if (WIFSIGNALED(result)) {
+				if (result != -1 && WIFSIGNALED(result)) {
 					printf("killed by signal %d\n", WTERMSIG(result));
+					++stats.signaled;
+				}
+				if (result != -1 && WIFEXITED(result) && WEXITSTATUS(result) == 0)
+					++stats.valid;
+			}
+			if (roundtrip) {
+				memcpy(contents, new_data, new_size);
+				unsigned char *rand;
+				size_t rand_size;
+				before = get_cur_time_us();
+				bool parsed = ff_parse(contents, new_size, &rand, &rand_size);
+				stats.parse_us += get_cur_time_us() - before;
+				if (parsed) {
+					stats.parsed += 1;
+					stats.decision_bytes += rand_size;
+					unsigned char *file = NULL;
+					size_t file_size = ff_generate(rand, rand_size, &file);
+					if (file && file_size == new_size && !memcmp(contents, file, file_size))
+						stats.roundtrip += 1;
+				}
+			}
+		}
+	}
+	close(rand_fd);
+	delete[] data;
+	delete[] contents;
+	return stats;
+}
+
+// Run benchmark_worker() on jobs forked processes, each checking its files
+// in a private temporary directory, and report the combined results
+static int benchmark_generate(int iterations, bool check, int jobs, bool roundtrip, bool json) {
+	std::string fmt = get_format_name();
+	std::string checker;
+	if (check) {
+		char *path = realpath(("checkers/" + fmt + ".sh").c_str(), NULL);
+		if (!path) {
+			perror(("checkers/" + fmt + ".sh").c_str());
+			return 1;
+		}
+		checker = path;
+		free(path);
+	}
+	if (jobs < 1)
+		jobs = 1;
+
+	benchmark_stats total;
+	uint64_t start = get_cur_time_us();
+	if (jobs == 1) {
+		total = benchmark_worker(iterations, check ? checker.c_str() : NULL, ".", roundtrip);
+	} else {
+		std::vector<std::pair<pid_t, int>> workers;
+		for (int job = 0; job < jobs; ++job) {
+			int fds[2];
+			if (pipe(fds)) {
+				perror("pipe");
+				break;
+			}
+			fflush(stdout);
+			pid_t pid = fork();
+			if (pid == -1) {
+				perror("fork");
+				close(fds[0]);
+				close(fds[1]);
+				break;
+			}
+			if (pid == 0) {
+				close(fds[0]);
+				char dir[] = "/tmp/ff-benchmark-XXXXXX";
+				if (!mkdtemp(dir)) {
+					perror("mkdtemp");
+					_exit(1);
 				}
-				if (WIFEXITED(result) && WEXITSTATUS(result) == 0)
-					++valid;
+				int count = iterations / jobs + (job < iterations % jobs);
+				benchmark_stats stats = benchmark_worker(count, check ? checker.c_str() : NULL, dir, roundtrip);
+				remove_dir(dir);
+				fflush(stdout);
+				ssize_t r = write(fds[1], &stats, sizeof(stats));
+				if (profiling && !ff_profile_send(fds[1]))
+					r = -1;
+				_exit(r == sizeof(stats) ? 0 : 1);
+			}
+			close(fds[1]);
+			workers.emplace_back(pid, fds[0]);
+		}
+		for (auto& w : workers) {
+			benchmark_stats stats;
+			if (read(w.second, &stats, sizeof(stats)) == sizeof(stats)) {
+				total.attempts += stats.attempts;
+				total.generated += stats.generated;
+				total.valid += stats.valid;
+				total.signaled += stats.signaled;
+				total.parsed += stats.parsed;
+				total.roundtrip += stats.roundtrip;
+				total.bytes += stats.bytes;
+				total.decision_bytes += stats.decision_bytes;
+				total.generate_us += stats.generate_us;
+				total.parse_us += stats.parse_us;
+				for (int i = 0; i < 256; ++i)
+					total.status[i] += stats.status[i];
+				if (profiling && !ff_profile_receive(w.second))
+					fprintf(stderr, "%s: no profile from worker %d\n", bin_name, (int) w.first);
+			} else {
+				fprintf(stderr, "%s: worker %d failed\n", bin_name, (int) w.first);
 			}
+			close(w.second);
+			waitpid(w.first, NULL, 0);
 		}
 	}
 	uint64_t end = get_cur_time_us();
 	double time = (end - start) / 1.0e6;
-	for (auto s : status)
-		printf("status %d: %d\n", s.first, s.second);
-	printf("Generated %d files from %d attempts in %f s.\n", generated, i, time);
-	if (argc > 1)
-		printf("Valid %d/%d = %f\n", valid, generated, (double)valid/(double)generated);
-	if (generated)
-		printf("Average file size %llu bytes.\n", total_bytes / generated);
-	printf("Speed %f / s.\n", generated / time);
-	delete[] data;
+	if (json) {
+		// Speeds are per process, measured over ff_generate() and ff_parse() only
+		printf("{\"format\": \"%s\", \"jobs\": %d, \"time\": %f, \"attempts\": %d, \"generated\": %d, ",
+			fmt.c_str(), jobs, time, total.attempts, total.generated);
+		printf("\"generate_speed\": %f, \"average_size\": %f",
+			total.generate_us ? total.generated / (total.generate_us / 1.0e6) : 0.0,
+			total.generated ? (double) total.bytes / total.generated : 0.0);
+		if (check) {
+			printf(", \"valid\": %d, \"validity\": %f", total.valid,
+				total.generated ? (double) total.valid / total.generated : 0.0);
+			printf(", \"status\": {");
+			const char *sep = "";
+			for (int i = 0; i < 256; ++i) {
+				if (total.status[i]) {
+					printf("%s\"%d\": %d", sep, i, total.status[i]);
+					sep = ", ";
+				}
+			}
+			printf("}, \"signaled\": %d", total.signaled);
+		}
+		if (roundtrip) {
+			printf(", \"parsed\": %d, \"roundtrip\": %d, \"roundtrip_rate\": %f", total.parsed, total.roundtrip,
+				total.generated ? (double) total.roundtrip / total.generated : 0.0);
+			printf(", \"parse_speed\": %f, \"average_decisions\": %f",
+				total.parse_us ? total.parsed / (total.parse_us / 1.0e6) : 0.0,
+				total.parsed ? (double) total.decision_bytes / total.parsed : 0.0);
+		}
+		printf("}\n");
+		return 0;
+	}
+	for (int i = 0; i < 256; ++i)
+		if (total.status[i])
+			printf("status %d: %d\n", i, total.status[i]);
+	if (total.signaled)
+		printf("killed by signal: %d\n", total.signaled);
+	printf("Generated %d files from %d attempts in %f s.\n", total.generated, total.attempts, time);
+	if (check)
+		printf("Valid %d/%d = %f\n", total.valid, total.generated, (double)total.valid/(double)total.generated);
+	if (total.generated)
+		printf("Average file size %llu bytes.\n", total.bytes / total.generated);
+	printf("Speed %f / s.\n", total.generated / time);
+	if (roundtrip) {
+		printf("Parsed %d files, re-generated %d/%d = %f identically.\n", total.parsed, total.roundtrip, total.generated,
+			(double) total.roundtrip / (double) total.generated);
+		if (total.parsed)
+			printf("Average decisions %llu bytes.\n", total.decision_bytes / total.parsed);
+		printf("Parsing speed %f / s.\n", total.parse_us ? total.parsed / (total.parse_us / 1.0e6) : 0.0);
+	}
 	return 0;
 }
 
+int benchmark(int argc, char *argv[])
+{
+	bool parse_mode = false;
+	int iterations = 10000;
+	int jobs = 1;
+	bool roundtrip = false;
+	bool json = false;
+
+	// Process options
+	while (1)
+	{
+		static struct option long_options[] =
+			{
+				{"help", no_argument, 0, 'h'},
+				{"parse", no_argument, 0, 'p'},
+				{"iterations", required_argument, 0, 'i'},
+				{"jobs", required_argument, 0, 'j'},
+				{"roundtrip", no_argument, 0, 'r'},
+				{"json", no_argument, 0, 'J'},
+				{0, 0, 0, 0}};
+		int option_index = 0;
+		int c = getopt_long(argc, argv, "pi:j:r",
+							long_options, &option_index);
+
+		// Detect the end of the options.
+		if (c == -1)
+			break;
+
+		switch (c)
+		{
+		case 'h':
+		case '?':
+			fprintf(stderr, "benchmark: usage: benchmark [--iterations N] [--jobs N] [--roundtrip] [--json] [check]\n");
+			fprintf(stderr, "       benchmark --parse [--iterations N] FILES...\n");
+			fprintf(stderr, "Measures generation speed (and validity, if `check' is given).\n");
+			fprintf(stderr, "Options:\n");
+			fprintf(stderr, "--parse: Measure parsing speed of FILES instead\n");
+			fprintf(stderr, "--iterations N: Generation attempts, or parses of each file (default: 10000)\n");
+			fprintf(stderr, "--jobs N: Generate and check files in N parallel processes (default: 1)\n");
+			fprintf(stderr, "--roundtrip: Also parse each file and re-generate it from its decisions\n");
+			fprintf(stderr, "--json: Print the results as a JSON object\n");
+			return 0;
+
+		case 'p':
+			parse_mode = true;
+			break;
+		case 'i':
+			iterations = atoi(optarg);
+			break;
+		case 'j':
+			jobs = atoi(optarg);
+			break;
+		case 'r':
+			roundtrip = true;
+			break;
+		case 'J':
+			json = true;
+			break;
+		}
+	}
+
+	if (parse_mode) {
+		if (optind >= argc) {
+			fprintf(stderr, "%s: missing input files.\n", bin_name);
+			return 1;
+		}
+		return benchmark_parse(argv + optind, argc - optind, iterations);
+	}
+	bool check = optind < argc;
+
+	return benchmark_generate(iterations, check, jobs, roundtrip, json);
+}
+
 int version(int argc, char *argv[])
 {
 	fprintf(stderr, "This is FormatFuzzer 1.0\n");
@@ -1888,10 +3485,31 @@ COMMAND commands[] = {
 	{"version", version, "Show version"},
 };
 
+// Parse a size such as 65536, 64K, 16M or 1G
+size_t parse_size(const char *arg)
+{
+	char *end;
+	size_t size = strtoul(arg, &end, 10);
+	switch (*end) {
+	case 'k': case 'K':
+		size <<= 10; ++end; break;
+	case 'm': case 'M':
+		size <<= 20; ++end; break;
+	case 'g': case 'G':
+		size <<= 30; ++end; break;
+	}
+	if (end == arg || *end)
+		return 0;
+	return size;
+}
+
 int help(int argc, char *argv[])
 {
 	version(argc, argv);
-	fprintf(stderr, "%s: usage: %s COMMAND [OPTIONS...] [ARGS...]\n", bin_name, bin_name);
+	fprintf(stderr, "%s: usage: %s [--max-size SIZE] [--profile PREFIX] COMMAND [OPTIONS...] [ARGS...]\n", bin_name, bin_name);
+	fprintf(stderr, "--max-size SIZE: maximum size of inputs (default: %u; suffixes K, M, G)\n", MAX_FILE_SIZE);
+	fprintf(stderr, "--profile PREFIX: write calls, decision bytes, file bytes and time per template variable\n"
+		"\tto PREFIX.flat, and collapsed stacks for flamegraph tools to PREFIX.collapsed\n");
 	fprintf(stderr, "Commands:\n");
 	for (unsigned i = 0; i < sizeof(commands) / sizeof(COMMAND); i++)
 		fprintf(stderr, "%-10s - %s\n", commands[i].name, commands[i].desc);
@@ -1902,6 +3520,29 @@ int help(int argc, char *argv[])
 int main(int argc, char **argv)
 {
 	bin_name = get_bin_name(argv[0]);
+	const char *profile = NULL;
+	while (argc >= 3 && strncmp(argv[1], "--", 2) == 0)
+	{
+		if (strcmp(argv[1], "--max-size") == 0)
+		{
+			size_t max_size = parse_size(argv[2]);
+			if (!ff_set_max_size(max_size))
+			{
+				fprintf(stderr, "%s: invalid maximum size '%s'\n", bin_name, argv[2]);
+				return -1;
+			}
+		}
+		else if (strcmp(argv[1], "--profile") == 0)
+		{
+			profile = argv[2];
+			profiling = true;
+		}
+		else
+			break;
+		argv[2] = argv[0];
+		argc -= 2;
+		argv += 2;
+	}
 	if (argc <= 1)
 		return help(argc, argv);
 
@@ -1909,7 +3550,12 @@ int main(int argc, char **argv)
 	for (unsigned i = 0; i < sizeof(commands) / sizeof(COMMAND); i++)
 	{
 		if (strcmp(cmd, commands[i].name) == 0)
-			return (*commands[i].fun)(argc - 1, argv + 1);
+		{
+			int status = (*commands[i].fun)(argc - 1, argv + 1);
+			if (profile && !ff_profile_write(profile))
+				return -1;
+			return status;
+		}
 	}
 
 	// Invalid command
@@ -8,37 +8,43 @@
 
 class char_class {
 	int small;
-	std::vector<char> known_values;
+	const value_set<char>* known_values;
 	char value;
 public:
 	int64 _startof = 0;
 	std::size_t _sizeof = sizeof(char);
 	char operator () () { return value; }
-	char_class(int small, std::vector<char> known_values = {}) : small(small), known_values(known_values) {}
+	char_class(int small, const value_set<char>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	char generate() {
 		_startof = FTell();
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(char), 0, small);
 		} else {
-			value = file_acc.file_integer(sizeof(char), 0, known_values);
+			value = file_acc.file_integer(sizeof(char), 0, *known_values);
 		}
 		return value;
 	}
 
-	char generate(std::vector<char> possible_values) {
+	char generate(const value_set<char>& possible_values) {
 		_startof = FTell();
 		value = file_acc.file_integer(sizeof(char), 0, possible_values);
 		return value;
 	}
+
+	bool generate_array(std::vector<char>& values, unsigned size) {
+		if (small || known_values)
+			return false;
+		return file_acc.file_integers(values, size);
+	}
 };
 
 
 
 class char_array_class {
 	char_class& element;
-	std::vector<std::string> known_values;
-	std::unordered_map<int, std::vector<char>> element_known_values;
+	const value_set<std::string>* known_values = NULL;
+	const known_values_map<char>* element_known_values = NULL;
 	std::string value;
 public:
 	int64 _startof = 0;
@@ -48,12 +54,12 @@ public:
 		assert_cond((unsigned)index < value.size(), "array index out of bounds");
 		return value[index];
 	}
-	char_array_class(char_class& element, std::unordered_map<int, std::vector<char>> element_known_values = {})
+	char_array_class(char_class& element, const known_values_map<char>* element_known_values = NULL)
 		: element(element), element_known_values(element_known_values) {}
-	char_array_class(char_class& element, std::vector<std::string> known_values)
+	char_array_class(char_class& element, const value_set<std::string>* known_values)
 		: element(element), known_values(known_values) {}
 
-	std::string generate(unsigned size, std::vector<std::string> possible_values = {}) {
+	std::string generate(unsigned size, const value_set<std::string>& possible_values = {}) {
 		check_array_length(size);
 		_startof = FTell();
 		value = "";
@@ -63,13 +69,13 @@ public:
 			_sizeof = size;
 			return value;
 		}
-		if (known_values.size()) {
-			value = file_acc.file_string(known_values);
+		if (known_values) {
+			value = file_acc.file_string(*known_values);
 			assert(value.length() == size);
 			_sizeof = size;
 			return value;
 		}
-		if (!element_known_values.size()) {
+		if (!element_known_values) {
 			if (size == 0)
 				 return "";
 			value = file_acc.file_string(size);
@@ -77,12 +83,12 @@ public:
 			return value;
 		}
 		for (unsigned i = 0; i < size; ++i) {
-			auto known = element_known_values.find(i);
-			if (known == element_known_values.end()) {
+			const value_set<char>* known = find_known_values(element_known_values, i);
+			if (!known) {
 				value.push_back(element.generate());
 				_sizeof += element._sizeof;
 			} else {
-				value.push_back(file_acc.file_integer(sizeof(char), 0, known->second));
+				value.push_back(file_acc.file_integer(sizeof(char), 0, *known));
 				_sizeof += sizeof(char);
 			}
 		}
@@ -115,8 +121,8 @@ public:
 	int evil;
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	GIFHEADER& operator () () { return *instances.back(); }
@@ -128,6 +134,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	GIFHEADER(std::vector<GIFHEADER*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~GIFHEADER() {
 		if (generated == 2)
 			return;
@@ -141,60 +149,66 @@ public:
 	GIFHEADER* generate();
 };
 
-int GIFHEADER::_parent_id = 0;
-int GIFHEADER::_index_start = 0;
+thread_local int GIFHEADER::_parent_id = 0;
+thread_local int GIFHEADER::_index_start = 0;
 
 
 
 class ushort_class {
 	int small;
-	std::vector<ushort> known_values;
+	const value_set<ushort>* known_values;
 	ushort value;
 public:
 	int64 _startof = 0;
 	std::size_t _sizeof = sizeof(ushort);
 	ushort operator () () { return value; }
-	ushort_class(int small, std::vector<ushort> known_values = {}) : small(small), known_values(known_values) {}
+	ushort_class(int small, const value_set<ushort>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	ushort generate() {
 		_startof = FTell();
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(ushort), 0, small);
 		} else {
-			value = file_acc.file_integer(sizeof(ushort), 0, known_values);
+			value = file_acc.file_integer(sizeof(ushort), 0, *known_values);
 		}
 		return value;
 	}
 
-	ushort generate(std::vector<ushort> possible_values) {
+	ushort generate(const value_set<ushort>& possible_values) {
 		_startof = FTell();
 		value = file_acc.file_integer(sizeof(ushort), 0, possible_values);
 		return value;
 	}
+
+	bool generate_array(std::vector<ushort>& values, unsigned size) {
+		if (small || known_values)
+			return false;
+		return file_acc.file_integers(values, size);
+	}
 };
 
 
 
 class UBYTE_bitfield {
 	int small;
-	std::vector<UBYTE> known_values;
+	const value_set<UBYTE>* known_values;
 	UBYTE value;
 public:
 	UBYTE operator () () { return value; }
-	UBYTE_bitfield(int small, std::vector<UBYTE> known_values = {}) : small(small), known_values(known_values) {}
+	UBYTE_bitfield(int small, const value_set<UBYTE>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	UBYTE generate(unsigned bits) {
 		if (!bits)
 			return 0;
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(UBYTE), bits, small);
 		} else {
-			value = file_acc.file_integer(sizeof(UBYTE), bits, known_values);
+			value = file_acc.file_integer(sizeof(UBYTE), bits, *known_values);
 		}
 		return value;
 	}
 
-	UBYTE generate(unsigned bits, std::vector<UBYTE> possible_values) {
+	UBYTE generate(unsigned bits, const value_set<UBYTE>& possible_values) {
 		if (!bits)
 			return 0;
 		value = file_acc.file_integer(sizeof(UBYTE), bits, possible_values);
@@ -236,8 +250,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	LOGICALSCREENDESCRIPTOR_PACKEDFIELDS& operator () () { return *instances.back(); }
@@ -249,6 +263,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	LOGICALSCREENDESCRIPTOR_PACKEDFIELDS(std::vector<LOGICALSCREENDESCRIPTOR_PACKEDFIELDS*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~LOGICALSCREENDESCRIPTOR_PACKEDFIELDS() {
 		if (generated == 2)
 			return;
@@ -262,36 +278,42 @@ public:
 	LOGICALSCREENDESCRIPTOR_PACKEDFIELDS* generate();
 };
 
-int LOGICALSCREENDESCRIPTOR_PACKEDFIELDS::_parent_id = 0;
-int LOGICALSCREENDESCRIPTOR_PACKEDFIELDS::_index_start = 0;
+thread_local int LOGICALSCREENDESCRIPTOR_PACKEDFIELDS::_parent_id = 0;
+thread_local int LOGICALSCREENDESCRIPTOR_PACKEDFIELDS::_index_start = 0;
 
 
 
 class UBYTE_class {
 	int small;
-	std::vector<UBYTE> known_values;
+	const value_set<UBYTE>* known_values;
 	UBYTE value;
 public:
 	int64 _startof = 0;
 	std::size_t _sizeof = sizeof(UBYTE);
 	UBYTE operator () () { return value; }
-	UBYTE_class(int small, std::vector<UBYTE> known_values = {}) : small(small), known_values(known_values) {}
+	UBYTE_class(int small, const value_set<UBYTE>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	UBYTE generate() {
 		_startof = FTell();
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(UBYTE), 0, small);
 		} else {
-			value = file_acc.file_integer(sizeof(UBYTE), 0, known_values);
+			value = file_acc.file_integer(sizeof(UBYTE), 0, *known_values);
 		}
 		return value;
 	}
 
-	UBYTE generate(std::vector<UBYTE> possible_values) {
+	UBYTE generate(const value_set<UBYTE>& possible_values) {
 		_startof = FTell();
 		value = file_acc.file_integer(sizeof(UBYTE), 0, possible_values);
 		return value;
 	}
+
+	bool generate_array(std::vector<UBYTE>& values, unsigned size) {
+		if (small || known_values)
+			return false;
+		return file_acc.file_integers(values, size);
+	}
 };
 
 
@@ -334,8 +356,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	LOGICALSCREENDESCRIPTOR& operator () () { return *instances.back(); }
@@ -347,6 +369,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	LOGICALSCREENDESCRIPTOR(std::vector<LOGICALSCREENDESCRIPTOR*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~LOGICALSCREENDESCRIPTOR() {
 		if (generated == 2)
 			return;
@@ -360,8 +384,8 @@ public:
 	LOGICALSCREENDESCRIPTOR* generate();
 };
 
-int LOGICALSCREENDESCRIPTOR::_parent_id = 0;
-int LOGICALSCREENDESCRIPTOR::_index_start = 0;
+thread_local int LOGICALSCREENDESCRIPTOR::_parent_id = 0;
+thread_local int LOGICALSCREENDESCRIPTOR::_index_start = 0;
 
 
 
@@ -391,8 +415,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	RGB& operator () () { return *instances.back(); }
@@ -404,6 +428,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	RGB(std::vector<RGB*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~RGB() {
 		if (generated == 2)
 			return;
@@ -417,8 +443,8 @@ public:
 	RGB* generate();
 };
 
-int RGB::_parent_id = 0;
-int RGB::_index_start = 0;
+thread_local int RGB::_parent_id = 0;
+thread_local int RGB::_index_start = 0;
 
 
 
@@ -467,8 +493,8 @@ public:
 	int size;
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	GLOBALCOLORTABLE& operator () () { return *instances.back(); }
@@ -480,6 +506,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	GLOBALCOLORTABLE(std::vector<GLOBALCOLORTABLE*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~GLOBALCOLORTABLE() {
 		if (generated == 2)
 			return;
@@ -493,8 +521,8 @@ public:
 	GLOBALCOLORTABLE* generate();
 };
 
-int GLOBALCOLORTABLE::_parent_id = 0;
-int GLOBALCOLORTABLE::_index_start = 0;
+thread_local int GLOBALCOLORTABLE::_parent_id = 0;
+thread_local int GLOBALCOLORTABLE::_index_start = 0;
 
 
 
@@ -539,8 +567,8 @@ public:
 	std::vector<UBYTE> possible_values;
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	IMAGEDESCRIPTOR_PACKEDFIELDS& operator () () { return *instances.back(); }
@@ -552,6 +580,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	IMAGEDESCRIPTOR_PACKEDFIELDS(std::vector<IMAGEDESCRIPTOR_PACKEDFIELDS*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~IMAGEDESCRIPTOR_PACKEDFIELDS() {
 		if (generated == 2)
 			return;
@@ -565,8 +595,8 @@ public:
 	IMAGEDESCRIPTOR_PACKEDFIELDS* generate();
 };
 
-int IMAGEDESCRIPTOR_PACKEDFIELDS::_parent_id = 0;
-int IMAGEDESCRIPTOR_PACKEDFIELDS::_index_start = 0;
+thread_local int IMAGEDESCRIPTOR_PACKEDFIELDS::_parent_id = 0;
+thread_local int IMAGEDESCRIPTOR_PACKEDFIELDS::_index_start = 0;
 
 
 
@@ -614,8 +644,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	IMAGEDESCRIPTOR& operator () () { return *instances.back(); }
@@ -627,6 +657,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	IMAGEDESCRIPTOR(std::vector<IMAGEDESCRIPTOR*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~IMAGEDESCRIPTOR() {
 		if (generated == 2)
 			return;
@@ -640,8 +672,8 @@ public:
 	IMAGEDESCRIPTOR* generate();
 };
 
-int IMAGEDESCRIPTOR::_parent_id = 0;
-int IMAGEDESCRIPTOR::_index_start = 0;
+thread_local int IMAGEDESCRIPTOR::_parent_id = 0;
+thread_local int IMAGEDESCRIPTOR::_index_start = 0;
 
 
 
@@ -663,8 +695,8 @@ public:
 	int size;
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	LOCALCOLORTABLE& operator () () { return *instances.back(); }
@@ -676,6 +708,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	LOCALCOLORTABLE(std::vector<LOCALCOLORTABLE*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~LOCALCOLORTABLE() {
 		if (generated == 2)
 			return;
@@ -689,8 +723,8 @@ public:
 	LOCALCOLORTABLE* generate();
 };
 
-int LOCALCOLORTABLE::_parent_id = 0;
-int LOCALCOLORTABLE::_index_start = 0;
+thread_local int LOCALCOLORTABLE::_parent_id = 0;
+thread_local int LOCALCOLORTABLE::_index_start = 0;
 
 
 
@@ -714,8 +748,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	DATASUBBLOCK& operator () () { return *instances.back(); }
@@ -727,6 +761,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	DATASUBBLOCK(std::vector<DATASUBBLOCK*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~DATASUBBLOCK() {
 		if (generated == 2)
 			return;
@@ -740,8 +776,8 @@ public:
 	DATASUBBLOCK* generate(UBYTE& size);
 };
 
-int DATASUBBLOCK::_parent_id = 0;
-int DATASUBBLOCK::_index_start = 0;
+thread_local int DATASUBBLOCK::_parent_id = 0;
+thread_local int DATASUBBLOCK::_index_start = 0;
 
 
 
@@ -770,8 +806,8 @@ public:
 	UBYTE size;
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	DATASUBBLOCKS& operator () () { return *instances.back(); }
@@ -783,6 +819,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	DATASUBBLOCKS(std::vector<DATASUBBLOCKS*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~DATASUBBLOCKS() {
 		if (generated == 2)
 			return;
@@ -796,8 +834,8 @@ public:
 	DATASUBBLOCKS* generate();
 };
 
-int DATASUBBLOCKS::_parent_id = 0;
-int DATASUBBLOCKS::_index_start = 0;
+thread_local int DATASUBBLOCKS::_parent_id = 0;
+thread_local int DATASUBBLOCKS::_index_start = 0;
 
 
 
@@ -821,8 +859,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	IMAGEDATA& operator () () { return *instances.back(); }
@@ -834,6 +872,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	IMAGEDATA(std::vector<IMAGEDATA*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~IMAGEDATA() {
 		if (generated == 2)
 			return;
@@ -847,8 +887,8 @@ public:
 	IMAGEDATA* generate();
 };
 
-int IMAGEDATA::_parent_id = 0;
-int IMAGEDATA::_index_start = 0;
+thread_local int IMAGEDATA::_parent_id = 0;
+thread_local int IMAGEDATA::_index_start = 0;
 
 
 
@@ -884,8 +924,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS& operator () () { return *instances.back(); }
@@ -897,6 +937,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS(std::vector<GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS() {
 		if (generated == 2)
 			return;
@@ -910,8 +952,8 @@ public:
 	GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS* generate();
 };
 
-int GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS::_parent_id = 0;
-int GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS::_index_start = 0;
+thread_local int GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS::_parent_id = 0;
+thread_local int GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS::_index_start = 0;
 
 
 
@@ -947,8 +989,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	GRAPHICCONTROLSUBBLOCK& operator () () { return *instances.back(); }
@@ -960,6 +1002,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	GRAPHICCONTROLSUBBLOCK(std::vector<GRAPHICCONTROLSUBBLOCK*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~GRAPHICCONTROLSUBBLOCK() {
 		if (generated == 2)
 			return;
@@ -973,8 +1017,8 @@ public:
 	GRAPHICCONTROLSUBBLOCK* generate();
 };
 
-int GRAPHICCONTROLSUBBLOCK::_parent_id = 0;
-int GRAPHICCONTROLSUBBLOCK::_index_start = 0;
+thread_local int GRAPHICCONTROLSUBBLOCK::_parent_id = 0;
+thread_local int GRAPHICCONTROLSUBBLOCK::_index_start = 0;
 
 
 
@@ -1010,8 +1054,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	GRAPHICCONTROLEXTENSION& operator () () { return *instances.back(); }
@@ -1023,6 +1067,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	GRAPHICCONTROLEXTENSION(std::vector<GRAPHICCONTROLEXTENSION*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~GRAPHICCONTROLEXTENSION() {
 		if (generated == 2)
 			return;
@@ -1036,8 +1082,8 @@ public:
 	GRAPHICCONTROLEXTENSION* generate();
 };
 
-int GRAPHICCONTROLEXTENSION::_parent_id = 0;
-int GRAPHICCONTROLEXTENSION::_index_start = 0;
+thread_local int GRAPHICCONTROLEXTENSION::_parent_id = 0;
+thread_local int GRAPHICCONTROLEXTENSION::_index_start = 0;
 
 
 
@@ -1067,8 +1113,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	COMMENTEXTENSION& operator () () { return *instances.back(); }
@@ -1080,6 +1126,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	COMMENTEXTENSION(std::vector<COMMENTEXTENSION*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~COMMENTEXTENSION() {
 		if (generated == 2)
 			return;
@@ -1093,8 +1141,8 @@ public:
 	COMMENTEXTENSION* generate();
 };
 
-int COMMENTEXTENSION::_parent_id = 0;
-int COMMENTEXTENSION::_index_start = 0;
+thread_local int COMMENTEXTENSION::_parent_id = 0;
+thread_local int COMMENTEXTENSION::_index_start = 0;
 
 
 
@@ -1160,8 +1208,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PLAINTEXTSUBBLOCK& operator () () { return *instances.back(); }
@@ -1173,6 +1221,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PLAINTEXTSUBBLOCK(std::vector<PLAINTEXTSUBBLOCK*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PLAINTEXTSUBBLOCK() {
 		if (generated == 2)
 			return;
@@ -1186,8 +1236,8 @@ public:
 	PLAINTEXTSUBBLOCK* generate();
 };
 
-int PLAINTEXTSUBBLOCK::_parent_id = 0;
-int PLAINTEXTSUBBLOCK::_index_start = 0;
+thread_local int PLAINTEXTSUBBLOCK::_parent_id = 0;
+thread_local int PLAINTEXTSUBBLOCK::_index_start = 0;
 
 
 
@@ -1223,8 +1273,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PLAINTEXTEXTENTION& operator () () { return *instances.back(); }
@@ -1236,6 +1286,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PLAINTEXTEXTENTION(std::vector<PLAINTEXTEXTENTION*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PLAINTEXTEXTENTION() {
 		if (generated == 2)
 			return;
@@ -1249,8 +1301,8 @@ public:
 	PLAINTEXTEXTENTION* generate();
 };
 
-int PLAINTEXTEXTENTION::_parent_id = 0;
-int PLAINTEXTEXTENTION::_index_start = 0;
+thread_local int PLAINTEXTEXTENTION::_parent_id = 0;
+thread_local int PLAINTEXTEXTENTION::_index_start = 0;
 
 
 
@@ -1280,8 +1332,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	APPLICATIONSUBBLOCK& operator () () { return *instances.back(); }
@@ -1293,6 +1345,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	APPLICATIONSUBBLOCK(std::vector<APPLICATIONSUBBLOCK*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~APPLICATIONSUBBLOCK() {
 		if (generated == 2)
 			return;
@@ -1306,8 +1360,8 @@ public:
 	APPLICATIONSUBBLOCK* generate();
 };
 
-int APPLICATIONSUBBLOCK::_parent_id = 0;
-int APPLICATIONSUBBLOCK::_index_start = 0;
+thread_local int APPLICATIONSUBBLOCK::_parent_id = 0;
+thread_local int APPLICATIONSUBBLOCK::_index_start = 0;
 
 
 
@@ -1343,8 +1397,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	APPLICATIONEXTENTION& operator () () { return *instances.back(); }
@@ -1356,6 +1410,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	APPLICATIONEXTENTION(std::vector<APPLICATIONEXTENTION*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~APPLICATIONEXTENTION() {
 		if (generated == 2)
 			return;
@@ -1369,8 +1425,8 @@ public:
 	APPLICATIONEXTENTION* generate();
 };
 
-int APPLICATIONEXTENTION::_parent_id = 0;
-int APPLICATIONEXTENTION::_index_start = 0;
+thread_local int APPLICATIONEXTENTION::_parent_id = 0;
+thread_local int APPLICATIONEXTENTION::_index_start = 0;
 
 
 
@@ -1400,8 +1456,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	UNDEFINEDDATA& operator () () { return *instances.back(); }
@@ -1413,6 +1469,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	UNDEFINEDDATA(std::vector<UNDEFINEDDATA*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~UNDEFINEDDATA() {
 		if (generated == 2)
 			return;
@@ -1426,8 +1484,8 @@ public:
 	UNDEFINEDDATA* generate();
 };
 
-int UNDEFINEDDATA::_parent_id = 0;
-int UNDEFINEDDATA::_index_start = 0;
+thread_local int UNDEFINEDDATA::_parent_id = 0;
+thread_local int UNDEFINEDDATA::_index_start = 0;
 
 
 
@@ -1491,8 +1549,8 @@ public:
 	int has_data;
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	DATA& operator () () { return *instances.back(); }
@@ -1504,6 +1562,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	DATA(std::vector<DATA*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~DATA() {
 		if (generated == 2)
 			return;
@@ -1517,8 +1577,8 @@ public:
 	DATA* generate();
 };
 
-int DATA::_parent_id = 0;
-int DATA::_index_start = 0;
+thread_local int DATA::_parent_id = 0;
+thread_local int DATA::_index_start = 0;
 
 
 
@@ -1536,8 +1596,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	TRAILER& operator () () { return *instances.back(); }
@@ -1549,6 +1609,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	TRAILER(std::vector<TRAILER*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~TRAILER() {
 		if (generated == 2)
 			return;
@@ -1562,54 +1624,56 @@ public:
 	TRAILER* generate();
 };
 
-int TRAILER::_parent_id = 0;
-int TRAILER::_index_start = 0;
-
-std::vector<byte> ReadByteInitValues;
-std::vector<ubyte> ReadUByteInitValues = {  };
-std::vector<short> ReadShortInitValues;
-std::vector<ushort> ReadUShortInitValues = { 0xF921, 0xFE21, 0x0121, 0xFF21 };
-std::vector<int> ReadIntInitValues;
-std::vector<uint> ReadUIntInitValues;
-std::vector<int64> ReadQuadInitValues;
-std::vector<uint64> ReadUQuadInitValues;
-std::vector<int64> ReadInt64InitValues;
-std::vector<uint64> ReadUInt64InitValues;
-std::vector<hfloat> ReadHFloatInitValues;
-std::vector<float> ReadFloatInitValues;
-std::vector<double> ReadDoubleInitValues;
-std::vector<std::string> ReadBytesInitValues;
-
-
-std::vector<GIFHEADER*> GIFHEADER_GifHeader_instances;
-std::vector<LOGICALSCREENDESCRIPTOR_PACKEDFIELDS*> LOGICALSCREENDESCRIPTOR_PACKEDFIELDS_PackedFields_instances;
-std::vector<LOGICALSCREENDESCRIPTOR*> LOGICALSCREENDESCRIPTOR_LogicalScreenDescriptor_instances;
-std::vector<RGB*> RGB_rgb_element_instances;
-std::vector<GLOBALCOLORTABLE*> GLOBALCOLORTABLE_GlobalColorTable_instances;
-std::vector<IMAGEDESCRIPTOR_PACKEDFIELDS*> IMAGEDESCRIPTOR_PACKEDFIELDS_PackedFields__instances;
-std::vector<IMAGEDESCRIPTOR*> IMAGEDESCRIPTOR_ImageDescriptor_instances;
-std::vector<LOCALCOLORTABLE*> LOCALCOLORTABLE_LocalColorTable_instances;
-std::vector<DATASUBBLOCK*> DATASUBBLOCK_DataSubBlock_instances;
-std::vector<DATASUBBLOCKS*> DATASUBBLOCKS_DataSubBlocks_instances;
-std::vector<IMAGEDATA*> IMAGEDATA_ImageData_instances;
-std::vector<GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS*> GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS_PackedFields___instances;
-std::vector<GRAPHICCONTROLSUBBLOCK*> GRAPHICCONTROLSUBBLOCK_GraphicControlSubBlock_instances;
-std::vector<GRAPHICCONTROLEXTENSION*> GRAPHICCONTROLEXTENSION_GraphicControlExtension_instances;
-std::vector<DATASUBBLOCKS*> DATASUBBLOCKS_CommentData_instances;
-std::vector<COMMENTEXTENSION*> COMMENTEXTENSION_CommentExtension_instances;
-std::vector<PLAINTEXTSUBBLOCK*> PLAINTEXTSUBBLOCK_PlainTextSubBlock_instances;
-std::vector<DATASUBBLOCKS*> DATASUBBLOCKS_PlainTextData_instances;
-std::vector<PLAINTEXTEXTENTION*> PLAINTEXTEXTENTION_PlainTextExtension_instances;
-std::vector<APPLICATIONSUBBLOCK*> APPLICATIONSUBBLOCK_ApplicationSubBlock_instances;
-std::vector<DATASUBBLOCKS*> DATASUBBLOCKS_ApplicationData_instances;
-std::vector<APPLICATIONEXTENTION*> APPLICATIONEXTENTION_ApplicationExtension_instances;
-std::vector<UNDEFINEDDATA*> UNDEFINEDDATA_UndefinedData_instances;
-std::vector<DATA*> DATA_Data__instances;
-std::vector<TRAILER*> TRAILER_Trailer_instances;
+thread_local int TRAILER::_parent_id = 0;
+thread_local int TRAILER::_index_start = 0;
+
+value_set<byte> ReadByteInitValues;
+value_set<ubyte> ReadUByteInitValues({  }, true);
+value_set<short> ReadShortInitValues;
+value_set<ushort> ReadUShortInitValues({ 0xF921, 0xFE21, 0x0121, 0xFF21 }, true);
+value_set<int> ReadIntInitValues;
+value_set<uint> ReadUIntInitValues;
+value_set<int64> ReadQuadInitValues;
+value_set<uint64> ReadUQuadInitValues;
+value_set<int64> ReadInt64InitValues;
+value_set<uint64> ReadUInt64InitValues;
+value_set<hfloat> ReadHFloatInitValues;
+value_set<float> ReadFloatInitValues;
+value_set<double> ReadDoubleInitValues;
+value_set<std::string> ReadBytesInitValues;
+
+
+thread_local std::vector<GIFHEADER*> GIFHEADER_GifHeader_instances;
+thread_local std::vector<LOGICALSCREENDESCRIPTOR_PACKEDFIELDS*> LOGICALSCREENDESCRIPTOR_PACKEDFIELDS_PackedFields_instances;
+thread_local std::vector<LOGICALSCREENDESCRIPTOR*> LOGICALSCREENDESCRIPTOR_LogicalScreenDescriptor_instances;
+thread_local std::vector<RGB*> RGB_rgb_element_instances;
+thread_local std::vector<GLOBALCOLORTABLE*> GLOBALCOLORTABLE_GlobalColorTable_instances;
+thread_local std::vector<IMAGEDESCRIPTOR_PACKEDFIELDS*> IMAGEDESCRIPTOR_PACKEDFIELDS_PackedFields__instances;
+thread_local std::vector<IMAGEDESCRIPTOR*> IMAGEDESCRIPTOR_ImageDescriptor_instances;
+thread_local std::vector<LOCALCOLORTABLE*> LOCALCOLORTABLE_LocalColorTable_instances;
+thread_local std::vector<DATASUBBLOCK*> DATASUBBLOCK_DataSubBlock_instances;
+thread_local std::vector<DATASUBBLOCKS*> DATASUBBLOCKS_DataSubBlocks_instances;
+thread_local std::vector<IMAGEDATA*> IMAGEDATA_ImageData_instances;
+thread_local std::vector<GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS*> GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS_PackedFields___instances;
+thread_local std::vector<GRAPHICCONTROLSUBBLOCK*> GRAPHICCONTROLSUBBLOCK_GraphicControlSubBlock_instances;
+thread_local std::vector<GRAPHICCONTROLEXTENSION*> GRAPHICCONTROLEXTENSION_GraphicControlExtension_instances;
+thread_local std::vector<DATASUBBLOCKS*> DATASUBBLOCKS_CommentData_instances;
+thread_local std::vector<COMMENTEXTENSION*> COMMENTEXTENSION_CommentExtension_instances;
+thread_local std::vector<PLAINTEXTSUBBLOCK*> PLAINTEXTSUBBLOCK_PlainTextSubBlock_instances;
+thread_local std::vector<DATASUBBLOCKS*> DATASUBBLOCKS_PlainTextData_instances;
+thread_local std::vector<PLAINTEXTEXTENTION*> PLAINTEXTEXTENTION_PlainTextExtension_instances;
+thread_local std::vector<APPLICATIONSUBBLOCK*> APPLICATIONSUBBLOCK_ApplicationSubBlock_instances;
+thread_local std::vector<DATASUBBLOCKS*> DATASUBBLOCKS_ApplicationData_instances;
+thread_local std::vector<APPLICATIONEXTENTION*> APPLICATIONEXTENTION_ApplicationExtension_instances;
+thread_local std::vector<UNDEFINEDDATA*> UNDEFINEDDATA_UndefinedData_instances;
+thread_local std::vector<DATA*> DATA_Data__instances;
+thread_local std::vector<TRAILER*> TRAILER_Trailer_instances;
 
 
 std::unordered_map<std::string, std::string> variable_types = { { "Signature", "char_array_class" }, { "Version", "char_array_class" }, { "GifHeader", "GIFHEADER" }, { "Width", "ushort_class" }, { "Height", "ushort_class" }, { "GlobalColorTableFlag", "UBYTE_bitfield" }, { "ColorResolution", "UBYTE_bitfield" }, { "SortFlag", "UBYTE_bitfield" }, { "SizeOfGlobalColorTable", "UBYTE_bitfield" }, { "PackedFields", "LOGICALSCREENDESCRIPTOR_PACKEDFIELDS" }, { "BackgroundColorIndex", "UBYTE_class" }, { "PixelAspectRatio", "UBYTE_class" }, { "LogicalScreenDescriptor", "LOGICALSCREENDESCRIPTOR" }, { "R", "UBYTE_class" }, { "G", "UBYTE_class" }, { "B", "UBYTE_class" }, { "rgb", "RGB_array_class" }, { "GlobalColorTable", "GLOBALCOLORTABLE" }, { "ImageSeperator", "UBYTE_class" }, { "ImageLeftPosition", "ushort_class" }, { "ImageTopPosition", "ushort_class" }, { "ImageWidth", "ushort_class" }, { "ImageHeight", "ushort_class" }, { "LocalColorTableFlag", "UBYTE_bitfield" }, { "InterlaceFlag", "UBYTE_bitfield" }, { "Reserved", "UBYTE_bitfield" }, { "SizeOfLocalColorTable", "UBYTE_bitfield" }, { "PackedFields_", "IMAGEDESCRIPTOR_PACKEDFIELDS" }, { "ImageDescriptor", "IMAGEDESCRIPTOR" }, { "LocalColorTable", "LOCALCOLORTABLE" }, { "LZWMinimumCodeSize", "UBYTE_class" }, { "Size", "UBYTE_class" }, { "Data", "char_array_class" }, { "DataSubBlock", "DATASUBBLOCK" }, { "BlockTerminator", "UBYTE_class" }, { "DataSubBlocks", "DATASUBBLOCKS" }, { "ImageData", "IMAGEDATA" }, { "ExtensionIntroducer", "UBYTE_class" }, { "GraphicControlLabel", "UBYTE_class" }, { "BlockSize", "UBYTE_class" }, { "DisposalMethod", "UBYTE_bitfield" }, { "UserInputFlag", "UBYTE_bitfield" }, { "TransparentColorFlag", "UBYTE_bitfield" }, { "PackedFields__", "GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS" }, { "DelayTime", "ushort_class" }, { "TransparentColorIndex", "UBYTE_class" }, { "GraphicControlSubBlock", "GRAPHICCONTROLSUBBLOCK" }, { "GraphicControlExtension", "GRAPHICCONTROLEXTENSION" }, { "CommentLabel", "UBYTE_class" }, { "CommentData", "DATASUBBLOCKS" }, { "CommentExtension", "COMMENTEXTENSION" }, { "PlainTextLabel", "UBYTE_class" }, { "TextGridLeftPosition", "ushort_class" }, { "TextGridTopPosition", "ushort_class" }, { "TextGridWidth", "ushort_class" }, { "TextGridHeight", "ushort_class" }, { "CharacterCellWidth", "UBYTE_class" }, { "CharacterCellHeight", "UBYTE_class" }, { "TextForegroundColorIndex", "UBYTE_class" }, { "TextBackgroundColorIndex", "UBYTE_class" }, { "PlainTextSubBlock", "PLAINTEXTSUBBLOCK" }, { "PlainTextData", "DATASUBBLOCKS" }, { "PlainTextExtension", "PLAINTEXTEXTENTION" }, { "ApplicationLabel", "UBYTE_class" }, { "ApplicationIdentifier", "char_array_class" }, { "ApplicationAuthenticationCode", "char_array_class" }, { "ApplicationSubBlock", "APPLICATIONSUBBLOCK" }, { "ApplicationData", "DATASUBBLOCKS" }, { "ApplicationExtension", "APPLICATIONEXTENTION" }, { "Label", "UBYTE_class" }, { "UndefinedData", "UNDEFINEDDATA" }, { "Data_", "DATA" }, { "GIFTrailer", "UBYTE_class" }, { "Trailer", "TRAILER" } };
 
+std::vector<std::pair<const char*, const char*>> variable_sites = { { "Signature", "gif.bt:67" }, { "Version", "gif.bt:69" }, { "GifHeader", "gif.bt:92" }, { "Width", "gif.bt:73" }, { "Height", "gif.bt:74" }, { "GlobalColorTableFlag", "gif.bt:77" }, { "ColorResolution", "gif.bt:78" }, { "SortFlag", "gif.bt:79" }, { "SizeOfGlobalColorTable", "gif.bt:80" }, { "PackedFields", "gif.bt:81" }, { "BackgroundColorIndex", "gif.bt:82" }, { "PixelAspectRatio", "gif.bt:84" }, { "PixelAspectRatio", "gif.bt:86" }, { "LogicalScreenDescriptor", "gif.bt:101" }, { "R", "gif.bt:34" }, { "G", "gif.bt:35" }, { "B", "gif.bt:36" }, { "rgb", "gif.bt:111" }, { "GlobalColorTable", "gif.bt:112" }, { "ImageSeperator", "gif.bt:132" }, { "ImageLeftPosition", "gif.bt:133" }, { "ImageTopPosition", "gif.bt:134" }, { "ImageWidth", "gif.bt:135" }, { "ImageHeight", "gif.bt:136" }, { "LocalColorTableFlag", "gif.bt:142" }, { "InterlaceFlag", "gif.bt:143" }, { "SortFlag", "gif.bt:144" }, { "Reserved", "gif.bt:145" }, { "SizeOfLocalColorTable", "gif.bt:146" }, { "PackedFields", "gif.bt:147" }, { "ImageDescriptor", "gif.bt:148" }, { "rgb", "gif.bt:157" }, { "LocalColorTable", "gif.bt:158" }, { "LZWMinimumCodeSize", "gif.bt:162" }, { "Size", "gif.bt:53" }, { "Data", "gif.bt:54" }, { "DataSubBlock", "gif.bt:55" }, { "BlockTerminator", "gif.bt:62" }, { "DataSubBlocks", "gif.bt:163" }, { "ImageData", "gif.bt:164" }, { "ExtensionIntroducer", "gif.bt:168" }, { "GraphicControlLabel", "gif.bt:169" }, { "BlockSize", "gif.bt:171" }, { "Reserved", "gif.bt:173" }, { "DisposalMethod", "gif.bt:174" }, { "UserInputFlag", "gif.bt:175" }, { "TransparentColorFlag", "gif.bt:176" }, { "PackedFields", "gif.bt:177" }, { "DelayTime", "gif.bt:178" }, { "TransparentColorIndex", "gif.bt:179" }, { "GraphicControlSubBlock", "gif.bt:180" }, { "BlockTerminator", "gif.bt:181" }, { "GraphicControlExtension", "gif.bt:182" }, { "ExtensionIntroducer", "gif.bt:186" }, { "CommentLabel", "gif.bt:187" }, { "CommentData", "gif.bt:188" }, { "CommentExtension", "gif.bt:189" }, { "ExtensionIntroducer", "gif.bt:193" }, { "PlainTextLabel", "gif.bt:194" }, { "BlockSize", "gif.bt:196" }, { "TextGridLeftPosition", "gif.bt:197" }, { "TextGridTopPosition", "gif.bt:198" }, { "TextGridWidth", "gif.bt:199" }, { "TextGridHeight", "gif.bt:200" }, { "CharacterCellWidth", "gif.bt:201" }, { "CharacterCellHeight", "gif.bt:202" }, { "TextForegroundColorIndex", "gif.bt:203" }, { "TextBackgroundColorIndex", "gif.bt:204" }, { "PlainTextSubBlock", "gif.bt:205" }, { "PlainTextData", "gif.bt:206" }, { "PlainTextExtension", "gif.bt:207" }, { "ExtensionIntroducer", "gif.bt:211" }, { "ApplicationLabel", "gif.bt:212" }, { "BlockSize", "gif.bt:214" }, { "ApplicationIdentifier", "gif.bt:215" }, { "ApplicationAuthenticationCode", "gif.bt:216" }, { "ApplicationSubBlock", "gif.bt:217" }, { "ApplicationData", "gif.bt:218" }, { "ApplicationExtension", "gif.bt:219" }, { "ExtensionIntroducer", "gif.bt:223" }, { "Label", "gif.bt:224" }, { "DataSubBlocks", "gif.bt:225" }, { "UndefinedData", "gif.bt:226" }, { "Data", "gif.bt:229" }, { "GIFTrailer", "gif.bt:233" }, { "Trailer", "gif.bt:234" } };
+
 std::vector<std::vector<int>> integer_ranges = { { 1, 16 } };
 
 class globals_class {
@@ -1700,13 +1764,13 @@ public:
 
 	globals_class() :
 		Signature_element(false),
-		Signature(Signature_element, { "GIF" }),
+		Signature(Signature_element, &KNOWN_VALUES(std::string, { "GIF" })),
 		Version_element(false),
-		Version(Version_element, { "89a" }),
+		Version(Version_element, &KNOWN_VALUES(std::string, { "89a" })),
 		GifHeader(GIFHEADER_GifHeader_instances),
 		Width(1),
 		Height(1),
-		GlobalColorTableFlag(1, { 1 }),
+		GlobalColorTableFlag(1, &KNOWN_VALUES(UBYTE, { 1 })),
 		ColorResolution(1),
 		SortFlag(1),
 		SizeOfGlobalColorTable(1),
@@ -1725,7 +1789,7 @@ public:
 		ImageTopPosition(1),
 		ImageWidth(1),
 		ImageHeight(1),
-		LocalColorTableFlag(1, { 1 }),
+		LocalColorTableFlag(1, &KNOWN_VALUES(UBYTE, { 1 })),
 		InterlaceFlag(1),
 		Reserved(1),
 		SizeOfLocalColorTable(1),
@@ -1782,7 +1846,7 @@ public:
 	{}
 };
 
-globals_class* g;
+thread_local globals_class* g;
 
 
 GIFHEADER* GIFHEADER::generate() {
@@ -1801,9 +1865,9 @@ GIFHEADER* GIFHEADER::generate() {
 	::g->_struct_id = ++::g->_struct_id_counter;
 
 	evil = SetEvilBit(false);
-	GENERATE_VAR(Signature, ::g->Signature.generate(3));
+	GENERATE_VAR(Signature, 0, ::g->Signature.generate(3));
 	SetEvilBit(evil);
-	GENERATE_VAR(Version, ::g->Version.generate(3, { {"87a"}, {"89a"} }));
+	GENERATE_VAR(Version, 1, ::g->Version.generate(3, KNOWN_VALUES(std::string, { {"87a"}, {"89a"} })));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -1826,10 +1890,10 @@ LOGICALSCREENDESCRIPTOR_PACKEDFIELDS* LOGICALSCREENDESCRIPTOR_PACKEDFIELDS::gene
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(GlobalColorTableFlag, ::g->GlobalColorTableFlag.generate(1));
-	GENERATE_VAR(ColorResolution, ::g->ColorResolution.generate(3));
-	GENERATE_VAR(SortFlag, ::g->SortFlag.generate(1));
-	GENERATE_VAR(SizeOfGlobalColorTable, ::g->SizeOfGlobalColorTable.generate(3));
+	GENERATE_VAR(GlobalColorTableFlag, 5, ::g->GlobalColorTableFlag.generate(1));
+	GENERATE_VAR(ColorResolution, 6, ::g->ColorResolution.generate(3));
+	GENERATE_VAR(SortFlag, 7, ::g->SortFlag.generate(1));
+	GENERATE_VAR(SizeOfGlobalColorTable, 8, ::g->SizeOfGlobalColorTable.generate(3));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -1852,15 +1916,15 @@ LOGICALSCREENDESCRIPTOR* LOGICALSCREENDESCRIPTOR::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(Width, ::g->Width.generate());
-	GENERATE_VAR(Height, ::g->Height.generate());
+	GENERATE_VAR(Width, 3, ::g->Width.generate());
+	GENERATE_VAR(Height, 4, ::g->Height.generate());
 	BitfieldLeftToRight();
-	GENERATE_VAR(PackedFields, ::g->PackedFields.generate());
-	GENERATE_VAR(BackgroundColorIndex, ::g->BackgroundColorIndex.generate());
+	GENERATE_VAR(PackedFields, 9, ::g->PackedFields.generate());
+	GENERATE_VAR(BackgroundColorIndex, 10, ::g->BackgroundColorIndex.generate());
 	if ((::g->GifHeader().Version() == "89a")) {
-		GENERATE_VAR(PixelAspectRatio, ::g->PixelAspectRatio.generate());
+		GENERATE_VAR(PixelAspectRatio, 11, ::g->PixelAspectRatio.generate());
 	} else {
-		GENERATE_VAR(PixelAspectRatio, ::g->PixelAspectRatio.generate({ 0 }));
+		GENERATE_VAR(PixelAspectRatio, 12, ::g->PixelAspectRatio.generate(KNOWN_VALUES(UBYTE, { 0 })));
 	};
 
 	::g->_struct_id = _parent_id;
@@ -1884,9 +1948,9 @@ RGB* RGB::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(R, ::g->R.generate());
-	GENERATE_VAR(G, ::g->G.generate());
-	GENERATE_VAR(B, ::g->B.generate());
+	GENERATE_VAR(R, 14, ::g->R.generate());
+	GENERATE_VAR(G, 15, ::g->G.generate());
+	GENERATE_VAR(B, 16, ::g->B.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -1914,7 +1978,7 @@ GLOBALCOLORTABLE* GLOBALCOLORTABLE::generate() {
 			size *= 2;
 	;
 	};
-	GENERATE_VAR(rgb, ::g->rgb.generate(size));
+	GENERATE_VAR(rgb, 17, ::g->rgb.generate(size));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -1942,11 +2006,11 @@ IMAGEDESCRIPTOR_PACKEDFIELDS* IMAGEDESCRIPTOR_PACKEDFIELDS::generate() {
 	} else {
 		possible_values = { 1 };
 	};
-	GENERATE_VAR(LocalColorTableFlag, ::g->LocalColorTableFlag.generate(1, possible_values));
-	GENERATE_VAR(InterlaceFlag, ::g->InterlaceFlag.generate(1));
-	GENERATE_VAR(SortFlag, ::g->SortFlag.generate(1));
-	GENERATE_VAR(Reserved, ::g->Reserved.generate(2));
-	GENERATE_VAR(SizeOfLocalColorTable, ::g->SizeOfLocalColorTable.generate(3));
+	GENERATE_VAR(LocalColorTableFlag, 24, ::g->LocalColorTableFlag.generate(1, possible_values));
+	GENERATE_VAR(InterlaceFlag, 25, ::g->InterlaceFlag.generate(1));
+	GENERATE_VAR(SortFlag, 26, ::g->SortFlag.generate(1));
+	GENERATE_VAR(Reserved, 27, ::g->Reserved.generate(2));
+	GENERATE_VAR(SizeOfLocalColorTable, 28, ::g->SizeOfLocalColorTable.generate(3));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -1969,12 +2033,12 @@ IMAGEDESCRIPTOR* IMAGEDESCRIPTOR::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(ImageSeperator, ::g->ImageSeperator.generate());
-	GENERATE_VAR(ImageLeftPosition, ::g->ImageLeftPosition.generate());
-	GENERATE_VAR(ImageTopPosition, ::g->ImageTopPosition.generate());
-	GENERATE_VAR(ImageWidth, ::g->ImageWidth.generate());
-	GENERATE_VAR(ImageHeight, ::g->ImageHeight.generate());
-	GENERATE_VAR(PackedFields, ::g->PackedFields_.generate());
+	GENERATE_VAR(ImageSeperator, 19, ::g->ImageSeperator.generate());
+	GENERATE_VAR(ImageLeftPosition, 20, ::g->ImageLeftPosition.generate());
+	GENERATE_VAR(ImageTopPosition, 21, ::g->ImageTopPosition.generate());
+	GENERATE_VAR(ImageWidth, 22, ::g->ImageWidth.generate());
+	GENERATE_VAR(ImageHeight, 23, ::g->ImageHeight.generate());
+	GENERATE_VAR(PackedFields, 29, ::g->PackedFields_.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2002,7 +2066,7 @@ LOCALCOLORTABLE* LOCALCOLORTABLE::generate() {
 			size *= 2;
 	;
 	};
-	GENERATE_VAR(rgb, ::g->rgb.generate(size));
+	GENERATE_VAR(rgb, 31, ::g->rgb.generate(size));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2025,8 +2089,8 @@ DATASUBBLOCK* DATASUBBLOCK::generate(UBYTE& size) {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(Size, ::g->Size.generate());
-	GENERATE_VAR(Data, ::g->Data.generate(size));
+	GENERATE_VAR(Size, 34, ::g->Size.generate());
+	GENERATE_VAR(Data, 35, ::g->Data.generate(size));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2056,14 +2120,14 @@ DATASUBBLOCKS* DATASUBBLOCKS::generate() {
 	count = 0;
 	size = ReadUByte(FTell(), values);
 	while ((size != 0)) {
-		GENERATE_VAR(DataSubBlock, ::g->DataSubBlock.generate(size));
+		GENERATE_VAR(DataSubBlock, 36, ::g->DataSubBlock.generate(size));
 		count += size;
 		size = ReadUByte(FTell(), values);
 		if ((count > 1500)) {
 			values = { 0, 255 };
 		};
 	};
-	GENERATE_VAR(BlockTerminator, ::g->BlockTerminator.generate());
+	GENERATE_VAR(BlockTerminator, 37, ::g->BlockTerminator.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2086,8 +2150,8 @@ IMAGEDATA* IMAGEDATA::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(LZWMinimumCodeSize, ::g->LZWMinimumCodeSize.generate({ 8 }));
-	GENERATE_VAR(DataSubBlocks, ::g->DataSubBlocks.generate());
+	GENERATE_VAR(LZWMinimumCodeSize, 33, ::g->LZWMinimumCodeSize.generate(KNOWN_VALUES(UBYTE, { 8 })));
+	GENERATE_VAR(DataSubBlocks, 38, ::g->DataSubBlocks.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2110,10 +2174,10 @@ GRAPHICCONTROLEXTENSION_DATASUBBLOCK_PACKEDFIELDS* GRAPHICCONTROLEXTENSION_DATAS
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(Reserved, ::g->Reserved.generate(3));
-	GENERATE_VAR(DisposalMethod, ::g->DisposalMethod.generate(3));
-	GENERATE_VAR(UserInputFlag, ::g->UserInputFlag.generate(1));
-	GENERATE_VAR(TransparentColorFlag, ::g->TransparentColorFlag.generate(1));
+	GENERATE_VAR(Reserved, 43, ::g->Reserved.generate(3));
+	GENERATE_VAR(DisposalMethod, 44, ::g->DisposalMethod.generate(3));
+	GENERATE_VAR(UserInputFlag, 45, ::g->UserInputFlag.generate(1));
+	GENERATE_VAR(TransparentColorFlag, 46, ::g->TransparentColorFlag.generate(1));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2136,10 +2200,10 @@ GRAPHICCONTROLSUBBLOCK* GRAPHICCONTROLSUBBLOCK::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(BlockSize, ::g->BlockSize.generate({ 4 }));
-	GENERATE_VAR(PackedFields, ::g->PackedFields__.generate());
-	GENERATE_VAR(DelayTime, ::g->DelayTime.generate());
-	GENERATE_VAR(TransparentColorIndex, ::g->TransparentColorIndex.generate());
+	GENERATE_VAR(BlockSize, 42, ::g->BlockSize.generate(KNOWN_VALUES(UBYTE, { 4 })));
+	GENERATE_VAR(PackedFields, 47, ::g->PackedFields__.generate());
+	GENERATE_VAR(DelayTime, 48, ::g->DelayTime.generate());
+	GENERATE_VAR(TransparentColorIndex, 49, ::g->TransparentColorIndex.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2162,10 +2226,10 @@ GRAPHICCONTROLEXTENSION* GRAPHICCONTROLEXTENSION::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(ExtensionIntroducer, ::g->ExtensionIntroducer.generate());
-	GENERATE_VAR(GraphicControlLabel, ::g->GraphicControlLabel.generate());
-	GENERATE_VAR(GraphicControlSubBlock, ::g->GraphicControlSubBlock.generate());
-	GENERATE_VAR(BlockTerminator, ::g->BlockTerminator.generate());
+	GENERATE_VAR(ExtensionIntroducer, 40, ::g->ExtensionIntroducer.generate());
+	GENERATE_VAR(GraphicControlLabel, 41, ::g->GraphicControlLabel.generate());
+	GENERATE_VAR(GraphicControlSubBlock, 50, ::g->GraphicControlSubBlock.generate());
+	GENERATE_VAR(BlockTerminator, 51, ::g->BlockTerminator.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2188,9 +2252,9 @@ COMMENTEXTENSION* COMMENTEXTENSION::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(ExtensionIntroducer, ::g->ExtensionIntroducer.generate());
-	GENERATE_VAR(CommentLabel, ::g->CommentLabel.generate());
-	GENERATE_VAR(CommentData, ::g->CommentData.generate());
+	GENERATE_VAR(ExtensionIntroducer, 53, ::g->ExtensionIntroducer.generate());
+	GENERATE_VAR(CommentLabel, 54, ::g->CommentLabel.generate());
+	GENERATE_VAR(CommentData, 55, ::g->CommentData.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2213,15 +2277,15 @@ PLAINTEXTSUBBLOCK* PLAINTEXTSUBBLOCK::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(BlockSize, ::g->BlockSize.generate());
-	GENERATE_VAR(TextGridLeftPosition, ::g->TextGridLeftPosition.generate());
-	GENERATE_VAR(TextGridTopPosition, ::g->TextGridTopPosition.generate());
-	GENERATE_VAR(TextGridWidth, ::g->TextGridWidth.generate());
-	GENERATE_VAR(TextGridHeight, ::g->TextGridHeight.generate());
-	GENERATE_VAR(CharacterCellWidth, ::g->CharacterCellWidth.generate());
-	GENERATE_VAR(CharacterCellHeight, ::g->CharacterCellHeight.generate());
-	GENERATE_VAR(TextForegroundColorIndex, ::g->TextForegroundColorIndex.generate());
-	GENERATE_VAR(TextBackgroundColorIndex, ::g->TextBackgroundColorIndex.generate());
+	GENERATE_VAR(BlockSize, 59, ::g->BlockSize.generate());
+	GENERATE_VAR(TextGridLeftPosition, 60, ::g->TextGridLeftPosition.generate());
+	GENERATE_VAR(TextGridTopPosition, 61, ::g->TextGridTopPosition.generate());
+	GENERATE_VAR(TextGridWidth, 62, ::g->TextGridWidth.generate());
+	GENERATE_VAR(TextGridHeight, 63, ::g->TextGridHeight.generate());
+	GENERATE_VAR(CharacterCellWidth, 64, ::g->CharacterCellWidth.generate());
+	GENERATE_VAR(CharacterCellHeight, 65, ::g->CharacterCellHeight.generate());
+	GENERATE_VAR(TextForegroundColorIndex, 66, ::g->TextForegroundColorIndex.generate());
+	GENERATE_VAR(TextBackgroundColorIndex, 67, ::g->TextBackgroundColorIndex.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2244,10 +2308,10 @@ PLAINTEXTEXTENTION* PLAINTEXTEXTENTION::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(ExtensionIntroducer, ::g->ExtensionIntroducer.generate());
-	GENERATE_VAR(PlainTextLabel, ::g->PlainTextLabel.generate());
-	GENERATE_VAR(PlainTextSubBlock, ::g->PlainTextSubBlock.generate());
-	GENERATE_VAR(PlainTextData, ::g->PlainTextData.generate());
+	GENERATE_VAR(ExtensionIntroducer, 57, ::g->ExtensionIntroducer.generate());
+	GENERATE_VAR(PlainTextLabel, 58, ::g->PlainTextLabel.generate());
+	GENERATE_VAR(PlainTextSubBlock, 68, ::g->PlainTextSubBlock.generate());
+	GENERATE_VAR(PlainTextData, 69, ::g->PlainTextData.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2270,9 +2334,9 @@ APPLICATIONSUBBLOCK* APPLICATIONSUBBLOCK::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(BlockSize, ::g->BlockSize.generate());
-	GENERATE_VAR(ApplicationIdentifier, ::g->ApplicationIdentifier.generate(8));
-	GENERATE_VAR(ApplicationAuthenticationCode, ::g->ApplicationAuthenticationCode.generate(3));
+	GENERATE_VAR(BlockSize, 73, ::g->BlockSize.generate());
+	GENERATE_VAR(ApplicationIdentifier, 74, ::g->ApplicationIdentifier.generate(8));
+	GENERATE_VAR(ApplicationAuthenticationCode, 75, ::g->ApplicationAuthenticationCode.generate(3));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2295,10 +2359,10 @@ APPLICATIONEXTENTION* APPLICATIONEXTENTION::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(ExtensionIntroducer, ::g->ExtensionIntroducer.generate());
-	GENERATE_VAR(ApplicationLabel, ::g->ApplicationLabel.generate());
-	GENERATE_VAR(ApplicationSubBlock, ::g->ApplicationSubBlock.generate());
-	GENERATE_VAR(ApplicationData, ::g->ApplicationData.generate());
+	GENERATE_VAR(ExtensionIntroducer, 71, ::g->ExtensionIntroducer.generate());
+	GENERATE_VAR(ApplicationLabel, 72, ::g->ApplicationLabel.generate());
+	GENERATE_VAR(ApplicationSubBlock, 76, ::g->ApplicationSubBlock.generate());
+	GENERATE_VAR(ApplicationData, 77, ::g->ApplicationData.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2321,9 +2385,9 @@ UNDEFINEDDATA* UNDEFINEDDATA::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(ExtensionIntroducer, ::g->ExtensionIntroducer.generate());
-	GENERATE_VAR(Label, ::g->Label.generate());
-	GENERATE_VAR(DataSubBlocks, ::g->DataSubBlocks.generate());
+	GENERATE_VAR(ExtensionIntroducer, 79, ::g->ExtensionIntroducer.generate());
+	GENERATE_VAR(Label, 80, ::g->Label.generate());
+	GENERATE_VAR(DataSubBlocks, 81, ::g->DataSubBlocks.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2359,32 +2423,32 @@ DATA* DATA::generate() {
 				possible.insert(possible.end(), { 0x3B });
 			};
 			SetBackColor(0xE0FFE0);
-			GENERATE_VAR(ImageDescriptor, ::g->ImageDescriptor.generate());
+			GENERATE_VAR(ImageDescriptor, 30, ::g->ImageDescriptor.generate());
 			if ((ImageDescriptor().PackedFields().LocalColorTableFlag() == 1)) {
 				SetBackColor(0xC0FFC0);
-				GENERATE_VAR(LocalColorTable, ::g->LocalColorTable.generate());
+				GENERATE_VAR(LocalColorTable, 32, ::g->LocalColorTable.generate());
 			};
 			SetBackColor(0xA0FFA0);
-			GENERATE_VAR(ImageData, ::g->ImageData.generate());
+			GENERATE_VAR(ImageData, 39, ::g->ImageData.generate());
 		} else {
 		if ((ReadUShort(FTell()) == 0xF921)) {
 			SetBackColor(0xC0FFFF);
-			GENERATE_VAR(GraphicControlExtension, ::g->GraphicControlExtension.generate());
+			GENERATE_VAR(GraphicControlExtension, 52, ::g->GraphicControlExtension.generate());
 		} else {
 		if ((ReadUShort(FTell()) == 0xFE21)) {
 			SetBackColor(0xFFFFC0);
-			GENERATE_VAR(CommentExtension, ::g->CommentExtension.generate());
+			GENERATE_VAR(CommentExtension, 56, ::g->CommentExtension.generate());
 		} else {
 		if ((ReadUShort(FTell()) == 0x0121)) {
 			SetBackColor(0xC0C0C0);
-			GENERATE_VAR(PlainTextExtension, ::g->PlainTextExtension.generate());
+			GENERATE_VAR(PlainTextExtension, 70, ::g->PlainTextExtension.generate());
 		} else {
 		if ((ReadUShort(FTell()) == 0xFF21)) {
 			SetBackColor(0xC0C0FF);
-			GENERATE_VAR(ApplicationExtension, ::g->ApplicationExtension.generate());
+			GENERATE_VAR(ApplicationExtension, 78, ::g->ApplicationExtension.generate());
 		} else {
 			SetBackColor(0xFF8080);
-			GENERATE_VAR(UndefinedData, ::g->UndefinedData.generate());
+			GENERATE_VAR(UndefinedData, 82, ::g->UndefinedData.generate());
 		};
 		};
 		};
@@ -2413,7 +2477,7 @@ TRAILER* TRAILER::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(GIFTrailer, ::g->GIFTrailer.generate({ 0x3B }));
+	GENERATE_VAR(GIFTrailer, 84, ::g->GIFTrailer.generate(KNOWN_VALUES(UBYTE, { 0x3B })));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2427,26 +2491,32 @@ void generate_file() {
 
 	LittleEndian();
 	SetBackColor(0xFFFFFF);
-	GENERATE(GifHeader, ::g->GifHeader.generate());
+	GENERATE(GifHeader, 2, ::g->GifHeader.generate());
 	if ((::g->GifHeader().Signature() != "GIF")) {
 		Warning("File is not a valid GIF. Template stopped.");
 		exit_template(-1);
 	};
 	SetBackColor(0xE0E0E0);
-	GENERATE(LogicalScreenDescriptor, ::g->LogicalScreenDescriptor.generate());
+	GENERATE(LogicalScreenDescriptor, 13, ::g->LogicalScreenDescriptor.generate());
 	if ((::g->LogicalScreenDescriptor().PackedFields().GlobalColorTableFlag() == 1)) {
 		SetBackColor(0xC0C0C0);
-		GENERATE(GlobalColorTable, ::g->GlobalColorTable.generate());
+		GENERATE(GlobalColorTable, 18, ::g->GlobalColorTable.generate());
 	};
 	SetBackColor(0xFFFFFF);
-	GENERATE(Data, ::g->Data_.generate());
+	GENERATE(Data, 83, ::g->Data_.generate());
 	SetBackColor(0xFFFFFF);
 	SetEvilBit(false);
-	GENERATE(Trailer, ::g->Trailer.generate());
+	GENERATE(Trailer, 85, ::g->Trailer.generate());
 
 	file_acc.finish();
 	delete_globals();
 }
 
-void delete_globals() { delete ::g; }
+void delete_globals() {
+	delete ::g;
+	::struct_arena.reset();
+}
+
+// Identifies the generated code, e.g. for cached parse results
+const char* template_hash = "ff550391b2d9301da45a782c793d634a3c602146f9603ff9e1136b1bdb17507c";
 
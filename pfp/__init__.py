@@ -1,14 +1,19 @@
 #!/usr/bin/env python
 
+import mmap
 import os
 import six
 import sys
+import threading
 
 import py010parser.c_parser
 
+import pfp.errors
 import pfp.interp
 from pfp.bitwrap import BitwrappedStream
+import pfp.events
 import pfp.fuzz
+import pfp.utils
 
 
 pfp.fuzz.init()
@@ -31,6 +36,7 @@ def parse(
     keep_successful=False,
     printf=True,
     generate=True,
+    cpp_target=None,
 ):
     """Parse the data stream using the supplied template. The data stream
     WILL NOT be automatically closed.
@@ -45,6 +51,7 @@ def parse(
     :int3: if debugger breaks are allowed while interpreting the template (true)
     :keep_successful: return any succesfully parsed data instead of raising an error. If an error occurred and ``keep_successful`` is True, then ``_pfp__error`` will be contain the exception object
     :printf: if ``False``, all calls to ``Printf`` (:any:`pfp.native.compat_interface.Printf`) will be noops. (default=``True``)
+    :cpp_target: path the generated C++ code is written to by the default interpreter (not written if ``None``)
     :returns: pfp DOM
     """
     if data is None and data_file is None:
@@ -79,7 +86,9 @@ def parse(
     # the user may specify their own instance of PfpInterp to be
     # used
     if interp is None:
-        interp = pfp.interp.PfpInterp(debug=debug, parser=PARSER, int3=int3, generate=generate)
+        interp = pfp.interp.PfpInterp(
+            debug=debug, parser=PARSER, int3=int3, generate=generate, cpp_target=cpp_target
+        )
 
     # so we can consume single bits at a time
     data = BitwrappedStream(data, generate=generate)
@@ -100,6 +109,156 @@ def parse(
     return dom
 
 
+# the interpreter recurses deeply, which needs more than the default
+# stack size of new threads
+ITERPARSE_STACK_SIZE = 256 * 1024 * 1024
+
+# serializes changes of the process-wide stack size of new threads
+_stack_size_lock = threading.Lock()
+
+
+def _start_thread(thread, stack_size):
+    """Start ``thread`` with a stack of at least ``stack_size`` bytes.
+
+    ``threading.stack_size()`` applies to all threads of the process, so
+    threads that other code starts at the same time may get the larger
+    stack, too.
+    """
+    with _stack_size_lock:
+        old_size = threading.stack_size()
+        threading.stack_size(max(old_size, stack_size))
+        try:
+            thread.start()
+        finally:
+            threading.stack_size(old_size)
+
+
+def iterparse(
+    template=None,
+    data_file=None,
+    template_file=None,
+    data=None,
+    printf=True,
+    release=True,
+    queue_size=1024,
+):
+    """Parse the data using the supplied template and yield a
+    :any:`pfp.events.ParseEvent` for every field as soon as it has been
+    parsed, instead of returning the complete DOM::
+
+        for event, path, offset, value in pfp.iterparse(
+            template_file="templates/pcap.bt", data_file="capture.pcap"
+        ):
+            if event == "leaf" and path.endswith(".incl_len"):
+                print(offset, value)
+
+    ``data_file`` is read through a read-only ``mmap``. Completed structs
+    that are not referenced by any expression in the template are removed
+    from the DOM, so that inputs much larger than the available memory can
+    be indexed. The template is interpreted in a separate thread, which
+    waits whenever ``queue_size`` events have not been consumed yet.
+
+    :template: template contents (str)
+    :data_file: PATH to the data to be used as the input stream
+    :template_file: template file path
+    :data: Input data as a file-like object, instead of ``data_file``. It WILL NOT be automatically closed.
+    :printf: if ``False``, all calls to ``Printf`` (:any:`pfp.native.compat_interface.Printf`) will be noops. (default=``True``)
+    :release: if completed, unreferenced structs should be removed from the DOM (default=``True``)
+    :queue_size: maximum number of events parsed ahead of the consumer (default=``1024``)
+    :returns: generator of :any:`pfp.events.ParseEvent`
+    """
+    if data is None and data_file is None:
+        raise Exception("No input data was specified")
+
+    if data is not None and data_file is not None:
+        raise Exception("Only one input data may be specified")
+
+    if template is None and template_file is None:
+        raise Exception("No template specified!")
+
+    if template is not None and template_file is not None:
+        raise Exception("Only one template may be specified!")
+
+    orig_filename = "string"
+    if template_file is not None:
+        orig_filename = template_file
+        try:
+            with open(os.path.expanduser(template_file), "r") as f:
+                template = f.read()
+        except Exception as e:
+            raise Exception(
+                "Could not open template file '{}'".format(template_file)
+            )
+
+    return _iterparse(
+        template, orig_filename, data, data_file, printf, release, queue_size
+    )
+
+
+def _iterparse(template, orig_filename, data, data_file, printf, release, queue_size):
+    events = pfp.utils.Queue(maxsize=queue_size)
+    # the end of the parse, followed by its exc_info (if any)
+    done = []
+    stopped = []
+
+    def report(event):
+        # the consumer went away, stop interpreting the template
+        if stopped:
+            raise pfp.errors.InterpExit()
+        events.put(event)
+
+    interp = pfp.interp.PfpInterp(
+        parser=PARSER,
+        int3=False,
+        generate=False,
+        listener=pfp.events.EventListener(report, release=release),
+    )
+
+    data_fd = mapped = None
+    if data_file is not None:
+        data = data_fd = open(os.path.expanduser(data_file), "rb")
+        # empty files cannot be mapped
+        if os.fstat(data_fd.fileno()).st_size > 0:
+            data = mapped = mmap.mmap(data_fd.fileno(), 0, access=mmap.ACCESS_READ)
+    stream = BitwrappedStream(data, generate=False)
+
+    def run():
+        try:
+            interp.parse(
+                stream, template, orig_filename=orig_filename, printf=printf
+            )
+            done.append(None)
+        except Exception:
+            done.append(sys.exc_info())
+        events.put(done)
+
+    thread = threading.Thread(target=run, name="pfp-iterparse")
+    thread.daemon = True
+    _start_thread(thread, ITERPARSE_STACK_SIZE)
+
+    try:
+        while True:
+            event = events.get()
+            if event is done:
+                break
+            yield event
+        if done[0] is not None:
+            six.reraise(*done[0])
+    finally:
+        stopped.append(True)
+        # unblock the interpreter if the consumer stopped early
+        while thread.is_alive():
+            try:
+                events.get(timeout=0.1)
+            except six.moves.queue.Empty:
+                pass
+        thread.join()
+        if mapped is not None:
+            mapped.close()
+        if data_fd is not None:
+            data_fd.close()
+
+
 def create_interp(template_file=None, template=None):
     """Create an Interp instance with the template preloaded
 
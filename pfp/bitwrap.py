@@ -1,9 +1,8 @@
 #!/usr/bin/env python
 # encoding: utf-8
 
-import collections
+import binascii
 from intervaltree import IntervalTree, Interval
-import math
 import os
 import six
 import sys
@@ -15,6 +14,39 @@ class EOFError(Exception):
     pass
 
 
+def _bytes_to_int(bytes_):
+    """Convert big-endian bytes into an int
+    """
+    if len(bytes_) == 0:
+        return 0
+    return int(binascii.hexlify(bytes_), 16)
+
+
+def _int_to_bytes(value, num_bytes):
+    """Convert an int into ``num_bytes`` big-endian bytes
+    """
+    if num_bytes == 0:
+        return utils.binary("")
+    return binascii.unhexlify("%0*x" % (num_bytes * 2, value))
+
+
+def _bits_to_int(bits):
+    """Convert a list of bits (most significant first) into an int
+    """
+    if len(bits) == 0:
+        return 0
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def _int_to_bits(value, num_bits):
+    """Convert an int into a list of ``num_bits`` bits (most significant
+    first)
+    """
+    if num_bits == 0:
+        return []
+    return [int(bit) for bit in "{:0{}b}".format(value, num_bits)]
+
+
 def bits_to_bytes(bits):
     """Convert the bit list into bytes. (Assumes bits is a list
     whose length is a multiple of 8)
@@ -22,25 +54,17 @@ def bits_to_bytes(bits):
     if len(bits) % 8 != 0:
         raise Exception("num bits must be multiple of 8")
 
-    res = ""
-
-    for x in six.moves.range(0, len(bits), 8):
-        byte_bits = bits[x : x + 8]
-        byte_val = int("".join(map(str, byte_bits)), 2)
-        res += chr(byte_val)
-
-    return utils.binary(res)
+    return _int_to_bytes(_bits_to_int(bits), len(bits) // 8)
 
 
 def bytes_to_bits(bytes_):
     """Convert bytes to a list of bits
     """
-    res = []
-    for x in bytes_:
-        if not isinstance(x, int):
-            x = ord(x)
-        res += byte_to_bits(x)
-    return res
+    if isinstance(bytes_, six.text_type):
+        bytes_ = utils.binary(bytes_)
+    elif not isinstance(bytes_, (bytes, bytearray)):
+        bytes_ = bytearray(bytes_)
+    return _int_to_bits(_bytes_to_int(bytes_), len(bytes_) * 8)
 
 
 def byte_to_bits(b):
@@ -67,7 +91,10 @@ class BitwrappedStream(object):
         :stream: The normal byte stream
         """
         self._stream = stream
-        self._bits = collections.deque()
+        # unconsumed bits: the low ``_bit_count`` bits of ``_bit_value``,
+        # most significant first
+        self._bit_value = 0
+        self._bit_count = 0
         self._generate = generate
 
         self.closed = False
@@ -77,7 +104,9 @@ class BitwrappedStream(object):
         # a bit stream with no padding
         self.padded = True
 
-        self.range_set = IntervalTree()
+        # consumed [begin, end) ranges, coalesced with the previous range
+        # when reads are consecutive
+        self._ranges = []
 
     def is_eof(self):
         """Return if the stream has reached EOF or not
@@ -131,12 +160,13 @@ class BitwrappedStream(object):
 
         if self.padded:
             # we toss out any uneven bytes
-            self._bits.clear()
+            self._clear_bits()
             res = utils.binary(self._stream.read(num))
         else:
-            bits = self.read_bits(num * 8)
-            res = bits_to_bytes(bits)
-            res = utils.binary(res)
+            value, num_bits = self._read_bits_value(num * 8)
+            if num_bits % 8 != 0:
+                raise Exception("num bits must be multiple of 8")
+            res = _int_to_bytes(value, num_bits // 8)
 
         end_pos = self.tell()
         self._update_consumed_ranges(start_pos, end_pos)
@@ -152,19 +182,8 @@ class BitwrappedStream(object):
         if self._generate:
             self.error()
             return [0] * num
-        if num > len(self._bits):
-            needed = num - len(self._bits)
-            num_bytes = int(math.ceil(needed / 8.0))
-            read_bytes = self._stream.read(num_bytes)
-
-            for bit in bytes_to_bits(read_bytes):
-                self._bits.append(bit)
-
-        res = []
-        while len(res) < num and len(self._bits) > 0:
-            res.append(self._bits.popleft())
-
-        return res
+        value, num_bits = self._read_bits_value(num)
+        return _int_to_bits(value, num_bits)
 
     def write(self, data):
         """Write data to the stream
@@ -174,7 +193,7 @@ class BitwrappedStream(object):
         """
         if self.padded:
             # flush out any remaining bits first
-            if len(self._bits) > 0:
+            if self._bit_count > 0:
                 self._flush_bits_to_stream()
             self._stream.write(data)
         else:
@@ -182,8 +201,9 @@ class BitwrappedStream(object):
             if len(data) == 0:
                 return
 
-            bits = bytes_to_bits(data)
-            self.write_bits(bits)
+            if isinstance(data, six.text_type):
+                data = utils.binary(data)
+            self._write_bits_value(_bytes_to_int(data), len(data) * 8)
 
     def write_bits(self, bits):
         """Write the bits to the stream.
@@ -191,15 +211,7 @@ class BitwrappedStream(object):
         Add the bits to the existing unflushed bits and write
         complete bytes to the stream.
         """
-        for bit in bits:
-            self._bits.append(bit)
-
-        while len(self._bits) >= 8:
-            byte_bits = [self._bits.popleft() for x in six.moves.range(8)]
-            byte = bits_to_bytes(byte_bits)
-            self._stream.write(byte)
-
-        # there may be unflushed bits leftover and THAT'S OKAY
+        self._write_bits_value(_bits_to_int(bits), len(bits))
 
     def tell(self):
         """Return the current position in the stream (ignoring bit
@@ -211,7 +223,7 @@ class BitwrappedStream(object):
             self.exc_count += 1
             return self.exc_count
         res = self._stream.tell()
-        if len(self._bits) > 0:
+        if self._bit_count > 0:
             res -= 1
         return res
 
@@ -221,9 +233,9 @@ class BitwrappedStream(object):
 
         :returns: int
         """
-        if len(self._bits) == 0:
+        if self._bit_count == 0:
             return 0
-        return 8 - len(self._bits)
+        return 8 - self._bit_count
 
     def seek(self, pos, seek_type=0):
         """Seek to the specified position in the stream with seek_type.
@@ -238,7 +250,7 @@ class BitwrappedStream(object):
         :returns: TODO
 
         """
-        self._bits.clear()
+        self._clear_bits()
         if self._generate:
             return 10
         return self._stream.seek(pos, seek_type)
@@ -255,27 +267,27 @@ class BitwrappedStream(object):
 
         return size
 
+    @property
+    def range_set(self):
+        """An IntervalTree of the consumed ranges
+        """
+        return IntervalTree(
+            Interval(begin, end) for begin, end in self._consumed_ranges()
+        )
+
     def unconsumed_ranges(self):
         """Return an IntervalTree of unconsumed ranges, of the format
         (start, end] with the end value not being included
         """
         res = IntervalTree()
 
-        prev = None
-
-        # normal iteration is not in a predictable order
-        ranges = sorted([x for x in self.range_set], key=lambda x: x.begin)
-
-        for rng in ranges:
-            if prev is None:
-                prev = rng
-                continue
-            res.add(Interval(prev.end, rng.begin))
-            prev = rng
+        ranges = self._consumed_ranges()
+        for prev, rng in zip(ranges, ranges[1:]):
+            res.add(Interval(prev[1], rng[0]))
 
         # means we've seeked past the end
-        if len(self.range_set[self.tell()]) != 1:
-            res.add(Interval(prev.end, self.tell()))
+        if len(ranges) > 0 and self.tell() > ranges[-1][1]:
+            res.add(Interval(ranges[-1][1], self.tell()))
 
         return res
 
@@ -284,27 +296,81 @@ class BitwrappedStream(object):
     # -----------------------------
 
     def _update_consumed_ranges(self, start_pos, end_pos):
-        """Update the ``self.consumed_ranges`` array with which
-        byte ranges have been consecutively consumed.
+        """Record that the bytes from ``start_pos`` to ``end_pos`` have
+        been consumed, extending the last range for consecutive reads.
         """
-        self.range_set.add(Interval(start_pos, end_pos + 1))
-        self.range_set.merge_overlaps()
+        end_pos += 1
+        if len(self._ranges) > 0:
+            last = self._ranges[-1]
+            if last[0] <= start_pos <= last[1]:
+                if end_pos > last[1]:
+                    last[1] = end_pos
+                return
+        self._ranges.append([start_pos, end_pos])
 
-    def _flush_bits_to_stream(self):
-        """Flush the bits to the stream. This is used when
-        a few bits have been read and ``self._bits`` contains unconsumed/
-        flushed bits when data is to be written to the stream
+    def _consumed_ranges(self):
+        """Return the sorted, merged list of consumed ``[begin, end)``
+        ranges. The merged list replaces the recorded ranges.
         """
-        if len(self._bits) == 0:
-            return 0
+        ranges = []
+        for begin, end in sorted(self._ranges):
+            if len(ranges) > 0 and begin <= ranges[-1][1]:
+                if end > ranges[-1][1]:
+                    ranges[-1][1] = end
+            else:
+                ranges.append([begin, end])
+        self._ranges = ranges
+        return [tuple(rng) for rng in ranges]
+
+    def _clear_bits(self):
+        """Discard any unconsumed or unflushed bits
+        """
+        self._bit_value = 0
+        self._bit_count = 0
 
-        bits = list(self._bits)
+    def _read_bits_value(self, num):
+        """Read ``num`` bits from the stream as an int
 
-        diff = 8 - (len(bits) % 8)
-        padding = [0] * diff
+        :returns: a tuple of the int and the number of bits read, which is
+            less than ``num`` if EOF has been reached
+        """
+        if num > self._bit_count:
+            needed = num - self._bit_count
+            read_bytes = self._stream.read((needed + 7) // 8)
+            self._bit_value = (self._bit_value << (len(read_bytes) * 8)) | _bytes_to_int(read_bytes)
+            self._bit_count += len(read_bytes) * 8
+
+        num = min(num, self._bit_count)
+        self._bit_count -= num
+        res = self._bit_value >> self._bit_count
+        self._bit_value &= (1 << self._bit_count) - 1
+        return res, num
+
+    def _write_bits_value(self, value, num):
+        """Add the ``num`` bits of ``value`` to the unflushed bits and write
+        complete bytes to the stream.
+        """
+        self._bit_value = (self._bit_value << num) | value
+        self._bit_count += num
+
+        num_bytes = self._bit_count // 8
+        if num_bytes > 0:
+            self._bit_count -= num_bytes * 8
+            self._stream.write(_int_to_bytes(self._bit_value >> self._bit_count, num_bytes))
+            self._bit_value &= (1 << self._bit_count) - 1
+
+        # there may be unflushed bits leftover and THAT'S OKAY
 
-        bits = bits + padding
+    def _flush_bits_to_stream(self):
+        """Flush the bits to the stream. This is used when
+        a few bits have been read and ``self._bit_value`` contains
+        unconsumed/unflushed bits when data is to be written to the stream
+        """
+        if self._bit_count == 0:
+            return 0
 
-        self._stream.write(bits_to_bytes(bits))
+        padding = -self._bit_count % 8
+        num_bytes = (self._bit_count + padding) // 8
+        self._stream.write(_int_to_bytes(self._bit_value << padding, num_bytes))
 
-        self._bits.clear()
+        self._clear_bits()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""
+On-disk cache of parsed template ASTs.
+
+Preprocessing and parsing a template (together with all of the predefines)
+is the most expensive part of loading it. The resulting AST only depends on
+the text being parsed and on the preprocessor arguments, so it is pickled
+into a cache directory keyed by a hash of those and reused as long as none
+of them change. Files pulled in with ``#include`` are not part of the key,
+so templates that include other files are not cached at all.
+
+The cache lives in ``$PFP_CACHE_DIR`` (default: ``~/.cache/pfp``); setting
+``PFP_CACHE_DIR`` to an empty string disables it. It is bounded to
+``$PFP_CACHE_SIZE`` bytes (default: 64 MiB) by evicting the least recently
+used entries. All cache errors are ignored - the template is then simply
+parsed again.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import sys
+import tempfile
+
+import py010parser
+
+
+# Bump whenever the structure of the cached ASTs changes
+CACHE_VERSION = 1
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+SUFFIX = ".ast"
+
+INCLUDE = re.compile(r"^\s*#\s*include\b", re.MULTILINE)
+
+
+def cache_dir():
+    """Return the cache directory, or ``None`` if caching is disabled.
+    """
+    res = os.environ.get("PFP_CACHE_DIR")
+    if res is None:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        res = os.path.join(base, "pfp")
+    return res or None
+
+
+def max_size():
+    """Return the maximum total size of the cache in bytes.
+    """
+    try:
+        return int(os.environ.get("PFP_CACHE_SIZE", DEFAULT_MAX_SIZE))
+    except ValueError:
+        return DEFAULT_MAX_SIZE
+
+
+def cacheable(template, predefines):
+    """Return whether the AST of a template may be cached, i.e. if neither
+    the template nor the predefines ``#include`` other files.
+    """
+    return not any(INCLUDE.search(text) for text in [template] + list(predefines))
+
+
+def key(template, predefines, cpp_args):
+    """Compute the cache key of a template.
+
+    :template: the template text
+    :predefines: list of predefine texts parsed before the template
+    :cpp_args: the arguments passed to the C preprocessor
+    :returns: the key as a hex string
+    """
+    h = hashlib.sha256()
+    for part in [
+        str(CACHE_VERSION),
+        py010parser.__version__,
+        "{}.{}".format(*sys.version_info[:2]),
+        repr(cpp_args),
+        str(len(predefines)),
+    ] + list(predefines) + [template]:
+        data = part.encode("utf-8", "surrogateescape")
+        h.update(str(len(data)).encode() + b":" + data)
+    return h.hexdigest()
+
+
+def _path(directory, key):
+    return os.path.join(directory, key + SUFFIX)
+
+
+def load(key):
+    """Return the AST cached under ``key``, or ``None``.
+    """
+    directory = cache_dir()
+    if directory is None:
+        return None
+    path = _path(directory, key)
+    try:
+        with open(path, "rb") as f:
+            ast = pickle.load(f)
+        # mark the entry as recently used
+        os.utime(path, None)
+    except Exception:
+        return None
+    return ast
+
+
+def store(key, ast):
+    """Cache ``ast`` under ``key`` and evict old entries if needed.
+    """
+    directory = cache_dir()
+    if directory is None:
+        return
+    tmp_path = None
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # write to a temporary file first, so that concurrent loads never
+        # see a partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(ast, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_path, _path(directory, key))
+        tmp_path = None
+        evict(directory, max_size())
+    except Exception:
+        pass
+    finally:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def evict(directory, limit):
+    """Remove the least recently used entries from ``directory`` until its
+    total size is at most ``limit`` bytes.
+    """
+    entries = []
+    total = 0
+    for name in os.listdir(directory):
+        if not name.endswith(SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+
+    entries.sort()
+    for mtime, size, path in entries:
+        if total <= limit:
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def clear():
+    """Remove all cached entries.
+    """
+    directory = cache_dir()
+    if directory is not None and os.path.isdir(directory):
+        evict(directory, 0)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""
+Bindings to compiled FormatFuzzer generators and parsers.
+
+Interpreting a template with pfp is orders of magnitude slower than running
+the C++ code that ``ffcompile`` produces for it. This module loads the
+shared library built from that code (``./build.sh gif`` creates
+``gif.so``) and calls its generator and parser directly::
+
+    gif = pfp.compiled.Format("./gif.so")
+    data = gif.generate()
+    ok, decisions = gif.parse(data)
+    files = gif.generate_batch(1000, random.Random(0))
+
+The GIL is released while the library runs, so several Python threads can
+generate in parallel; each thread gets its own generation context. Results
+are ``memoryview`` objects over buffers of that context and are only valid
+until the next call from the same thread; copy them with ``bytes()`` to
+keep them, or pass ``out`` to have them copied into a buffer of your own.
+"""
+
+import ctypes
+import os
+import threading
+
+
+_c_ubyte_p = ctypes.POINTER(ctypes.c_ubyte)
+
+
+def _view(address, size):
+    """Return a memoryview over ``size`` bytes at ``address``.
+    """
+    if not size:
+        return memoryview(b"")
+    return memoryview((ctypes.c_ubyte * size).from_address(address)).cast("B")
+
+
+def _pointer(data):
+    """Return a pointer to the contents of ``data`` and its size, without
+    copying writable buffers.
+    """
+    if isinstance(data, bytes):
+        return ctypes.cast(ctypes.c_char_p(data), _c_ubyte_p), len(data)
+    view = memoryview(data).cast("B")
+    if view.readonly:
+        return _pointer(view.tobytes())
+    if not view.nbytes:
+        return _c_ubyte_p(), 0
+    return ctypes.cast((ctypes.c_ubyte * view.nbytes).from_buffer(view), _c_ubyte_p), view.nbytes
+
+
+def _copy_out(view, out):
+    """Copy ``view`` into the start of the writable buffer ``out`` and
+    return a memoryview of the copy.
+    """
+    out = memoryview(out).cast("B")
+    if len(view) > len(out):
+        raise ValueError("output buffer too small ({} < {} bytes)".format(len(out), len(view)))
+    out[: len(view)] = view
+    return out[: len(view)]
+
+
+class Format(object):
+    """A compiled format, loaded from a FormatFuzzer shared library.
+    """
+
+    def __init__(self, library):
+        """
+        :library: path to the shared library, e.g. ``./gif.so``
+        """
+        if os.path.sep not in library:
+            library = os.path.join(os.curdir, library)
+        # A CDLL (unlike a PyDLL) releases the GIL during each call
+        self._lib = lib = ctypes.CDLL(library)
+        self._local = threading.local()
+
+        lib.ff_context_new.restype = ctypes.c_void_p
+        lib.ff_context_new.argtypes = []
+        lib.ff_context_free.restype = None
+        lib.ff_context_free.argtypes = [ctypes.c_void_p]
+        lib.ff_generate_ctx.restype = ctypes.c_size_t
+        lib.ff_generate_ctx.argtypes = [
+            ctypes.c_void_p, _c_ubyte_p, ctypes.c_size_t, ctypes.POINTER(_c_ubyte_p)
+        ]
+        lib.ff_parse_ctx.restype = ctypes.c_int
+        lib.ff_parse_ctx.argtypes = [
+            ctypes.c_void_p, _c_ubyte_p, ctypes.c_size_t,
+            ctypes.POINTER(_c_ubyte_p), ctypes.POINTER(ctypes.c_size_t),
+        ]
+        lib.ff_generate_batch.restype = ctypes.c_size_t
+        lib.ff_generate_batch.argtypes = [
+            ctypes.c_void_p, _c_ubyte_p, ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t),
+            ctypes.c_size_t, _c_ubyte_p, ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t),
+        ]
+        lib.ff_set_max_size.restype = ctypes.c_int
+        lib.ff_set_max_size.argtypes = [ctypes.c_size_t]
+
+        self._max_rand_size = ctypes.c_uint.in_dll(lib, "ff_max_rand_size")
+        self._max_file_size = ctypes.c_uint.in_dll(lib, "ff_max_file_size")
+
+    @property
+    def max_decisions(self):
+        """The maximum number of decision bytes used for one file.
+        """
+        return self._max_rand_size.value
+
+    @property
+    def max_size(self):
+        """The maximum size of generated and parsed files.
+        """
+        return self._max_file_size.value
+
+    def set_max_size(self, size):
+        """Set the maximum size of generated and parsed files, allowing
+        twice as many decision bytes. This applies to all threads.
+        """
+        if not self._lib.ff_set_max_size(size):
+            raise ValueError("unsupported maximum size {}".format(size))
+
+    def _context(self):
+        ctx = getattr(self._local, "ctx", None)
+        if ctx is None:
+            ctx = self._local.ctx = _Context(self._lib)
+        return ctx.handle
+
+    def generate(self, decisions=None, out=None):
+        """Generate a file.
+
+        :decisions: the decision bytes to generate the file from (default:
+            ``max_decisions`` random bytes)
+        :out: writable buffer to copy the file into (default: return a view
+            of the context's buffer)
+        :returns: a memoryview of the file, or ``None`` if generation failed
+        """
+        if decisions is None:
+            decisions = os.urandom(self.max_decisions)
+        data, size = _pointer(decisions)
+        new_data = _c_ubyte_p()
+        new_size = self._lib.ff_generate_ctx(self._context(), data, size, ctypes.byref(new_data))
+        if not new_data:
+            return None
+        view = _view(ctypes.addressof(new_data.contents), new_size)
+        if out is not None:
+            return _copy_out(view, out)
+        return view
+
+    def parse(self, data, out=None):
+        """Parse a file into the decisions that generate it.
+
+        :data: the file contents
+        :out: writable buffer to copy the decisions into (default: return a
+            view of the context's buffer)
+        :returns: a tuple of whether parsing succeeded and a memoryview of
+            the decisions
+        """
+        ptr, size = _pointer(data)
+        new_data = _c_ubyte_p()
+        new_size = ctypes.c_size_t()
+        success = self._lib.ff_parse_ctx(
+            self._context(), ptr, size, ctypes.byref(new_data), ctypes.byref(new_size)
+        )
+        view = _view(ctypes.addressof(new_data.contents), new_size.value)
+        if out is not None:
+            view = _copy_out(view, out)
+        return bool(success), view
+
+    def generate_batch(self, n, rng=None, out=None):
+        """Generate ``n`` files in as few library calls as possible.
+
+        Each file uses the random decisions left over by the previous one,
+        as ``<fmt>-fuzzer fuzz --count`` does.
+
+        :n: the number of generation attempts
+        :rng: a ``random.Random`` instance to draw the decisions from
+            (default: ``os.urandom``)
+        :out: writable buffer to store the files in, one after the other
+            (default: new ``bytearray`` buffers, allocated as needed)
+        :returns: a list of ``n`` memoryviews into the output buffer, with
+            ``None`` for failed attempts
+        """
+        ctx = self._context()
+        chunk = 16 * self.max_decisions
+        decisions = b""
+        if out is not None:
+            segments = [memoryview(out).cast("B")]
+        else:
+            segments = [memoryview(bytearray(chunk))]
+        out_pos = 0
+        sizes = (ctypes.c_size_t * max(n, 1))()
+        used = ctypes.c_size_t()
+        res = []
+
+        while len(res) < n:
+            if len(decisions) < self.max_decisions:
+                if rng is None:
+                    new = os.urandom(chunk)
+                else:
+                    new = rng.getrandbits(8 * chunk).to_bytes(chunk, "little")
+                decisions += new
+            segment = segments[-1]
+            data, size = _pointer(decisions)
+            out_ptr, out_size = _pointer(segment[out_pos:])
+            attempts = self._lib.ff_generate_batch(
+                ctx, data, size, ctypes.byref(used), n - len(res), out_ptr, out_size, sizes
+            )
+            for i in range(attempts):
+                if sizes[i]:
+                    res.append(segment[out_pos : out_pos + sizes[i]])
+                    out_pos += sizes[i]
+                else:
+                    res.append(None)
+            decisions = decisions[used.value :]
+            if attempts == 0 and len(decisions) >= self.max_decisions:
+                # the next file does not fit into the output buffer
+                if out is not None:
+                    raise ValueError("output buffer too small for {} files".format(n))
+                segments.append(memoryview(bytearray(max(chunk, self.max_size))))
+                out_pos = 0
+        return res
+
+
+class _Context(object):
+    """A generation context, freed together with its thread's state.
+    """
+
+    def __init__(self, lib):
+        self._lib = lib
+        self.handle = lib.ff_context_new()
+
+    def __del__(self):
+        self._lib.ff_context_free(self.handle)
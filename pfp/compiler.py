@@ -0,0 +1,441 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""
+Compilation of template statements to closures for parsing.
+
+When parsing, the interpreter evaluates the statements in loops and
+struct bodies once for every record of the input. Besides computing
+values, the handlers of :any:`pfp.interp.PfpInterp` also translate every
+node to C++ and log it. A parse has no use for that work after a node's
+first evaluation.
+
+After a node has been evaluated once by its handler, a ``Compiler`` turns
+it into a closure ``run(scope, ctxt, stream)``. The closure binds the
+closures of its children and only computes the node's value, with the
+same semantics as the handler has when parsing. Declarations, function
+calls and the other nodes that create fields or scopes keep going
+through their handlers. Names are still looked up in the scope at run
+time: the same statements are evaluated in the scopes of many struct
+instances.
+"""
+
+import py010parser.c_ast as AST
+
+import pfp.errors as errors
+import pfp.fields as fields
+# imported as a module: pfp.interp imports this module
+import pfp.interp
+
+
+class Compiler(object):
+    """Compile the nodes evaluated by a parsing :any:`pfp.interp.PfpInterp`
+    to closures.
+    """
+
+    def __init__(self, interp):
+        """
+        :interp: the :any:`pfp.interp.PfpInterp` the closures are run by
+        """
+        self._interp = interp
+        self._switch = {
+            AST.Constant: self._compile_constant,
+            AST.ID: self._compile_id,
+            AST.BinaryOp: self._compile_binary_op,
+            AST.UnaryOp: self._compile_unary_op,
+            AST.Assignment: self._compile_assignment,
+            AST.ArrayRef: self._compile_array_ref,
+            AST.StructRef: self._compile_struct_ref,
+            AST.Cast: self._compile_cast,
+            AST.ExprList: self._compile_expr_list,
+            AST.Compound: self._compile_compound,
+            AST.If: self._compile_if,
+            AST.TernaryOp: self._compile_if,
+            AST.For: self._compile_for,
+            AST.While: self._compile_while,
+            AST.DoWhile: self._compile_do_while,
+            AST.Break: self._compile_break,
+            AST.Continue: self._compile_continue,
+            AST.EmptyStatement: self._compile_empty_statement,
+        }
+
+    def compile(self, node):
+        """Return the closure for ``node``, or ``None`` if it has to be
+        handled by the interpreter. ``node`` must have been handled by
+        the interpreter at least once.
+        """
+        compile_func = self._switch.get(node.__class__)
+        if compile_func is None:
+            return None
+        return compile_func(node)
+
+    def compiled(self, node):
+        """Return the closure that was stored on ``node`` by this compiler,
+        ``None`` if it has to be handled by the interpreter, and ``False``
+        if it was not compiled yet.
+        """
+        compiled = node.__dict__.get("_pfp__compiled")
+        if compiled is None or compiled[0] is not self:
+            return False
+        return compiled[1]
+
+    def _child(self, node):
+        """Return a closure evaluating the child ``node`` like
+        ``PfpInterp._handle_node`` does.
+        """
+        if type(node) is tuple:
+            node = node[1]
+        # if-statements that have a single statement instead of a compound
+        # statement
+        elif type(node) is list:
+            node = self._interp._list_compound(node)
+
+        run = self.compiled(node)
+        if run:
+            return run
+
+        # not evaluated yet (e.g. untaken branches), or not compilable
+        handle_node = self._interp._handle_node
+
+        def run(scope, ctxt, stream):
+            return handle_node(node, scope, ctxt, stream)
+
+        return run
+
+    def _compile_constant(self, node):
+        val, field_cls, _ = node._pfp__const
+
+        def run(scope, ctxt, stream):
+            field = field_cls()
+            field._pfp__set_value(val)
+            return field
+
+        return run
+
+    def _compile_id(self, node):
+        interp = self._interp
+        name = node.name
+        coord = node.coord
+
+        if name == "__root":
+            return lambda scope, ctxt, stream: interp._root
+        if name == "__this" or name == "this":
+            return lambda scope, ctxt, stream: ctxt
+
+        handle_id = interp._handle_id
+
+        def run(scope, ctxt, stream):
+            if getattr(node, "is_lazy", False):
+                return handle_id(node, scope, ctxt, stream)
+            field = scope.get_id(name)
+            if field is None:
+                raise errors.UnresolvedID(coord, name)
+            return field
+
+        return run
+
+    def _compile_binary_op(self, node):
+        op = node.op
+        func = pfp.interp.BINARY_OPS.get(op)
+        if func is None:
+            return None
+        left = self._child(node.left)
+        right = self._child(node.right)
+        short_circuit = op == "||"
+        Int = fields.Int
+
+        def run(scope, ctxt, stream):
+            dest_type = scope.get_meta("dest_type")
+
+            left_val = left(scope, ctxt, stream)
+            if dest_type is not None and left_val is not None and not isinstance(left_val, dest_type):
+                new_left_val = dest_type()
+                new_left_val._pfp__set_value(left_val)
+                left_val = new_left_val
+
+            # short circuit power!
+            if short_circuit and left_val:
+                res = 1
+            else:
+                right_val = right(scope, ctxt, stream)
+                if dest_type is not None and not isinstance(right_val, dest_type) and right_val is not None:
+                    new_right_val = dest_type()
+                    new_right_val._pfp__set_value(right_val)
+                    right_val = new_right_val
+
+                res = None
+                try:
+                    res = func(left_val, right_val)
+                except:
+                    pass
+
+            if type(res) is bool:
+                new_res = Int()
+                new_res._pfp__set_value(1 if res else 0)
+                res = new_res
+
+            return res
+
+        return run
+
+    def _compile_unary_op(self, node):
+        op = node.op
+        expr = self._child(node.expr)
+
+        if op == "p++":
+            def run(scope, ctxt, stream):
+                field = expr(scope, ctxt, stream)
+                clone = field.__class__()
+                clone._pfp__set_value(field)
+                field += 1
+                return clone
+
+            return run
+
+        if op == "p--":
+            def run(scope, ctxt, stream):
+                field = expr(scope, ctxt, stream)
+                clone = field.__class__()
+                clone._pfp__set_value(field)
+                field -= 1
+                return clone
+
+            return run
+
+        # parentof, exists and function_exists
+        func = pfp.interp.UNARY_OPS.get(op)
+        if func is None:
+            return None
+
+        def run(scope, ctxt, stream):
+            field = expr(scope, ctxt, stream)
+            if type(field) is type:
+                field = field()
+            res = None
+            try:
+                res = func(field)
+            except:
+                pass
+            if type(res) is bool:
+                new_res = field.__class__()
+                if type(new_res) == int:
+                    new_res = 1 if res == True else 0
+                else:
+                    new_res._pfp__set_value(1 if res == True else 0)
+                res = new_res
+            return res
+
+        return run
+
+    def _compile_assignment(self, node):
+        op = node.op
+        lvalue = self._child(node.lvalue)
+        rvalue = self._child(node.rvalue)
+        line = node.coord.line if node.coord is not None else "?"
+
+        if op is None:
+            def run(scope, ctxt, stream):
+                scope.clear_meta()
+                field = lvalue(scope, ctxt, stream)
+                if type(field) is type:
+                    field = field()
+                scope.push_meta("dest_type", field._pfp__get_class())
+                field._pfp__set_value(rvalue(scope, ctxt, stream))
+                return field
+
+            return run
+
+        func = pfp.interp.ASSIGNMENT_OPS.get(op)
+        if func is None:
+            return None
+
+        def run(scope, ctxt, stream):
+            scope.clear_meta()
+            field = lvalue(scope, ctxt, stream)
+            if type(field) is type:
+                field = field()
+            scope.push_meta("dest_type", field._pfp__get_class())
+            value = rvalue(scope, ctxt, stream)
+            try:
+                if not hasattr(field, "width"):
+                    func(field, value)
+            except:
+                print("* EXCEPTION IN ASSIGNMENT " + str(field) + " " + op + " " + str(value) + ", in line " + str(line))
+            return field
+
+        return run
+
+    def _compile_array_ref(self, node):
+        name = self._child(node.name)
+        subscript = self._child(node.subscript)
+        PYVAL = fields.PYVAL
+
+        def run(scope, ctxt, stream):
+            ary = name(scope, ctxt, stream)
+            index = PYVAL(subscript(scope, ctxt, stream))
+            return ary[index]
+
+        return run
+
+    def _compile_struct_ref(self, node):
+        name = self._child(node.name)
+        field_name = node.field.name
+        Array = fields.Array
+
+        def run(scope, ctxt, stream):
+            struct = name(scope, ctxt, stream)
+            try:
+                return getattr(struct, field_name)
+            except AttributeError:
+                # the members of the last item of implicit arrays can be
+                # accessed directly
+                if isinstance(struct, Array) and struct.implicit:
+                    return getattr(struct[-1], field_name)
+                raise
+
+        return run
+
+    def _compile_cast(self, node):
+        to_type = self._child(node.to_type)
+        expr = self._child(node.expr)
+
+        def run(scope, ctxt, stream):
+            cast_type = to_type(scope, ctxt, stream)
+            scope.push_meta("dest_type", cast_type)
+            val_to_cast = expr(scope, ctxt, stream)
+            try:
+                scope.pop_meta("dest_type")
+            except:
+                pass
+
+            res = cast_type()
+            if val_to_cast is not None:
+                res._pfp__set_value(val_to_cast)
+            return res
+
+        return run
+
+    def _compile_expr_list(self, node):
+        exprs = [self._child(expr) for expr in node.exprs]
+
+        def run(scope, ctxt, stream):
+            return [expr(scope, ctxt, stream) for expr in exprs]
+
+        return run
+
+    def _compile_compound(self, node):
+        interp = self._interp
+        handle_node = interp._handle_node
+        BREAK_NONE = interp.BREAK_NONE
+        children = [
+            (child, self._child(child), child.coord)
+            for _, child in node.children()
+        ]
+
+        def run(scope, ctxt, stream):
+            try:
+                for child, run_child, coord in children:
+                    scope.clear_meta()
+                    # let the debugger break on the statements
+                    if interp._break_type != BREAK_NONE:
+                        handle_node(child, scope, ctxt, stream)
+                        continue
+                    interp._coord = coord
+                    if ctxt is not None:
+                        interp._ctxt = ctxt
+                    run_child(scope, ctxt, stream)
+            finally:
+                scope.clear_meta()
+
+        return run
+
+    def _compile_if(self, node):
+        cond = self._child(node.cond)
+        iftrue = self._child(node.iftrue)
+        if node.iffalse is None:
+            def run(scope, ctxt, stream):
+                if cond(scope, ctxt, stream):
+                    return iftrue(scope, ctxt, stream)
+
+            return run
+
+        iffalse = self._child(node.iffalse)
+
+        def run(scope, ctxt, stream):
+            if cond(scope, ctxt, stream):
+                return iftrue(scope, ctxt, stream)
+            return iffalse(scope, ctxt, stream)
+
+        return run
+
+    def _compile_for(self, node):
+        init = None if node.init is None else self._child(node.init)
+        cond = None if node.cond is None else self._child(node.cond)
+        stmt = None if node.stmt is None else self._child(node.stmt)
+        next_ = None if node.next is None else self._child(node.next)
+
+        def run(scope, ctxt, stream):
+            if init is not None:
+                init(scope, ctxt, stream)
+            while cond is None or cond(scope, ctxt, stream):
+                if stmt is not None:
+                    try:
+                        stmt(scope, ctxt, stream)
+                    except errors.InterpBreak:
+                        break
+                    # we still need to interpret the "next" statement
+                    except errors.InterpContinue:
+                        pass
+                if next_ is not None:
+                    next_(scope, ctxt, stream)
+
+        return run
+
+    def _compile_while(self, node):
+        cond = None if node.cond is None else self._child(node.cond)
+        stmt = None if node.stmt is None else self._child(node.stmt)
+
+        def run(scope, ctxt, stream):
+            while cond is None or cond(scope, ctxt, stream):
+                if stmt is not None:
+                    try:
+                        stmt(scope, ctxt, stream)
+                    except errors.InterpBreak:
+                        break
+                    except errors.InterpContinue:
+                        pass
+
+        return run
+
+    def _compile_do_while(self, node):
+        cond = None if node.cond is None else self._child(node.cond)
+        stmt = None if node.stmt is None else self._child(node.stmt)
+
+        def run(scope, ctxt, stream):
+            while True:
+                if stmt is not None:
+                    try:
+                        stmt(scope, ctxt, stream)
+                    except errors.InterpBreak:
+                        break
+                    except errors.InterpContinue:
+                        pass
+                if cond is not None and not cond(scope, ctxt, stream):
+                    break
+
+        return run
+
+    def _compile_break(self, node):
+        def run(scope, ctxt, stream):
+            raise errors.InterpBreak()
+
+        return run
+
+    def _compile_continue(self, node):
+        def run(scope, ctxt, stream):
+            raise errors.InterpContinue()
+
+        return run
+
+    def _compile_empty_statement(self, node):
+        return lambda scope, ctxt, stream: None
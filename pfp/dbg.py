@@ -2,7 +2,6 @@
 # encoding: utf-8
 
 import cmd
-import collections
 import os
 import sys
 
@@ -74,10 +73,10 @@ class PfpDbg(cmd.Cmd, object):
         s = self._interp._stream
         # make a copy of it
         pos = s.tell()
-        saved_bits = collections.deque(s._bits)
+        saved_bits = (s._bit_value, s._bit_count)
         data = s.read(0x10)
         s.seek(pos, 0)
-        s._bits = saved_bits
+        s._bit_value, s._bit_count = saved_bits
 
         parts = [
             "{:02x}".format(ord(data[x : x + 1])) for x in range(len(data))
@@ -99,9 +98,9 @@ class PfpDbg(cmd.Cmd, object):
             res += utils.binary(" " * (0x10 - len(res)))
 
         res = "{} {}".format(hex_line, utils.string(res))
-        if len(saved_bits) > 0:
-            reverse_bits = reversed(list(saved_bits))
-            print("bits: {}".format(" ".join(str(x) for x in reverse_bits)))
+        if saved_bits[1] > 0:
+            reverse_bits = reversed("{:0{}b}".format(*saved_bits))
+            print("bits: {}".format(" ".join(reverse_bits)))
         print(res)
 
     def do_next(self, args):
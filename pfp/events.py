@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""
+Events for streaming parses.
+
+An ``EventListener`` passed to :any:`pfp.interp.PfpInterp` is notified
+about the fields of the DOM while the interpreter parses them: ``start``
+and ``end`` around every struct and union, and ``leaf`` for every other
+field. :any:`pfp.iterparse` turns these notifications into
+:any:`ParseEvent` tuples.
+
+Since the events carry all the information about a field, the listener
+also removes completed structs from the DOM when the template can no
+longer refer to them. This keeps the memory used while parsing large
+inputs bounded by the size of the records instead of the size of the
+whole input.
+"""
+
+import collections
+
+import py010parser.c_ast as AST
+
+import pfp.fields as fields
+
+
+ParseEvent = collections.namedtuple("ParseEvent", ["event", "path", "offset", "value"])
+"""A field that was parsed.
+
+``event`` is ``"start"`` or ``"end"`` for structs and unions and ``"leaf"``
+for all other fields. ``path`` is the full path of the field, e.g.
+``record[3].header.len``. ``value`` is the python value of leaf fields
+(numbers, strings and the raw bytes of numeric arrays) and ``None``
+otherwise.
+"""
+
+
+def referenced_names(ast):
+    """Return the names of all identifiers referenced by expressions in
+    ``ast``. Declarations do not count as references.
+    """
+    res = set()
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        # e.g. the statements of if-statements without curly braces
+        if isinstance(node, (list, tuple)):
+            stack.extend(node)
+            continue
+        if isinstance(node, AST.ID):
+            res.add(node.name)
+        for _, child in node.children():
+            stack.append(child)
+    return res
+
+
+def field_path(field, released=None):
+    """Return the full path of ``field``. Unlike ``_pfp__path``, this also
+    names the items of implicit arrays, which have no name of their own.
+
+    :released: ``{id(struct): {name: count}}`` of the children that were
+        released from each struct. Later children with the same name are
+        numbered after them.
+    """
+    res = []
+    curr = field
+    while curr is not None:
+        parent = curr._pfp__parent
+        # don't show the meta __root name in the path
+        if curr._pfp__name == "__root" and parent is None:
+            break
+        name = curr._pfp__name
+        if isinstance(parent, fields.Array):
+            if name is None:
+                name = "{}[{}]".format(parent._pfp__name, _item_index(parent, curr))
+            res.append(name)
+            curr = parent._pfp__parent
+            continue
+        if name is not None:
+            count = released.get(id(parent), {}).get(name) if released else None
+            if count:
+                name = "{}[{}]".format(name, count)
+            res.append(name)
+        curr = parent
+    return ".".join(reversed(res))
+
+
+def _item_index(array, item):
+    # items are almost always reported right after being appended
+    for idx in range(len(array.items) - 1, -1, -1):
+        if array.items[idx] is item:
+            return idx
+    return None
+
+
+def field_value(field):
+    """Return the python value of a leaf field"""
+    if isinstance(field, fields.Array):
+        return field.raw_data
+    return getattr(field, "_pfp__value", None)
+
+
+class EventListener(object):
+    """Report parsed fields to a callback and release completed structs
+    that the template does not refer to.
+    """
+
+    def __init__(self, callback, release=True):
+        """
+        :callback: function called with each :any:`ParseEvent`
+        :release: if completed, unreferenced structs should be removed from the DOM
+        """
+        self._callback = callback
+        self._release = False
+        self._allow_release = release
+        self._referenced = set()
+        self._top_level_only = False
+        # {id(struct): {name: count}} of released children
+        self._released = {}
+
+    def begin(self, ast):
+        """Start a new parse of the template ``ast``"""
+        self._referenced = referenced_names(ast)
+        self._released = {}
+        self._release = self._allow_release
+        # sizeof(this), parentof(...) etc. may need the completed children
+        # of any struct that is still being parsed
+        self._top_level_only = bool(self._referenced & {"this", "parentof"})
+
+    def start(self, field):
+        self._report("start", field, None)
+
+    def end(self, field):
+        self._report("end", field, None)
+        # children of this struct can no longer be numbered
+        self._released.pop(id(field), None)
+        if self._release and self._releasable(field):
+            self._detach(field)
+
+    def leaf(self, field):
+        self._report("leaf", field, field_value(field))
+
+    def _report(self, event, field, value):
+        self._callback(
+            ParseEvent(event, field_path(field, self._released), field._pfp__offset, value)
+        )
+
+    def parsed(self, field):
+        """Report a field that was parsed before being added to the DOM
+        (e.g. the items of an array of structs) together with its
+        children.
+        """
+        if isinstance(field, fields.Struct):
+            self.start(field)
+            for child in list(field._pfp__children):
+                self.parsed(child)
+            self._report("end", field, None)
+        elif isinstance(field, fields.Array) and field.raw_data is None and field.items:
+            for item in field.items:
+                self.parsed(item)
+        else:
+            self.leaf(field)
+
+    def _releasable(self, field):
+        parent = field._pfp__parent
+        # implicit arrays must keep all of their items
+        if not isinstance(parent, fields.Struct):
+            return False
+        # the width of unions depends on all of their descendants, and
+        # sizeof(), startof() etc. of a referenced struct on its children
+        curr = parent
+        while curr is not None:
+            if isinstance(curr, fields.Union) or self._is_referenced(curr._pfp__name):
+                return False
+            curr = curr._pfp__parent
+        if self._top_level_only and parent._pfp__parent is not None:
+            return False
+        if not parent._pfp__children or parent._pfp__children[-1] is not field:
+            return False
+        if parent._pfp__children_map.get(field._pfp__name) is not field:
+            return False
+        # the children of a struct are only visible in the scope of the
+        # struct itself, afterwards they can only be reached through it
+        if self._is_referenced(field._pfp__name):
+            return False
+        return not self._is_watched(field)
+
+    def _is_referenced(self, name):
+        if name is None:
+            return False
+        # non-consecutive duplicates are renamed to <name>_<n>
+        return name in self._referenced or name.rsplit("_", 1)[0] in self._referenced
+
+    def _is_watched(self, field):
+        if field._pfp__watchers or field._pfp__watch_fields:
+            return True
+        if isinstance(field, fields.Struct):
+            return any(self._is_watched(child) for child in field._pfp__children)
+        if isinstance(field, fields.Array) and field.raw_data is None:
+            return any(self._is_watched(item) for item in field.items)
+        return False
+
+    def _detach(self, field):
+        parent = field._pfp__parent
+        parent._pfp__children.pop()
+        del parent._pfp__children_map[field._pfp__name]
+        if parent._pfp__children:
+            parent._pfp__children[-1]._pfp__next_sibling = None
+        parent._pfp__invalidate()
+        counts = self._released.setdefault(id(parent), {})
+        counts[field._pfp__name] = counts.get(field._pfp__name, 0) + 1
+        field._pfp__parent = None
+        field._pfp__prev_sibling = None
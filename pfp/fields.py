@@ -239,52 +239,68 @@ class Field(object):
     struct fields will implement ``__getattr__`` and 
     ``__setattr__`` to directly access child fields"""
 
-    _pfp__interp = None
-
-    _pfp__name = None
-    """The name of the Field"""
-
-    _pfp__parent = None
-    """The parent of the field"""
-
-    _pfp__prev_sibling = None
-    """The previous field in this scope"""
-
-    _pfp__next_sibling = None
-    """The next field in this scope"""
-
-    _pfp__watchers = []
-    """All fields that are watching this field"""
-
-    _pfp__watch_fields = []
-    """All fields that this field is watching"""
+    # All slots of the hierarchy are declared here: LazyField instances
+    # swap their base class, which requires identical layouts. Attributes
+    # that only some fields have still go into the (lazily created)
+    # ``__dict__``.
+    __slots__ = {
+        "__dict__": "",
+        "__weakref__": "",
+        "_pfp__interp": "The interpreter that created the field",
+        "_pfp__name": "The name of the Field",
+        "_pfp__parent": "The parent of the field",
+        "_pfp__prev_sibling": "The previous field in this scope",
+        "_pfp__next_sibling": "The next field in this scope",
+        "_pfp__frozen": "If the field is const",
+        "_pfp__offset": "The offset of the field in the stream",
+        "_pfp__offset_bits": "The bit offset of bitfields",
+        "_pfp__watchers": "All fields that are watching this field",
+        "_pfp__watch_fields": "All fields that this field is watching",
+        "_pfp__no_notify": "If changes should not be propagated",
+        "_pfp__metadata_processor": "Processes the metadata of the field",
+        "_pfp__array_idx": "The index of the field in its array",
+        "_pfp__snapshot_stack": "Saved values of the field",
+        "_pfp__built": "The cached result of ``_pfp__build()``, if any",
+        "_pfp__built_width": "The cached result of ``_pfp__width()``, if any",
+        "_pfp__value": "The value of numeric and string fields",
+        "_pfp__data": "The raw data of numeric fields",
+    }
+
+    # packing is rare, these are only set on fields that use it
+    # (see ``_pfp__set_packer``)
+    _pfp__packer = None
+    _pfp__unpack = None
+    _pfp__pack = None
+    _pfp__pack_type = None
+    _pfp__no_unpack = False
+    _pfp__parsed_packed = None
+    _ = None
 
     def __init__(self, stream=None, metadata_processor=None):
         super(Field, self).__init__()
+        self._pfp__interp = None
         self._pfp__name = None
         self._pfp__frozen = False
 
         self._pfp__offset = -1
         self._pfp__offset_bits = None
 
-        # watchers to update when something changes
-        self._pfp__watchers = []
+        # watchers to update when something changes. Empty tuples are
+        # shared until the first watcher is added
+        self._pfp__watchers = ()
         self._pfp__parent = None
-        self._pfp__watch_fields = []
+        self._pfp__prev_sibling = None
+        self._pfp__next_sibling = None
+        self._pfp__watch_fields = ()
         self._pfp__no_notify = False
 
-        self._pfp__packer = None
-        self._pfp__unpack = None
-        self._pfp__pack = None
-        self._pfp__pack_type = None
-        self._pfp__no_unpack = False
-        self._pfp__parsed_packed = None
         self._pfp__metadata_processor = metadata_processor
-        self._ = None
 
         self._pfp__array_idx = None
 
-        self._pfp__snapshot_stack = []
+        self._pfp__snapshot_stack = ()
+        self._pfp__built = None
+        self._pfp__built_width = None
 
         if stream is not None:
             self._pfp__parse(stream, save_offset=True)
@@ -330,6 +346,8 @@ class Field(object):
         """Save off the current value of the field
         """
         if hasattr(self, "_pfp__value"):
+            if not self._pfp__snapshot_stack:
+                self._pfp__snapshot_stack = []
             self._pfp__snapshot_stack.append(self._pfp__value)
 
     def _pfp__restore_snapshot(self, recurse=True):
@@ -337,6 +355,7 @@ class Field(object):
         """
         if hasattr(self, "_pfp__value"):
             self._pfp__value = self._pfp__snapshot_stack.pop()
+        self._pfp__invalidate()
 
     def _pfp__process_metadata(self):
         """Process the metadata once the entire struct has been
@@ -370,6 +389,8 @@ class Field(object):
         ):
             self._pfp__parent._pfp__watch(watcher)
         else:
+            if not self._pfp__watchers:
+                self._pfp__watchers = []
             self._pfp__watchers.append(watcher)
 
     def _pfp__set_watch(self, watch_fields, update_func, *func_call_info):
@@ -524,12 +545,40 @@ class Field(object):
     def _pfp__width(self):
         """Return the width of the field (sizeof)
         """
+        res = self._pfp__aligned_width()
+        if res is None:
+            res = self._pfp__stream_width()
+        return res
+
+    def _pfp__stream_width(self):
+        """Return the width of the field by building it into a new stream
+        """
         raw_output = six.BytesIO()
         output = bitwrap.BitwrappedStream(raw_output)
         self._pfp__build(output)
         output.flush()
         return len(raw_output.getvalue())
 
+    def _pfp__aligned_width(self):
+        """Return the (cached) width of the field, or None if the field
+        contains bitfields and can only be measured as a whole.
+        """
+        if self._pfp__built_width is None:
+            self._pfp__built_width = self._pfp__stream_width()
+        return self._pfp__built_width
+
+    def _pfp__invalidate(self):
+        """Drop the cached build results of this field and of all of
+        its parents. Must be called whenever the data of the field changes.
+        """
+        field = self
+        while field is not None:
+            # setting attributes of structs is slow, skip clean fields
+            if field._pfp__built is not None or field._pfp__built_width is not None:
+                field._pfp__built = None
+                field._pfp__built_width = None
+            field = field._pfp__parent
+
     def _pfp__freeze(self):
         """Freeze the field so that it cannot be modified (const)
         """
@@ -556,6 +605,7 @@ class Field(object):
         return self._pfp__notify_parent()
 
     def _pfp__notify_parent(self):
+        self._pfp__invalidate()
         if self._pfp__no_notify:
             return []
 
@@ -602,11 +652,6 @@ class Field(object):
             return
         pass
 
-    def _pfp__pack(self):
-        """Should be called after initial parsing
-        """
-        pass
-
     def __cmp__(self, other):
         """Compare the Field to something else, either another
         Field or something else
@@ -749,24 +794,21 @@ class Struct(Field):
 
     _pfp__implicit_arrays = {}
     """Mapping of all implicit arrays in this struct. All implicit arrays will
-    be resolved to a concrete array after parsing is complete"""
+    be resolved to a concrete array after parsing is complete. Only allocated
+    for structs that have implicit arrays"""
 
     _pfp__name_collisions = {}
-    """Counters for any naming collisions"""
+    """Counters for any naming collisions. Only allocated for structs that
+    have collisions"""
 
     _pfp__scope = None
 
     def __init__(self, stream=None, metadata_processor=None):
         # ordered list of children
         super(Struct, self).__setattr__("_pfp__children", [])
-        # initialize implicit arrays for this struct instance
-        super(Struct, self).__setattr__("_pfp__implicit_arrays", {})
         # for quick child access
         super(Struct, self).__setattr__("_pfp__children_map", {})
 
-        # reinit it here just for this instance...
-        self._pfp__name_collisions = {}
-
         super(Struct, self).__init__(metadata_processor=metadata_processor)
 
         if stream is not None:
@@ -867,6 +909,8 @@ class Struct(Field):
             #    Printf("%d\n", x);    // prints the latest x value
             #    Printf("%d\n", x[0]); // prints the first x value
             #
+            if not self._pfp__implicit_arrays:
+                self._pfp__implicit_arrays = {}
             self._pfp__implicit_arrays[name] = implicit_array
             wrapper = self._pfp__children_map[name] = ImplicitArrayWrapper(child, implicit_array)
             res = wrapper
@@ -881,6 +925,7 @@ class Struct(Field):
             res._pfp__prev_sibling = self._pfp__children[-2]
             self._pfp__children[-2]._pfp__next_sibling = res
 
+        self._pfp__invalidate()
         return res
 
     def _pfp__handle_non_consecutive_duplicate(self, name, child, insert=True):
@@ -900,6 +945,8 @@ class Struct(Field):
                 )
                 del self._pfp__children_map[name]
 
+        if not self._pfp__name_collisions:
+            self._pfp__name_collisions = {}
         next_suffix = self._pfp__name_collisions.setdefault(name, 0)
         new_name = "{}_{}".format(name, next_suffix)
         child._pfp__name = new_name
@@ -998,8 +1045,17 @@ class Struct(Field):
         if save_offset and stream is not None:
             self._pfp__offset = stream.tell()
 
-        # returns either num bytes written or total data
-        res = utils.binary("") if stream is None else 0
+        # children that did not change since the last build return their
+        # cached data
+        if stream is None:
+            if self._pfp__built is None:
+                self._pfp__built = utils.binary("").join(
+                    child._pfp__build() for child in self._pfp__children
+                )
+            return self._pfp__built
+
+        # returns the num bytes written
+        res = 0
 
         # iterate IN ORDER
         for child in self._pfp__children:
@@ -1008,6 +1064,20 @@ class Struct(Field):
 
         return res
 
+    def _pfp__aligned_width(self):
+        """Sum the widths of the children, see
+        :any:`Field._pfp__aligned_width`
+        """
+        if self._pfp__built_width is None:
+            res = 0
+            for child in self._pfp__children:
+                child_width = child._pfp__aligned_width()
+                if child_width is None:
+                    return None
+                res += child_width
+            self._pfp__built_width = res
+        return self._pfp__built_width
+
     def __getattr__(self, name):
         """Custom __getattr__ for quick access to the children"""
         children_map = super(Struct, self).__getattribute__(
@@ -1173,6 +1243,8 @@ class Union(Struct):
         """
         max_size = -1
         if stream is None:
+            if self._pfp__built is not None:
+                return self._pfp__built
             core_stream = six.BytesIO()
             new_stream = bitwrap.BitwrappedStream(core_stream)
         else:
@@ -1190,10 +1262,22 @@ class Union(Struct):
         new_stream.seek(max_size, 1)
 
         if stream is None:
-            return core_stream.getvalue()
+            self._pfp__built = core_stream.getvalue()
+            return self._pfp__built
         else:
             return max_size
 
+    def _pfp__aligned_width(self):
+        """Return the width of the built union, see
+        :any:`Field._pfp__aligned_width`
+        """
+        if self._pfp__built_width is None:
+            for child in self._pfp__children:
+                if child._pfp__aligned_width() is None:
+                    return None
+            self._pfp__built_width = len(self._pfp__build())
+        return self._pfp__built_width
+
     def __setattr__(self, name, value):
         """Custom __setattr__ to keep track of the order things
         are writen (to mimic writing to memory)
@@ -1267,8 +1351,9 @@ class NumberBase(Field):
     width = 4  # number of bytes
     format = "i"  # default signed int
     bitsize = None  # for IntBase
-
-    _pfp__value = 0  # default value
+    bitfield_rw = None
+    bitfield_padded = False
+    bitfield_left_right = False
 
     @classmethod
     def _pfp__width(self):
@@ -1276,6 +1361,13 @@ class NumberBase(Field):
         """
         return self.width
 
+    def _pfp__aligned_width(self):
+        """Return the width of the field, or None if it is a bitfield
+        """
+        if self.bitsize is not None:
+            return None
+        return self.width
+
     def __init__(
         self,
         stream=None,
@@ -1287,12 +1379,16 @@ class NumberBase(Field):
     ):
         """Special init for the bitsize
         """
-        self.bitsize = get_value(bitsize)
-        self.bitfield_rw = bitfield_rw
+        self._pfp__value = 0  # default value
+
+        # only bitfields store their settings, others use the class defaults
+        if bitsize is not None:
+            self.bitsize = get_value(bitsize)
+            self.bitfield_rw = bitfield_rw
 
-        # fields need to remember if they were parsed with padded bits or not
-        self.bitfield_padded = bitfield_padded
-        self.bitfield_left_right = bitfield_left_right
+            # fields need to remember if they were parsed with padded bits or not
+            self.bitfield_padded = bitfield_padded
+            self.bitfield_left_right = bitfield_left_right
 
         super(NumberBase, self).__init__(
             stream, metadata_processor=metadata_processor
@@ -1353,6 +1449,7 @@ class NumberBase(Field):
         if set_val:
             self._pfp__data = data
             self._pfp__value = val
+            self._pfp__invalidate()
             return self.width
         else:
             return val
@@ -1427,42 +1524,52 @@ class NumberBase(Field):
 
     def __imul__(self, other):
         self._pfp__value *= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __idiv__(self, other):
         self._pfp__value /= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __iand__(self, other):
         self._pfp__value &= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __ixor__(self, other):
         self._pfp__value ^= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __ior__(self, other):
         self._pfp__value |= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __ifloordiv__(self, other):
         self._pfp__value //= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __imod__(self, other):
         self._pfp__value %= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __ipow__(self, other):
         self._pfp__value **= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __ilshift__(self, other):
         self._pfp__value <<= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __irshift__(self, other):
         self._pfp__value >>= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __add__(self, other):
@@ -1805,18 +1912,22 @@ class IntBase(NumberBase):
         #
         # See the test_imod function in test_integer_promotion.py
         self._pfp__value %= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __ipow__(self, other):
         self._pfp__value **= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __ilshift__(self, other):
         self._pfp__value <<= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __irshift__(self, other):
         self._pfp__value >>= get_value(other)
+        self._pfp__invalidate()
         return self
 
     def __add__(self, other):
@@ -2087,16 +2198,40 @@ class Array(Field):
     width = -1
     """The number of items of the array. ``len(array_field)`` also works"""
 
-    raw_data = None
-    """The raw data of the array. Note that this will only be
-    set if the array's items are a core type (E.g. Int, Char, etc)"""
-
     field_cls = None
     """The class for items in the array"""
 
     implicit = False
     """If the array is an implicit array or not"""
 
+    _pfp__snapshot_raw_stack = ()
+    """Saved raw data of the array"""
+
+    _pfp__raw = None
+    """Mutable buffer that holds ``raw_data``"""
+
+    _pfp__item_cache = None
+    """Item fields of ``raw_data`` that have been accessed, by index"""
+
+    @property
+    def raw_data(self):
+        """The raw data of the array. Note that this will only be
+        set if the array's items are a core type (E.g. Int, Char, etc)"""
+        if self._pfp__raw is None:
+            return None
+        if self._pfp__built is None:
+            self._pfp__built = bytes(self._pfp__raw)
+        return self._pfp__built
+
+    @raw_data.setter
+    def raw_data(self, value):
+        if value is None:
+            self._pfp__raw = None
+        else:
+            self._pfp__raw = bytearray(utils.binary(value))
+        self._pfp__item_cache = None
+        self._pfp__invalidate()
+
     def __init__(self, width, field_cls, stream=None, metadata_processor=None):
         """ Create an array field of size "width" from the stream
         """
@@ -2110,19 +2245,21 @@ class Array(Field):
         self.raw_data = None
         self.implicit = False
 
-        self._pfp__snapshot_raw_stack = []
-
         if stream is not None:
             self._pfp__parse(stream, save_offset=True)
         else:
             if width is not None:
                 for x in six.moves.range(self.width):
-                    self.items.append(self.field_cls())
+                    item = self.field_cls()
+                    item._pfp__parent = self
+                    self.items.append(item)
 
     def _pfp__snapshot(self, recurse=True):
         """Save off the current value of the field
         """
         super(Array, self)._pfp__snapshot(recurse=recurse)
+        if not self._pfp__snapshot_raw_stack:
+            self._pfp__snapshot_raw_stack = []
         self._pfp__snapshot_raw_stack.append(self.raw_data)
 
         if recurse:
@@ -2134,6 +2271,7 @@ class Array(Field):
         """
         super(Array, self)._pfp__restore_snapshot(recurse=recurse)
         self.raw_data = self._pfp__snapshot_raw_stack.pop()
+        self._pfp__invalidate()
 
         if recurse:
             for item in self.items:
@@ -2144,6 +2282,7 @@ class Array(Field):
         item._pfp__parent = self
         self.items.append(item)
         self.width = len(self.items)
+        self._pfp__invalidate()
 
     def is_stringable(self):
         # TODO WChar
@@ -2221,6 +2360,8 @@ class Array(Field):
                 new_item = self.field_cls()
                 new_item._pfp__set_value(item)
                 item = new_item
+            if item._pfp__parent is None:
+                item._pfp__parent = self
             self.items[idx] = item
 
         self.width = len(self.items)
@@ -2253,6 +2394,7 @@ class Array(Field):
             for x in six.moves.range(PYVAL(self.width)):
                 field = self.field_cls(stream)
                 field._pfp__name = "{}[{}]".format(self._pfp__name, x)
+                field._pfp__parent = self
                 # field._pfp__parse(stream, save_offset)
                 self.items.append(field)
 
@@ -2266,12 +2408,20 @@ class Array(Field):
 
                 self._pfp__unpack_data(data)
 
+        self._pfp__invalidate()
+
     def _pfp__build(self, stream=None, save_offset=False):
         if stream is not None and save_offset:
             self._pfp__offset = stream.tell()
 
         if self.raw_data is None:
-            res = 0 if stream is not None else utils.binary("")
+            if stream is None:
+                if self._pfp__built is None:
+                    self._pfp__built = utils.binary("").join(
+                        item._pfp__build() for item in self.items
+                    )
+                return self._pfp__built
+            res = 0
             for item in self.items:
                 res += item._pfp__build(stream=stream, save_offset=save_offset)
         else:
@@ -2282,58 +2432,147 @@ class Array(Field):
                 return len(self.raw_data)
         return res
 
+    def _pfp__aligned_width(self):
+        """Sum the widths of the items, see
+        :any:`Field._pfp__aligned_width`
+        """
+        if self._pfp__raw is not None:
+            return len(self._pfp__raw)
+        if self._pfp__built_width is None:
+            res = 0
+            for item in self.items:
+                item_width = item._pfp__aligned_width()
+                if item_width is None:
+                    return None
+                res += item_width
+            self._pfp__built_width = res
+        return self._pfp__built_width
+
     def _pfp__handle_updated(self, watched_field):
         if (
-            self.raw_data is not None
+            self._pfp__raw is not None
             and watched_field._pfp__name is not None
             and watched_field._pfp__name.startswith(self._pfp__name)
             and watched_field._pfp__array_idx is not None
         ):
+            idx = watched_field._pfp__array_idx
             data = watched_field._pfp__build()
-            offset = watched_field.width * watched_field._pfp__array_idx
-            self.raw_data = (
-                self.raw_data[0:offset]
-                + data
-                + self.raw_data[offset + len(data) :]
-            )
+            offset = watched_field.width * idx
+            self._pfp__raw[offset : offset + len(data)] = data
+            self._pfp__invalidate()
+
+            # the item may be an older field for the same index
+            if self._pfp__item_cache is not None:
+                item = self._pfp__item_cache.get(idx)
+                if item is not None and item is not watched_field:
+                    self._pfp__reparse_item(item)
         else:
             super(Array, self)._pfp__handle_updated(watched_field)
 
+    def _pfp__reparse_item(self, item):
+        """Reparse an item field of ``raw_data`` from the buffer
+        """
+        width = self.field_cls.width
+        offset = width * item._pfp__array_idx
+        # a plain BytesIO is enough to parse core types
+        item._pfp__parse(six.BytesIO(bytes(self._pfp__raw[offset : offset + width])))
+
     def __getitem__(self, idx):
-        if self.raw_data is None:
+        if self._pfp__raw is None:
             return self.items[idx]
         else:
             if self.width < 0 or idx + 1 > self.width:
                 raise IndexError(idx)
-            width = self.field_cls.width
-            offset = width * idx
-            data = self.raw_data[offset : offset + width]
 
-            stream = bitwrap.BitwrappedStream(six.BytesIO(data))
-            res = self.field_cls(stream)
+            if self._pfp__item_cache is None:
+                self._pfp__item_cache = {}
+            res = self._pfp__item_cache.get(idx)
+            if res is not None:
+                return res
+
+            res = self.field_cls()
+            res._pfp__array_idx = idx
+            self._pfp__reparse_item(res)
             res._pfp__watch(self)
             res._pfp__parent = self
-            res._pfp__array_idx = idx
             res._pfp__name = "{}[{}]".format(self._pfp__name, idx)
+            self._pfp__item_cache[idx] = res
             return res
 
     def __setitem__(self, idx, value):
         if isinstance(value, Field):
-            if self.raw_data is None:
+            if self._pfp__raw is None:
                 self.items[idx] = value
             else:
                 if self.width < 0 or idx + 1 > self.width:
                     raise IndexError(idx)
                 data = value._pfp__build()
                 offset = self.field_cls.width * idx
-                self.raw_data = (
-                    self.raw_data[0:offset]
-                    + data
-                    + self.raw_data[offset + self.field_cls.width :]
-                )
+                self._pfp__raw[offset : offset + self.field_cls.width] = data
+                if self._pfp__item_cache is not None:
+                    item = self._pfp__item_cache.get(idx)
+                    if item is not None:
+                        self._pfp__reparse_item(item)
         else:
             self[idx]._pfp__set_value(value)
 
+        self._pfp__invalidate()
+        self._pfp__notify_update(self)
+
+    def _pfp__raw_format(self, count):
+        """Return the struct format of ``count`` items of ``raw_data``
+        """
+        return "{}{}{}".format(self.field_cls.endian, count, self.field_cls.format)
+
+    def _pfp__get_values(self, start=0, stop=None):
+        """Return the values of the items from ``start`` to ``stop`` as a
+        list. Items in ``raw_data`` are unpacked at once, without creating
+        fields for them.
+        """
+        if stop is None or stop > len(self):
+            stop = len(self)
+        if start >= stop:
+            return []
+
+        if self._pfp__raw is None:
+            return [get_value(item) for item in self.items[start:stop]]
+
+        return list(struct.unpack_from(
+            self._pfp__raw_format(stop - start),
+            self._pfp__raw,
+            start * self.field_cls.width,
+        ))
+
+    def _pfp__set_values(self, values, start=0):
+        """Set the items starting at ``start`` to ``values``. Items in
+        ``raw_data`` are packed at once, with the same conversions as
+        setting each item on its own.
+        """
+        values = list(values)
+        if start < 0 or start + len(values) > len(self):
+            raise IndexError(start + len(values))
+
+        if self._pfp__raw is None:
+            for idx, value in enumerate(values):
+                self.items[start + idx]._pfp__set_value(value)
+            return
+
+        if len(values) == 0:
+            return
+
+        converter = self.field_cls()
+        struct.pack_into(
+            self._pfp__raw_format(len(values)),
+            self._pfp__raw,
+            start * self.field_cls.width,
+            *[get_value(converter._pfp__promote(value)) for value in values]
+        )
+        if self._pfp__item_cache is not None:
+            for idx, item in six.iteritems(self._pfp__item_cache):
+                if start <= idx < start + len(values):
+                    self._pfp__reparse_item(item)
+
+        self._pfp__invalidate()
         self._pfp__notify_update(self)
 
     def __repr__(self):
@@ -2374,8 +2613,8 @@ class Array(Field):
         return "\n".join(res)
 
     def __len__(self):
-        if self.raw_data is not None:
-            return int(len(self.raw_data) / self.field_cls.width)
+        if self._pfp__raw is not None:
+            return int(len(self._pfp__raw) / self.field_cls.width)
         else:
             return len(self.items)
 
@@ -2433,6 +2672,7 @@ class String(Field):
                 break
             res += byte
         self._pfp__value = res
+        self._pfp__invalidate()
 
     def _pfp__build(self, stream=None, save_offset=False):
         """Build the String field
@@ -2472,6 +2712,7 @@ class String(Field):
         self._pfp__value = (
             self._pfp__value[0:idx] + val + self._pfp__value[idx + 1 :]
         )
+        self._pfp__invalidate()
 
     def __add__(self, other):
         """Add two strings together. If other is not a String instance,
@@ -2501,6 +2742,7 @@ class String(Field):
             self._pfp__value += other._pfp__value
         else:
             self._pfp__value += utils.binary(PYSTR(other))
+        self._pfp__invalidate()
         return self
 
     def __len__(self):
@@ -2516,6 +2758,7 @@ class WString(String):
     def _pfp__parse(self, stream, save_offset=False):
         String._pfp__parse(self, stream, save_offset)
         self._pfp__value = utils.binary(self._pfp__value.decode("utf-16le"))
+        self._pfp__invalidate()
 
     def _pfp__build(self, stream=None, save_offset=False):
         if stream is not None and save_offset:
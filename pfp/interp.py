@@ -7,11 +7,13 @@ Python format parser
 import collections
 import copy
 import glob
+import hashlib
 import logging
 import os
 import re
 import six
 import sys
+import time
 import traceback
 import platform
 
@@ -21,6 +23,8 @@ from py010parser import c_ast as AST
 
 import pfp
 import pfp.bitwrap as bitwrap
+import pfp.cache as cache
+import pfp.compiler as compiler
 import pfp.errors as errors
 import pfp.fields as fields
 import pfp.functions as functions
@@ -30,6 +34,98 @@ import pfp.utils as utils
 logging.basicConfig(level=logging.CRITICAL)
 
 
+BINARY_OPS = {
+    "+": lambda x, y: x + y,
+    "-": lambda x, y: x - y,
+    "*": lambda x, y: x * y,
+    "/": lambda x, y: x / y,
+    "|": lambda x, y: x | y,
+    "^": lambda x, y: x ^ y,
+    "&": lambda x, y: x & y,
+    "%": lambda x, y: x % y,
+    ">": lambda x, y: x > y,
+    "<": lambda x, y: x < y,
+    "||": lambda x, y: 1 if x or y else 0,
+    ">=": lambda x, y: x >= y,
+    "<=": lambda x, y: x <= y,
+    "==": lambda x, y: x == y,
+    "!=": lambda x, y: x != y,
+    "&&": lambda x, y: 1 if x and y else 0,
+    ">>": lambda x, y: x >> y,
+    "<<": lambda x, y: x << y,
+}
+
+UNARY_OPS = {
+    # for ++i and --i
+    "++": lambda x: x.__iadd__(1),
+    "--": lambda x: x.__isub__(1),
+    "~": lambda x: ~x,
+    "!": lambda x: not x,
+    "-": lambda x: -x,
+    "sizeof": lambda x: (fields.UInt64() + x._pfp__width()),
+    "startof": lambda x: (fields.UInt64() + x._pfp__offset),
+}
+
+
+def _add_op(x, y):
+    x += y
+
+
+def _sub_op(x, y):
+    x -= y
+
+
+def _div_op(x, y):
+    x.__idiv__(y)
+
+
+def _mod_op(x, y):
+    x %= y
+
+
+def _mul_op(x, y):
+    x *= y
+
+
+def _xor_op(x, y):
+    x ^= y
+
+
+def _and_op(x, y):
+    x &= y
+
+
+def _or_op(x, y):
+    x |= y
+
+
+def _lshift_op(x, y):
+    x <<= y
+
+
+def _rshift_op(x, y):
+    x >>= y
+
+
+def _assign_op(x, y):
+    x._pfp__set_value(y)
+
+
+ASSIGNMENT_OPS = {
+    "+=": _add_op,
+    "-=": _sub_op,
+    "/=": _div_op,
+    "%=": _mod_op,
+    "*=": _mul_op,
+    "^=": _xor_op,
+    "&=": _and_op,
+    "|=": _or_op,
+    "<<=": _lshift_op,
+    ">>=": _rshift_op,
+    "=": _assign_op,
+}
+
+
 class Decls(object):
     def __init__(self, decls, coord):
         self.decls = decls
@@ -143,6 +239,7 @@ def StructUnionDef(typedef_name, interp, node, overrides=None, cls=None):
             stream,
             metadata_processor=metadata_processor,
         )
+        self._pfp__interp = interp
 
         if do_init:
             self._pfp__init(stream)
@@ -154,7 +251,6 @@ def StructUnionDef(typedef_name, interp, node, overrides=None, cls=None):
         "__init__": __init__,
         "_pfp__init": _pfp__init,
         "_pfp__node": node,
-        "_pfp__interp": interp,
     }
 
     for k, v in six.iteritems(overrides or {}):
@@ -288,6 +384,10 @@ class DebugLogger(object):
             )
         )
 
+    @property
+    def active(self):
+        return self._active
+
     def inc(self):
         self._indent += 1
 
@@ -583,7 +683,8 @@ class Scope(object):
     # ------------------
 
     def _dlog(self, msg):
-        self._log.debug(" scope({:08x})".format(id(self)), msg)
+        if self._log.active:
+            self._log.debug(" scope({:08x})".format(id(self)), msg)
 
     def _resolve_name(self, name):
         """TODO: Docstring for _resolve_names.
@@ -653,6 +754,7 @@ class PfpInterp(object):
     _fstat_funcs = set()
     _generates_cpp = ""
     _known_values = {}
+    _native_types = {}
     _defined = {"time" : None}
     _declared = set()
     _to_define = {}
@@ -665,7 +767,7 @@ class PfpInterp(object):
         if node.name not in self._defined:
             self._defined[node.name] = classname
             self._globals.append((node.name, classname + " " + node.name + "(" + classname + "_" + node.name + "_instances);\n"))
-            self._instances += "std::vector<" + classname + "*> " + classname + "_" + node.name + "_instances;\n"
+            self._instances += "thread_local std::vector<" + classname + "*> " + classname + "_" + node.name + "_instances;\n"
         if classname in self._defined:
             name = node.name
             if hasattr(node, "originalname"):
@@ -674,7 +776,7 @@ class PfpInterp(object):
             if len(self._call_stack) > 1 and not self._call_stack[-1]:
                 node.cpp += "_VAR"
             self._variable_types[node.name] = classname
-            node.cpp += "(" + name + ", ::g->" + node.name + ".generate("
+            node.cpp += "(" + name + ", " + self._generate_site(name, node) + ", ::g->" + node.name + ".generate("
             arg_num = 0
             if hasattr(node.type, "args") and node.type.args:
                 for arg in node.type.args.exprs:
@@ -701,7 +803,7 @@ class PfpInterp(object):
             if is_var:
                 node.cpp += "_VAR"
             self._variable_types[node.name] = classname
-            node.cpp += "(" + name + ", ::g->" + node.name + ".generate("
+            node.cpp += "(" + name + ", " + self._generate_site(name, node) + ", ::g->" + node.name + ".generate("
             arg_num = 0
             if hasattr(node.type, "args") and node.type.args:
                 for arg in node.type.args.exprs:
@@ -720,6 +822,28 @@ class PfpInterp(object):
                 self._declared.add(classname)
                 self._cpp.append((classname, "\nclass " + classname + ";\n\n"))
 
+    def _is_constant(self, node):
+        """Whether the C++ code of node only depends on literals.
+        """
+        if isinstance(node, AST.Constant):
+            return True
+        if isinstance(node, AST.UnaryOp) and node.op in ["-", "+", "~"]:
+            return self._is_constant(node.expr)
+        if isinstance(node, AST.Cast):
+            return self._is_constant(node.expr)
+        if isinstance(node, AST.InitList):
+            return all(self._is_constant(expr) for expr in node.exprs)
+        return False
+
+    def _known_values_cpp(self, valuetype, exprs):
+        """Return the C++ code for a list of known values. Lists of literals
+        become a value_set that is built only once per call site.
+        """
+        cpp = "{ " + ", ".join(expr.cpp for expr in exprs) + " }"
+        if all(self._is_constant(expr) for expr in exprs):
+            cpp = "KNOWN_VALUES(" + valuetype + ", " + cpp + ")"
+        return cpp
+
     def add_string_class(self, classname):
         if classname not in self._defined:
             self._defined[classname] = None
@@ -746,16 +870,17 @@ class PfpInterp(object):
     def add_native_class(self, classname, classtype, is_bitfield=False):
         if classname not in self._defined:
             self._defined[classname] = None
+            self._native_types[classname] = classtype
             cpp = "\n\nclass " + classname + " {\n"
             cpp += "\tint small;\n"
-            cpp += "\tstd::vector<" + classtype + "> known_values;\n"
+            cpp += "\tconst value_set<" + classtype + ">* known_values;\n"
             cpp += "\t" + classtype + " value;\n"
             cpp += "public:\n"
             if not is_bitfield:
                 cpp += "\tint64 _startof = 0;\n"
                 cpp += "\tstd::size_t _sizeof = sizeof(" + classtype + ");\n"
             cpp += "\t" + classtype + " operator () () { return value; }\n"
-            cpp += "\t" + classname + "(int small, std::vector<" + classtype + "> known_values = {}) : small(small), known_values(known_values) {}\n"
+            cpp += "\t" + classname + "(int small, const value_set<" + classtype + ">* known_values = NULL) : small(small), known_values(known_values) {}\n"
             if is_bitfield:
                 cpp += "\n\t" + classtype + " generate(unsigned bits) {\n"
                 cpp += "\t\tif (!bits)\n"
@@ -764,25 +889,25 @@ class PfpInterp(object):
                 cpp += "\n\t" + classtype + " generate() {\n"
             if not is_bitfield:
                 cpp += "\t\t_startof = FTell();\n"
-            cpp += "\t\tif (known_values.empty()) {\n"
+            cpp += "\t\tif (!known_values) {\n"
             if is_bitfield:
                 cpp += "\t\t\tvalue = file_acc.file_integer(sizeof(" + classtype + "), bits, small);\n"
             else:
                 cpp += "\t\t\tvalue = file_acc.file_integer(sizeof(" + classtype + "), 0, small);\n"
             cpp += "\t\t} else {\n"
             if is_bitfield:
-                cpp += "\t\t\tvalue = file_acc.file_integer(sizeof(" + classtype + "), bits, known_values);\n"
+                cpp += "\t\t\tvalue = file_acc.file_integer(sizeof(" + classtype + "), bits, *known_values);\n"
             else:
-                cpp += "\t\t\tvalue = file_acc.file_integer(sizeof(" + classtype + "), 0, known_values);\n"
+                cpp += "\t\t\tvalue = file_acc.file_integer(sizeof(" + classtype + "), 0, *known_values);\n"
             cpp += "\t\t}\n"
             cpp += "\t\treturn value;\n"
             cpp += "\t}\n"
             if is_bitfield:
-                cpp += "\n\t" + classtype + " generate(unsigned bits, std::vector<" + classtype + "> possible_values) {\n"
+                cpp += "\n\t" + classtype + " generate(unsigned bits, const value_set<" + classtype + ">& possible_values) {\n"
                 cpp += "\t\tif (!bits)\n"
                 cpp += "\t\t\treturn 0;\n"
             else:
-                cpp += "\n\t" + classtype + " generate(std::vector<" + classtype + "> possible_values) {\n"
+                cpp += "\n\t" + classtype + " generate(const value_set<" + classtype + ">& possible_values) {\n"
             if not is_bitfield:
                 cpp += "\t\t_startof = FTell();\n"
             if is_bitfield:
@@ -791,6 +916,12 @@ class PfpInterp(object):
                 cpp += "\t\tvalue = file_acc.file_integer(sizeof(" + classtype + "), 0, possible_values);\n"
             cpp += "\t\treturn value;\n"
             cpp += "\t}\n"
+            if not is_bitfield:
+                cpp += "\n\tbool generate_array(std::vector<" + classtype + ">& values, unsigned size) {\n"
+                cpp += "\t\tif (small || known_values)\n"
+                cpp += "\t\t\treturn false;\n"
+                cpp += "\t\treturn file_acc.file_integers(values, size);\n"
+                cpp += "\t}\n"
             cpp += "};\n\n"
             self._cpp.append((classname, cpp))
 
@@ -945,8 +1076,8 @@ class PfpInterp(object):
                 classnode.args = AST.ParamList([])
             classnode.args.params.append(local)
         cpp += "\n\tunsigned char generated = 0;\n"
-        cpp += "\tstatic int _parent_id;\n"
-        cpp += "\tstatic int _index_start;\n"
+        cpp += "\tstatic thread_local int _parent_id;\n"
+        cpp += "\tstatic thread_local int _index_start;\n"
         cpp += "\tint64 _startof = 0;\n"
         cpp += "\tstd::size_t _sizeof = 0;\n"
         cpp += "\t" + classname + "& operator () () { return *instances.back(); }\n"
@@ -958,6 +1089,8 @@ class PfpInterp(object):
         cpp += "\t\treturn instances.size() - _index_start;\n"
         cpp += "\t}\n"
         cpp += "\t" + classname + "(std::vector<" + classname + "*>& instances) : instances(instances) { instances.push_back(this); }\n"
+        cpp += "\tstatic void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }\n"
+        cpp += "\tstatic void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }\n"
         cpp += "\t~" + classname + "() {\n"
         cpp += "\t\tif (generated == 2)\n"
         cpp += "\t\t\treturn;\n"
@@ -992,8 +1125,8 @@ class PfpInterp(object):
                 cpp += " " + param.name + ", "
             cpp = cpp[:-2]
         cpp += ");\n};\n\n"
-        cpp += "int " + classname + "::_parent_id = 0;\n"
-        cpp += "int " + classname + "::_index_start = 0;\n\n"
+        cpp += "thread_local int " + classname + "::_parent_id = 0;\n"
+        cpp += "thread_local int " + classname + "::_index_start = 0;\n\n"
         self._cpp.append((classname, cpp))
         if classname in self._to_define:
             for field_name, node, is_var in self._to_define[classname]:
@@ -1155,25 +1288,50 @@ class PfpInterp(object):
             setattr(mod, "PYVAL", fields.get_value)
             setattr(mod, "PYSTR", fields.get_str)
 
-    def __init__(self, debug=False, parser=None, int3=True, generate=True):
+    def __init__(self, debug=False, parser=None, int3=True, generate=True, cpp_target=None, profiler=None, listener=None):
         """Create a new instance of the ``PfpInterp`` class.
 
         :param bool debug: if debug output should be used (default=``False``)
         :param :any:`py010parser.c_parser.CParser` parser: The ``py010parser.c_parser.CParser`` to use (default=``None``)
         :param bool int3: If debug breakpoints (calls to :any:`pfp.native.dbg.int3` ``Int3()``) are active (default=``True``)
+        :param str cpp_target: Path of the generated C++ file (default=``None``, the C++ code is not written)
+        :param :any:`pfp.profiler.Profiler` profiler: Profiler to report the time spent per template location to (default=``None``)
+        :param :any:`pfp.events.EventListener` listener: Listener to report the parsed fields to (default=``None``)
         """
         sys.setrecursionlimit(100000)
         self._generate = generate
+        self._cpp_target = cpp_target
+        # (phase, seconds) pairs, filled in while compiling a template
+        self.timings = []
+        self._phase_start = time.time()
         self._global_locals = []
         self._global_consts = []
         self._globals = []
         self._variable_types = {}
+        # (GENERATE_VAR name, .bt location of its declaration) per site id
+        self._variable_sites = []
+        self._variable_site_ids = {}
         self._integer_ranges = [("1", "16")]
         self._instances = ""
         self._locals_stack = [[]]
         self._incomplete_stack = [False]
         self._incomplete = False
         self._structs = set()
+        # the C++ translation of the template, so that the names defined by
+        # an earlier template (e.g. in a long-running process parsing many
+        # files) do not leak into this one
+        self._cpp = []
+        self._functions_cpp = []
+        self._read_funcs = set()
+        self._fstat_funcs = set()
+        self._generates_cpp = ""
+        self._known_values = {}
+        self._native_types = {}
+        self._defined = {"time": None}
+        self._declared = set()
+        self._to_define = {}
+        self._to_replace = []
+        self._call_stack = [False]
         self.__class__.define_natives()
 
         self._log = DebugLogger(debug)
@@ -1196,6 +1354,16 @@ class PfpInterp(object):
         self._scope = None
         self._coord = None
         self._orig_filename = None
+        self._profiler = profiler
+        self._listener = listener
+        # parses run the nodes they have handled before as closures
+        self._compiler = None if generate else compiler.Compiler(self)
+        # id(list of statements) -> (list, its compound statement)
+        self._list_compounds = {}
+        # number of structs being parsed that are not part of the DOM yet
+        self._detached = 0
+        # the file the preprocessor placed the template itself in
+        self._template_coord_file = None
 
         if parser is None:
             parser = py010parser.c_parser.CParser()
@@ -1300,11 +1468,14 @@ class PfpInterp(object):
         self._orig_filename = orig_filename
         self._stream = stream
 
+        self.timings = []
+        self._phase_start = time.time()
         if not self._ast_frozen:
             self._template = template
             self._template_lines = self._template.split("\n")
             self._ast = self._parse_string(template, predefines)
             self._dlog("parsed template into ast")
+            self._time_phase("parse")
 
         res = self._run(keep_successful)
         res._pfp__finalize()
@@ -1442,6 +1613,15 @@ class PfpInterp(object):
     def _parse_string(self, string, predefines=True):
         if self.CPP_ARGS is None:
             self.set_cpp_args()
+
+        predefine_texts = self._predefines if predefines else []
+        cache_key = None
+        if cache.cacheable(string, predefine_texts):
+            cache_key = cache.key(string, predefine_texts, self.CPP_ARGS)
+            res = cache.load(cache_key)
+            if res is not None:
+                return res
+
         exts = []
         if predefines:
             for idx, predefine in enumerate(self._predefines):
@@ -1466,6 +1646,8 @@ class PfpInterp(object):
             keep_scopes=predefines,
         )
         res.ext = exts + res.ext
+        if cache_key is not None:
+            cache.store(cache_key, res)
 
         return res
 
@@ -1495,6 +1677,12 @@ class PfpInterp(object):
 
         self._dlog("interpreting template")
 
+        if self._ast.ext and self._ast.ext[-1].coord is not None:
+            self._template_coord_file = self._ast.ext[-1].coord.file
+
+        if self._listener is not None:
+            self._listener.begin(self._ast)
+
         try:
             # it is important to pass the stream in as the stream
             # may change (e.g. compressed data)
@@ -1537,6 +1725,21 @@ class PfpInterp(object):
 
         return res
 
+    def _list_compound(self, node):
+        """Return the compound statement wrapping the list of statements
+        ``node``. The same compound statement is returned every time, so
+        that it is compiled like the other nodes.
+
+        :node: a list of statements
+        :returns: an ``AST.Compound``
+        """
+        cached = self._list_compounds.get(id(node))
+        if cached is None:
+            # the list is kept alive with its compound, its id is not reused
+            compound = AST.Compound(block_items=node, coord=node[0].coord)
+            cached = self._list_compounds[id(node)] = (node, compound)
+        return cached[1]
+
     def _handle_node(self, node, scope=None, ctxt=None, stream=None):
         """Recursively handle nodes in the 010 AST
 
@@ -1563,10 +1766,8 @@ class PfpInterp(object):
         # TODO probably a better way to do this...
         # this occurs with if-statements that have a single statement
         # instead of a compound statement (no curly braces)
-        elif type(node) is list and len(
-            list(filter(lambda x: isinstance(x, AST.Node), node))
-        ) == len(node):
-            node = AST.Compound(block_items=node, coord=node[0].coord)
+        elif type(node) is list and all(isinstance(x, AST.Node) for x in node):
+            node = self._list_compound(node)
             return self._handle_node(node, scope, ctxt, stream)
 
         # need to check this so that debugger-eval'd statements
@@ -1574,6 +1775,36 @@ class PfpInterp(object):
         if not self._no_debug:
             self._coord = node.coord
 
+        # without debug logging, profiling or a pending break, dispatch directly
+        if (
+            not self._log.active
+            and self._break_type == self.BREAK_NONE
+            and self._profiler is None
+        ):
+            handler = self._node_switch.get(node.__class__)
+            if handler is None:
+                raise errors.UnsupportedASTNode(
+                    node.coord, node.__class__.__name__
+                )
+            if self._compiler is None or self._no_debug:
+                return handler(node, scope, ctxt, stream)
+
+            run = self._compiler.compiled(node)
+            if run:
+                return run(scope, ctxt, stream)
+            if run is None:
+                return handler(node, scope, ctxt, stream)
+
+            # the first time, the handler also translates the node to C++,
+            # which some handlers read from the children of their node
+            try:
+                res = handler(node, scope, ctxt, stream)
+            except (errors.InterpBreak, errors.InterpContinue, errors.InterpReturn):
+                node._pfp__compiled = (self._compiler, self._compiler.compile(node))
+                raise
+            node._pfp__compiled = (self._compiler, self._compiler.compile(node))
+            return res
+
         self._dlog(
             "handling node type {}, line {}".format(
                 node.__class__.__name__,
@@ -1607,12 +1838,91 @@ class PfpInterp(object):
                 node.coord, node.__class__.__name__
             )
 
-        res = self._node_switch[node.__class__](node, scope, ctxt, stream)
+        handler = self._node_switch[node.__class__]
+        if self._profiler is not None and node.__class__ in self._PROFILED_CLASSES:
+            self._profiler.enter(self._profile_label(node))
+            try:
+                res = handler(node, scope, ctxt, stream)
+            finally:
+                self._profiler.leave()
+        else:
+            res = handler(node, scope, ctxt, stream)
 
         self._log.dec()
 
         return res
 
+    def _location(self, node):
+        """Return the location of ``node`` in the template, e.g. ``gif.bt:67``.
+        """
+        name = os.path.basename(self._orig_filename or "template")
+        if node.coord is None:
+            return name
+        if node.coord.file != self._template_coord_file:
+            return "predefines:{}".format(node.coord.line)
+        return "{}:{}".format(name, node.coord.line)
+
+    def _profile_label(self, node):
+        """Return the label that the time spent on ``node`` is profiled under.
+        """
+        location = self._location(node)
+        if isinstance(node, (AST.Struct, AST.Union)) and node.name is not None:
+            kind = "struct" if isinstance(node, AST.Struct) else "union"
+            return "{} {} ({})".format(kind, node.name, location)
+        if isinstance(node, AST.FuncDef):
+            return "function {} ({})".format(node.decl.name, location)
+        return location
+
+    def _generate_site(self, name, node):
+        """Return the id of the site where the variable generated as
+        ``name`` is declared, which tells apart variables of the same name.
+        """
+        site = (name, self._location(node))
+        if site not in self._variable_site_ids:
+            self._variable_site_ids[site] = len(self._variable_sites)
+            self._variable_sites.append(site)
+        return str(self._variable_site_ids[site])
+
+    _PLACEHOLDER = re.compile(r"/\*TODO class (\w+)\*/|/\*\*/(?:(\w+)\(\))?")
+
+    def _resolve_placeholders(self, cpp):
+        """Resolve the ``/*TODO class X*/`` and ``/**/name()`` placeholders
+        left in the generated code in a single pass over ``cpp``.
+
+        :cpp: the generated C++ code
+        :returns: the code with all placeholders replaced
+
+        """
+        classes = {}
+        for todo, todoclass in self._to_replace:
+            classes.setdefault(todo[len("/*TODO class "):-len("*/")], todoclass)
+        names = {}
+        for local in self._global_locals:
+            names.setdefault(local, "::g->" + local)
+        for n, c in self._globals:
+            names.setdefault(n, "::g->" + n + "()")
+        for local in self._global_consts:
+            names.setdefault(local, local)
+
+        def replace(match):
+            classname, name = match.groups()
+            if classname is not None:
+                return classes.get(classname, match.group(0))
+            if name is None:
+                return ""
+            return names.get(name, name + "()")
+
+        return self._PLACEHOLDER.sub(replace, cpp)
+
+    def _time_phase(self, phase):
+        """Record the time spent since the previous phase ended.
+
+        :phase: the name of the phase that just ended
+        """
+        now = time.time()
+        self.timings.append((phase, now - self._phase_start))
+        self._phase_start = now
+
     def _handle_file_ast(self, node, scope, ctxt, stream):
         """TODO: Docstring for _handle_file_ast.
 
@@ -1623,7 +1933,7 @@ class PfpInterp(object):
         :returns: TODO
 
         """
-        node.cpp = "#include <cstdlib>\n#include <cstdio>\n#include <string>\n#include <vector>\n#include <unordered_map>\n#include \"bt.h\"\n"
+        out = ["#include <cstdlib>\n#include <cstdio>\n#include <string>\n#include <vector>\n#include <unordered_map>\n#include \"bt.h\"\n"]
         self._root = ctxt = fields.Dom(stream)
         ctxt._pfp__scope = scope
         self._root._pfp__name = "__root"
@@ -1645,10 +1955,10 @@ class PfpInterp(object):
                 continue
             self._handle_node(child, scope, ctxt, stream)
             if child.cpp:
-                node.cpp += child.cpp + ";\n"
+                out.append(child.cpp + ";\n")
             scope.clear_meta()
 
-        node.cpp1 = ""
+        body = []
         for child in children:
             if type(child) is tuple:
                 child = child[1]
@@ -1662,11 +1972,12 @@ class PfpInterp(object):
                     self._globals.append((decl.name, cpp))
                     self._global_locals.append(decl.name)
             if child.cpp:
-                node.cpp1 += "\t" + child.cpp.replace("\n", "\n\t") + ";\n"
+                body.append("\t" + child.cpp.replace("\n", "\n\t") + ";\n")
+        self._time_phase("translate")
 
         for n, c in self._cpp:
-            #node.cpp += "/*" + n + "*/\n"
-            node.cpp += c
+            #out.append("/*" + n + "*/\n")
+            out.append(c)
         readfunctions = [["byte", "Byte"],
                          ["ubyte", "UByte"],
                          ["short", "Short"],
@@ -1683,64 +1994,69 @@ class PfpInterp(object):
                          ["std::string", "Bytes"]]
         lookahead = []
         for t, n in readfunctions:
-            node.cpp += "std::vector<" + t + "> Read" + n + "InitValues"
+            out.append("value_set<" + t + "> Read" + n + "InitValues")
             if "Read" + n + "InitValues" in self._known_values:
-                node.cpp += " = { " + ", ".join(self._known_values["Read" + n + "InitValues"]) + " }"
+                out.append("({ " + ", ".join(self._known_values["Read" + n + "InitValues"]) + " }, true)")
             elif "Read" + n in self._known_values:
-                node.cpp += " = { " + ", ".join(self._known_values["Read" + n]) + " }"
-            node.cpp += ";\n"
+                out.append("({ " + ", ".join(self._known_values["Read" + n]) + " }, true)")
+            out.append(";\n")
             if "Read" + n in self._read_funcs:
                 lookahead.append("Read" + n)
-        node.cpp += "\n\n" + self._instances
-        node.cpp += "\n\nstd::unordered_map<std::string, std::string> variable_types = { "
-        for var in self._variable_types:
-            node.cpp += '{ "' + var + '", "' + self._variable_types[var] + '" }, '
-        if self._variable_types:
-            node.cpp = node.cpp[:-2]
-        node.cpp += " };"
-        node.cpp += "\n\nstd::vector<std::vector<int>> integer_ranges = { "
-        for (a, b) in self._integer_ranges:
-            node.cpp += '{ ' + a + ', ' + b + ' }, '
-        node.cpp = node.cpp[:-2] + " };"
-        node.cpp += "\n\nclass globals_class {\npublic:\n\tint _struct_id = 0;\n\tint _struct_id_counter = 0;\n"
+        out.append("\n\n" + self._instances)
+        out.append("\n\nstd::unordered_map<std::string, std::string> variable_types = { ")
+        out.append(", ".join(
+            '{ "' + var + '", "' + self._variable_types[var] + '" }'
+            for var in self._variable_types
+        ))
+        out.append(" };")
+        out.append("\n\nstd::vector<std::pair<const char*, const char*>> variable_sites = { ")
+        out.append(", ".join(
+            '{ "' + var + '", "' + location + '" }'
+            for (var, location) in self._variable_sites
+        ))
+        out.append(" };")
+        out.append("\n\nstd::vector<std::vector<int>> integer_ranges = { ")
+        out.append(", ".join("{ " + a + ", " + b + " }" for (a, b) in self._integer_ranges))
+        out.append(" };")
+        out.append("\n\nclass globals_class {\npublic:\n\tint _struct_id = 0;\n\tint _struct_id_counter = 0;\n")
         for n, c in self._globals:
-            #node.cpp += "/*" + n + "*/\n"
+            #out.append("/*" + n + "*/\n")
             if c:
-                node.cpp += "\t" + re.sub(r"\(.*\)", "", c)
-        node.cpp += "\n\n\tglobals_class() :\n"
+                out.append("\t" + re.sub(r"\(.*\)", "", c))
+        initializers = []
         for n, c in self._globals:
             index = c.find(" " + n + "(") + 1
             if index > 0:
-                node.cpp += "\t\t" + c[index:-2] + ",\n"
-        node.cpp = node.cpp[:-2] + "\n"
-        node.cpp += "\t{}\n"
-        node.cpp += "};\n\n"
-        node.cpp += "globals_class* g;\n\n"
+                initializers.append("\t\t" + c[index:-2])
+        if initializers:
+            out.append("\n\n\tglobals_class() :\n" + ",\n".join(initializers) + "\n")
+        else:
+            out.append("\n\n\tglobals_class() \n")
+        out.append("\t{}\n")
+        out.append("};\n\n")
+        out.append("thread_local globals_class* g;\n\n")
         for n, c in self._functions_cpp:
-            #node.cpp += "/*" + n + "*/\n"
-            node.cpp += c
-        node.cpp += self._generates_cpp
-        node.cpp += "\n\nvoid generate_file() {\n"
-        node.cpp += "\t::g = new globals_class();\n\n"
-        node.cpp += node.cpp1
-        node.cpp += "\n\tfile_acc.finish();\n"
-        node.cpp += "\tdelete_globals();\n"
-        node.cpp += "}\n"
-        node.cpp += "\nvoid delete_globals() { delete ::g; }\n"
-
-        for a, b in self._to_replace:
-            node.cpp = node.cpp.replace(a, b)
-        for local in self._global_locals:
-            node.cpp = node.cpp.replace("/**/" + local + "()", "::g->" + local)
-        for n, c in self._globals:
-            node.cpp = node.cpp.replace("/**/" + n + "()", "::g->" + n + "()")
-        for local in self._global_consts:
-            node.cpp = node.cpp.replace("/**/" + local + "()", local)
-        node.cpp = node.cpp.replace("/**/", "")
-
-        outfile = open(sys.argv[2], "w")
-        print(node.cpp, file=outfile)
-        outfile.close()
+            #out.append("/*" + n + "*/\n")
+            out.append(c)
+        out.append(self._generates_cpp)
+        out.append("\n\nvoid generate_file() {\n")
+        out.append("\t::g = new globals_class();\n\n")
+        out.extend(body)
+        out.append("\n\tfile_acc.finish();\n")
+        out.append("\tdelete_globals();\n")
+        out.append("}\n")
+        out.append("\nvoid delete_globals() {\n\tdelete ::g;\n\t::struct_arena.reset();\n}\n")
+
+        node.cpp = self._resolve_placeholders("".join(out))
+        node.cpp += "\n// Identifies the generated code, e.g. for cached parse results\n"
+        node.cpp += "const char* template_hash = \"" + hashlib.sha256(node.cpp.encode("utf-8")).hexdigest() + "\";\n"
+        self._time_phase("emit")
+
+        if self._cpp_target is not None:
+            outfile = open(self._cpp_target, "w")
+            print(node.cpp, file=outfile)
+            outfile.close()
+        self._time_phase("write")
         if self._generate:
             print("Finished creating cpp generator.")
             if lookahead:
@@ -2108,6 +2424,8 @@ class PfpInterp(object):
                 field._pfp__interp = self
                 field_res = ctxt._pfp__add_child(field_name, field, stream)
                 field_res._pfp__interp = self
+                if self._listener is not None and self._detached == 0:
+                    self._listener.parsed(field)
                 #field_res._pfp__scope = scope
                 #print(field_res)
 
@@ -2182,7 +2500,7 @@ class PfpInterp(object):
                         self._globals.append((node.name + "_element", element_classname + " " + node.name + "_element(false);\n"))
                     else:
                         self._globals.append((node.name + "_element", element_classname + " " + node.name + "_element" + "(" + element_classname + "_" + node.name + "_element_instances);\n"))
-                        self._instances += "std::vector<" + element_classname + "*> " + element_classname + "_" + node.name + "_element_instances;\n"
+                        self._instances += "thread_local std::vector<" + element_classname + "*> " + element_classname + "_" + node.name + "_element_instances;\n"
 
                 cpp = ""
                 if classname.replace(" ", "_") + "_array_class" not in self._defined:
@@ -2190,9 +2508,9 @@ class PfpInterp(object):
                     cpp += "\n\nclass " + classname.replace(" ", "_") + "_array_class {\n"
                     cpp += "\t" + element_classname + "& " + "element;\n"
                     if is_char_array:
-                        cpp += "\tstd::vector<std::string> known_values;\n"
+                        cpp += "\tconst value_set<std::string>* known_values = NULL;\n"
                     if is_native:
-                        cpp += "\tstd::unordered_map<int, std::vector<" + classtype + ">> element_known_values;\n"
+                        cpp += "\tconst known_values_map<" + classtype + ">* element_known_values = NULL;\n"
                     cpp += "\t" + node.type.cpp + " " + "value;\n"
                     cpp += "public:\n"
                     cpp += "\tint64 _startof = 0;\n"
@@ -2203,12 +2521,12 @@ class PfpInterp(object):
                     cpp += "\t\treturn " + is_pointer + "value[index];\n"
                     cpp += "\t}\n"
                     if is_native:
-                        cpp += "\t" + classname.replace(" ", "_") + "_array_class(" + element_classname + "& element, std::unordered_map<int, std::vector<" + classtype + ">> element_known_values = {})\n\t\t: element(element), element_known_values(element_known_values) {}\n"
+                        cpp += "\t" + classname.replace(" ", "_") + "_array_class(" + element_classname + "& element, const known_values_map<" + classtype + ">* element_known_values = NULL)\n\t\t: element(element), element_known_values(element_known_values) {}\n"
                     else:
                         cpp += "\t" + classname.replace(" ", "_") + "_array_class(" + element_classname + "& element) : element(element) {}\n"
                     if is_char_array:
-                        cpp += "\t" + classname.replace(" ", "_") + "_array_class(" + element_classname + "& element, std::vector<std::string> known_values)\n\t\t: element(element), known_values(known_values) {}\n"
-                        cpp += "\n\t" + node.type.cpp + " generate(unsigned size, std::vector<std::string> possible_values = {}) {\n"
+                        cpp += "\t" + classname.replace(" ", "_") + "_array_class(" + element_classname + "& element, const value_set<std::string>* known_values)\n\t\t: element(element), known_values(known_values) {}\n"
+                        cpp += "\n\t" + node.type.cpp + " generate(unsigned size, const value_set<std::string>& possible_values = {}) {\n"
                     else:
                         cpp += "\n\t" + node.type.cpp + " generate(unsigned size) {\n"
                     cpp += "\t\tcheck_array_length(size);\n"
@@ -2221,14 +2539,14 @@ class PfpInterp(object):
                         cpp += "\t\t\t_sizeof = size;\n"
                         cpp += "\t\t\treturn value;\n"
                         cpp += "\t\t}\n"
-                        cpp += "\t\tif (known_values.size()) {\n"
-                        cpp += "\t\t\tvalue = file_acc.file_string(known_values);\n"
+                        cpp += "\t\tif (known_values) {\n"
+                        cpp += "\t\t\tvalue = file_acc.file_string(*known_values);\n"
                         cpp += "\t\t\tassert(value.length() == size);\n"
                         cpp += "\t\t\t_sizeof = size;\n"
                         cpp += "\t\t\treturn value;\n"
                         cpp += "\t\t}\n"
                         if classname in ["char", "uchar", "unsigned char", "CHAR", "UCHAR"]:
-                            cpp += "\t\tif (!element_known_values.size()) {\n"
+                            cpp += "\t\tif (!element_known_values) {\n"
                             cpp += "\t\t\tif (size == 0)\n"
                             cpp += "\t\t\t\t return \"\";\n"
                             cpp += "\t\t\tvalue = file_acc.file_string(size);\n"
@@ -2237,14 +2555,19 @@ class PfpInterp(object):
                             cpp += "\t\t}\n"
                     else:
                         cpp += "\t\tvalue = {};\n"
+                        if is_native and not is_string:
+                            cpp += "\t\tif (!element_known_values && element.generate_array(value, size)) {\n"
+                            cpp += "\t\t\t_sizeof += size * sizeof(" + classtype + ");\n"
+                            cpp += "\t\t\treturn value;\n"
+                            cpp += "\t\t}\n"
                     cpp += "\t\tfor (unsigned i = 0; i < size; ++i) {\n"
                     if is_native:
-                        cpp += "\t\t\tauto known = element_known_values.find(i);\n"
-                        cpp += "\t\t\tif (known == element_known_values.end()) {\n"
+                        cpp += "\t\t\tconst value_set<" + classtype + ">* known = find_known_values(element_known_values, i);\n"
+                        cpp += "\t\t\tif (!known) {\n"
                         cpp += "\t\t\t\tvalue.push_back(element.generate());\n"
                         cpp += "\t\t\t\t_sizeof += element._sizeof;\n"
                         cpp += "\t\t\t} else {\n"
-                        cpp += "\t\t\t\tvalue.push_back(file_acc.file_integer(sizeof(" + classtype + "), 0, known->second));\n"
+                        cpp += "\t\t\t\tvalue.push_back(file_acc.file_integer(sizeof(" + classtype + "), 0, *known));\n"
                         cpp += "\t\t\t\t_sizeof += sizeof(" + classtype + ");\n"
                         cpp += "\t\t\t}\n"
                     else:
@@ -2258,13 +2581,19 @@ class PfpInterp(object):
                     self._defined[node.name] = classname.replace(" ", "_") + "_array_class"
                     nodecpp = classname.replace(" ", "_") + "_array_class " + node.name + "(" + node.name + "_element"
                     nodecpp += ");\n"
+                # the class and the global are only defined by the first
+                # declaration, don't grow them with every parsed instance
                 if nodetype is None or isinstance(nodetype, list) or issubclass(nodetype, fields.Enum) or issubclass(nodetype, fields.Union):
-                    self._cpp.append((classname.replace(" ", "_") + "_array_class", cpp))
-                    self._globals.append((node.name, nodecpp))
+                    if cpp:
+                        self._cpp.append((classname.replace(" ", "_") + "_array_class", cpp))
+                    if nodecpp:
+                        self._globals.append((node.name, nodecpp))
                 else:
-                    self._globals.append((node.name, nodecpp))
+                    if nodecpp:
+                        self._globals.append((node.name, nodecpp))
                     if classname in self._defined:
-                        self._cpp.append((classname.replace(" ", "_") + "_array_class", cpp))
+                        if cpp:
+                            self._cpp.append((classname.replace(" ", "_") + "_array_class", cpp))
                         self.add_class_generate(classname, classnode, is_union)
                     else:
                         if classname not in self._to_define:
@@ -2278,16 +2607,12 @@ class PfpInterp(object):
                 if len(self._call_stack) > 1 and not self._call_stack[-1]:
                     node.cpp += "_VAR"
                 self._variable_types[node.name] = classname.replace(" ", "_") + "_array_class"
-                node.cpp += "(" + node.originalname + ", ::g->" + node.name + ".generate("
+                node.cpp += "(" + node.originalname + ", " + self._generate_site(node.originalname, node) + ", ::g->" + node.name + ".generate("
                 if node.type.dim is not None:
                     node.cpp += node.type.dim.cpp
                 if node.init is not None:
                     val = self._handle_node(node.init, scope, ctxt, stream)
-                    node.cpp += ", { "
-                    for expr in node.init.exprs:
-                        node.cpp += expr.cpp + ", "
-                    node.cpp = node.cpp[:-2]
-                    node.cpp += " }"
+                    node.cpp += ", " + self._known_values_cpp("std::string", node.init.exprs)
                 node.cpp += "))"
             elif isinstance(node.type.type, AST.Enum):
                 classname = " ".join(node.type.type.names)
@@ -2299,14 +2624,10 @@ class PfpInterp(object):
                 if len(self._call_stack) > 1 and not self._call_stack[-1]:
                     node.cpp += "_VAR"
                 self._variable_types[node.name] = classname
-                node.cpp += "(" + node.name + ", " + classname + "_generate("
+                node.cpp += "(" + node.name + ", " + self._generate_site(node.name, node) + ", " + classname + "_generate("
                 if node.init is not None:
                     self._handle_node(node.init, scope, ctxt, stream)
-                    node.cpp += "{ "
-                    for expr in node.init.exprs:
-                        node.cpp += expr.cpp + ", "
-                    node.cpp = node.cpp[:-2]
-                    node.cpp += " }"
+                    node.cpp += self._known_values_cpp(" ".join(node.type.type.type.names), node.init.exprs)
                 node.cpp += "))"
                 node.type.cpp = " ".join(node.type.type.type.names)
                 if classname not in self._defined:
@@ -2327,7 +2648,7 @@ class PfpInterp(object):
                 if classname + "_generate" not in self._defined:
                     self._defined[classname + "_generate"] = None
                     cpp = "\n" + classname + " " + classname + "_generate() {\n\treturn (" + classname + ") file_acc.file_integer(sizeof(" + " ".join(node.type.type.type.names) + "), 0, " + classname + "_values);\n}\n"
-                    cpp += "\n" + classname + " " + classname + "_generate(std::vector<" + " ".join(node.type.type.type.names) + "> known_values) {\n\treturn (" + classname + ") file_acc.file_integer(sizeof(" + " ".join(node.type.type.type.names) + "), 0, known_values);\n}\n"
+                    cpp += "\n" + classname + " " + classname + "_generate(const value_set<" + " ".join(node.type.type.type.names) + ">& known_values) {\n\treturn (" + classname + ") file_acc.file_integer(sizeof(" + " ".join(node.type.type.type.names) + "), 0, known_values);\n}\n"
                     self._cpp.append((classname + "_generate", cpp))
             elif isinstance(node.type.type, AST.Union) or isinstance(node.type.type, AST.Struct):
                 if hasattr(node.type.type, "name"):
@@ -2404,18 +2725,14 @@ class PfpInterp(object):
                     if len(self._call_stack) > 1 and not self._call_stack[-1]:
                         node.cpp += "_VAR"
                     self._variable_types[node.name] = classname
-                    node.cpp += "(" + node.originalname + ", ::g->" + node.name + ".generate("
+                    node.cpp += "(" + node.originalname + ", " + self._generate_site(node.originalname, node) + ", ::g->" + node.name + ".generate("
                     if is_bitfield:
                         node.cpp += node.bitsize.cpp
                     if node.init is not None:
                         if is_bitfield:
                             node.cpp += ", "
                         val = self._handle_node(node.init, scope, ctxt, stream)
-                        node.cpp += "{ "
-                        for expr in node.init.exprs:
-                            node.cpp += expr.cpp + ", "
-                        node.cpp = node.cpp[:-2]
-                        node.cpp += " }"
+                        node.cpp += self._known_values_cpp(node.type.cpp, node.init.exprs)
                     if node.metadata is not None and "values" in node.metadata.keyvals:
                         if is_bitfield:
                             node.cpp += ", "
@@ -2426,14 +2743,10 @@ class PfpInterp(object):
                     if len(self._call_stack) > 1 and not self._call_stack[-1]:
                         node.cpp += "_VAR"
                     self._variable_types[node.name] = classname
-                    node.cpp += "(" + node.name + ", " + classname + "_generate("
+                    node.cpp += "(" + node.name + ", " + self._generate_site(node.name, node) + ", " + classname + "_generate("
                     if node.init is not None:
                         self._handle_node(node.init, scope, ctxt, stream)
-                        node.cpp += "{ "
-                        for expr in node.init.exprs:
-                            node.cpp += expr.cpp + ", "
-                        node.cpp = node.cpp[:-2]
-                        node.cpp += " }"
+                        node.cpp += self._known_values_cpp(nodetype.typename, node.init.exprs)
                     node.cpp += "))"
                     node.type.cpp = nodetype.typename
                     if node.bitsize is not None:
@@ -2441,7 +2754,7 @@ class PfpInterp(object):
                     if classname + "_generate" not in self._defined:
                         self._defined[classname + "_generate"] = None
                         cpp = "\n" + classname + " " + classname + "_generate() {\n\treturn (" + classname + ") file_acc.file_integer(sizeof(" + nodetype.typename + "), 0, " + classname + "_values);\n}\n"
-                        cpp += "\n" + classname + " " + classname + "_generate(std::vector<" + nodetype.typename + "> known_values) {\n\treturn (" + classname + ") file_acc.file_integer(sizeof(" + nodetype.typename + "), 0, known_values);\n}\n"
+                        cpp += "\n" + classname + " " + classname + "_generate(const value_set<" + nodetype.typename + ">& known_values) {\n\treturn (" + classname + ") file_acc.file_integer(sizeof(" + nodetype.typename + "), 0, known_values);\n}\n"
                         self._cpp.append((classname + "_generate", cpp))
                 else:
                     if hasattr(nodetype, "_pfp__node"):
@@ -2673,6 +2986,7 @@ class PfpInterp(object):
         # new scope
         scope = ctxt._pfp__scope = Scope(self._log, parent=scope)
 
+        notify = self._notify_start(ctxt)
         try:
             max_pos = 0
             for decl in node.decls:
@@ -2690,6 +3004,29 @@ class PfpInterp(object):
             self._locals_stack.pop()
             self._call_stack.pop()
             self._incomplete = self._incomplete_stack.pop()
+            self._notify_done(ctxt, notify)
+
+        if notify:
+            self._listener.end(ctxt)
+
+    def _notify_start(self, ctxt):
+        """Report the start of the struct or union ``ctxt`` to the listener.
+        Structs that are not part of the DOM yet (e.g. the items of an
+        array of structs) are reported once they have been added.
+
+        :returns: if the end of ``ctxt`` should be reported
+        """
+        if self._listener is None:
+            return False
+        if self._detached or ctxt._pfp__parent is None:
+            self._detached += 1
+            return False
+        self._listener.start(ctxt)
+        return True
+
+    def _notify_done(self, ctxt, notify):
+        if self._listener is not None and not notify:
+            self._detached -= 1
 
     def _handle_init_list(self, node, scope, ctxt, stream):
         """Handle InitList nodes (e.g. when initializing a struct)
@@ -2778,6 +3115,7 @@ class PfpInterp(object):
             scope = ctxt._pfp__scope = Scope(self._log, parent=scope)
             self._scope = scope
 
+        notify = self._notify_start(ctxt)
         try:
             for decl in node.decls:
                 # new context! (struct)
@@ -2799,6 +3137,10 @@ class PfpInterp(object):
             self._locals_stack.pop()
             self._call_stack.pop()
             self._incomplete = self._incomplete_stack.pop()
+            self._notify_done(ctxt, notify)
+
+        if notify:
+            self._listener.end(ctxt)
 
     def _handle_identifier_type(self, node, scope, ctxt, stream):
         """TODO: Docstring for _handle_identifier_type.
@@ -2930,42 +3272,46 @@ class PfpInterp(object):
         :stream: TODO
         :returns: TODO
         """
-        self._dlog("handling constant type {}".format(node.type))
-        switch = {
-            "int": (self._str_to_int, self._choose_const_int_class),
-            "long": (self._str_to_int, self._choose_const_int_class),
-            # TODO this isn't quite right, but py010parser wouldn't have
-            # parsed it if it wasn't correct...
-            "float": (
-                lambda x: float(x.lower().replace("f", "")),
-                fields.Float,
-            ),
-            "double": (float, fields.Double),
-            # cut out the quotes
-            "char": (lambda x: ord(utils.string_escape(x[1:-1])), fields.Char),
-            # TODO should this be unicode?? will probably bite me later...
-            # cut out the quotes
-            "string": (
-                lambda x: str(utils.string_escape(x[1:-1])),
-                fields.String,
-            ),
-        }
+        # constants are converted once and cached on their node
+        const = getattr(node, "_pfp__const", None)
+        if const is None:
+            self._dlog("handling constant type {}".format(node.type))
+            switch = {
+                "int": (self._str_to_int, self._choose_const_int_class),
+                "long": (self._str_to_int, self._choose_const_int_class),
+                # TODO this isn't quite right, but py010parser wouldn't have
+                # parsed it if it wasn't correct...
+                "float": (
+                    lambda x: float(x.lower().replace("f", "")),
+                    fields.Float,
+                ),
+                "double": (float, fields.Double),
+                # cut out the quotes
+                "char": (lambda x: ord(utils.string_escape(x[1:-1])), fields.Char),
+                # TODO should this be unicode?? will probably bite me later...
+                # cut out the quotes
+                "string": (
+                    lambda x: str(utils.string_escape(x[1:-1])),
+                    fields.String,
+                ),
+            }
+
+            if node.type not in switch:
+                raise UnsupportedConstantType(node.coord, node.type)
 
-        if node.type in switch:
-            # return switch[node.type](node.value)
             conversion, field_cls = switch[node.type]
             val = conversion(node.value)
-            node.cpp = node.value
+            cpp = node.value
             if node.type == "string" and '\0' in val:
-                node.cpp = "std::string(" + node.value + ", {})".format(len(val))
+                cpp = "std::string(" + node.value + ", {})".format(len(val))
             if hasattr(field_cls, "__call__") and not type(field_cls) is type:
                 field_cls = field_cls(val)
+            const = node._pfp__const = (val, field_cls, cpp)
 
-            field = field_cls()
-            field._pfp__set_value(val)
-            return field
-
-        raise UnsupportedConstantType(node.coord, node.type)
+        val, field_cls, node.cpp = const
+        field = field_cls()
+        field._pfp__set_value(val)
+        return field
 
     def _handle_binary_op(self, node, scope, ctxt, stream):
         """TODO: Docstring for _handle_binary_op.
@@ -2978,26 +3324,7 @@ class PfpInterp(object):
 
         """
         self._dlog("handling binary operation {}".format(node.op))
-        switch = {
-            "+": lambda x, y: x + y,
-            "-": lambda x, y: x - y,
-            "*": lambda x, y: x * y,
-            "/": lambda x, y: x / y,
-            "|": lambda x, y: x | y,
-            "^": lambda x, y: x ^ y,
-            "&": lambda x, y: x & y,
-            "%": lambda x, y: x % y,
-            ">": lambda x, y: x > y,
-            "<": lambda x, y: x < y,
-            "||": lambda x, y: 1 if x or y else 0,
-            ">=": lambda x, y: x >= y,
-            "<=": lambda x, y: x <= y,
-            "==": lambda x, y: x == y,
-            "!=": lambda x, y: x != y,
-            "&&": lambda x, y: 1 if x and y else 0,
-            ">>": lambda x, y: x >> y,
-            "<<": lambda x, y: x << y,
-        }
+        switch = BINARY_OPS
 
         dest_type = scope.get_meta("dest_type")
 
@@ -3044,15 +3371,15 @@ class PfpInterp(object):
                             self._known_values[name][index] = []
                         self._known_values[name][index].append(value)
                         elemtype = self._variable_types[name].replace("_array_class", "")
-                        cpp = "_element, (std::unordered_map<int, std::vector<" + elemtype + ">>) { "
+                        cpp = "_element, &KNOWN_VALUES_MAP(" + elemtype + ", { "
                         for index in self._known_values[name]:
-                            cpp += "{ " + index + ", {{"
+                            cpp += "{ " + index + ", { "
                             for value in self._known_values[name][index]:
                                 cpp += value + ", "
                             cpp = cpp[:-2]
-                            cpp += "}} }, "
+                            cpp += " } }, "
                         cpp = cpp[:-2]
-                        cpp += " });"
+                        cpp += " }));"
                         for i, (n, c) in enumerate(self._globals):
                             if n == name:
                                 self._globals[i] = (n, re.sub("_element.*", "###", c).replace("###", cpp))
@@ -3071,20 +3398,20 @@ class PfpInterp(object):
                             self._known_values[name] = self._known_values[name][:1]
                         classname = self._defined[name]
                         if classname[-12:] == "_array_class":
-                            cpp = "_element, { "
+                            cpp = "_element, &KNOWN_VALUES(std::string, { "
                             for value in self._known_values[name]:
                                 cpp += value + ", "
                             cpp = cpp[:-2]
-                            cpp += " });"
+                            cpp += " }));"
                             for i, (n, c) in enumerate(self._globals):
                                 if n == name:
                                     self._globals[i] = (n, re.sub("_element.*", "###", c).replace("###", cpp))
-                        else:
-                            cpp = "(1, { "
+                        elif classname in self._native_types:
+                            cpp = "(1, &KNOWN_VALUES(" + self._native_types[classname] + ", { "
                             for value in self._known_values[name]:
                                 cpp += value + ", "
                             cpp = cpp[:-2]
-                            cpp += " });"
+                            cpp += " }));"
                             for i, (n, c) in enumerate(self._globals):
                                 if n == name:
                                     self._globals[i] = (n, re.sub(r"\(1.*", "###", c).replace("###", cpp))
@@ -3138,16 +3465,7 @@ class PfpInterp(object):
             "p--": self._handle_post_minus_minus,
         }
 
-        switch = {
-            # for ++i and --i
-            "++": lambda x, v: x.__iadd__(1),
-            "--": lambda x, v: x.__isub__(1),
-            "~": lambda x, v: ~x,
-            "!": lambda x, v: not x,
-            "-": lambda x, v: -x,
-            "sizeof": lambda x, v: (fields.UInt64() + x._pfp__width()),
-            "startof": lambda x, v: (fields.UInt64() + x._pfp__offset),
-        }
+        switch = UNARY_OPS
 
         if node.op not in switch and node.op not in special_switch:
             raise errors.UnsupportedUnaryOperator(node.coord, node.op)
@@ -3176,7 +3494,7 @@ class PfpInterp(object):
             field = field()
         res = None
         try:
-            res = switch[node.op](field, 1)
+            res = switch[node.op](field)
         except:
             pass
         if type(res) is bool:
@@ -3321,52 +3639,7 @@ class PfpInterp(object):
         :returns: TODO
         """
 
-        def add_op(x, y):
-            x += y
-
-        def sub_op(x, y):
-            x -= y
-
-        def div_op(x, y):
-            x.__idiv__(y)
-
-        def mod_op(x, y):
-            x %= y
-
-        def mul_op(x, y):
-            x *= y
-
-        def xor_op(x, y):
-            x ^= y
-
-        def and_op(x, y):
-            x &= y
-
-        def or_op(x, y):
-            x |= y
-
-        def lshift_op(x, y):
-            x <<= y
-
-        def rshift_op(x, y):
-            x >>= y
-
-        def assign_op(x, y):
-            x._pfp__set_value(y)
-
-        switch = {
-            "+=": add_op,
-            "-=": sub_op,
-            "/=": div_op,
-            "%=": mod_op,
-            "*=": mul_op,
-            "^=": xor_op,
-            "&=": and_op,
-            "|=": or_op,
-            "<<=": lshift_op,
-            ">>=": rshift_op,
-            "=": assign_op,
-        }
+        switch = ASSIGNMENT_OPS
 
         scope.clear_meta()
 
@@ -4196,38 +4469,59 @@ class PfpInterp(object):
         if curr is not None:
             curr.is_lazy = True
 
+    # AST node classes that the debugger can break on
+    _BREAKABLE_CLASSES = frozenset([
+        AST.FileAST,
+        AST.Decl,
+        # AST.ByRefDecl,
+        # AST.TypeDecl,
+        # AST.Struct,
+        # AST.IdentifierType,
+        AST.Typedef,
+        # AST.Constant,
+        AST.BinaryOp,
+        AST.Assignment,
+        # AST.ID,
+        AST.UnaryOp,
+        # AST.FuncDef,
+        AST.FuncCall,
+        # AST.FuncDecl,
+        # AST.ParamList,
+        # AST.ExprList,
+        # AST.Compound,
+        AST.Return,
+        AST.ArrayDecl,
+        AST.Continue,
+        AST.Break,
+        AST.Switch,
+        AST.Case,
+    ])
+
     def _node_is_breakable(self, node):
         if not self._int3:
             return False
 
-        breakable_classes = [
-            AST.FileAST,
-            AST.Decl,
-            # AST.ByRefDecl,
-            # AST.TypeDecl,
-            # AST.Struct,
-            # AST.IdentifierType,
-            AST.Typedef,
-            # AST.Constant,
-            AST.BinaryOp,
-            AST.Assignment,
-            # AST.ID,
-            AST.UnaryOp,
-            # AST.FuncDef,
-            AST.FuncCall,
-            # AST.FuncDecl,
-            # AST.ParamList,
-            # AST.ExprList,
-            # AST.Compound,
-            AST.Return,
-            AST.ArrayDecl,
-            AST.Continue,
-            AST.Break,
-            AST.Switch,
-            AST.Case,
-        ]
-
-        return node.__class__ in breakable_classes
+        return node.__class__ in self._BREAKABLE_CLASSES
+
+    # statements, type definitions and functions, but not the expressions
+    # within them
+    _PROFILED_CLASSES = frozenset([
+        AST.FileAST,
+        AST.Decl,
+        AST.Typedef,
+        AST.Struct,
+        AST.Union,
+        AST.FuncDef,
+        AST.FuncCall,
+        AST.Assignment,
+        AST.Return,
+        AST.If,
+        AST.For,
+        AST.While,
+        AST.DoWhile,
+        AST.Switch,
+        AST.Case,
+    ])
 
     def _create_scope(self):
         """TODO: Docstring for _create_scope.
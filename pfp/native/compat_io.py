@@ -186,6 +186,7 @@ def FSeek(params, ctxt, scope, stream, coord):
         skipped_name = old_name
         ctxt._pfp__children = ctxt._pfp__children[:-1]
         del ctxt._pfp__children_map[old_name]
+        ctxt._pfp__invalidate()
 
     tmp_stream = bitwrap.BitwrappedStream(six.BytesIO(data))
     new_field = pfp.fields.Array(len(data), pfp.fields.Char, tmp_stream)
@@ -277,7 +278,7 @@ def OverwriteBytes(params, ctxt, scope, stream, coord):
 
 
 def _read_data(params, stream, cls, coord):
-    bits = stream._bits
+    bits = (stream._bit_value, stream._bit_count)
     curr_pos = stream.tell()
 
     if len(params) >= 1:
@@ -292,7 +293,7 @@ def _read_data(params, stream, cls, coord):
 
     # reset the stream
     stream.seek(curr_pos, 0)
-    stream._bits = bits
+    stream._bit_value, stream._bit_count = bits
 
     return res
 
@@ -411,7 +412,7 @@ def ReadBytes(params, ctxt, scope, stream, coord):
             coord, "n must be an integer", params[2].__class__.__name__
         )
 
-    bits = stream._bits
+    bits = (stream._bit_value, stream._bit_count)
     curr_pos = stream.tell()
 
     num_bytes = PYVAL(params[2])
@@ -424,7 +425,7 @@ def ReadBytes(params, ctxt, scope, stream, coord):
     ]
 
     stream.seek(curr_pos, 0)
-    stream._bits = bits
+    stream._bit_value, stream._bit_count = bits
 
     params[0]._pfp__set_value(vals)
 
@@ -550,7 +550,7 @@ def _find_helper(params, ctxt, scope, stream, coord, interp):
 
     regex = utils.binary(regex)
 
-    stream_bits = stream._bits
+    stream_bits = (stream._bit_value, stream._bit_count)
     stream_pos = stream.tell()
 
     stream.seek(start)
@@ -560,7 +560,7 @@ def _find_helper(params, ctxt, scope, stream, coord, interp):
         search_data = stream.read(size)
 
     stream.seek(stream_pos)
-    stream._bits = stream_bits
+    stream._bit_value, stream._bit_count = stream_bits
 
     flags = 0
     if not match_case:
@@ -56,8 +56,8 @@ def watch_crc(params, ctxt, scope, stream, coord):
 
     to_update = params[0]
 
-    total_data = utils.binary("")
-    for param in params[1:]:
-        total_data += param._pfp__build()
+    total_data = utils.binary("").join(
+        param._pfp__build() for param in params[1:]
+    )
 
     to_update._pfp__set_value(binascii.crc32(total_data))
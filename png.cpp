@@ -75,36 +75,42 @@ std::vector<byte> APNG_BLEND_OP_values = { APNG_BLEND_OP_SOURCE, APNG_BLEND_OP_O
 
 class uint16_class {
 	int small;
-	std::vector<uint16> known_values;
+	const value_set<uint16>* known_values;
 	uint16 value;
 public:
 	int64 _startof = 0;
 	std::size_t _sizeof = sizeof(uint16);
 	uint16 operator () () { return value; }
-	uint16_class(int small, std::vector<uint16> known_values = {}) : small(small), known_values(known_values) {}
+	uint16_class(int small, const value_set<uint16>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	uint16 generate() {
 		_startof = FTell();
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(uint16), 0, small);
 		} else {
-			value = file_acc.file_integer(sizeof(uint16), 0, known_values);
+			value = file_acc.file_integer(sizeof(uint16), 0, *known_values);
 		}
 		return value;
 	}
 
-	uint16 generate(std::vector<uint16> possible_values) {
+	uint16 generate(const value_set<uint16>& possible_values) {
 		_startof = FTell();
 		value = file_acc.file_integer(sizeof(uint16), 0, possible_values);
 		return value;
 	}
+
+	bool generate_array(std::vector<uint16>& values, unsigned size) {
+		if (small || known_values)
+			return false;
+		return file_acc.file_integers(values, size);
+	}
 };
 
 
 
 class uint16_array_class {
 	uint16_class& element;
-	std::unordered_map<int, std::vector<uint16>> element_known_values;
+	const known_values_map<uint16>* element_known_values = NULL;
 	std::vector<uint16> value;
 public:
 	int64 _startof = 0;
@@ -114,20 +120,24 @@ public:
 		assert_cond((unsigned)index < value.size(), "array index out of bounds");
 		return value[index];
 	}
-	uint16_array_class(uint16_class& element, std::unordered_map<int, std::vector<uint16>> element_known_values = {})
+	uint16_array_class(uint16_class& element, const known_values_map<uint16>* element_known_values = NULL)
 		: element(element), element_known_values(element_known_values) {}
 
 	std::vector<uint16> generate(unsigned size) {
 		check_array_length(size);
 		_startof = FTell();
 		value = {};
+		if (!element_known_values && element.generate_array(value, size)) {
+			_sizeof += size * sizeof(uint16);
+			return value;
+		}
 		for (unsigned i = 0; i < size; ++i) {
-			auto known = element_known_values.find(i);
-			if (known == element_known_values.end()) {
+			const value_set<uint16>* known = find_known_values(element_known_values, i);
+			if (!known) {
 				value.push_back(element.generate());
 				_sizeof += element._sizeof;
 			} else {
-				value.push_back(file_acc.file_integer(sizeof(uint16), 0, known->second));
+				value.push_back(file_acc.file_integer(sizeof(uint16), 0, *known));
 				_sizeof += sizeof(uint16);
 			}
 		}
@@ -151,8 +161,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_SIGNATURE& operator () () { return *instances.back(); }
@@ -164,6 +174,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_SIGNATURE(std::vector<PNG_SIGNATURE*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_SIGNATURE() {
 		if (generated == 2)
 			return;
@@ -177,73 +189,85 @@ public:
 	PNG_SIGNATURE* generate();
 };
 
-int PNG_SIGNATURE::_parent_id = 0;
-int PNG_SIGNATURE::_index_start = 0;
+thread_local int PNG_SIGNATURE::_parent_id = 0;
+thread_local int PNG_SIGNATURE::_index_start = 0;
 
 
 
 class uint32_class {
 	int small;
-	std::vector<uint32> known_values;
+	const value_set<uint32>* known_values;
 	uint32 value;
 public:
 	int64 _startof = 0;
 	std::size_t _sizeof = sizeof(uint32);
 	uint32 operator () () { return value; }
-	uint32_class(int small, std::vector<uint32> known_values = {}) : small(small), known_values(known_values) {}
+	uint32_class(int small, const value_set<uint32>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	uint32 generate() {
 		_startof = FTell();
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(uint32), 0, small);
 		} else {
-			value = file_acc.file_integer(sizeof(uint32), 0, known_values);
+			value = file_acc.file_integer(sizeof(uint32), 0, *known_values);
 		}
 		return value;
 	}
 
-	uint32 generate(std::vector<uint32> possible_values) {
+	uint32 generate(const value_set<uint32>& possible_values) {
 		_startof = FTell();
 		value = file_acc.file_integer(sizeof(uint32), 0, possible_values);
 		return value;
 	}
+
+	bool generate_array(std::vector<uint32>& values, unsigned size) {
+		if (small || known_values)
+			return false;
+		return file_acc.file_integers(values, size);
+	}
 };
 
 
 
 class char_class {
 	int small;
-	std::vector<char> known_values;
+	const value_set<char>* known_values;
 	char value;
 public:
 	int64 _startof = 0;
 	std::size_t _sizeof = sizeof(char);
 	char operator () () { return value; }
-	char_class(int small, std::vector<char> known_values = {}) : small(small), known_values(known_values) {}
+	char_class(int small, const value_set<char>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	char generate() {
 		_startof = FTell();
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(char), 0, small);
 		} else {
-			value = file_acc.file_integer(sizeof(char), 0, known_values);
+			value = file_acc.file_integer(sizeof(char), 0, *known_values);
 		}
 		return value;
 	}
 
-	char generate(std::vector<char> possible_values) {
+	char generate(const value_set<char>& possible_values) {
 		_startof = FTell();
 		value = file_acc.file_integer(sizeof(char), 0, possible_values);
 		return value;
 	}
+
+	bool generate_array(std::vector<char>& values, unsigned size) {
+		if (small || known_values)
+			return false;
+		return file_acc.file_integers(values, size);
+	}
 };
 
 
 
 class char_array_class {
 	char_class& element;
-	std::vector<std::string> known_values;
-	std::unordered_map<int, std::vector<char>> element_known_values;
+	const value_set<std::string>* known_values = NULL;
+	const known_values_map<char>* element_known_values = NULL;
 	std::string value;
 public:
 	int64 _startof = 0;
@@ -253,12 +277,12 @@ public:
 		assert_cond((unsigned)index < value.size(), "array index out of bounds");
 		return value[index];
 	}
-	char_array_class(char_class& element, std::unordered_map<int, std::vector<char>> element_known_values = {})
+	char_array_class(char_class& element, const known_values_map<char>* element_known_values = NULL)
 		: element(element), element_known_values(element_known_values) {}
-	char_array_class(char_class& element, std::vector<std::string> known_values)
+	char_array_class(char_class& element, const value_set<std::string>* known_values)
 		: element(element), known_values(known_values) {}
 
-	std::string generate(unsigned size, std::vector<std::string> possible_values = {}) {
+	std::string generate(unsigned size, const value_set<std::string>& possible_values = {}) {
 		check_array_length(size);
 		_startof = FTell();
 		value = "";
@@ -268,13 +292,13 @@ public:
 			_sizeof = size;
 			return value;
 		}
-		if (known_values.size()) {
-			value = file_acc.file_string(known_values);
+		if (known_values) {
+			value = file_acc.file_string(*known_values);
 			assert(value.length() == size);
 			_sizeof = size;
 			return value;
 		}
-		if (!element_known_values.size()) {
+		if (!element_known_values) {
 			if (size == 0)
 				 return "";
 			value = file_acc.file_string(size);
@@ -282,12 +306,12 @@ public:
 			return value;
 		}
 		for (unsigned i = 0; i < size; ++i) {
-			auto known = element_known_values.find(i);
-			if (known == element_known_values.end()) {
+			const value_set<char>* known = find_known_values(element_known_values, i);
+			if (!known) {
 				value.push_back(element.generate());
 				_sizeof += element._sizeof;
 			} else {
-				value.push_back(file_acc.file_integer(sizeof(char), 0, known->second));
+				value.push_back(file_acc.file_integer(sizeof(char), 0, *known));
 				_sizeof += sizeof(char);
 			}
 		}
@@ -319,8 +343,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	CTYPE& operator () () { return *instances.back(); }
@@ -332,6 +356,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	CTYPE(std::vector<CTYPE*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~CTYPE() {
 		if (generated == 2)
 			return;
@@ -345,36 +371,42 @@ public:
 	CTYPE* generate();
 };
 
-int CTYPE::_parent_id = 0;
-int CTYPE::_index_start = 0;
+thread_local int CTYPE::_parent_id = 0;
+thread_local int CTYPE::_index_start = 0;
 
 const std::vector<byte> color_types = { GrayScale, TrueColor, Indexed, AlphaGrayScale, AlphaTrueColor };
 
 class ubyte_class {
 	int small;
-	std::vector<ubyte> known_values;
+	const value_set<ubyte>* known_values;
 	ubyte value;
 public:
 	int64 _startof = 0;
 	std::size_t _sizeof = sizeof(ubyte);
 	ubyte operator () () { return value; }
-	ubyte_class(int small, std::vector<ubyte> known_values = {}) : small(small), known_values(known_values) {}
+	ubyte_class(int small, const value_set<ubyte>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	ubyte generate() {
 		_startof = FTell();
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(ubyte), 0, small);
 		} else {
-			value = file_acc.file_integer(sizeof(ubyte), 0, known_values);
+			value = file_acc.file_integer(sizeof(ubyte), 0, *known_values);
 		}
 		return value;
 	}
 
-	ubyte generate(std::vector<ubyte> possible_values) {
+	ubyte generate(const value_set<ubyte>& possible_values) {
 		_startof = FTell();
 		value = file_acc.file_integer(sizeof(ubyte), 0, possible_values);
 		return value;
 	}
+
+	bool generate_array(std::vector<ubyte>& values, unsigned size) {
+		if (small || known_values)
+			return false;
+		return file_acc.file_integers(values, size);
+	}
 };
 
 
@@ -382,7 +414,7 @@ PNG_COLOR_SPACE_TYPE PNG_COLOR_SPACE_TYPE_generate() {
 	return (PNG_COLOR_SPACE_TYPE) file_acc.file_integer(sizeof(byte), 0, PNG_COLOR_SPACE_TYPE_values);
 }
 
-PNG_COLOR_SPACE_TYPE PNG_COLOR_SPACE_TYPE_generate(std::vector<byte> known_values) {
+PNG_COLOR_SPACE_TYPE PNG_COLOR_SPACE_TYPE_generate(const value_set<byte>& known_values) {
 	return (PNG_COLOR_SPACE_TYPE) file_acc.file_integer(sizeof(byte), 0, known_values);
 }
 
@@ -390,7 +422,7 @@ PNG_COMPR_METHOD PNG_COMPR_METHOD_generate() {
 	return (PNG_COMPR_METHOD) file_acc.file_integer(sizeof(byte), 0, PNG_COMPR_METHOD_values);
 }
 
-PNG_COMPR_METHOD PNG_COMPR_METHOD_generate(std::vector<byte> known_values) {
+PNG_COMPR_METHOD PNG_COMPR_METHOD_generate(const value_set<byte>& known_values) {
 	return (PNG_COMPR_METHOD) file_acc.file_integer(sizeof(byte), 0, known_values);
 }
 
@@ -398,7 +430,7 @@ PNG_FILTER_METHOD PNG_FILTER_METHOD_generate() {
 	return (PNG_FILTER_METHOD) file_acc.file_integer(sizeof(byte), 0, PNG_FILTER_METHOD_values);
 }
 
-PNG_FILTER_METHOD PNG_FILTER_METHOD_generate(std::vector<byte> known_values) {
+PNG_FILTER_METHOD PNG_FILTER_METHOD_generate(const value_set<byte>& known_values) {
 	return (PNG_FILTER_METHOD) file_acc.file_integer(sizeof(byte), 0, known_values);
 }
 
@@ -406,7 +438,7 @@ PNG_INTERLACE_METHOD PNG_INTERLACE_METHOD_generate() {
 	return (PNG_INTERLACE_METHOD) file_acc.file_integer(sizeof(byte), 0, PNG_INTERLACE_METHOD_values);
 }
 
-PNG_INTERLACE_METHOD PNG_INTERLACE_METHOD_generate(std::vector<byte> known_values) {
+PNG_INTERLACE_METHOD PNG_INTERLACE_METHOD_generate(const value_set<byte>& known_values) {
 	return (PNG_INTERLACE_METHOD) file_acc.file_integer(sizeof(byte), 0, known_values);
 }
 
@@ -461,8 +493,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_IHDR& operator () () { return *instances.back(); }
@@ -474,6 +506,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_IHDR(std::vector<PNG_CHUNK_IHDR*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_IHDR() {
 		if (generated == 2)
 			return;
@@ -487,8 +521,8 @@ public:
 	PNG_CHUNK_IHDR* generate();
 };
 
-int PNG_CHUNK_IHDR::_parent_id = 0;
-int PNG_CHUNK_IHDR::_index_start = 0;
+thread_local int PNG_CHUNK_IHDR::_parent_id = 0;
+thread_local int PNG_CHUNK_IHDR::_index_start = 0;
 
 
 
@@ -535,8 +569,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_TEXT& operator () () { return *instances.back(); }
@@ -548,6 +582,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_TEXT(std::vector<PNG_CHUNK_TEXT*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_TEXT() {
 		if (generated == 2)
 			return;
@@ -561,36 +597,42 @@ public:
 	PNG_CHUNK_TEXT* generate();
 };
 
-int PNG_CHUNK_TEXT::_parent_id = 0;
-int PNG_CHUNK_TEXT::_index_start = 0;
+thread_local int PNG_CHUNK_TEXT::_parent_id = 0;
+thread_local int PNG_CHUNK_TEXT::_index_start = 0;
 
 
 
 class byte_class {
 	int small;
-	std::vector<byte> known_values;
+	const value_set<byte>* known_values;
 	byte value;
 public:
 	int64 _startof = 0;
 	std::size_t _sizeof = sizeof(byte);
 	byte operator () () { return value; }
-	byte_class(int small, std::vector<byte> known_values = {}) : small(small), known_values(known_values) {}
+	byte_class(int small, const value_set<byte>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	byte generate() {
 		_startof = FTell();
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(byte), 0, small);
 		} else {
-			value = file_acc.file_integer(sizeof(byte), 0, known_values);
+			value = file_acc.file_integer(sizeof(byte), 0, *known_values);
 		}
 		return value;
 	}
 
-	byte generate(std::vector<byte> possible_values) {
+	byte generate(const value_set<byte>& possible_values) {
 		_startof = FTell();
 		value = file_acc.file_integer(sizeof(byte), 0, possible_values);
 		return value;
 	}
+
+	bool generate_array(std::vector<byte>& values, unsigned size) {
+		if (small || known_values)
+			return false;
+		return file_acc.file_integers(values, size);
+	}
 };
 
 
@@ -621,8 +663,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_PALETTE_PIXEL& operator () () { return *instances.back(); }
@@ -634,6 +676,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_PALETTE_PIXEL(std::vector<PNG_PALETTE_PIXEL*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_PALETTE_PIXEL() {
 		if (generated == 2)
 			return;
@@ -647,8 +691,8 @@ public:
 	PNG_PALETTE_PIXEL* generate();
 };
 
-int PNG_PALETTE_PIXEL::_parent_id = 0;
-int PNG_PALETTE_PIXEL::_index_start = 0;
+thread_local int PNG_PALETTE_PIXEL::_parent_id = 0;
+thread_local int PNG_PALETTE_PIXEL::_index_start = 0;
 
 
 
@@ -693,8 +737,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_PLTE& operator () () { return *instances.back(); }
@@ -706,6 +750,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_PLTE(std::vector<PNG_CHUNK_PLTE*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_PLTE() {
 		if (generated == 2)
 			return;
@@ -719,8 +765,8 @@ public:
 	PNG_CHUNK_PLTE* generate(int32 chunkLen);
 };
 
-int PNG_CHUNK_PLTE::_parent_id = 0;
-int PNG_CHUNK_PLTE::_index_start = 0;
+thread_local int PNG_CHUNK_PLTE::_parent_id = 0;
+thread_local int PNG_CHUNK_PLTE::_index_start = 0;
 
 
 
@@ -744,8 +790,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_POINT& operator () () { return *instances.back(); }
@@ -757,6 +803,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_POINT(std::vector<PNG_POINT*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_POINT() {
 		if (generated == 2)
 			return;
@@ -770,8 +818,8 @@ public:
 	PNG_POINT* generate();
 };
 
-int PNG_POINT::_parent_id = 0;
-int PNG_POINT::_index_start = 0;
+thread_local int PNG_POINT::_parent_id = 0;
+thread_local int PNG_POINT::_index_start = 0;
 
 
 
@@ -807,8 +855,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_CHRM& operator () () { return *instances.back(); }
@@ -820,6 +868,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_CHRM(std::vector<PNG_CHUNK_CHRM*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_CHRM() {
 		if (generated == 2)
 			return;
@@ -833,15 +883,15 @@ public:
 	PNG_CHUNK_CHRM* generate();
 };
 
-int PNG_CHUNK_CHRM::_parent_id = 0;
-int PNG_CHUNK_CHRM::_index_start = 0;
+thread_local int PNG_CHUNK_CHRM::_parent_id = 0;
+thread_local int PNG_CHUNK_CHRM::_index_start = 0;
 
 
 PNG_SRGB_CHUNK_DATA PNG_SRGB_CHUNK_DATA_generate() {
 	return (PNG_SRGB_CHUNK_DATA) file_acc.file_integer(sizeof(byte), 0, PNG_SRGB_CHUNK_DATA_values);
 }
 
-PNG_SRGB_CHUNK_DATA PNG_SRGB_CHUNK_DATA_generate(std::vector<byte> known_values) {
+PNG_SRGB_CHUNK_DATA PNG_SRGB_CHUNK_DATA_generate(const value_set<byte>& known_values) {
 	return (PNG_SRGB_CHUNK_DATA) file_acc.file_integer(sizeof(byte), 0, known_values);
 }
 
@@ -860,8 +910,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_SRGB& operator () () { return *instances.back(); }
@@ -873,6 +923,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_SRGB(std::vector<PNG_CHUNK_SRGB*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_SRGB() {
 		if (generated == 2)
 			return;
@@ -886,8 +938,8 @@ public:
 	PNG_CHUNK_SRGB* generate();
 };
 
-int PNG_CHUNK_SRGB::_parent_id = 0;
-int PNG_CHUNK_SRGB::_index_start = 0;
+thread_local int PNG_CHUNK_SRGB::_parent_id = 0;
+thread_local int PNG_CHUNK_SRGB::_index_start = 0;
 
 
 
@@ -935,8 +987,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_ITXT& operator () () { return *instances.back(); }
@@ -948,6 +1000,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_ITXT(std::vector<PNG_CHUNK_ITXT*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_ITXT() {
 		if (generated == 2)
 			return;
@@ -961,8 +1015,8 @@ public:
 	PNG_CHUNK_ITXT* generate(int32 chunkLen);
 };
 
-int PNG_CHUNK_ITXT::_parent_id = 0;
-int PNG_CHUNK_ITXT::_index_start = 0;
+thread_local int PNG_CHUNK_ITXT::_parent_id = 0;
+thread_local int PNG_CHUNK_ITXT::_index_start = 0;
 
 
 
@@ -992,8 +1046,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_ZTXT& operator () () { return *instances.back(); }
@@ -1005,6 +1059,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_ZTXT(std::vector<PNG_CHUNK_ZTXT*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_ZTXT() {
 		if (generated == 2)
 			return;
@@ -1018,36 +1074,42 @@ public:
 	PNG_CHUNK_ZTXT* generate(int32 chunkLen);
 };
 
-int PNG_CHUNK_ZTXT::_parent_id = 0;
-int PNG_CHUNK_ZTXT::_index_start = 0;
+thread_local int PNG_CHUNK_ZTXT::_parent_id = 0;
+thread_local int PNG_CHUNK_ZTXT::_index_start = 0;
 
 
 
 class int16_class {
 	int small;
-	std::vector<int16> known_values;
+	const value_set<int16>* known_values;
 	int16 value;
 public:
 	int64 _startof = 0;
 	std::size_t _sizeof = sizeof(int16);
 	int16 operator () () { return value; }
-	int16_class(int small, std::vector<int16> known_values = {}) : small(small), known_values(known_values) {}
+	int16_class(int small, const value_set<int16>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	int16 generate() {
 		_startof = FTell();
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(int16), 0, small);
 		} else {
-			value = file_acc.file_integer(sizeof(int16), 0, known_values);
+			value = file_acc.file_integer(sizeof(int16), 0, *known_values);
 		}
 		return value;
 	}
 
-	int16 generate(std::vector<int16> possible_values) {
+	int16 generate(const value_set<int16>& possible_values) {
 		_startof = FTell();
 		value = file_acc.file_integer(sizeof(int16), 0, possible_values);
 		return value;
 	}
+
+	bool generate_array(std::vector<int16>& values, unsigned size) {
+		if (small || known_values)
+			return false;
+		return file_acc.file_integers(values, size);
+	}
 };
 
 
@@ -1096,8 +1158,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_TIME& operator () () { return *instances.back(); }
@@ -1109,6 +1171,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_TIME(std::vector<PNG_CHUNK_TIME*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_TIME() {
 		if (generated == 2)
 			return;
@@ -1122,36 +1186,42 @@ public:
 	PNG_CHUNK_TIME* generate();
 };
 
-int PNG_CHUNK_TIME::_parent_id = 0;
-int PNG_CHUNK_TIME::_index_start = 0;
+thread_local int PNG_CHUNK_TIME::_parent_id = 0;
+thread_local int PNG_CHUNK_TIME::_index_start = 0;
 
 
 
 class uint_class {
 	int small;
-	std::vector<uint> known_values;
+	const value_set<uint>* known_values;
 	uint value;
 public:
 	int64 _startof = 0;
 	std::size_t _sizeof = sizeof(uint);
 	uint operator () () { return value; }
-	uint_class(int small, std::vector<uint> known_values = {}) : small(small), known_values(known_values) {}
+	uint_class(int small, const value_set<uint>* known_values = NULL) : small(small), known_values(known_values) {}
 
 	uint generate() {
 		_startof = FTell();
-		if (known_values.empty()) {
+		if (!known_values) {
 			value = file_acc.file_integer(sizeof(uint), 0, small);
 		} else {
-			value = file_acc.file_integer(sizeof(uint), 0, known_values);
+			value = file_acc.file_integer(sizeof(uint), 0, *known_values);
 		}
 		return value;
 	}
 
-	uint generate(std::vector<uint> possible_values) {
+	uint generate(const value_set<uint>& possible_values) {
 		_startof = FTell();
 		value = file_acc.file_integer(sizeof(uint), 0, possible_values);
 		return value;
 	}
+
+	bool generate_array(std::vector<uint>& values, unsigned size) {
+		if (small || known_values)
+			return false;
+		return file_acc.file_integers(values, size);
+	}
 };
 
 
@@ -1165,7 +1235,7 @@ physUnitSpec_enum physUnitSpec_enum_generate() {
 	return (physUnitSpec_enum) file_acc.file_integer(sizeof(byte), 0, physUnitSpec_enum_values);
 }
 
-physUnitSpec_enum physUnitSpec_enum_generate(std::vector<byte> known_values) {
+physUnitSpec_enum physUnitSpec_enum_generate(const value_set<byte>& known_values) {
 	return (physUnitSpec_enum) file_acc.file_integer(sizeof(byte), 0, known_values);
 }
 
@@ -1196,8 +1266,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_PHYS& operator () () { return *instances.back(); }
@@ -1209,6 +1279,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_PHYS(std::vector<PNG_CHUNK_PHYS*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_PHYS() {
 		if (generated == 2)
 			return;
@@ -1222,8 +1294,8 @@ public:
 	PNG_CHUNK_PHYS* generate();
 };
 
-int PNG_CHUNK_PHYS::_parent_id = 0;
-int PNG_CHUNK_PHYS::_index_start = 0;
+thread_local int PNG_CHUNK_PHYS::_parent_id = 0;
+thread_local int PNG_CHUNK_PHYS::_index_start = 0;
 
 
 
@@ -1265,8 +1337,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_BKGD& operator () () { return *instances.back(); }
@@ -1278,6 +1350,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_BKGD(std::vector<PNG_CHUNK_BKGD*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_BKGD() {
 		if (generated == 2)
 			return;
@@ -1291,8 +1365,8 @@ public:
 	PNG_CHUNK_BKGD* generate(int32 colorType);
 };
 
-int PNG_CHUNK_BKGD::_parent_id = 0;
-int PNG_CHUNK_BKGD::_index_start = 0;
+thread_local int PNG_CHUNK_BKGD::_parent_id = 0;
+thread_local int PNG_CHUNK_BKGD::_index_start = 0;
 
 
 
@@ -1382,8 +1456,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_SBIT& operator () () { return *instances.back(); }
@@ -1395,6 +1469,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_SBIT(std::vector<PNG_CHUNK_SBIT*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_SBIT() {
 		if (generated == 2)
 			return;
@@ -1408,14 +1484,14 @@ public:
 	PNG_CHUNK_SBIT* generate(int32 colorType);
 };
 
-int PNG_CHUNK_SBIT::_parent_id = 0;
-int PNG_CHUNK_SBIT::_index_start = 0;
+thread_local int PNG_CHUNK_SBIT::_parent_id = 0;
+thread_local int PNG_CHUNK_SBIT::_index_start = 0;
 
 
 
 class byte_array_class {
 	byte_class& element;
-	std::unordered_map<int, std::vector<byte>> element_known_values;
+	const known_values_map<byte>* element_known_values = NULL;
 	std::vector<byte> value;
 public:
 	int64 _startof = 0;
@@ -1425,20 +1501,24 @@ public:
 		assert_cond((unsigned)index < value.size(), "array index out of bounds");
 		return value[index];
 	}
-	byte_array_class(byte_class& element, std::unordered_map<int, std::vector<byte>> element_known_values = {})
+	byte_array_class(byte_class& element, const known_values_map<byte>* element_known_values = NULL)
 		: element(element), element_known_values(element_known_values) {}
 
 	std::vector<byte> generate(unsigned size) {
 		check_array_length(size);
 		_startof = FTell();
 		value = {};
+		if (!element_known_values && element.generate_array(value, size)) {
+			_sizeof += size * sizeof(byte);
+			return value;
+		}
 		for (unsigned i = 0; i < size; ++i) {
-			auto known = element_known_values.find(i);
-			if (known == element_known_values.end()) {
+			const value_set<byte>* known = find_known_values(element_known_values, i);
+			if (!known) {
 				value.push_back(element.generate());
 				_sizeof += element._sizeof;
 			} else {
-				value.push_back(file_acc.file_integer(sizeof(byte), 0, known->second));
+				value.push_back(file_acc.file_integer(sizeof(byte), 0, *known));
 				_sizeof += sizeof(byte);
 			}
 		}
@@ -1474,8 +1554,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_SPLT& operator () () { return *instances.back(); }
@@ -1487,6 +1567,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_SPLT(std::vector<PNG_CHUNK_SPLT*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_SPLT() {
 		if (generated == 2)
 			return;
@@ -1500,8 +1582,8 @@ public:
 	PNG_CHUNK_SPLT* generate(int32 chunkLen);
 };
 
-int PNG_CHUNK_SPLT::_parent_id = 0;
-int PNG_CHUNK_SPLT::_index_start = 0;
+thread_local int PNG_CHUNK_SPLT::_parent_id = 0;
+thread_local int PNG_CHUNK_SPLT::_index_start = 0;
 
 
 
@@ -1525,8 +1607,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_ACTL& operator () () { return *instances.back(); }
@@ -1538,6 +1620,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_ACTL(std::vector<PNG_CHUNK_ACTL*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_ACTL() {
 		if (generated == 2)
 			return;
@@ -1551,15 +1635,15 @@ public:
 	PNG_CHUNK_ACTL* generate();
 };
 
-int PNG_CHUNK_ACTL::_parent_id = 0;
-int PNG_CHUNK_ACTL::_index_start = 0;
+thread_local int PNG_CHUNK_ACTL::_parent_id = 0;
+thread_local int PNG_CHUNK_ACTL::_index_start = 0;
 
 
 APNG_DISPOSE_OP APNG_DISPOSE_OP_generate() {
 	return (APNG_DISPOSE_OP) file_acc.file_integer(sizeof(byte), 0, APNG_DISPOSE_OP_values);
 }
 
-APNG_DISPOSE_OP APNG_DISPOSE_OP_generate(std::vector<byte> known_values) {
+APNG_DISPOSE_OP APNG_DISPOSE_OP_generate(const value_set<byte>& known_values) {
 	return (APNG_DISPOSE_OP) file_acc.file_integer(sizeof(byte), 0, known_values);
 }
 
@@ -1567,7 +1651,7 @@ APNG_BLEND_OP APNG_BLEND_OP_generate() {
 	return (APNG_BLEND_OP) file_acc.file_integer(sizeof(byte), 0, APNG_BLEND_OP_values);
 }
 
-APNG_BLEND_OP APNG_BLEND_OP_generate(std::vector<byte> known_values) {
+APNG_BLEND_OP APNG_BLEND_OP_generate(const value_set<byte>& known_values) {
 	return (APNG_BLEND_OP) file_acc.file_integer(sizeof(byte), 0, known_values);
 }
 
@@ -1634,8 +1718,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_FCTL& operator () () { return *instances.back(); }
@@ -1647,6 +1731,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_FCTL(std::vector<PNG_CHUNK_FCTL*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_FCTL() {
 		if (generated == 2)
 			return;
@@ -1660,14 +1746,14 @@ public:
 	PNG_CHUNK_FCTL* generate();
 };
 
-int PNG_CHUNK_FCTL::_parent_id = 0;
-int PNG_CHUNK_FCTL::_index_start = 0;
+thread_local int PNG_CHUNK_FCTL::_parent_id = 0;
+thread_local int PNG_CHUNK_FCTL::_index_start = 0;
 
 
 
 class ubyte_array_class {
 	ubyte_class& element;
-	std::unordered_map<int, std::vector<ubyte>> element_known_values;
+	const known_values_map<ubyte>* element_known_values = NULL;
 	std::vector<ubyte> value;
 public:
 	int64 _startof = 0;
@@ -1677,20 +1763,24 @@ public:
 		assert_cond((unsigned)index < value.size(), "array index out of bounds");
 		return value[index];
 	}
-	ubyte_array_class(ubyte_class& element, std::unordered_map<int, std::vector<ubyte>> element_known_values = {})
+	ubyte_array_class(ubyte_class& element, const known_values_map<ubyte>* element_known_values = NULL)
 		: element(element), element_known_values(element_known_values) {}
 
 	std::vector<ubyte> generate(unsigned size) {
 		check_array_length(size);
 		_startof = FTell();
 		value = {};
+		if (!element_known_values && element.generate_array(value, size)) {
+			_sizeof += size * sizeof(ubyte);
+			return value;
+		}
 		for (unsigned i = 0; i < size; ++i) {
-			auto known = element_known_values.find(i);
-			if (known == element_known_values.end()) {
+			const value_set<ubyte>* known = find_known_values(element_known_values, i);
+			if (!known) {
 				value.push_back(element.generate());
 				_sizeof += element._sizeof;
 			} else {
-				value.push_back(file_acc.file_integer(sizeof(ubyte), 0, known->second));
+				value.push_back(file_acc.file_integer(sizeof(ubyte), 0, *known));
 				_sizeof += sizeof(ubyte);
 			}
 		}
@@ -1720,8 +1810,8 @@ public:
 	}
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK_FDAT& operator () () { return *instances.back(); }
@@ -1733,6 +1823,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK_FDAT(std::vector<PNG_CHUNK_FDAT*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK_FDAT() {
 		if (generated == 2)
 			return;
@@ -1746,8 +1838,8 @@ public:
 	PNG_CHUNK_FDAT* generate();
 };
 
-int PNG_CHUNK_FDAT::_parent_id = 0;
-int PNG_CHUNK_FDAT::_index_start = 0;
+thread_local int PNG_CHUNK_FDAT::_parent_id = 0;
+thread_local int PNG_CHUNK_FDAT::_index_start = 0;
 
 
 
@@ -1888,8 +1980,8 @@ public:
 	std::string msg;
 
 	unsigned char generated = 0;
-	static int _parent_id;
-	static int _index_start;
+	static thread_local int _parent_id;
+	static thread_local int _index_start;
 	int64 _startof = 0;
 	std::size_t _sizeof = 0;
 	PNG_CHUNK& operator () () { return *instances.back(); }
@@ -1901,6 +1993,8 @@ public:
 		return instances.size() - _index_start;
 	}
 	PNG_CHUNK(std::vector<PNG_CHUNK*>& instances) : instances(instances) { instances.push_back(this); }
+	static void* operator new(std::size_t size) { return ::struct_arena.allocate(size); }
+	static void operator delete(void* p, std::size_t size) { ::struct_arena.free(p, size); }
 	~PNG_CHUNK() {
 		if (generated == 2)
 			return;
@@ -1914,52 +2008,54 @@ public:
 	PNG_CHUNK* generate();
 };
 
-int PNG_CHUNK::_parent_id = 0;
-int PNG_CHUNK::_index_start = 0;
-
-std::vector<byte> ReadByteInitValues;
-std::vector<ubyte> ReadUByteInitValues;
-std::vector<short> ReadShortInitValues;
-std::vector<ushort> ReadUShortInitValues;
-std::vector<int> ReadIntInitValues;
-std::vector<uint> ReadUIntInitValues;
-std::vector<int64> ReadQuadInitValues;
-std::vector<uint64> ReadUQuadInitValues;
-std::vector<int64> ReadInt64InitValues;
-std::vector<uint64> ReadUInt64InitValues;
-std::vector<hfloat> ReadHFloatInitValues;
-std::vector<float> ReadFloatInitValues;
-std::vector<double> ReadDoubleInitValues;
-std::vector<std::string> ReadBytesInitValues;
-
-
-std::vector<PNG_SIGNATURE*> PNG_SIGNATURE_sig_instances;
-std::vector<CTYPE*> CTYPE_type_instances;
-std::vector<PNG_CHUNK_IHDR*> PNG_CHUNK_IHDR_ihdr_instances;
-std::vector<PNG_CHUNK_TEXT*> PNG_CHUNK_TEXT_text_instances;
-std::vector<PNG_PALETTE_PIXEL*> PNG_PALETTE_PIXEL_plteChunkData_element_instances;
-std::vector<PNG_CHUNK_PLTE*> PNG_CHUNK_PLTE_plte_instances;
-std::vector<PNG_POINT*> PNG_POINT_white_instances;
-std::vector<PNG_POINT*> PNG_POINT_red_instances;
-std::vector<PNG_POINT*> PNG_POINT_green_instances;
-std::vector<PNG_POINT*> PNG_POINT_blue_instances;
-std::vector<PNG_CHUNK_CHRM*> PNG_CHUNK_CHRM_chrm_instances;
-std::vector<PNG_CHUNK_SRGB*> PNG_CHUNK_SRGB_srgb_instances;
-std::vector<PNG_CHUNK_ITXT*> PNG_CHUNK_ITXT_itxt_instances;
-std::vector<PNG_CHUNK_ZTXT*> PNG_CHUNK_ZTXT_ztxt_instances;
-std::vector<PNG_CHUNK_TIME*> PNG_CHUNK_TIME_time__instances;
-std::vector<PNG_CHUNK_PHYS*> PNG_CHUNK_PHYS_phys_instances;
-std::vector<PNG_CHUNK_BKGD*> PNG_CHUNK_BKGD_bkgd_instances;
-std::vector<PNG_CHUNK_SBIT*> PNG_CHUNK_SBIT_sbit_instances;
-std::vector<PNG_CHUNK_SPLT*> PNG_CHUNK_SPLT_splt_instances;
-std::vector<PNG_CHUNK_ACTL*> PNG_CHUNK_ACTL_actl_instances;
-std::vector<PNG_CHUNK_FCTL*> PNG_CHUNK_FCTL_fctl_instances;
-std::vector<PNG_CHUNK_FDAT*> PNG_CHUNK_FDAT_fdat_instances;
-std::vector<PNG_CHUNK*> PNG_CHUNK_chunk_instances;
+thread_local int PNG_CHUNK::_parent_id = 0;
+thread_local int PNG_CHUNK::_index_start = 0;
+
+value_set<byte> ReadByteInitValues;
+value_set<ubyte> ReadUByteInitValues;
+value_set<short> ReadShortInitValues;
+value_set<ushort> ReadUShortInitValues;
+value_set<int> ReadIntInitValues;
+value_set<uint> ReadUIntInitValues;
+value_set<int64> ReadQuadInitValues;
+value_set<uint64> ReadUQuadInitValues;
+value_set<int64> ReadInt64InitValues;
+value_set<uint64> ReadUInt64InitValues;
+value_set<hfloat> ReadHFloatInitValues;
+value_set<float> ReadFloatInitValues;
+value_set<double> ReadDoubleInitValues;
+value_set<std::string> ReadBytesInitValues;
+
+
+thread_local std::vector<PNG_SIGNATURE*> PNG_SIGNATURE_sig_instances;
+thread_local std::vector<CTYPE*> CTYPE_type_instances;
+thread_local std::vector<PNG_CHUNK_IHDR*> PNG_CHUNK_IHDR_ihdr_instances;
+thread_local std::vector<PNG_CHUNK_TEXT*> PNG_CHUNK_TEXT_text_instances;
+thread_local std::vector<PNG_PALETTE_PIXEL*> PNG_PALETTE_PIXEL_plteChunkData_element_instances;
+thread_local std::vector<PNG_CHUNK_PLTE*> PNG_CHUNK_PLTE_plte_instances;
+thread_local std::vector<PNG_POINT*> PNG_POINT_white_instances;
+thread_local std::vector<PNG_POINT*> PNG_POINT_red_instances;
+thread_local std::vector<PNG_POINT*> PNG_POINT_green_instances;
+thread_local std::vector<PNG_POINT*> PNG_POINT_blue_instances;
+thread_local std::vector<PNG_CHUNK_CHRM*> PNG_CHUNK_CHRM_chrm_instances;
+thread_local std::vector<PNG_CHUNK_SRGB*> PNG_CHUNK_SRGB_srgb_instances;
+thread_local std::vector<PNG_CHUNK_ITXT*> PNG_CHUNK_ITXT_itxt_instances;
+thread_local std::vector<PNG_CHUNK_ZTXT*> PNG_CHUNK_ZTXT_ztxt_instances;
+thread_local std::vector<PNG_CHUNK_TIME*> PNG_CHUNK_TIME_time__instances;
+thread_local std::vector<PNG_CHUNK_PHYS*> PNG_CHUNK_PHYS_phys_instances;
+thread_local std::vector<PNG_CHUNK_BKGD*> PNG_CHUNK_BKGD_bkgd_instances;
+thread_local std::vector<PNG_CHUNK_SBIT*> PNG_CHUNK_SBIT_sbit_instances;
+thread_local std::vector<PNG_CHUNK_SPLT*> PNG_CHUNK_SPLT_splt_instances;
+thread_local std::vector<PNG_CHUNK_ACTL*> PNG_CHUNK_ACTL_actl_instances;
+thread_local std::vector<PNG_CHUNK_FCTL*> PNG_CHUNK_FCTL_fctl_instances;
+thread_local std::vector<PNG_CHUNK_FDAT*> PNG_CHUNK_FDAT_fdat_instances;
+thread_local std::vector<PNG_CHUNK*> PNG_CHUNK_chunk_instances;
 
 
 std::unordered_map<std::string, std::string> variable_types = { { "btPngSignature", "uint16_array_class" }, { "sig", "PNG_SIGNATURE" }, { "length", "uint32_class" }, { "cname", "char_array_class" }, { "ctype", "uint32_class" }, { "type", "CTYPE" }, { "width", "uint32_class" }, { "height", "uint32_class" }, { "bits", "ubyte_class" }, { "color_type", "PNG_COLOR_SPACE_TYPE" }, { "compr_method", "PNG_COMPR_METHOD" }, { "filter_method", "PNG_FILTER_METHOD" }, { "interlace_method", "PNG_INTERLACE_METHOD" }, { "ihdr", "PNG_CHUNK_IHDR" }, { "label", "string_class" }, { "data", "char_array_class" }, { "text", "PNG_CHUNK_TEXT" }, { "btRed", "byte_class" }, { "btGreen", "byte_class" }, { "btBlue", "byte_class" }, { "plteChunkData", "PNG_PALETTE_PIXEL_array_class" }, { "plte", "PNG_CHUNK_PLTE" }, { "x", "uint32_class" }, { "y", "uint32_class" }, { "white", "PNG_POINT" }, { "red", "PNG_POINT" }, { "green", "PNG_POINT" }, { "blue", "PNG_POINT" }, { "chrm", "PNG_CHUNK_CHRM" }, { "srgbChunkData", "PNG_SRGB_CHUNK_DATA" }, { "srgb", "PNG_CHUNK_SRGB" }, { "itxtIdChunkData", "string_class" }, { "itxtCompressionFlag", "byte_class" }, { "itxtComprMethod", "PNG_COMPR_METHOD" }, { "itxtLanguageTag", "string_class" }, { "itxtTranslatedKeyword", "string_class" }, { "itxtValChunkData", "char_array_class" }, { "itxt", "PNG_CHUNK_ITXT" }, { "ztxtIdChunkData", "string_class" }, { "comprMethod", "PNG_COMPR_METHOD" }, { "ztxtValChunkData", "char_array_class" }, { "ztxt", "PNG_CHUNK_ZTXT" }, { "timeYear", "int16_class" }, { "timeMonth", "byte_class" }, { "timeDay", "byte_class" }, { "timeHour", "byte_class" }, { "timeMin", "byte_class" }, { "timeSec", "byte_class" }, { "time_", "PNG_CHUNK_TIME" }, { "physPixelPerUnitX", "uint_class" }, { "physPixelPerUnitY", "uint_class" }, { "physUnitSpec", "physUnitSpec_enum" }, { "phys", "PNG_CHUNK_PHYS" }, { "bgColorPaletteIndex", "ubyte_class" }, { "bgGrayscalePixelValue", "uint16_class" }, { "bgColorPixelRed", "uint16_class" }, { "bgColorPixelGreen", "uint16_class" }, { "bgColorPixelBlue", "uint16_class" }, { "bkgd", "PNG_CHUNK_BKGD" }, { "sbitRed", "byte_class" }, { "sbitGreen", "byte_class" }, { "sbitBlue", "byte_class" }, { "sbitGraySource", "byte_class" }, { "sbitGrayAlphaSource", "byte_class" }, { "sbitGrayAlphaSourceAlpha", "byte_class" }, { "sbitColorRed", "byte_class" }, { "sbitColorGreen", "byte_class" }, { "sbitColorBlue", "byte_class" }, { "sbitColorAlphaRed", "byte_class" }, { "sbitColorAlphaGreen", "byte_class" }, { "sbitColorAlphaBlue", "byte_class" }, { "sbitColorAlphaAlpha", "byte_class" }, { "sbit", "PNG_CHUNK_SBIT" }, { "paletteName", "string_class" }, { "sampleDepth", "byte_class" }, { "spltData", "byte_array_class" }, { "splt", "PNG_CHUNK_SPLT" }, { "num_frames", "uint32_class" }, { "num_plays", "uint32_class" }, { "actl", "PNG_CHUNK_ACTL" }, { "sequence_number", "uint32_class" }, { "x_offset", "uint32_class" }, { "y_offset", "uint32_class" }, { "delay_num", "int16_class" }, { "delay_den", "int16_class" }, { "dispose_op", "APNG_DISPOSE_OP" }, { "blend_op", "APNG_BLEND_OP" }, { "fctl", "PNG_CHUNK_FCTL" }, { "frame_data", "ubyte_array_class" }, { "fdat", "PNG_CHUNK_FDAT" }, { "data_", "ubyte_array_class" }, { "crc", "uint32_class" }, { "pad", "uint16_class" }, { "chunk", "PNG_CHUNK" } };
 
+std::vector<std::pair<const char*, const char*>> variable_sites = { { "btPngSignature", "png.bt:50" }, { "sig", "png.bt:400" }, { "length", "png.bt:320" }, { "cname", "png.bt:113" }, { "ctype", "png.bt:114" }, { "type", "png.bt:322" }, { "width", "png.bt:125" }, { "height", "png.bt:126" }, { "bits", "png.bt:130" }, { "bits", "png.bt:133" }, { "bits", "png.bt:136" }, { "bits", "png.bt:139" }, { "bits", "png.bt:142" }, { "bits", "png.bt:145" }, { "color_type", "png.bt:148" }, { "compr_method", "png.bt:149" }, { "filter_method", "png.bt:150" }, { "interlace_method", "png.bt:151" }, { "ihdr", "png.bt:324" }, { "label", "png.bt:162" }, { "data", "png.bt:163" }, { "text", "png.bt:326" }, { "btRed", "png.bt:78" }, { "btGreen", "png.bt:79" }, { "btBlue", "png.bt:80" }, { "plteChunkData", "png.bt:173" }, { "plte", "png.bt:0" }, { "x", "png.bt:84" }, { "y", "png.bt:85" }, { "white", "png.bt:177" }, { "red", "png.bt:178" }, { "green", "png.bt:179" }, { "blue", "png.bt:180" }, { "chrm", "png.bt:330" }, { "srgbChunkData", "png.bt:184" }, { "srgb", "png.bt:332" }, { "itxtIdChunkData", "png.bt:188" }, { "itxtCompressionFlag", "png.bt:189" }, { "itxtComprMethod", "png.bt:190" }, { "itxtLanguageTag", "png.bt:191" }, { "itxtTranslatedKeyword", "png.bt:192" }, { "itxtValChunkData", "png.bt:193" }, { "itxt", "png.bt:0" }, { "ztxtIdChunkData", "png.bt:201" }, { "comprMethod", "png.bt:202" }, { "ztxtValChunkData", "png.bt:203" }, { "ztxt", "png.bt:0" }, { "timeYear", "png.bt:207" }, { "timeMonth", "png.bt:208" }, { "timeDay", "png.bt:209" }, { "timeHour", "png.bt:210" }, { "timeMin", "png.bt:211" }, { "timeSec", "png.bt:212" }, { "time", "png.bt:338" }, { "physPixelPerUnitX", "png.bt:240" }, { "physPixelPerUnitY", "png.bt:241" }, { "physUnitSpec", "png.bt:245" }, { "phys", "png.bt:340" }, { "bgColorPaletteIndex", "png.bt:218" }, { "bgGrayscalePixelValue", "png.bt:223" }, { "bgColorPixelRed", "png.bt:228" }, { "bgColorPixelGreen", "png.bt:229" }, { "bgColorPixelBlue", "png.bt:230" }, { "bkgd", "png.bt:0" }, { "sbitRed", "png.bt:251" }, { "sbitGreen", "png.bt:252" }, { "sbitBlue", "png.bt:253" }, { "sbitGraySource", "png.bt:257" }, { "sbitGrayAlphaSource", "png.bt:261" }, { "sbitGrayAlphaSourceAlpha", "png.bt:262" }, { "sbitColorRed", "png.bt:266" }, { "sbitColorGreen", "png.bt:267" }, { "sbitColorBlue", "png.bt:268" }, { "sbitColorAlphaRed", "png.bt:272" }, { "sbitColorAlphaGreen", "png.bt:273" }, { "sbitColorAlphaBlue", "png.bt:274" }, { "sbitColorAlphaAlpha", "png.bt:275" }, { "sbit", "png.bt:0" }, { "paletteName", "png.bt:285" }, { "sampleDepth", "png.bt:286" }, { "spltData", "png.bt:287" }, { "splt", "png.bt:0" }, { "num_frames", "png.bt:291" }, { "num_plays", "png.bt:292" }, { "actl", "png.bt:348" }, { "sequence_number", "png.bt:298" }, { "width", "png.bt:299" }, { "height", "png.bt:300" }, { "x_offset", "png.bt:301" }, { "y_offset", "png.bt:302" }, { "delay_num", "png.bt:303" }, { "delay_den", "png.bt:304" }, { "dispose_op", "png.bt:305" }, { "blend_op", "png.bt:306" }, { "fctl", "png.bt:350" }, { "sequence_number", "png.bt:310" }, { "frame_data", "png.bt:311" }, { "fdat", "png.bt:352" }, { "data", "png.bt:354" }, { "length", "png.bt:361" }, { "crc", "png.bt:367" }, { "pad", "png.bt:375" }, { "chunk", "png.bt:419" } };
+
 std::vector<std::vector<int>> integer_ranges = { { 1, 16 }, { 1, 24 }, { 1, 24 } };
 
 class globals_class {
@@ -2070,11 +2166,11 @@ public:
 
 	globals_class() :
 		btPngSignature_element(false),
-		btPngSignature(btPngSignature_element, (std::unordered_map<int, std::vector<uint16>>) { { 0, {{0x8950}} }, { 1, {{0x4E47}} }, { 2, {{0x0D0A}} }, { 3, {{0x1A0A}} } }),
+		btPngSignature(btPngSignature_element, &KNOWN_VALUES_MAP(uint16, { { 0, { 0x8950 } }, { 1, { 0x4E47 } }, { 2, { 0x0D0A } }, { 3, { 0x1A0A } } })),
 		sig(PNG_SIGNATURE_sig_instances),
 		length(2),
 		cname_element(false),
-		cname(cname_element, { "IHDR", "tEXt", "PLTE", "cHRM", "sRGB", "iTXt", "zTXt", "tIME", "pHYs", "bKGD", "sBIT", "sPLT", "acTL", "fcTL", "fdAT", "IEND", "eXIf", "IHDR", "IEND" }),
+		cname(cname_element, &KNOWN_VALUES(std::string, { "IHDR", "tEXt", "PLTE", "cHRM", "sRGB", "iTXt", "zTXt", "tIME", "pHYs", "bKGD", "sBIT", "sPLT", "acTL", "fcTL", "fdAT", "IEND", "eXIf", "IHDR", "IEND" })),
 		ctype(1),
 		type(CTYPE_type_instances),
 		width(3),
@@ -2159,7 +2255,7 @@ public:
 	{}
 };
 
-globals_class* g;
+thread_local globals_class* g;
 
 void error_message(std::string msg) {
 	Warning(msg);
@@ -2181,7 +2277,7 @@ PNG_SIGNATURE* PNG_SIGNATURE::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(btPngSignature, ::g->btPngSignature.generate(4));
+	GENERATE_VAR(btPngSignature, 0, ::g->btPngSignature.generate(4));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2204,8 +2300,8 @@ CTYPE* CTYPE::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(cname, ::g->cname.generate(4));
-	GENERATE_EXISTS(ctype, ::g->ctype.generate());
+	GENERATE_VAR(cname, 3, ::g->cname.generate(4));
+	GENERATE_EXISTS(ctype, 4, ::g->ctype.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2228,32 +2324,32 @@ PNG_CHUNK_IHDR* PNG_CHUNK_IHDR::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(width, ::g->width.generate());
-	GENERATE_VAR(height, ::g->height.generate());
+	GENERATE_VAR(width, 6, ::g->width.generate());
+	GENERATE_VAR(height, 7, ::g->height.generate());
 	switch (ReadByte((FTell() + 1), color_types)) {
 	case GrayScale:
-		GENERATE_VAR(bits, ::g->bits.generate({ 1, 2, 4, 8, 16 }));
+		GENERATE_VAR(bits, 8, ::g->bits.generate(KNOWN_VALUES(ubyte, { 1, 2, 4, 8, 16 })));
 		break;
 	case TrueColor:
-		GENERATE_VAR(bits, ::g->bits.generate({ 8, 16 }));
+		GENERATE_VAR(bits, 9, ::g->bits.generate(KNOWN_VALUES(ubyte, { 8, 16 })));
 		break;
 	case Indexed:
-		GENERATE_VAR(bits, ::g->bits.generate({ 1, 2, 4, 8 }));
+		GENERATE_VAR(bits, 10, ::g->bits.generate(KNOWN_VALUES(ubyte, { 1, 2, 4, 8 })));
 		break;
 	case AlphaGrayScale:
-		GENERATE_VAR(bits, ::g->bits.generate({ 8, 16 }));
+		GENERATE_VAR(bits, 11, ::g->bits.generate(KNOWN_VALUES(ubyte, { 8, 16 })));
 		break;
 	case AlphaTrueColor:
-		GENERATE_VAR(bits, ::g->bits.generate({ 8, 16 }));
+		GENERATE_VAR(bits, 12, ::g->bits.generate(KNOWN_VALUES(ubyte, { 8, 16 })));
 		break;
 	default:
-		GENERATE_VAR(bits, ::g->bits.generate());
+		GENERATE_VAR(bits, 13, ::g->bits.generate());
 		break;
 	};
-	GENERATE_VAR(color_type, PNG_COLOR_SPACE_TYPE_generate());
-	GENERATE_VAR(compr_method, PNG_COMPR_METHOD_generate());
-	GENERATE_VAR(filter_method, PNG_FILTER_METHOD_generate());
-	GENERATE_VAR(interlace_method, PNG_INTERLACE_METHOD_generate());
+	GENERATE_VAR(color_type, 14, PNG_COLOR_SPACE_TYPE_generate());
+	GENERATE_VAR(compr_method, 15, PNG_COMPR_METHOD_generate());
+	GENERATE_VAR(filter_method, 16, PNG_FILTER_METHOD_generate());
+	GENERATE_VAR(interlace_method, 17, PNG_INTERLACE_METHOD_generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2276,8 +2372,8 @@ PNG_CHUNK_TEXT* PNG_CHUNK_TEXT::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(label, ::g->label.generate());
-	GENERATE_VAR(data, ::g->data.generate(((::g->length() - Strlen(label())) - 1)));
+	GENERATE_VAR(label, 19, ::g->label.generate());
+	GENERATE_VAR(data, 20, ::g->data.generate(((::g->length() - Strlen(label())) - 1)));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2300,9 +2396,9 @@ PNG_PALETTE_PIXEL* PNG_PALETTE_PIXEL::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(btRed, ::g->btRed.generate());
-	GENERATE_VAR(btGreen, ::g->btGreen.generate());
-	GENERATE_VAR(btBlue, ::g->btBlue.generate());
+	GENERATE_VAR(btRed, 22, ::g->btRed.generate());
+	GENERATE_VAR(btGreen, 23, ::g->btGreen.generate());
+	GENERATE_VAR(btBlue, 24, ::g->btBlue.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2325,7 +2421,7 @@ PNG_CHUNK_PLTE* PNG_CHUNK_PLTE::generate(int32 chunkLen) {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(plteChunkData, ::g->plteChunkData.generate((chunkLen / 3)));
+	GENERATE_VAR(plteChunkData, 25, ::g->plteChunkData.generate((chunkLen / 3)));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2348,8 +2444,8 @@ PNG_POINT* PNG_POINT::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(x, ::g->x.generate());
-	GENERATE_VAR(y, ::g->y.generate());
+	GENERATE_VAR(x, 27, ::g->x.generate());
+	GENERATE_VAR(y, 28, ::g->y.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2372,10 +2468,10 @@ PNG_CHUNK_CHRM* PNG_CHUNK_CHRM::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(white, ::g->white.generate());
-	GENERATE_VAR(red, ::g->red.generate());
-	GENERATE_VAR(green, ::g->green.generate());
-	GENERATE_VAR(blue, ::g->blue.generate());
+	GENERATE_VAR(white, 29, ::g->white.generate());
+	GENERATE_VAR(red, 30, ::g->red.generate());
+	GENERATE_VAR(green, 31, ::g->green.generate());
+	GENERATE_VAR(blue, 32, ::g->blue.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2398,7 +2494,7 @@ PNG_CHUNK_SRGB* PNG_CHUNK_SRGB::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(srgbChunkData, PNG_SRGB_CHUNK_DATA_generate());
+	GENERATE_VAR(srgbChunkData, 34, PNG_SRGB_CHUNK_DATA_generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2421,12 +2517,12 @@ PNG_CHUNK_ITXT* PNG_CHUNK_ITXT::generate(int32 chunkLen) {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(itxtIdChunkData, ::g->itxtIdChunkData.generate());
-	GENERATE_VAR(itxtCompressionFlag, ::g->itxtCompressionFlag.generate());
-	GENERATE_VAR(itxtComprMethod, PNG_COMPR_METHOD_generate());
-	GENERATE_VAR(itxtLanguageTag, ::g->itxtLanguageTag.generate());
-	GENERATE_VAR(itxtTranslatedKeyword, ::g->itxtTranslatedKeyword.generate());
-	GENERATE_VAR(itxtValChunkData, ::g->itxtValChunkData.generate((((((((chunkLen - Strlen(itxtIdChunkData())) - 1) - Strlen(itxtLanguageTag())) - 1) - Strlen(itxtTranslatedKeyword())) - 1) - 2)));
+	GENERATE_VAR(itxtIdChunkData, 36, ::g->itxtIdChunkData.generate());
+	GENERATE_VAR(itxtCompressionFlag, 37, ::g->itxtCompressionFlag.generate());
+	GENERATE_VAR(itxtComprMethod, 38, PNG_COMPR_METHOD_generate());
+	GENERATE_VAR(itxtLanguageTag, 39, ::g->itxtLanguageTag.generate());
+	GENERATE_VAR(itxtTranslatedKeyword, 40, ::g->itxtTranslatedKeyword.generate());
+	GENERATE_VAR(itxtValChunkData, 41, ::g->itxtValChunkData.generate((((((((chunkLen - Strlen(itxtIdChunkData())) - 1) - Strlen(itxtLanguageTag())) - 1) - Strlen(itxtTranslatedKeyword())) - 1) - 2)));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2449,9 +2545,9 @@ PNG_CHUNK_ZTXT* PNG_CHUNK_ZTXT::generate(int32 chunkLen) {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(ztxtIdChunkData, ::g->ztxtIdChunkData.generate());
-	GENERATE_VAR(comprMethod, PNG_COMPR_METHOD_generate());
-	GENERATE_VAR(ztxtValChunkData, ::g->ztxtValChunkData.generate(((chunkLen - Strlen(ztxtIdChunkData())) - 2)));
+	GENERATE_VAR(ztxtIdChunkData, 43, ::g->ztxtIdChunkData.generate());
+	GENERATE_VAR(comprMethod, 44, PNG_COMPR_METHOD_generate());
+	GENERATE_VAR(ztxtValChunkData, 45, ::g->ztxtValChunkData.generate(((chunkLen - Strlen(ztxtIdChunkData())) - 2)));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2474,12 +2570,12 @@ PNG_CHUNK_TIME* PNG_CHUNK_TIME::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(timeYear, ::g->timeYear.generate());
-	GENERATE_VAR(timeMonth, ::g->timeMonth.generate());
-	GENERATE_VAR(timeDay, ::g->timeDay.generate());
-	GENERATE_VAR(timeHour, ::g->timeHour.generate());
-	GENERATE_VAR(timeMin, ::g->timeMin.generate());
-	GENERATE_VAR(timeSec, ::g->timeSec.generate());
+	GENERATE_VAR(timeYear, 47, ::g->timeYear.generate());
+	GENERATE_VAR(timeMonth, 48, ::g->timeMonth.generate());
+	GENERATE_VAR(timeDay, 49, ::g->timeDay.generate());
+	GENERATE_VAR(timeHour, 50, ::g->timeHour.generate());
+	GENERATE_VAR(timeMin, 51, ::g->timeMin.generate());
+	GENERATE_VAR(timeSec, 52, ::g->timeSec.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2502,9 +2598,9 @@ PNG_CHUNK_PHYS* PNG_CHUNK_PHYS::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(physPixelPerUnitX, ::g->physPixelPerUnitX.generate());
-	GENERATE_VAR(physPixelPerUnitY, ::g->physPixelPerUnitY.generate());
-	GENERATE_VAR(physUnitSpec, physUnitSpec_enum_generate());
+	GENERATE_VAR(physPixelPerUnitX, 54, ::g->physPixelPerUnitX.generate());
+	GENERATE_VAR(physPixelPerUnitY, 55, ::g->physPixelPerUnitY.generate());
+	GENERATE_VAR(physUnitSpec, 56, physUnitSpec_enum_generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2529,17 +2625,17 @@ PNG_CHUNK_BKGD* PNG_CHUNK_BKGD::generate(int32 colorType) {
 
 	switch (colorType) {
 	case 3:
-		GENERATE_VAR(bgColorPaletteIndex, ::g->bgColorPaletteIndex.generate());
+		GENERATE_VAR(bgColorPaletteIndex, 58, ::g->bgColorPaletteIndex.generate());
 		break;
 	case 0:
 	case 4:
-		GENERATE_VAR(bgGrayscalePixelValue, ::g->bgGrayscalePixelValue.generate());
+		GENERATE_VAR(bgGrayscalePixelValue, 59, ::g->bgGrayscalePixelValue.generate());
 		break;
 	case 2:
 	case 6:
-		GENERATE_VAR(bgColorPixelRed, ::g->bgColorPixelRed.generate());
-		GENERATE_VAR(bgColorPixelGreen, ::g->bgColorPixelGreen.generate());
-		GENERATE_VAR(bgColorPixelBlue, ::g->bgColorPixelBlue.generate());
+		GENERATE_VAR(bgColorPixelRed, 60, ::g->bgColorPixelRed.generate());
+		GENERATE_VAR(bgColorPixelGreen, 61, ::g->bgColorPixelGreen.generate());
+		GENERATE_VAR(bgColorPixelBlue, 62, ::g->bgColorPixelBlue.generate());
 		break;
 	default:
 		error_message("*WARNING: Unknown Color Model Type for background color chunk.");
@@ -2569,27 +2665,27 @@ PNG_CHUNK_SBIT* PNG_CHUNK_SBIT::generate(int32 colorType) {
 
 	switch (colorType) {
 	case 3:
-		GENERATE_VAR(sbitRed, ::g->sbitRed.generate());
-		GENERATE_VAR(sbitGreen, ::g->sbitGreen.generate());
-		GENERATE_VAR(sbitBlue, ::g->sbitBlue.generate());
+		GENERATE_VAR(sbitRed, 64, ::g->sbitRed.generate());
+		GENERATE_VAR(sbitGreen, 65, ::g->sbitGreen.generate());
+		GENERATE_VAR(sbitBlue, 66, ::g->sbitBlue.generate());
 		break;
 	case 0:
-		GENERATE_VAR(sbitGraySource, ::g->sbitGraySource.generate());
+		GENERATE_VAR(sbitGraySource, 67, ::g->sbitGraySource.generate());
 		break;
 	case 4:
-		GENERATE_VAR(sbitGrayAlphaSource, ::g->sbitGrayAlphaSource.generate());
-		GENERATE_VAR(sbitGrayAlphaSourceAlpha, ::g->sbitGrayAlphaSourceAlpha.generate());
+		GENERATE_VAR(sbitGrayAlphaSource, 68, ::g->sbitGrayAlphaSource.generate());
+		GENERATE_VAR(sbitGrayAlphaSourceAlpha, 69, ::g->sbitGrayAlphaSourceAlpha.generate());
 		break;
 	case 2:
-		GENERATE_VAR(sbitColorRed, ::g->sbitColorRed.generate());
-		GENERATE_VAR(sbitColorGreen, ::g->sbitColorGreen.generate());
-		GENERATE_VAR(sbitColorBlue, ::g->sbitColorBlue.generate());
+		GENERATE_VAR(sbitColorRed, 70, ::g->sbitColorRed.generate());
+		GENERATE_VAR(sbitColorGreen, 71, ::g->sbitColorGreen.generate());
+		GENERATE_VAR(sbitColorBlue, 72, ::g->sbitColorBlue.generate());
 		break;
 	case 6:
-		GENERATE_VAR(sbitColorAlphaRed, ::g->sbitColorAlphaRed.generate());
-		GENERATE_VAR(sbitColorAlphaGreen, ::g->sbitColorAlphaGreen.generate());
-		GENERATE_VAR(sbitColorAlphaBlue, ::g->sbitColorAlphaBlue.generate());
-		GENERATE_VAR(sbitColorAlphaAlpha, ::g->sbitColorAlphaAlpha.generate());
+		GENERATE_VAR(sbitColorAlphaRed, 73, ::g->sbitColorAlphaRed.generate());
+		GENERATE_VAR(sbitColorAlphaGreen, 74, ::g->sbitColorAlphaGreen.generate());
+		GENERATE_VAR(sbitColorAlphaBlue, 75, ::g->sbitColorAlphaBlue.generate());
+		GENERATE_VAR(sbitColorAlphaAlpha, 76, ::g->sbitColorAlphaAlpha.generate());
 		break;
 	default:
 		error_message("*WARNING: Unknown Color Model Type for background color chunk.");
@@ -2617,9 +2713,9 @@ PNG_CHUNK_SPLT* PNG_CHUNK_SPLT::generate(int32 chunkLen) {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(paletteName, ::g->paletteName.generate());
-	GENERATE_VAR(sampleDepth, ::g->sampleDepth.generate());
-	GENERATE_VAR(spltData, ::g->spltData.generate(((chunkLen - Strlen(paletteName())) - 2)));
+	GENERATE_VAR(paletteName, 78, ::g->paletteName.generate());
+	GENERATE_VAR(sampleDepth, 79, ::g->sampleDepth.generate());
+	GENERATE_VAR(spltData, 80, ::g->spltData.generate(((chunkLen - Strlen(paletteName())) - 2)));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2642,8 +2738,8 @@ PNG_CHUNK_ACTL* PNG_CHUNK_ACTL::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(num_frames, ::g->num_frames.generate());
-	GENERATE_VAR(num_plays, ::g->num_plays.generate());
+	GENERATE_VAR(num_frames, 82, ::g->num_frames.generate());
+	GENERATE_VAR(num_plays, 83, ::g->num_plays.generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2666,15 +2762,15 @@ PNG_CHUNK_FCTL* PNG_CHUNK_FCTL::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(sequence_number, ::g->sequence_number.generate({ ::g->sec_num++ }));
-	GENERATE_VAR(width, ::g->width.generate());
-	GENERATE_VAR(height, ::g->height.generate());
-	GENERATE_VAR(x_offset, ::g->x_offset.generate());
-	GENERATE_VAR(y_offset, ::g->y_offset.generate());
-	GENERATE_VAR(delay_num, ::g->delay_num.generate());
-	GENERATE_VAR(delay_den, ::g->delay_den.generate());
-	GENERATE_VAR(dispose_op, APNG_DISPOSE_OP_generate());
-	GENERATE_VAR(blend_op, APNG_BLEND_OP_generate());
+	GENERATE_VAR(sequence_number, 85, ::g->sequence_number.generate({ ::g->sec_num++ }));
+	GENERATE_VAR(width, 86, ::g->width.generate());
+	GENERATE_VAR(height, 87, ::g->height.generate());
+	GENERATE_VAR(x_offset, 88, ::g->x_offset.generate());
+	GENERATE_VAR(y_offset, 89, ::g->y_offset.generate());
+	GENERATE_VAR(delay_num, 90, ::g->delay_num.generate());
+	GENERATE_VAR(delay_den, 91, ::g->delay_den.generate());
+	GENERATE_VAR(dispose_op, 92, APNG_DISPOSE_OP_generate());
+	GENERATE_VAR(blend_op, 93, APNG_BLEND_OP_generate());
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2697,8 +2793,8 @@ PNG_CHUNK_FDAT* PNG_CHUNK_FDAT::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(sequence_number, ::g->sequence_number.generate({ ::g->sec_num++ }));
-	GENERATE_VAR(frame_data, ::g->frame_data.generate((::g->length() - 4)));
+	GENERATE_VAR(sequence_number, 95, ::g->sequence_number.generate({ ::g->sec_num++ }));
+	GENERATE_VAR(frame_data, 96, ::g->frame_data.generate((::g->length() - 4)));
 
 	::g->_struct_id = _parent_id;
 	_sizeof = FTell() - _startof;
@@ -2881,65 +2977,65 @@ PNG_CHUNK* PNG_CHUNK::generate() {
 	_parent_id = ::g->_struct_id;
 	::g->_struct_id = ++::g->_struct_id_counter;
 
-	GENERATE_VAR(length, ::g->length.generate());
+	GENERATE_VAR(length, 2, ::g->length.generate());
 	pos_start = FTell();
-	GENERATE_VAR(type, ::g->type.generate());
+	GENERATE_VAR(type, 5, ::g->type.generate());
 	if ((type().cname() == "IHDR")) {
-		GENERATE_VAR(ihdr, ::g->ihdr.generate());
+		GENERATE_VAR(ihdr, 18, ::g->ihdr.generate());
 	} else {
 	if ((type().cname() == "tEXt")) {
-		GENERATE_VAR(text, ::g->text.generate());
+		GENERATE_VAR(text, 21, ::g->text.generate());
 	} else {
 	if ((type().cname() == "PLTE")) {
-		GENERATE_VAR(plte, ::g->plte.generate(length()));
+		GENERATE_VAR(plte, 26, ::g->plte.generate(length()));
 	} else {
 	if ((type().cname() == "cHRM")) {
-		GENERATE_VAR(chrm, ::g->chrm.generate());
+		GENERATE_VAR(chrm, 33, ::g->chrm.generate());
 	} else {
 	if ((type().cname() == "sRGB")) {
-		GENERATE_VAR(srgb, ::g->srgb.generate());
+		GENERATE_VAR(srgb, 35, ::g->srgb.generate());
 	} else {
 	if ((type().cname() == "iTXt")) {
-		GENERATE_VAR(itxt, ::g->itxt.generate(length()));
+		GENERATE_VAR(itxt, 42, ::g->itxt.generate(length()));
 	} else {
 	if ((type().cname() == "zTXt")) {
-		GENERATE_VAR(ztxt, ::g->ztxt.generate(length()));
+		GENERATE_VAR(ztxt, 46, ::g->ztxt.generate(length()));
 	} else {
 	if ((type().cname() == "tIME")) {
-		GENERATE_VAR(time, ::g->time_.generate());
+		GENERATE_VAR(time, 53, ::g->time_.generate());
 	} else {
 	if ((type().cname() == "pHYs")) {
-		GENERATE_VAR(phys, ::g->phys.generate());
+		GENERATE_VAR(phys, 57, ::g->phys.generate());
 	} else {
 	if ((type().cname() == "bKGD")) {
-		GENERATE_VAR(bkgd, ::g->bkgd.generate(::g->chunk()[0].ihdr().color_type()));
+		GENERATE_VAR(bkgd, 63, ::g->bkgd.generate(::g->chunk()[0].ihdr().color_type()));
 	} else {
 	if ((type().cname() == "sBIT")) {
-		GENERATE_VAR(sbit, ::g->sbit.generate(::g->chunk()[0].ihdr().color_type()));
+		GENERATE_VAR(sbit, 77, ::g->sbit.generate(::g->chunk()[0].ihdr().color_type()));
 	} else {
 	if ((type().cname() == "sPLT")) {
-		GENERATE_VAR(splt, ::g->splt.generate(length()));
+		GENERATE_VAR(splt, 81, ::g->splt.generate(length()));
 	} else {
 	if ((type().cname() == "acTL")) {
-		GENERATE_VAR(actl, ::g->actl.generate());
+		GENERATE_VAR(actl, 84, ::g->actl.generate());
 	} else {
 	if ((type().cname() == "fcTL")) {
-		GENERATE_VAR(fctl, ::g->fctl.generate());
+		GENERATE_VAR(fctl, 94, ::g->fctl.generate());
 	} else {
 	if ((type().cname() == "fdAT")) {
-		GENERATE_VAR(fdat, ::g->fdat.generate());
+		GENERATE_VAR(fdat, 97, ::g->fdat.generate());
 	} else {
 	if ((type().cname() == "IDAT")) {
 		std::string compressed_data = generate_data(::g->chunk()[0].ihdr().width(), ::g->chunk()[0].ihdr().height(), (PNG_COLOR_SPACE_TYPE) ::g->chunk()[0].ihdr().color_type(), ::g->chunk()[0].ihdr().bits(), (PNG_INTERLACE_METHOD) ::g->chunk()[0].ihdr().interlace_method());
 		std::vector<std::string> good_data = { compressed_data };
 		bool evil = file_acc.set_evil_bit(false);
-		start_generation("data");
+		start_generation("data", 98);
 		file_acc.file_string(good_data);
 		end_generation();
 		file_acc.set_evil_bit(evil);
 	} else {
 	if (((length() > 0) && (type().cname() != "IEND"))) {
-		GENERATE_VAR(data, ::g->data_.generate(length()));
+		GENERATE_VAR(data, 98, ::g->data_.generate(length()));
 	};
 	};
 	};
@@ -2962,20 +3058,20 @@ PNG_CHUNK* PNG_CHUNK::generate() {
 	if ((length() != correct_length)) {
 		FSeek((pos_start - 4));
 		evil = SetEvilBit(false);
-		GENERATE_VAR(length, ::g->length.generate({ correct_length }));
+		GENERATE_VAR(length, 99, ::g->length.generate({ correct_length }));
 		SetEvilBit(evil);
 		FSeek(pos_end);
 	};
 	data_size = (pos_end - pos_start);
 	crc_calc = Checksum(CHECKSUM_CRC32, pos_start, data_size);
-	GENERATE_VAR(crc, ::g->crc.generate({ crc_calc }));
+	GENERATE_VAR(crc, 100, ::g->crc.generate({ crc_calc }));
 	if ((crc() != crc_calc)) {
 		SPrintf(msg, "*ERROR: CRC Mismatch @ chunk[%d]; in data: %08x; expected: %08x", ::g->CHUNK_CNT, crc(), crc_calc);
 		error_message(msg);
 	};
 	::g->CHUNK_CNT++;
 	if ((type().cname() == "eXIf")) {
-		GENERATE_VAR(pad, ::g->pad.generate());
+		GENERATE_VAR(pad, 101, ::g->pad.generate());
 	};
 
 	::g->_struct_id = _parent_id;
@@ -2992,7 +3088,7 @@ void generate_file() {
 	::g->sec_num = 0;
 	::g->CHUNK_CNT = 0;
 	::g->evil = SetEvilBit(false);
-	GENERATE(sig, ::g->sig.generate());
+	GENERATE(sig, 1, ::g->sig.generate());
 	SetEvilBit(::g->evil);
 	if (((((::g->sig().btPngSignature()[0] != 0x8950) || (::g->sig().btPngSignature()[1] != 0x4E47)) || (::g->sig().btPngSignature()[2] != 0x0D0A)) || (::g->sig().btPngSignature()[3] != 0x1A0A))) {
 		error_message("*ERROR: File is not a PNG image. Template stopped.");
@@ -3005,7 +3101,7 @@ void generate_file() {
 	::g->possible_chunks = { "IHDR" };
 	while (ReadBytes(::g->chunk_type, (FTell() + 4), 4, ::g->preferred_chunks, ::g->possible_chunks)) {
 		SetBackColor(((::g->chunk_count++ % 2) ? cNone : cLtGray));
-		GENERATE(chunk, ::g->chunk.generate());
+		GENERATE(chunk, 102, ::g->chunk.generate());
 		switch (STR2INT(::g->chunk_type)) {
 		case STR2INT("IHDR"):
 			switch (::g->chunk().ihdr().color_type()) {
@@ -3082,5 +3178,11 @@ void generate_file() {
 	delete_globals();
 }
 
-void delete_globals() { delete ::g; }
+void delete_globals() {
+	delete ::g;
+	::struct_arena.reset();
+}
+
+// Identifies the generated code, e.g. for cached parse results
+const char* template_hash = "a36817ed7106a8bd6cf5dd6e94d835af15e7f08e84914c6cbe0a671e4a036a43";
 
@@ -0,0 +1,15 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import os
+import shutil
+import tempfile
+
+# keep the templates parsed by the tests out of the user's cache
+# (~/.cache/pfp)
+CACHE_DIR = tempfile.mkdtemp(prefix="pfp-test-cache-")
+os.environ["PFP_CACHE_DIR"] = CACHE_DIR
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
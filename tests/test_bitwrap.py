@@ -13,6 +13,7 @@ import pfp
 import pfp.errors
 from pfp.fields import *
 import pfp.utils
+import pfp.bitwrap
 from pfp.bitwrap import BitwrappedStream
 
 import utils
@@ -193,6 +194,65 @@ class TestBitwrap(unittest.TestCase):
         self.assertEqual(bits, [0])
         self.assertEqual(bitwrapped.tell_bits(), 3)
 
+    def test_bits_read_unpadded_many(self):
+        data = pfp.utils.binary("".join(chr(x * 37 % 256) for x in range(64)))
+        all_bits = pfp.bitwrap.bytes_to_bits(data)
+        bitwrapped = BitwrappedStream(six.BytesIO(data), generate=False)
+        bitwrapped.padded = False
+
+        pos = 0
+        num = 1
+        while pos < len(all_bits):
+            res = bitwrapped.read_bits(num)
+            self.assertEqual(all_bits[pos : pos + num], res)
+            pos += len(res)
+            num = num % 13 + 1
+        self.assertEqual([], bitwrapped.read_bits(1))
+
+    def test_bits_write_unpadded(self):
+        stream = six.BytesIO()
+        bitwrapped = BitwrappedStream(stream, generate=False)
+        bitwrapped.padded = False
+
+        bitwrapped.write_bits([1, 0, 1])
+        bitwrapped.write(pfp.utils.binary("\xff"))
+        self.assertEqual(stream.getvalue(), pfp.utils.binary(chr(0b10111111)))
+
+        bitwrapped.write_bits([0, 1])
+        bitwrapped.flush()
+        self.assertEqual(
+            stream.getvalue(),
+            pfp.utils.binary(chr(0b10111111) + chr(0b11101000)),
+        )
+
+    def test_consumed_ranges_coalesced(self):
+        stream = six.BytesIO(pfp.utils.binary("A" * 1000))
+        bitwrapped = BitwrappedStream(stream, generate=False)
+
+        for x in range(500):
+            bitwrapped.read(2)
+
+        self.assertEqual(1, len(bitwrapped._ranges))
+        self.assertEqual(0, len(bitwrapped.unconsumed_ranges()))
+
+    def test_unconsumed_ranges_out_of_order(self):
+        stream = six.BytesIO(pfp.utils.binary("A" * 100))
+        bitwrapped = BitwrappedStream(stream, generate=False)
+
+        bitwrapped.seek(50)
+        bitwrapped.read(10)
+        bitwrapped.seek(0)
+        bitwrapped.read(10)
+        bitwrapped.seek(20)
+        bitwrapped.read(10)
+        bitwrapped.seek(70)
+
+        uranges = sorted(bitwrapped.unconsumed_ranges())
+        self.assertEqual(
+            [(11, 20), (31, 50), (61, 70)],
+            [(rng.begin, rng.end) for rng in uranges],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
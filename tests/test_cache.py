@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import os
+import shutil
+import six
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import py010parser
+
+import pfp
+import pfp.cache
+import pfp.interp
+
+
+def ast_str(ast):
+    buf = six.StringIO()
+    ast.show(buf=buf)
+    return buf.getvalue()
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self._old_env = dict(os.environ)
+        self.cache_dir = tempfile.mkdtemp()
+        os.environ["PFP_CACHE_DIR"] = self.cache_dir
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self._old_env)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _entries(self):
+        return [
+            name for name in os.listdir(self.cache_dir)
+            if name.endswith(pfp.cache.SUFFIX)
+        ]
+
+    def test_key(self):
+        key = pfp.cache.key("int a;", ["typedef int INT;"], "-xc++")
+        self.assertEqual(key, pfp.cache.key("int a;", ["typedef int INT;"], "-xc++"))
+        self.assertNotEqual(key, pfp.cache.key("int b;", ["typedef int INT;"], "-xc++"))
+        self.assertNotEqual(key, pfp.cache.key("int a;", [], "-xc++"))
+        self.assertNotEqual(key, pfp.cache.key("int a;", ["typedef int INT;"], ""))
+        # parts must not run into each other
+        self.assertNotEqual(
+            pfp.cache.key("b", ["a"], ""), pfp.cache.key("", ["ab"], "")
+        )
+
+    def test_store_load(self):
+        pfp.cache.store("abc", {"ast": [1, 2, 3]})
+        self.assertEqual({"ast": [1, 2, 3]}, pfp.cache.load("abc"))
+        self.assertIsNone(pfp.cache.load("def"))
+
+    def test_disabled(self):
+        os.environ["PFP_CACHE_DIR"] = ""
+        pfp.cache.store("abc", [1])
+        self.assertIsNone(pfp.cache.load("abc"))
+        self.assertEqual([], self._entries())
+
+    def test_corrupt_entry(self):
+        with open(os.path.join(self.cache_dir, "abc" + pfp.cache.SUFFIX), "wb") as f:
+            f.write(b"not a pickle")
+        self.assertIsNone(pfp.cache.load("abc"))
+
+    def test_evict_lru(self):
+        for idx, key in enumerate(["a", "b", "c"]):
+            pfp.cache.store(key, b"x" * 1000)
+            path = os.path.join(self.cache_dir, key + pfp.cache.SUFFIX)
+            os.utime(path, (time.time() - 100 + idx, time.time() - 100 + idx))
+        # loading "a" makes it the most recently used entry
+        self.assertIsNotNone(pfp.cache.load("a"))
+        size = os.path.getsize(os.path.join(self.cache_dir, "a" + pfp.cache.SUFFIX))
+        pfp.cache.evict(self.cache_dir, 2 * size)
+        self.assertEqual(["a.ast", "c.ast"], sorted(self._entries()))
+
+    def test_size_limit(self):
+        os.environ["PFP_CACHE_SIZE"] = "1"
+        pfp.cache.store("abc", b"x" * 1000)
+        self.assertEqual([], self._entries())
+
+    def test_interp_uses_cache(self):
+        template = """
+            typedef struct {
+                uchar a;
+                uint b;
+            } TEST_STRUCT;
+            TEST_STRUCT test;
+        """
+        interp = pfp.interp.PfpInterp(parser=pfp.PARSER)
+        ast = interp._parse_string(template)
+        self.assertEqual(1, len(self._entries()))
+
+        # a second parse must not touch the parser at all
+        orig_parse_string = py010parser.parse_string
+        def fail(*args, **kwargs):
+            raise AssertionError("template was parsed again")
+        py010parser.parse_string = fail
+        try:
+            cached = pfp.interp.PfpInterp(parser=pfp.PARSER)._parse_string(template)
+        finally:
+            py010parser.parse_string = orig_parse_string
+        self.assertEqual(ast_str(ast), ast_str(cached))
+
+        # a changed template is parsed again
+        interp._parse_string(template + "uchar c;")
+        self.assertEqual(2, len(self._entries()))
+
+    def test_include(self):
+        self.assertFalse(pfp.cache.cacheable('#include "a.bt"\nuchar a;', []))
+        self.assertFalse(pfp.cache.cacheable("uchar a;", ["  # include <a.bt>"]))
+        self.assertTrue(pfp.cache.cacheable("uchar a; // #include", []))
+
+        included = os.path.join(self.cache_dir, "included.bt")
+        template = '#include "{}"\nHEADER header;\n'.format(included)
+        with open(included, "w") as f:
+            f.write("typedef struct { uchar a; } HEADER;\n")
+        dom = pfp.parse(data=six.BytesIO(b"\x01\x02"), template=template, generate=False)
+        self.assertEqual(1, dom.header.a)
+        self.assertEqual([], self._entries())
+
+        # changes of the included file are picked up
+        with open(included, "w") as f:
+            f.write("typedef struct { uchar a; uchar b; } HEADER;\n")
+        dom = pfp.parse(data=six.BytesIO(b"\x01\x02"), template=template, generate=False)
+        self.assertEqual(2, dom.header.b)
+
+
+if __name__ == "__main__":
+    unittest.main()
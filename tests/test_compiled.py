@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import os
+import ctypes
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pfp.compiled
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CXX = os.environ.get("CXX", "g++")
+# A GIF with more decisions than the default limit of the generator, whose
+# image data sub-blocks all differ
+LARGE_GIF = (
+    b"GIF89a\x01\x00\x01\x00\x00\x00\x00"
+    + b"\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02"
+    + b"".join(b"\xff" + bytes(bytearray((i + j) % 256 for j in range(255))) for i in range(800))
+    + b"\x00\x3b"
+)
+
+
+def build_library(fmt, directory):
+    """Build the shared library of the checked-in fmt.cpp into directory.
+    """
+    library = os.path.join(directory, fmt + ".so")
+    subprocess.check_call(
+        [CXX, "-I", ROOT, "-std=c++17", "-O0", "-w", "-shared", "-fPIC",
+         os.path.join(ROOT, fmt + ".cpp"), os.path.join(ROOT, "fuzzer.cpp"),
+         os.path.join(ROOT, "afl_mutator.cpp"), "-o", library, "-lz"]
+    )
+    return library
+
+
+# gif.so, built once for all tests of this module
+BUILD_DIR = None
+LIBRARY = None
+
+
+def setUpModule():
+    global BUILD_DIR, LIBRARY
+    BUILD_DIR = tempfile.mkdtemp()
+    try:
+        LIBRARY = build_library("gif", BUILD_DIR)
+    except (OSError, subprocess.CalledProcessError) as e:
+        shutil.rmtree(BUILD_DIR, ignore_errors=True)
+        raise unittest.SkipTest("cannot build gif.so: {}".format(e))
+
+
+def tearDownModule():
+    shutil.rmtree(BUILD_DIR, ignore_errors=True)
+
+
+def library_copy(name):
+    """Return a copy of gif.so that is loaded separately: the fuzzer keeps
+    the processed files in globals.
+    """
+    library = os.path.join(BUILD_DIR, "gif-{}.so".format(name))
+    shutil.copyfile(LIBRARY, library)
+    return library
+
+
+class TestCompiled(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.gif = pfp.compiled.Format(LIBRARY)
+
+    def _decisions(self, seed):
+        rng = random.Random(seed)
+        size = self.gif.max_decisions
+        return rng.getrandbits(8 * size).to_bytes(size, "little")
+
+    def test_generate_parse_roundtrip(self):
+        data = bytes(self.gif.generate(self._decisions(1)))
+        self.assertEqual(b"GIF", data[:3])
+
+        success, decisions = self.gif.parse(data)
+        self.assertTrue(success)
+        self.assertEqual(data, bytes(self.gif.generate(bytes(decisions))))
+
+    def test_generate_deterministic(self):
+        decisions = self._decisions(2)
+        self.assertEqual(
+            bytes(self.gif.generate(decisions)),
+            bytes(self.gif.generate(bytearray(decisions))),
+        )
+
+    def test_generate_failure(self):
+        self.assertIsNone(self.gif.generate(b""))
+
+    def test_output_buffers(self):
+        decisions = self._decisions(3)
+        data = bytes(self.gif.generate(decisions))
+        out = bytearray(self.gif.max_size)
+        view = self.gif.generate(decisions, out=out)
+        self.assertEqual(data, bytes(view))
+        self.assertEqual(data, bytes(out[: len(data)]))
+
+        with self.assertRaises(ValueError):
+            self.gif.generate(decisions, out=bytearray(2))
+
+        success, rand = self.gif.parse(data)
+        out = bytearray(self.gif.max_decisions)
+        success_out, view = self.gif.parse(data, out=out)
+        self.assertEqual(success, success_out)
+        self.assertEqual(bytes(rand), bytes(view))
+
+    def test_generate_batch(self):
+        files = self.gif.generate_batch(200, random.Random(4))
+        self.assertEqual(200, len(files))
+        same = self.gif.generate_batch(200, random.Random(4))
+        for a, b in zip(files, same):
+            self.assertEqual(a is None, b is None)
+            if a is not None:
+                self.assertEqual(bytes(a), bytes(b))
+                self.assertTrue(self.gif.parse(bytes(a))[0])
+
+        with self.assertRaises(ValueError):
+            self.gif.generate_batch(10, random.Random(4), out=bytearray(100))
+
+    def test_threads(self):
+        results = []
+
+        def worker():
+            files = self.gif.generate_batch(50, random.Random(5))
+            results.append([None if f is None else bytes(f) for f in files])
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(4, len(results))
+        for res in results[1:]:
+            self.assertEqual(results[0], res)
+
+
+class TestSmartMutation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        library = library_copy("smart-mutation")
+        cls.gif = pfp.compiled.Format(library)
+        cls.lib = ctypes.CDLL(library)
+        cls.lib.process_file.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
+        cls.lib.one_smart_mutation.argtypes = [
+            ctypes.c_int,
+            ctypes.POINTER(ctypes.POINTER(ctypes.c_ubyte)),
+            ctypes.POINTER(ctypes.c_uint),
+        ]
+        cls.lib.ff_open_chunk_index.argtypes = [ctypes.c_char_p]
+        cls.lib.ff_set_checkpoints.argtypes = [ctypes.c_int]
+        cls.lib.one_smart_mutation_of_kind.argtypes = [
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.POINTER(ctypes.POINTER(ctypes.c_ubyte)),
+            ctypes.POINTER(ctypes.c_uint),
+        ]
+        # files are numbered in the order they are processed
+        cls.files = 0
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir, ignore_errors=True)
+
+    def _process(self, data, name=None):
+        if name is None:
+            name = os.path.join(self.work_dir, "file-{}".format(self.files))
+            with open(name, "wb") as f:
+                f.write(data)
+        self.lib.process_file(name.encode(), (name + "-decisions").encode())
+        TestSmartMutation.files += 1
+        return self.files - 1
+
+    def _small_files(self, count, seed):
+        rng = random.Random(seed)
+        res = []
+        while len(res) < count:
+            data = self.gif.generate_batch(1, rng)[0]
+            if data is not None:
+                res.append(bytes(data))
+        return res
+
+    def _mutate(self, index):
+        file = ctypes.POINTER(ctypes.c_ubyte)()
+        size = ctypes.c_uint()
+        self.lib.one_smart_mutation(index, ctypes.byref(file), ctypes.byref(size))
+        return ctypes.string_at(file, size.value) if file else None
+
+    def test_raise_max_size(self):
+        index = self._process(self._small_files(1, 6)[0])
+        for _ in range(10):
+            self._mutate(index)
+
+        # decisions of this file are larger than the default limit
+        self.gif.set_max_size(1 << 20)
+        success, decisions = self.gif.parse(LARGE_GIF)
+        self.assertTrue(success)
+        self.assertGreater(len(decisions), 131072)
+        index = self._process(LARGE_GIF)
+        mutants = [self._mutate(index) for _ in range(20)]
+        self.assertTrue(any(m is not None and m[:3] == b"GIF" for m in mutants))
+
+    def test_resume_from_checkpoints(self):
+        self.gif.set_max_size(1 << 20)
+        index = self._process(LARGE_GIF)
+        libc = ctypes.CDLL(None)
+
+        def mutants(checkpoints):
+            self.lib.ff_set_checkpoints(checkpoints)
+            res = []
+            # replacements and insertions (deletions use up their chunks,
+            # abstractions read /dev/urandom)
+            for kind in (1, 2, 3):
+                for seed in range(10):
+                    libc.srand(seed)
+                    file = ctypes.POINTER(ctypes.c_ubyte)()
+                    size = ctypes.c_uint()
+                    result = self.lib.one_smart_mutation_of_kind(
+                        index, kind, ctypes.byref(file), ctypes.byref(size)
+                    )
+                    res.append((result, ctypes.string_at(file, size.value) if file else None))
+            return res
+
+        complete = mutants(0)
+        self.assertEqual(complete, mutants(16))
+        self.assertTrue(any(m is not None and m[:3] == b"GIF" for _, m in complete))
+        self.lib.ff_set_checkpoints(0)
+
+    def test_chunk_index(self):
+        index_name = os.path.join(self.work_dir, "index")
+        names = []
+        for data in self._small_files(2, 7):
+            names.append(os.path.join(self.work_dir, "indexed-{}".format(len(names))))
+            with open(names[-1], "wb") as f:
+                f.write(data)
+        self.assertEqual(0, self.lib.ff_open_chunk_index(index_name.encode()))
+        for name in names:
+            self._process(None, name)
+        with open(index_name, "rb") as f:
+            index = bytearray(f.read())
+        header_size = 80
+        first_size = struct.unpack_from("<I", index, header_size)[0]
+        second = header_size + first_size
+        self.assertEqual(len(index), second + struct.unpack_from("<I", index, second)[0])
+
+        # a record whose counts reach past its end is dropped like an
+        # incomplete one, and its file is parsed again
+        struct.pack_into("<I", index, second + 36, 0xFFFFFFFF)
+        with open(index_name, "wb") as f:
+            f.write(index)
+        self.assertEqual(0, self.lib.ff_open_chunk_index(index_name.encode()))
+        self.assertEqual(second, os.path.getsize(index_name))
+        file_index = self._process(None, names[1])
+        self.assertEqual(len(index), os.path.getsize(index_name))
+        self.assertTrue(any(self._mutate(file_index) for _ in range(10)))
+
+        # an index of another template is replaced
+        index[20] ^= 0xFF
+        with open(index_name, "wb") as f:
+            f.write(index)
+        self.assertEqual(0, self.lib.ff_open_chunk_index(index_name.encode()))
+        self.assertEqual(header_size, os.path.getsize(index_name))
+        self.assertEqual([], [f for f in os.listdir(self.work_dir) if f.startswith("index.new")])
+
+
+class TestAflMutator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        library = library_copy("afl-mutator")
+        cls.gif = pfp.compiled.Format(library)
+        lib = cls.lib = ctypes.CDLL(library)
+        lib.afl_custom_init.restype = ctypes.c_void_p
+        lib.afl_custom_init.argtypes = [ctypes.c_void_p, ctypes.c_uint]
+        lib.afl_custom_fuzz.restype = ctypes.c_size_t
+        lib.afl_custom_fuzz.argtypes = [
+            ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t,
+            ctypes.POINTER(ctypes.POINTER(ctypes.c_ubyte)),
+            ctypes.c_char_p, ctypes.c_size_t, ctypes.c_size_t,
+        ]
+        lib.afl_custom_queue_new_entry.restype = ctypes.c_ubyte
+        lib.afl_custom_queue_new_entry.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+        lib.afl_custom_queue_get.restype = ctypes.c_ubyte
+        lib.afl_custom_queue_get.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+        lib.afl_custom_deinit.restype = None
+        lib.afl_custom_deinit.argtypes = [ctypes.c_void_p]
+
+        rng = random.Random(8)
+        cls.inputs = []
+        while len(cls.inputs) < 8:
+            data = cls.gif.generate_batch(1, rng)[0]
+            if data is not None and bytes(data) not in cls.inputs:
+                cls.inputs.append(bytes(data))
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        os.environ["FF_MUTATOR_DIR"] = os.path.join(self.work_dir, "mutator")
+        os.environ["FF_BATCH_SIZE"] = "4"
+        self.mutator = self.lib.afl_custom_init(None, 9)
+        self.assertTrue(self.mutator)
+
+    def tearDown(self):
+        self.lib.afl_custom_deinit(self.mutator)
+        del os.environ["FF_MUTATOR_DIR"]
+        del os.environ["FF_BATCH_SIZE"]
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _queue_file(self, data):
+        name = os.path.join(self.work_dir, "queue-{}".format(len(os.listdir(self.work_dir))))
+        with open(name, "wb") as f:
+            f.write(data)
+        return name.encode()
+
+    def _fuzz(self, data):
+        out = ctypes.POINTER(ctypes.c_ubyte)()
+        size = self.lib.afl_custom_fuzz(self.mutator, data, len(data), ctypes.byref(out), None, 0, 1 << 20)
+        self.assertTrue(out)
+        return ctypes.string_at(out, size)
+
+    def _parsed(self):
+        """Return the number of parsed queue entries and the other files
+        """
+        names = os.listdir(os.path.join(self.work_dir, "mutator"))
+        entries = [n for n in names if n[0].isdigit() and n.endswith("-decisions")]
+        return len(entries), sorted(set(names) - set(entries))
+
+    def test_queue_entries(self):
+        for data in self.inputs[:5]:
+            self.lib.afl_custom_queue_new_entry(self.mutator, self._queue_file(data), None)
+        mutants = [self._fuzz(self.inputs[3]) for _ in range(8)]
+        self.assertTrue(any(m != self.inputs[3] for m in mutants))
+        # the entry being fuzzed and one entry parsed ahead per batch
+        self.assertEqual((3, []), self._parsed())
+
+        # entries that were not announced are found through queue_get
+        name = self._queue_file(self.inputs[5])
+        self.assertEqual(1, self.lib.afl_custom_queue_get(self.mutator, name))
+        self._fuzz(self.inputs[5])
+        self.assertEqual((5, []), self._parsed())
+
+    def test_unknown_inputs(self):
+        for data in self.inputs[:6]:
+            for _ in range(4):
+                self.assertTrue(self._fuzz(data))
+        # all of them were parsed into the same slot
+        self.assertEqual((0, ["input", "input-decisions"]), self._parsed())
+
+        # queue entries parsed later do not keep the slot alive
+        name = self._queue_file(self.inputs[6])
+        self.lib.afl_custom_queue_new_entry(self.mutator, name, None)
+        self._fuzz(self.inputs[6])
+        self._fuzz(self.inputs[7])
+        self.assertEqual((1, ["input", "input-decisions"]), self._parsed())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import logging
+import os
+import struct
+import sys
+import unittest
+
+import six
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pfp
+import pfp.interp
+
+
+RECORDS = r"""
+int sum(uchar vals[], int count) {
+    local int i;
+    local int total = 0;
+    for (i = 0; i < count; i++) {
+        if (vals[i] == 0xff)
+            return -1;
+        total += vals[i];
+    }
+    return total;
+}
+
+typedef struct {
+    uchar len;
+    uchar kind;
+    if (kind == 1)
+        ushort extra;
+    else if (kind == 2) {
+        uchar flags;
+        local int shifted = (flags << 2) | (kind & 1);
+    }
+    local int i = 0;
+    local int odd = 0;
+    do {
+        i++;
+        if (i % 2)
+            continue;
+        odd = (uchar)(odd + i);
+    } while (i < len);
+    while (1) {
+        uchar b;
+        if (b == 0 || b > 0x80)
+            break;
+    }
+    uchar data[len];
+    local int total = sum(data, len);
+    local int big = total > 10 ? total * 2 : -total;
+    local uint64 size = sizeof(data) + startof(data);
+} RECORD;
+
+LittleEndian();
+local int count = 0;
+while (!FEof()) {
+    RECORD record;
+    count = count + record.len;
+}
+local int last = record.len;
+local int first = record[0].kind;
+"""
+
+LOCALS = ["i", "odd", "shifted", "total", "big", "size"]
+
+
+def records(count):
+    res = b""
+    for k in range(count):
+        kind = k % 3
+        res += struct.pack("BB", k % 5 + 1, kind)
+        if kind == 1:
+            res += b"\x02\x01"
+        elif kind == 2:
+            res += b"\x07"
+        res += b"\x05\x10\x00" if k % 4 else b"\x90"
+        res += bytes(bytearray((k + j) % 256 for j in range(k % 5 + 1)))
+    return res
+
+
+class TestCompiler(unittest.TestCase):
+    def setUp(self):
+        self.log_level = logging.getLogger("").level
+
+    def tearDown(self):
+        logging.getLogger("").setLevel(self.log_level)
+
+    def _parse(self, debug):
+        interp = pfp.interp.PfpInterp(
+            debug=debug,
+            parser=pfp.PARSER,
+            generate=False,
+            cpp_target=os.devnull,
+        )
+        dom = pfp.parse(
+            data=six.BytesIO(records(40)),
+            template=RECORDS,
+            interp=interp,
+            generate=False,
+            printf=False,
+        )
+        values = [
+            [str(getattr(record, name, None)) for name in LOCALS]
+            for record in dom.record
+        ]
+        values.append([str(dom.count), str(dom.last), str(dom.first)])
+        return interp, dom._pfp__show(include_offset=True), values
+
+    def _compiled(self, node):
+        res = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, (list, tuple)):
+                stack.extend(node)
+                continue
+            compiled = node.__dict__.get("_pfp__compiled")
+            if compiled is not None and compiled[1] is not None:
+                res += 1
+            for _, child in node.children():
+                stack.append(child)
+        return res
+
+    def test_debug(self):
+        interp, show, values = self._parse(False)
+        self.assertEqual(40, len(values) - 1)
+        self.assertGreater(self._compiled(interp._ast), 0)
+        # the statements of if-statements without braces are compiled too
+        self.assertTrue(interp._list_compounds)
+        for _, compound in interp._list_compounds.values():
+            self.assertTrue(interp._compiler.compiled(compound))
+
+        # debug logging handles every node with its handler
+        debug_interp, debug_show, debug_values = self._parse(True)
+        self.assertEqual(0, self._compiled(debug_interp._ast))
+
+        self.assertEqual(debug_show, show)
+        self.assertEqual(debug_values, values)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+
+import six
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pfp
+import pfp.errors
+import pfp.events
+import pfp.fields
+import pfp.interp
+
+
+RECORDS = "\n".join([
+    "typedef struct {",
+    "    uchar len;",
+    "    uchar data[len];",
+    "} RECORD;",
+    "",
+    "while (!FEof()) {",
+    "    RECORD record;",
+    "}",
+])
+
+
+class TestIterparse(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _data_file(self, data):
+        path = os.path.join(self.tmp_dir, "data")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_events(self):
+        template = "\n".join([
+            "typedef struct {",
+            "    uchar a;",
+            "    ushort b;",
+            "} PAIR;",
+            "",
+            "LittleEndian();",
+            "PAIR pair;",
+            "uchar c[2];",
+            "uchar d;",
+            "uchar d;",
+        ])
+        data_file = self._data_file(b"\x01\x02\x00cd\x05\x06")
+        self.assertEqual(
+            [
+                ("start", "pair", 0, None),
+                ("leaf", "pair.a", 0, 1),
+                ("leaf", "pair.b", 1, 2),
+                ("end", "pair", 0, None),
+                ("leaf", "c", 3, b"cd"),
+                ("leaf", "d", 5, 5),
+                ("leaf", "d[1]", 6, 6),
+            ],
+            list(pfp.iterparse(template=template, data_file=data_file)),
+        )
+
+    def _parse(self, template, data):
+        events = []
+        interp = pfp.interp.PfpInterp(
+            parser=pfp.PARSER,
+            generate=False,
+            cpp_target=os.devnull,
+            listener=pfp.events.EventListener(events.append),
+        )
+        dom = pfp.parse(
+            data=six.BytesIO(data),
+            template=template,
+            interp=interp,
+            generate=False,
+            printf=False,
+        )
+        return dom, events
+
+    def test_release(self):
+        dom, events = self._parse(RECORDS, b"\x01a\x02bc\x00\x01d")
+        # all records were released once they had been parsed
+        self.assertEqual([], dom._pfp__children)
+        self.assertEqual(
+            ["record", "record[1]", "record[2]", "record[3]"],
+            [e.path for e in events if e.event == "start"],
+        )
+        self.assertIn(("leaf", "record[3].data", 7, b"d"), events)
+
+    def test_referenced(self):
+        template = RECORDS + '\nPrintf("%d", record[1].len);'
+        dom, events = self._parse(template, b"\x01a\x02bc")
+        self.assertEqual(2, len(dom.record))
+        self.assertEqual(b"bc", dom.record[1].data.raw_data)
+        self.assertEqual(
+            ["record", "record[1]"],
+            [e.path for e in events if e.event == "end"],
+        )
+
+    def test_referenced_ancestor(self):
+        template = "\n".join([
+            "typedef struct {",
+            "    uchar a;",
+            "    uchar b;",
+            "} REC;",
+            "typedef struct {",
+            "    REC r1;",
+            "    REC r2;",
+            "} FILEHDR;",
+            "",
+            "FILEHDR file;",
+            "local int s = sizeof(file);",
+        ])
+        dom, events = self._parse(template, b"\x01\x02\x03\x04")
+        self.assertEqual(4, dom.s)
+        self.assertEqual(b"\x01\x02\x03\x04", dom.file._pfp__build())
+        self.assertIn(("leaf", "file.r2.b", 3, 4), events)
+
+    def test_mmap(self):
+        data = b"".join(struct.pack("B", 3) + b"abc" for x in range(100))
+        data_file = self._data_file(data)
+        events = list(pfp.iterparse(template=RECORDS, data_file=data_file))
+        self.assertEqual(400, len(events))
+        self.assertEqual(("leaf", "record[99].data", 397, b"abc"), events[-2])
+
+    def test_close(self):
+        data_file = self._data_file(b"\x00" * 1000)
+        events = pfp.iterparse(template=RECORDS, data_file=data_file, queue_size=1)
+        self.assertEqual(("start", "record", 0, None), next(events))
+        events.close()
+
+    def test_error(self):
+        data_file = self._data_file(b"\x01a")
+        events = pfp.iterparse(template=RECORDS + "\nuchar x[y];", data_file=data_file)
+        with self.assertRaises(pfp.errors.PfpError):
+            list(events)
+
+
+if __name__ == "__main__":
+    unittest.main()
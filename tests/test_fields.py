@@ -18,6 +18,8 @@ import pfp
 import pfp.errors
 from pfp.fields import *
 import pfp.utils
+import pfp.bitwrap
+import six
 
 import utils
 
@@ -84,5 +86,145 @@ class TestNumericFields(utils.PfpTestCase):
         )
 
 
+class TestBuildCache(unittest.TestCase):
+    def _struct(self):
+        res = Struct()
+        a = res._pfp__add_child("a", UChar())
+        b = res._pfp__add_child("b", UShort())
+        b.endian = pfp.fields.BIG_ENDIAN
+        a._pfp__set_value(1)
+        b._pfp__set_value(2)
+        return res
+
+    def test_struct_set_value(self):
+        field = self._struct()
+        self.assertEqual(b"\x01\x00\x02", field._pfp__build())
+        self.assertEqual(3, field._pfp__width())
+
+        field.b._pfp__set_value(0x0304)
+        self.assertEqual(b"\x01\x03\x04", field._pfp__build())
+
+    def test_struct_add_child(self):
+        field = self._struct()
+        self.assertEqual(3, field._pfp__width())
+        field._pfp__add_child("c", UInt())
+        self.assertEqual(7, field._pfp__width())
+        self.assertEqual(b"\x01\x00\x02\x00\x00\x00\x00", field._pfp__build())
+
+    def test_nested(self):
+        outer = Struct()
+        inner = outer._pfp__add_child("inner", self._struct())
+        self.assertEqual(b"\x01\x00\x02", outer._pfp__build())
+
+        inner.a._pfp__set_value(5)
+        self.assertEqual(b"\x05\x00\x02", outer._pfp__build())
+
+        inner.a *= 2
+        self.assertEqual(b"\x0a\x00\x02", outer._pfp__build())
+
+    def test_array_items(self):
+        outer = Struct()
+        ary = outer._pfp__add_child("ary", Array(2, Struct))
+        ary[0]._pfp__add_child("x", UChar())
+        self.assertEqual(b"\x00", outer._pfp__build())
+
+        ary[1]._pfp__add_child("y", UChar())
+        ary[1].y._pfp__set_value(7)
+        self.assertEqual(b"\x00\x07", outer._pfp__build())
+        self.assertEqual(2, outer._pfp__width())
+
+    def test_string(self):
+        outer = Struct()
+        string = outer._pfp__add_child("str", String())
+        string._pfp__set_value(b"ab")
+        self.assertEqual(3, outer._pfp__width())
+
+        string += "cd"
+        self.assertEqual(b"abcd\x00", outer._pfp__build())
+        self.assertEqual(5, outer._pfp__width())
+
+
+class TestFieldLayout(unittest.TestCase):
+    def test_numbers_have_no_dict(self):
+        parent = Struct()
+        field = parent._pfp__add_child("a", UInt())
+        field._pfp__set_value(5)
+        field._pfp__snapshot()
+        field._pfp__restore_snapshot()
+        self.assertEqual({}, vars(field))
+
+    def test_watchers_not_shared(self):
+        a = UChar()
+        b = UChar()
+        watcher = UChar()
+        a._pfp__watch(watcher)
+        self.assertEqual([watcher], a._pfp__watchers)
+        self.assertEqual((), b._pfp__watchers)
+        self.assertEqual((), UChar()._pfp__watchers)
+
+    def test_struct_collisions_not_shared(self):
+        a = Struct()
+        for name in ["x", "y", "x"]:
+            a._pfp__add_child(name, UChar())
+        self.assertEqual({"x": 2}, a._pfp__name_collisions)
+        self.assertEqual({}, Struct()._pfp__name_collisions)
+
+
+class TestRawArrays(unittest.TestCase):
+    def _array(self, data=b"\x01\x00\x02\x00\x03\x00"):
+        parent = Struct()
+        stream = pfp.bitwrap.BitwrappedStream(six.BytesIO(data), generate=False)
+        ary = parent._pfp__add_child("ary", Array(len(data) // 2, UShort, stream))
+        return parent, ary
+
+    def test_getitem(self):
+        parent, ary = self._array()
+        self.assertEqual([1, 2, 3], [PYVAL(ary[x]) for x in range(3)])
+        self.assertIs(ary[1], ary[1])
+        with self.assertRaises(IndexError):
+            ary[3]
+
+    def test_setitem(self):
+        parent, ary = self._array()
+        item = ary[1]
+        ary[1] = 0x0405
+        self.assertEqual(0x0405, item)
+        self.assertEqual(b"\x01\x00\x05\x04\x03\x00", parent._pfp__build())
+
+        new_item = UShort()
+        new_item._pfp__set_value(7)
+        ary[1] = new_item
+        self.assertEqual(7, item)
+        self.assertEqual(b"\x01\x00\x07\x00\x03\x00", parent._pfp__build())
+
+        ary[2] += 1
+        self.assertEqual(b"\x01\x00\x07\x00\x04\x00", ary.raw_data)
+
+    def test_bulk_values(self):
+        parent, ary = self._array()
+        item = ary[2]
+        self.assertEqual([2, 3], ary._pfp__get_values(1))
+        ary._pfp__set_values([0x10000 + 5, -1], start=1)
+        self.assertEqual([1, 5, 0xFFFF], ary._pfp__get_values())
+        self.assertEqual(0xFFFF, item)
+        self.assertEqual(b"\x01\x00\x05\x00\xff\xff", parent._pfp__build())
+        with self.assertRaises(IndexError):
+            ary._pfp__set_values([1, 2], start=2)
+
+    def test_snapshot(self):
+        parent, ary = self._array()
+        ary._pfp__snapshot()
+        ary[0] = 9
+        ary._pfp__restore_snapshot()
+        self.assertEqual(1, ary[0])
+        self.assertEqual(b"\x01\x00\x02\x00\x03\x00", parent._pfp__build())
+
+    def test_string_value(self):
+        ary = Array(2, Char)
+        ary._pfp__set_value("abc")
+        self.assertEqual(b"abc", ary.raw_data)
+        self.assertEqual(ord("b"), ary[1])
+
+
 if __name__ == "__main__":
     unittest.main()
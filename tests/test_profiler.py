@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pfp
+import pfp.interp
+import pfp.profiler
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.profiler = pfp.profiler.Profiler(clock=self.clock)
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _run(self, label, seconds, *children):
+        self.profiler.enter(label)
+        self.clock.now += seconds
+        for child in children:
+            self._run(*child)
+        self.profiler.leave()
+
+    def test_nesting(self):
+        self._run("a.bt:1", 1.0, ("a.bt:2", 2.0), ("a.bt:3", 3.0, ("a.bt:2", 4.0)))
+        self.assertEqual(
+            [
+                ("a.bt:2", 2, 6.0, 6.0),
+                ("a.bt:3", 1, 7.0, 3.0),
+                ("a.bt:1", 1, 10.0, 1.0),
+            ],
+            self.profiler.flat(),
+        )
+        self.assertEqual(
+            {
+                "a.bt:1": 1.0,
+                "a.bt:1;a.bt:2": 2.0,
+                "a.bt:1;a.bt:3": 3.0,
+                "a.bt:1;a.bt:3;a.bt:2": 4.0,
+            },
+            self.profiler.stacks,
+        )
+
+    def test_recursion(self):
+        self._run("f", 1.0, ("f", 1.0, ("f", 1.0)))
+        self.assertEqual([("f", 3, 3.0, 3.0)], self.profiler.flat())
+        self.assertEqual({"f": 1.0, "f;f": 1.0, "f;f;f": 1.0}, self.profiler.stacks)
+
+    def test_write(self):
+        self._run("struct A (a.bt:1)", 0.5, ("a.bt:2", 0.25))
+        prefix = os.path.join(self.tmp_dir, "a")
+        self.profiler.write(prefix)
+
+        with open(prefix + ".flat") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[1].endswith("  struct A (a.bt:1)"))
+        self.assertEqual(["1", "0.750000", "0.500000"], lines[1].split()[:3])
+
+        with open(prefix + ".collapsed") as f:
+            self.assertEqual(
+                "struct A (a.bt:1) 500000\nstruct A (a.bt:1);a.bt:2 250000\n",
+                f.read(),
+            )
+
+    def test_interp(self):
+        profiler = pfp.profiler.Profiler()
+        interp = pfp.interp.PfpInterp(
+            parser=pfp.PARSER,
+            cpp_target=os.path.join(self.tmp_dir, "test.cpp"),
+            profiler=profiler,
+        )
+        template = "\n".join([
+            "typedef struct {",
+            "    uchar a;",
+            "    ushort b;",
+            "} HEADER;",
+            "",
+            "HEADER header;",
+            "",
+            "typedef struct {",
+            "    uchar a;",
+            "} FOOTER;",
+            "",
+            "FOOTER footer;",
+        ])
+        with self.assertRaises(SystemExit):
+            # the interpreter exits once the generator has been written
+            pfp.parse(data="", template=template, interp=interp)
+
+        labels = set(label for label, _, _, _ in profiler.flat())
+        self.assertIn("string", labels)
+        self.assertIn("string:6", labels)
+        self.assertIn("string;string:6;string:2", profiler.stacks)
+
+        # variables of the same name are told apart by their declaration
+        with open(os.path.join(self.tmp_dir, "test.cpp")) as f:
+            cpp = f.read()
+        self.assertIn(
+            'variable_sites = { { "a", "string:2" }, { "b", "string:3" }, '
+            '{ "header", "string:6" }, { "a", "string:9" }, { "footer", "string:12" } };',
+            cpp,
+        )
+        self.assertIn("GENERATE_VAR(a, 0, ", cpp)
+        self.assertIn("GENERATE_VAR(a, 3, ", cpp)
+
+
+if __name__ == "__main__":
+    unittest.main()